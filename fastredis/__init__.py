@@ -7,3 +7,15 @@ from fastredis.connections import (
     SyncConnection,
     AsyncConnection
 )
+from fastredis.pool import (
+    AsyncConnectionPool,
+    ConnectionPool
+)
+from fastredis.cluster import (
+    AsyncClusterConnection,
+    ClusterConnection
+)
+from fastredis.cache import CachedConnection
+from fastredis.instrument import CommandStats, Observer
+from fastredis.profile import Profiler, profiling
+from fastredis.wrappers_async import AutoPipeline
@@ -0,0 +1,27 @@
+"""Latency and throughput benchmarks of fastredis against other clients.
+
+A run sweeps value sizes, pipeline depths, key counts, sync and async, str
+and bytes, and TCP and unix sockets, recording p50, p99 and p999 latency
+and throughput of each case. Reports are JSON, and two of them can be
+compared to flag regressions:
+
+    python -m fastredis.benchmarks run --sizes 16,1K,1M -o new.json
+    python -m fastredis.benchmarks compare old.json new.json
+
+The same can be done from Python with sweep(), run(), save() and compare().
+redis-py and aioredis are benchmarked when they can be imported.
+"""
+
+from fastredis.benchmarks.report import (
+    Change,
+    compare,
+    load,
+    save,
+    versus
+)
+from fastredis.benchmarks.runner import (
+    Case,
+    run,
+    run_case,
+    sweep
+)
@@ -0,0 +1,168 @@
+"""Command line interface: python -m fastredis.benchmarks run|compare ..."""
+
+import argparse
+import asyncio
+import sys
+from typing import Callable, List, Sequence
+
+from fastredis.benchmarks import clients, report, runner
+
+
+_UNITS = {'': 1, 'B': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count such as 16, 4K, 1M or 16MB, in powers of 1024.
+
+    Raises:
+        * ValueError if the text is not a size
+    """
+
+    text = text.strip().upper()
+    if text.endswith('B') and len(text) > 1 and text[-2] in _UNITS:
+        text = text[:-1]
+    unit = text[-1:] if text[-1:] in _UNITS else ''
+    number = text[:len(text) - len(unit)]
+    try:
+        return int(number) * _UNITS[unit]
+    except ValueError:
+        raise ValueError(f'not a size: {text!r}') from None
+
+
+def _list(parse: Callable = str) -> Callable[[str], List]:
+    return lambda text: [parse(item) for item in text.split(',') if item]
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m fastredis.benchmarks',
+        description='Latency and throughput sweeps of redis clients.'
+    )
+    commands = parser.add_subparsers(dest='action', required=True)
+
+    run = commands.add_parser('run', help='run a sweep and save a report')
+    run.add_argument('-o', '--output', help='write a JSON report here')
+    run.add_argument('--ip', default='127.0.0.1')
+    run.add_argument('--port', type=int, default=6379)
+    run.add_argument('--path', default='/tmp/redis.sock',
+        help='unix socket of the same server')
+    run.add_argument('--libraries', type=_list(),
+        default=['fastredis', 'fastredis-protocol', 'redis-py', 'aioredis'])
+    run.add_argument('--modes', type=_list(), default=list(clients.MODES))
+    run.add_argument('--encodings', type=_list(),
+        default=list(clients.ENCODINGS))
+    run.add_argument('--transports', type=_list(),
+        default=list(clients.TRANSPORTS))
+    run.add_argument('--commands', type=_list(), default=list(runner.COMMANDS))
+    run.add_argument('--sizes', type=_list(parse_size),
+        default=[16, 1 << 10, 64 << 10, 1 << 20, 16 << 20],
+        help='value sizes, such as 16,1K,16M')
+    run.add_argument('--depths', type=_list(int), default=[1, 16, 128],
+        help='commands per pipelined batch')
+    run.add_argument('--keys', type=_list(int), default=[1, 1000],
+        help='distinct keys per case')
+    run.add_argument('--duration', type=float, default=0.5,
+        help='seconds per case')
+    run.add_argument('--min-samples', type=int, default=20)
+    run.add_argument('--max-batch-bytes', type=parse_size, default=64 << 20)
+    run.add_argument('--max-dataset-bytes', type=parse_size, default=256 << 20)
+    run.add_argument('--threshold', type=float, default=0.1,
+        help='flag fastredis when slower than another library by this much')
+    run.add_argument('--uvloop', action='store_true',
+        help='run async cases in uvloop event loops')
+
+    compare = commands.add_parser('compare',
+        help='compare two reports and flag regressions')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=0.1,
+        help='relative change counted as a regression, 0.1 is 10%%')
+    compare.add_argument('--all', action='store_true',
+        help='list every change, not only regressions')
+    return parser
+
+
+def _available(libraries: Sequence[str]) -> List[str]:
+    found = []
+    for library in libraries:
+        adapters = [
+            cls for (name, _), cls in clients.CLIENTS.items()
+            if name == library
+        ]
+        if not adapters:
+            raise SystemExit(f'unknown library: {library}')
+        if any(cls.available() for cls in adapters):
+            found.append(library)
+        else:
+            print(f'skipping {library}: it cannot be imported', file=sys.stderr)
+    return found
+
+
+def _print_versus(results: List[runner.Result], threshold: float) -> None:
+    slower = report.format_changes(report.versus(results, threshold=threshold))
+    if slower:
+        print('\nfastredis is slower than another library in:')
+        print(slower)
+
+
+def _run(args: argparse.Namespace) -> int:
+    cases = list(runner.sweep(
+        libraries=_available(args.libraries),
+        modes=args.modes,
+        encodings=args.encodings,
+        transports=args.transports,
+        commands=args.commands,
+        sizes=args.sizes,
+        depths=args.depths,
+        key_counts=args.keys,
+        max_batch_bytes=args.max_batch_bytes,
+        max_dataset_bytes=args.max_dataset_bytes
+    ))
+    loop_factory = asyncio.new_event_loop
+    if args.uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            raise SystemExit('--uvloop needs uvloop installed')
+        loop_factory = uvloop.new_event_loop
+    print(report.format_results([]))
+    progress = lambda result: print(report.format_results([result]).splitlines()[1])
+    results = runner.run(
+        cases,
+        progress=progress,
+        ip=args.ip,
+        port=args.port,
+        path=args.path,
+        duration=args.duration,
+        min_samples=args.min_samples,
+        loop_factory=loop_factory
+    )
+    if args.output:
+        report.save(args.output, results)
+    _print_versus(results, args.threshold)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = report.load(args.baseline)
+    candidate = report.load(args.candidate)
+    changes = report.compare(baseline, candidate, args.threshold)
+    print(f'{len({c.id for c in changes})} cases in both reports')
+    table = report.format_changes(changes, regressions_only=not args.all)
+    if table:
+        print(table)
+    _print_versus(candidate, args.threshold)
+    return 1 if any(c.regression for c in changes) else 0
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """Run the command line. Returns 1 if compare found a regression."""
+
+    args = _parser().parse_args(argv)
+    if args.action == 'run':
+        return _run(args)
+    return _compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
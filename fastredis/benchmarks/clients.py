@@ -0,0 +1,229 @@
+"""Adapters giving fastredis and other client libraries one interface.
+
+Each adapter opens one connection and runs a batch of commands, as a single
+command when the batch has one and as a pipeline otherwise. Batches are
+lists of argument tuples, given as str or bytes to match the encoding.
+"""
+
+import importlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+
+from fastredis.wrapper_tools import CommandArgs
+
+
+TRANSPORTS = ('tcp', 'unix')
+ENCODINGS = ('str', 'bytes')
+MODES = ('sync', 'async')
+
+
+class Client(ABC):
+    """One connection of a client library, opened for a benchmark.
+
+    `transport` is "tcp", to connect to `ip` and `port`, or "unix", to
+    connect to the socket at `path`. With the "bytes" `encoding`, replies
+    are not decoded and arguments should be bytes.
+    """
+
+    # The name of the module the library is imported from
+    module = None
+
+    def __init__(self,
+            transport: str,
+            encoding: str,
+            ip: str = '127.0.0.1',
+            port: int = 6379,
+            path: str = '/tmp/redis.sock'
+        ):
+        if transport not in TRANSPORTS:
+            raise ValueError(f'transport must be one of {TRANSPORTS}')
+        if encoding not in ENCODINGS:
+            raise ValueError(f'encoding must be one of {ENCODINGS}')
+        self.transport = transport
+        self.encoding = encoding
+        self.ip = ip
+        self.port = port
+        self.path = path
+
+    @classmethod
+    def available(cls) -> bool:
+        """True if the library can be imported."""
+
+        try:
+            importlib.import_module(cls.module)
+        # Old releases of some libraries fail with other errors than
+        # ImportError on newer Pythons, such as aioredis 2 on 3.11.
+        except Exception:
+            return False
+        return True
+
+    @abstractmethod
+    def connect(self) -> None:
+        """Open the connection. A coroutine for async clients."""
+
+    @abstractmethod
+    def execute(self, batch: List[CommandArgs]) -> list:
+        """Run the batch and return its replies. A coroutine for async clients."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Close the connection. A coroutine for async clients."""
+
+
+class FastredisClient(Client):
+    """A fastredis SyncConnection."""
+
+    module = 'fastredis'
+
+    def connect(self) -> None:
+        from fastredis import SyncConnection
+        encoding = 'utf-8' if self.encoding == 'str' else None
+        if self.transport == 'unix':
+            path = self.path if encoding else self.path.encode()
+            self.conn = SyncConnection(path=path, encoding=encoding)
+        else:
+            ip = self.ip if encoding else self.ip.encode()
+            self.conn = SyncConnection(ip, self.port, encoding=encoding)
+        self.conn.connect()
+
+    def execute(self, batch: List[CommandArgs]) -> list:
+        if len(batch) == 1:
+            return [self.conn.command_args(*batch[0])]
+        pipe = self.conn.pipeline()
+        for args in batch:
+            pipe.command_args(*args)
+        return pipe.execute()
+
+    def close(self) -> None:
+        self.conn.disconnect()
+
+
+class AsyncFastredisClient(Client):
+    """A fastredis AsyncConnection."""
+
+    module = 'fastredis'
+
+    async def connect(self) -> None:
+        from fastredis import AsyncConnection
+        encoding = 'utf-8' if self.encoding == 'str' else None
+        if self.transport == 'unix':
+            path = self.path if encoding else self.path.encode()
+            self.conn = AsyncConnection(path=path, encoding=encoding)
+        else:
+            ip = self.ip if encoding else self.ip.encode()
+            self.conn = AsyncConnection(ip, self.port, encoding=encoding)
+        await self.conn.connect()
+
+    async def execute(self, batch: List[CommandArgs]) -> list:
+        if len(batch) == 1:
+            return [await self.conn.command_args(*batch[0])]
+        pipe = self.conn.pipeline()
+        for args in batch:
+            pipe.command_args(*args)
+        return await pipe.execute()
+
+    async def close(self) -> None:
+        await self.conn.disconnect()
+
+
+class AsyncFastredisProtocolClient(AsyncFastredisClient):
+    """A fastredis AsyncConnection with the asyncio.Protocol backend."""
+
+    async def connect(self) -> None:
+        from fastredis import AsyncConnection
+        encoding = 'utf-8' if self.encoding == 'str' else None
+        if self.transport == 'unix':
+            path = self.path if encoding else self.path.encode()
+            self.conn = AsyncConnection(
+                path=path,
+                encoding=encoding,
+                backend='protocol'
+            )
+        else:
+            ip = self.ip if encoding else self.ip.encode()
+            self.conn = AsyncConnection(
+                ip,
+                self.port,
+                encoding=encoding,
+                backend='protocol'
+            )
+        await self.conn.connect()
+
+
+class RedisPyClient(Client):
+    """A redis-py Redis client, limited to one connection."""
+
+    module = 'redis'
+
+    def _kwargs(self) -> dict:
+        kwargs = {'decode_responses': self.encoding == 'str'}
+        if self.transport == 'unix':
+            kwargs['unix_socket_path'] = self.path
+        else:
+            kwargs['host'] = self.ip
+            kwargs['port'] = self.port
+        return kwargs
+
+    def connect(self) -> None:
+        import redis
+        self.conn = redis.Redis(single_connection_client=True, **self._kwargs())
+        self.conn.ping()
+
+    def execute(self, batch: List[CommandArgs]) -> list:
+        if len(batch) == 1:
+            return [self.conn.execute_command(*batch[0])]
+        pipe = self.conn.pipeline(transaction=False)
+        for args in batch:
+            pipe.execute_command(*args)
+        return pipe.execute()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class AsyncRedisPyClient(RedisPyClient):
+    """A redis.asyncio Redis client, limited to one connection."""
+
+    module = 'redis.asyncio'
+
+    async def connect(self) -> None:
+        self.conn = importlib.import_module(self.module).Redis(
+            single_connection_client=True,
+            **self._kwargs()
+        )
+        await self.conn.ping()
+
+    async def execute(self, batch: List[CommandArgs]) -> list:
+        if len(batch) == 1:
+            return [await self.conn.execute_command(*batch[0])]
+        pipe = self.conn.pipeline(transaction=False)
+        for args in batch:
+            pipe.execute_command(*args)
+        return await pipe.execute()
+
+    async def close(self) -> None:
+        close = getattr(self.conn, 'aclose', None) or self.conn.close
+        await close()
+
+
+class AioredisClient(AsyncRedisPyClient):
+    """An aioredis 2 Redis client, which has the redis.asyncio interface."""
+
+    module = 'aioredis'
+
+
+# (library, mode) -> adapter
+CLIENTS: Dict[Tuple[str, str], Type[Client]] = {
+    ('fastredis', 'sync'): FastredisClient,
+    ('fastredis', 'async'): AsyncFastredisClient,
+    ('fastredis-protocol', 'async'): AsyncFastredisProtocolClient,
+    ('redis-py', 'sync'): RedisPyClient,
+    ('redis-py', 'async'): AsyncRedisPyClient,
+    ('aioredis', 'async'): AioredisClient,
+}
+
+
+def client_class(library: str, mode: str) -> Optional[Type[Client]]:
+    """Return the adapter for a library and mode, or None if there is none."""
+
+    return CLIENTS.get((library, mode))
@@ -0,0 +1,173 @@
+"""JSON reports of benchmark runs, and comparisons between them."""
+
+import datetime
+import importlib
+import json
+import platform
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from fastredis.benchmarks.runner import Case, Result
+
+
+# Metrics compared between runs, with True where a higher value is better
+METRICS = (
+    ('p50_us', False),
+    ('p99_us', False),
+    ('p999_us', False),
+    ('ops_per_sec', True),
+)
+
+# The import name of each library, for its version
+_MODULES = {'fastredis': 'fastredis', 'redis-py': 'redis', 'aioredis': 'aioredis'}
+
+
+class Change(NamedTuple):
+    """How a metric of a case differs from a baseline.
+
+    `change` is the relative difference, candidate / baseline - 1, and
+    `regression` is True if the candidate is worse by more than the
+    threshold of the comparison.
+    """
+
+    id: str
+    metric: str
+    baseline: float
+    candidate: float
+    change: float
+    regression: bool
+
+
+def environment() -> Dict[str, object]:
+    """Describe the machine, Python and libraries a run is made with."""
+
+    versions = {}
+    for library, module in _MODULES.items():
+        try:
+            versions[library] = getattr(
+                importlib.import_module(module), '__version__', 'unknown'
+            )
+        except Exception:
+            versions[library] = None
+    return {
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': sys.version,
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'libraries': versions,
+    }
+
+
+def save(path: str, results: List[Result], meta: Optional[dict] = None) -> None:
+    """Write results to a JSON report, with environment() as its metadata."""
+
+    report = {
+        'meta': environment() if meta is None else meta,
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+
+def load(path: str) -> List[Result]:
+    """Read the results of a JSON report written by save()."""
+
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def _changes(
+        id: str,
+        baseline: Dict[str, float],
+        candidate: Dict[str, float],
+        threshold: float
+    ) -> List[Change]:
+    changes = []
+    for metric, higher_is_better in METRICS:
+        old, new = baseline[metric], candidate[metric]
+        change = new / old - 1 if old else 0.0
+        worse = -change if higher_is_better else change
+        changes.append(Change(id, metric, old, new, change, worse > threshold))
+    return changes
+
+
+def compare(
+        baseline: Sequence[Result],
+        candidate: Sequence[Result],
+        threshold: float = 0.1
+    ) -> List[Change]:
+    """Compare the metrics of the cases found in both runs.
+
+    A latency percentile that grew, or a throughput that fell, by more than
+    `threshold` (0.1 is 10%) is a regression.
+    """
+
+    old = {result['id']: result['stats'] for result in baseline}
+    changes = []
+    for result in candidate:
+        if result['id'] in old:
+            changes += _changes(
+                result['id'], old[result['id']], result['stats'], threshold
+            )
+    return changes
+
+
+def versus(
+        results: Sequence[Result],
+        library: str = 'fastredis',
+        threshold: float = 0.1
+    ) -> List[Change]:
+    """Compare the cases of `library` to the same cases of other libraries.
+
+    Each other library is the baseline of a Change, identified by the case
+    of `library` and the other library's name. A regression means `library`
+    is worse than the other library by more than `threshold`.
+    """
+
+    by_case = {Case(**result['case']): result['stats'] for result in results}
+    changes = []
+    for case, stats in by_case.items():
+        if case.library != library:
+            continue
+        for other in sorted({c.library for c in by_case} - {library}):
+            peer = by_case.get(case.peer(other))
+            if peer is not None:
+                changes += _changes(
+                    f'{case.id} vs {other}', peer, stats, threshold
+                )
+    return changes
+
+
+def format_results(results: Sequence[Result]) -> str:
+    """A table of the latency percentiles and throughput of each case."""
+
+    lines = [
+        f'{"case":64} {"p50 us":>10} {"p99 us":>10} {"p999 us":>10} '
+        f'{"ops/s":>12} {"MB/s":>9}'
+    ]
+    for result in results:
+        s = result['stats']
+        lines.append(
+            f'{result["id"]:64} {s["p50_us"]:10.1f} {s["p99_us"]:10.1f} '
+            f'{s["p999_us"]:10.1f} {s["ops_per_sec"]:12.0f} '
+            f'{s["mb_per_sec"]:9.1f}'
+        )
+    return '\n'.join(lines)
+
+
+def format_changes(changes: Sequence[Change], regressions_only: bool = True) -> str:
+    """A table of changes, flagging regressions."""
+
+    lines = []
+    for c in changes:
+        if regressions_only and not c.regression:
+            continue
+        flag = 'REGRESSION' if c.regression else ''
+        lines.append(
+            f'{c.id:80} {c.metric:12} {c.baseline:12.1f} -> '
+            f'{c.candidate:12.1f} {c.change:+8.1%} {flag}'
+        )
+    return '\n'.join(lines)
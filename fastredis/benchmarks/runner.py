@@ -0,0 +1,298 @@
+"""Sweeps of benchmark cases, and the timing loop that runs each one."""
+
+import asyncio
+import itertools
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from fastredis.benchmarks.clients import Client, client_class
+from fastredis.benchmarks.stats import summarize
+from fastredis.exceptions import FastredisError
+from fastredis.wrapper_tools import CommandArgs
+
+
+KEY_PREFIX = 'fastredis-benchmark:'
+COMMANDS = ('set', 'get')
+
+# Keys written before a GET case, or deleted after a case, per batch
+SETUP_BATCH = 1000
+
+# A case as stored in a JSON report
+Result = Dict[str, object]
+
+
+class Case(NamedTuple):
+    """One point of a sweep: what is sent, by which client, and how.
+
+    Each timed sample is one batch of `depth` `command`s, pipelined if there
+    are more than one, over `keys` distinct keys holding `size` byte values.
+    """
+
+    library: str
+    mode: str
+    encoding: str
+    transport: str
+    command: str
+    size: int
+    depth: int
+    keys: int
+
+    @property
+    def id(self) -> str:
+        """A readable name, unique within a sweep, used to match reports."""
+
+        return (
+            f'{self.library}/{self.mode}/{self.encoding}/{self.transport} '
+            f'{self.command} size={self.size} depth={self.depth} '
+            f'keys={self.keys}'
+        )
+
+    def peer(self, library: str) -> 'Case':
+        """The same case, run by another library."""
+
+        return self._replace(library=library)
+
+
+def sweep(
+        libraries: Sequence[str] = ('fastredis',),
+        modes: Sequence[str] = ('sync', 'async'),
+        encodings: Sequence[str] = ('str', 'bytes'),
+        transports: Sequence[str] = ('tcp', 'unix'),
+        commands: Sequence[str] = COMMANDS,
+        sizes: Sequence[int] = (16,),
+        depths: Sequence[int] = (1,),
+        key_counts: Sequence[int] = (1,),
+        max_batch_bytes: int = 64 << 20,
+        max_dataset_bytes: int = 256 << 20
+    ) -> Iterator[Case]:
+    """Yield every combination of the given values as a Case.
+
+    Combinations without a client, such as sync aioredis, are left out, as
+    are cases sending more than `max_batch_bytes` of values in one batch or
+    storing more than `max_dataset_bytes` in redis.
+
+    Raises:
+        * ValueError if a command is unknown, or a count is not positive
+    """
+
+    for command in commands:
+        if command not in COMMANDS:
+            raise ValueError(f'command must be one of {COMMANDS}')
+    for n in itertools.chain(sizes, depths, key_counts):
+        if n < 1:
+            raise ValueError('sizes, depths and key counts must be positive')
+    for values in itertools.product(
+            libraries, modes, encodings, transports,
+            commands, sizes, depths, key_counts
+        ):
+        case = Case(*values)
+        if client_class(case.library, case.mode) is None:
+            continue
+        if case.size * case.depth > max_batch_bytes:
+            continue
+        if case.size * case.keys > max_dataset_bytes:
+            continue
+        yield case
+
+
+def _commands(case: Case) -> List[CommandArgs]:
+    """One command per key of the case, as str or bytes to match it."""
+
+    keys = [f'{KEY_PREFIX}{i}' for i in range(case.keys)]
+    if case.command == 'set':
+        value = 'x' * case.size
+        commands = [('SET', key, value) for key in keys]
+    else:
+        commands = [('GET', key) for key in keys]
+    if case.encoding == 'bytes':
+        commands = [tuple(arg.encode() for arg in args) for args in commands]
+    return commands
+
+
+def _setup(case: Case, commands: List[CommandArgs]) -> List[List[CommandArgs]]:
+    """Batches of SETs for the keys a GET case reads, or none for a SET case."""
+
+    if case.command != 'get':
+        return []
+    value = 'x' * case.size
+    if case.encoding == 'bytes':
+        value = value.encode()
+    return _chunked([('SET', args[1], value) for args in commands])
+
+
+def _teardown(commands: List[CommandArgs]) -> List[List[CommandArgs]]:
+    """Batches of DELs for the keys of a case."""
+
+    return [
+        [('DEL', *(args[1] for args in chunk))]
+        for chunk in _chunked(commands)
+    ]
+
+
+def _chunked(commands: List[CommandArgs]) -> List[List[CommandArgs]]:
+    return [
+        commands[i:i + SETUP_BATCH]
+        for i in range(0, len(commands), SETUP_BATCH)
+    ]
+
+
+def _batch(commands: List[CommandArgs], start: int, depth: int) -> List[CommandArgs]:
+    """`depth` commands from `start`, wrapping around to the first one."""
+
+    n = len(commands)
+    return [commands[(start + i) % n] for i in range(depth)]
+
+
+def _check(case: Case, replies: list) -> None:
+    """Makes sure the client really ran the batch, before timing it."""
+
+    if len(replies) != case.depth:
+        raise FastredisError(f'{case.id}: got {len(replies)} replies')
+    if case.command == 'get':
+        reply = replies[0]
+        if reply is None or len(reply) != case.size:
+            raise FastredisError(f'{case.id}: GET returned the wrong value')
+
+
+def _run_sync(
+        case: Case,
+        client: Client,
+        duration: float,
+        min_samples: int,
+        max_samples: int,
+        warmup: int
+    ) -> List[int]:
+    commands = _commands(case)
+    samples = []
+    client.connect()
+    try:
+        for batch in _setup(case, commands):
+            client.execute(batch)
+        start = 0
+        for _ in range(max(warmup, 1)):
+            replies = client.execute(_batch(commands, start, case.depth))
+            start += case.depth
+        _check(case, replies)
+
+        deadline = time.perf_counter() + duration
+        while len(samples) < max_samples and (
+                len(samples) < min_samples or time.perf_counter() < deadline
+            ):
+            batch = _batch(commands, start, case.depth)
+            start += case.depth
+            t0 = time.perf_counter_ns()
+            client.execute(batch)
+            samples.append(time.perf_counter_ns() - t0)
+    finally:
+        try:
+            for batch in _teardown(commands):
+                client.execute(batch)
+        finally:
+            client.close()
+    return samples
+
+
+async def _run_async(
+        case: Case,
+        client: Client,
+        duration: float,
+        min_samples: int,
+        max_samples: int,
+        warmup: int
+    ) -> List[int]:
+    commands = _commands(case)
+    samples = []
+    await client.connect()
+    try:
+        for batch in _setup(case, commands):
+            await client.execute(batch)
+        start = 0
+        for _ in range(max(warmup, 1)):
+            replies = await client.execute(_batch(commands, start, case.depth))
+            start += case.depth
+        _check(case, replies)
+
+        deadline = time.perf_counter() + duration
+        while len(samples) < max_samples and (
+                len(samples) < min_samples or time.perf_counter() < deadline
+            ):
+            batch = _batch(commands, start, case.depth)
+            start += case.depth
+            t0 = time.perf_counter_ns()
+            await client.execute(batch)
+            samples.append(time.perf_counter_ns() - t0)
+    finally:
+        try:
+            for batch in _teardown(commands):
+                await client.execute(batch)
+        finally:
+            await client.close()
+    return samples
+
+
+def run_case(
+        case: Case,
+        ip: str = '127.0.0.1',
+        port: int = 6379,
+        path: str = '/tmp/redis.sock',
+        duration: float = 0.5,
+        min_samples: int = 20,
+        max_samples: int = 1_000_000,
+        warmup: int = 10,
+        loop_factory: Callable[[], asyncio.AbstractEventLoop] = asyncio.new_event_loop
+    ) -> Result:
+    """Time batches of a case for `duration` seconds on a new connection.
+
+    At least `min_samples` and at most `max_samples` batches are timed,
+    after `warmup` untimed ones. Async cases run in a new event loop from
+    `loop_factory`, such as uvloop.new_event_loop. The keys of the case are
+    deleted afterwards.
+
+    Returns a dict with the "id" of the case, its fields under "case" and
+    its summary, see stats.summarize(), under "stats".
+
+    Raises:
+        * ValueError if the case has no client
+        * Any error of the client library
+    """
+
+    cls = client_class(case.library, case.mode)
+    if cls is None:
+        raise ValueError(f'no {case.mode} client for {case.library}')
+    client = cls(case.transport, case.encoding, ip, port, path)
+    args = (case, client, duration, min_samples, max_samples, warmup)
+    if case.mode == 'async':
+        # Not asyncio.run(), which would leave no current event loop behind
+        loop = loop_factory()
+        try:
+            samples = loop.run_until_complete(_run_async(*args))
+        finally:
+            loop.close()
+    else:
+        samples = _run_sync(*args)
+    size = case.size * case.depth
+    return {
+        'id': case.id,
+        'case': case._asdict(),
+        'stats': summarize(samples, case.depth, size),
+    }
+
+
+def run(
+        cases: Sequence[Case],
+        progress: Optional[Callable[[Result], None]] = None,
+        **kwargs
+    ) -> List[Result]:
+    """Run every case with run_case() and return their results in order.
+
+    `progress` is called with each result as soon as it is ready. Keyword
+    arguments are passed to run_case().
+    """
+
+    results = []
+    for case in cases:
+        result = run_case(case, **kwargs)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return results
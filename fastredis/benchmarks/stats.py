@@ -0,0 +1,56 @@
+"""Latency percentiles and throughput of a list of timed batches."""
+
+import math
+from typing import Dict, List, Sequence
+
+
+# Reported percentiles, by the name of their field in a summary
+PERCENTILES = (('p50_us', 50.0), ('p99_us', 99.0), ('p999_us', 99.9))
+
+
+def percentile(ordered: Sequence[float], p: float) -> float:
+    """Return the `p`th percentile of sorted samples, by nearest rank.
+
+    Raises:
+        * ValueError if there are no samples or `p` is not in [0, 100]
+    """
+
+    if not ordered:
+        raise ValueError('no samples')
+    if not 0 <= p <= 100:
+        raise ValueError('p must be between 0 and 100')
+    # the tolerance keeps exact ranks, such as 99.9% of 1000 samples, from
+    # being rounded up by floating point error
+    rank = math.ceil(p * len(ordered) / 100 - 1e-9)
+    return ordered[max(rank, 1) - 1]
+
+
+def summarize(
+        samples_ns: List[int],
+        commands_per_sample: int,
+        bytes_per_sample: int
+    ) -> Dict[str, float]:
+    """Summarize the durations of timed batches, in nanoseconds.
+
+    Latencies are per batch, in microseconds. Throughput counts commands, and
+    value bytes sent or received, per second of the summed batch durations.
+
+    Raises:
+        * ValueError if there are no samples
+    """
+
+    if not samples_ns:
+        raise ValueError('no samples')
+    ordered = sorted(samples_ns)
+    total_s = sum(ordered) / 1e9
+    summary = {
+        'samples': len(ordered),
+        'mean_us': sum(ordered) / len(ordered) / 1e3,
+        'min_us': ordered[0] / 1e3,
+        'max_us': ordered[-1] / 1e3,
+    }
+    for name, p in PERCENTILES:
+        summary[name] = percentile(ordered, p) / 1e3
+    summary['ops_per_sec'] = len(ordered) * commands_per_sample / total_s
+    summary['mb_per_sec'] = len(ordered) * bytes_per_sample / total_s / 1e6
+    return summary
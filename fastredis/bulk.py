@@ -0,0 +1,169 @@
+"""Bulk commands over many keys, split into chunks and pipelined."""
+
+import asyncio
+from typing import Callable, Dict, List, Mapping, Sequence, Tuple
+
+from fastredis.exceptions import PoolExhaustedError
+from fastredis.wrapper_tools import Command, CommandArg
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Commands split into chunks, and a function that combines the replies to
+# all of them, in order, into the result.
+Plan = Tuple[List[List[Command]], Callable[[list], object]]
+
+
+def _chunks(items: Sequence, size: int) -> List[Sequence]:
+    if size < 1:
+        raise ValueError('chunk_size must be at least 1')
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def mget_plan(keys: Sequence[CommandArg], chunk_size: int) -> Plan:
+    """One MGET per chunk of keys. The result lists the values in order."""
+
+    chunks = [[('MGET', *chunk)] for chunk in _chunks(keys, chunk_size)]
+    return chunks, lambda results: [v for values in results for v in values]
+
+
+def mset_plan(mapping: Mapping[CommandArg, CommandArg], chunk_size: int) -> Plan:
+    """One MSET per chunk of key-value pairs. The result is None."""
+
+    chunks = [
+        [('MSET', *(arg for pair in chunk for arg in pair))]
+        for chunk in _chunks(list(mapping.items()), chunk_size)
+    ]
+    return chunks, lambda results: None
+
+
+def delete_many_plan(keys: Sequence[CommandArg], chunk_size: int) -> Plan:
+    """One DEL per chunk of keys. The result is the number deleted."""
+
+    chunks = [[('DEL', *chunk)] for chunk in _chunks(keys, chunk_size)]
+    return chunks, sum
+
+
+def _hashes(results: list) -> List[Dict]:
+    hashes = []
+    for fields in results:
+        it = iter(fields)
+        hashes.append(dict(zip(it, it)))
+    return hashes
+
+
+def hgetall_many_plan(keys: Sequence[CommandArg], chunk_size: int) -> Plan:
+    """One HGETALL per key, chunked. The result lists the hashes as dicts."""
+
+    chunks = [
+        [('HGETALL', key) for key in chunk]
+        for chunk in _chunks(keys, chunk_size)
+    ]
+    return chunks, _hashes
+
+
+def _flatten(chunks: List[List[Command]]) -> List[Command]:
+    return [command for chunk in chunks for command in chunk]
+
+
+def _split(chunks: List[List[Command]], n: int) -> List[List[Command]]:
+    """Splits the chunks into at most `n` runs of whole, consecutive chunks."""
+
+    per = -(-len(chunks) // n)
+    return [_flatten(chunks[i:i + per]) for i in range(0, len(chunks), per)]
+
+
+def _raise_first(results: list) -> None:
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+def run(connection, chunks: List[List[Command]], combine: Callable):
+    """Sends every chunk in a single pipeline on a SyncConnection."""
+
+    commands = _flatten(chunks)
+    if not commands:
+        return combine([])
+    return combine(
+        connection._redis_pipeline(connection.context, commands, True)
+    )
+
+
+def run_pool(pool, chunks: List[List[Command]], combine: Callable):
+    """Spreads the chunks over as many connections of a ConnectionPool as
+    can be had without waiting, up to one per chunk.
+
+    All commands are written to every connection before any reply is read,
+    so the connections are busy at the same time.
+    """
+
+    if not chunks:
+        return combine([])
+    conns = [pool.acquire()]
+    unread = set()
+    try:
+        while len(conns) < len(chunks):
+            try:
+                conns.append(pool.acquire(block=False))
+            except PoolExhaustedError:
+                break
+        runs = list(zip(conns, _split(chunks, len(conns))))
+        for conn, commands in runs:
+            conn._redis_write_many(conn.context, commands)
+            unread.add(conn)
+            conn._redis_flush(conn.context)
+        results = []
+        for conn, commands in runs:
+            results += conn._redis_read_many(conn.context, len(commands), False)
+            unread.discard(conn)
+    finally:
+        for conn in conns:
+            if conn in unread:
+                # replies are still pending, so it cannot be reused
+                conn.disconnect()
+            pool.release(conn)
+    _raise_first(results)
+    return combine(results)
+
+
+async def run_async(connection, chunks: List[List[Command]], combine: Callable):
+    """Sends every chunk in a single pipeline on an AsyncConnection."""
+
+    commands = _flatten(chunks)
+    if not commands:
+        return combine([])
+    return combine(await connection._redis_pipeline(
+        connection.context,
+        commands,
+        True,
+        connection.replies
+    ))
+
+
+async def run_async_pool(pool, chunks: List[List[Command]], combine: Callable):
+    """Spreads the chunks over the open connections of an AsyncConnectionPool.
+
+    Each run of chunks is sent as one pipeline on the connection with the
+    fewest replies pending at the time, and all runs are awaited together.
+    """
+
+    if not chunks:
+        return combine([])
+
+    async def run_one(commands: List[Command]) -> list:
+        conn = pool.connection()
+        return await conn._redis_pipeline(
+            conn.context,
+            commands,
+            False,
+            conn.replies
+        )
+
+    parts = await asyncio.gather(*(
+        run_one(commands)
+        for commands in _split(chunks, max(1, pool.size))
+    ))
+    results = [result for part in parts for result in part]
+    _raise_first(results)
+    return combine(results)
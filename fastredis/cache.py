@@ -0,0 +1,371 @@
+"""Client-side caching with server-assisted invalidation."""
+
+import os
+import select
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from fastredis.connections import SyncConnection, SyncConnectionBytes
+from fastredis.exceptions import ContextError, FastredisError
+from fastredis.wrapper_tools import Command, CommandArg, ReplyValue
+
+
+# Read-only commands whose reply depends only on the key in the first argument.
+CACHED_COMMANDS = frozenset((
+    'GET', 'GETRANGE', 'STRLEN',
+    'HGET', 'HMGET', 'HGETALL', 'HEXISTS', 'HLEN', 'HKEYS', 'HVALS',
+    'LRANGE', 'LINDEX', 'LLEN',
+    'SMEMBERS', 'SISMEMBER', 'SCARD',
+    'ZRANGE', 'ZSCORE', 'ZCARD',
+))
+
+INVALIDATE_CHANNEL = '__redis__:invalidate'
+
+_MISS = object()
+_MESSAGE = ('message', b'message')
+_FLUSH_COMMANDS = frozenset(('FLUSHDB', 'FLUSHALL'))
+
+
+def _sizeof(value) -> int:
+    """Approximate payload size of a reply value or command, in bytes."""
+
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(_sizeof(item) for item in value) + 8
+    return 8
+
+
+class LRUCache:
+    """Reply values by command, bounded by entry count and approximate size.
+
+    Entries are indexed by key so that all cached replies for a key, such as
+    several HGET fields, are dropped together by invalidate(). The size of an
+    entry is the length of its command arguments and reply strings, so
+    `max_bytes` bounds the payload rather than the exact memory used.
+
+    Not thread-safe. `hits`, `misses`, `evictions` and `invalidations` count
+    lookups, entries dropped to stay within bounds and entries dropped by
+    invalidate().
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 << 20):
+        if max_entries < 1:
+            raise ValueError('max_entries must be at least 1')
+        if max_bytes < 1:
+            raise ValueError('max_bytes must be at least 1')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # command -> (value, size, key), least recently used first
+        self.entries: OrderedDict = OrderedDict()
+        # key -> commands cached for it
+        self.keys: Dict[object, Set[Tuple]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, command: Tuple, default=None):
+        """Return the cached reply for `command` and mark it recently used."""
+
+        entry = self.entries.get(command)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(command)
+        return entry[0]
+
+    def put(self, command: Tuple, key, value) -> None:
+        """Cache `value` as the reply to `command`, which reads `key`.
+
+        Least recently used entries are evicted to make room. A value larger
+        than `max_bytes` on its own is not cached.
+        """
+
+        size = _sizeof(command) + _sizeof(value)
+        if size > self.max_bytes:
+            return
+        self._remove(command)
+        self.entries[command] = (value, size, key)
+        self.keys.setdefault(key, set()).add(command)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, command: Tuple) -> None:
+        entry = self.entries.pop(command, None)
+        if entry is None:
+            return
+        _, size, key = entry
+        self.bytes -= size
+        commands = self.keys[key]
+        commands.discard(command)
+        if not commands:
+            del self.keys[key]
+
+    def invalidate(self, key) -> None:
+        """Drop every entry for `key`."""
+
+        commands = self.keys.pop(key, None)
+        if commands is None:
+            return
+        for command in commands:
+            self.bytes -= self.entries.pop(command)[1]
+        self.invalidations += len(commands)
+
+    def clear(self) -> None:
+        """Drop every entry. Counters are kept."""
+
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+        self.keys.clear()
+        self.bytes = 0
+
+
+class CachedConnection:
+    """Synchronous connection that caches replies to repeated reads.
+
+    Replies to the read commands in `commands` (CACHED_COMMANDS by default)
+    are kept in an LRUCache, so repeating a read returns without touching the
+    socket. Other commands are sent as usual. Positional and keyword
+    arguments, including `encoding`, are passed to SyncConnection():
+
+        with CachedConnection('127.0.0.1', max_entries=100000) as conn:
+            conn.command_args('GET', key)   # round trip
+            conn.command_args('GET', key)   # from the cache
+
+    The cache is kept coherent by the server. connect() opens a second
+    connection, subscribes it to the invalidation channel and turns on
+    CLIENT TRACKING with REDIRECT to it. Whenever a key this connection read
+    is modified, by any client, the server publishes the key and a background
+    thread drops it from the cache. Keys written through this connection are
+    also dropped at once, so it always reads its own writes.
+
+    If either connection is lost, the cache is cleared and every command
+    goes to the server until connect() is called again; `error` holds the
+    exception. Like SyncConnection, a CachedConnection must only be
+    used by one thread at a time.
+    """
+
+    def __init__(self,
+            *args,
+            max_entries: int = 10000,
+            max_bytes: int = 64 << 20,
+            commands=CACHED_COMMANDS,
+            **kwargs
+        ):
+        self.connection = SyncConnection(*args, **kwargs)
+        self.cache = LRUCache(max_entries, max_bytes)
+        self.commands = frozenset(name.upper() for name in commands)
+        self.error: Optional[Exception] = None
+
+        self._invalidation = SyncConnection(*args, **kwargs)
+        self._bytes = isinstance(self.connection, SyncConnectionBytes)
+        self._lock = threading.Lock()
+        # keys being read from the server, dropped again if invalidated
+        self._filling: Set[object] = set()
+        self._reader: Optional[threading.Thread] = None
+        self._wakeup = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
+
+    @property
+    def usable(self) -> bool:
+        """False if not connected, or if the connection has hit an error."""
+
+        return self.connection.usable
+
+    @property
+    def tracking(self) -> bool:
+        """True while replies are served from the cache."""
+
+        return self._reader is not None and self.error is None
+
+    def connect(self) -> None:
+        """Connect both connections and turn on invalidation tracking.
+
+        If already connected, disconnect first. The cache starts empty.
+
+        Raises:
+            * ContextError (any type) if either connection cannot be made
+            * ReplyError if the server does not support CLIENT TRACKING
+        """
+
+        self.disconnect()
+        try:
+            invalidation = self._invalidation
+            invalidation.connect()
+            client_id = invalidation.command_args('CLIENT', 'ID')
+            invalidation.command_args('SUBSCRIBE', INVALIDATE_CHANNEL)
+            self.connection.connect()
+            self.connection.command_args(
+                'CLIENT', 'TRACKING', 'ON', 'REDIRECT', client_id
+            )
+        except BaseException:
+            self.disconnect()
+            raise
+
+        self.error = None
+        self._wakeup = os.pipe()
+        self._reader = threading.Thread(
+            target=self._read_invalidations,
+            args=(invalidation.context, self._wakeup[0]),
+            name='fastredis-invalidation',
+            daemon=True
+        )
+        self._reader.start()
+
+    def disconnect(self) -> None:
+        """Stop the invalidation thread and disconnect both connections.
+
+        This call is idempotent.
+        """
+
+        if self._reader is not None:
+            os.write(self._wakeup[1], b'x')
+            self._reader.join()
+            self._reader = None
+            for fd in self._wakeup:
+                os.close(fd)
+            self._wakeup = None
+        self._invalidation.disconnect()
+        self.connection.disconnect()
+        with self._lock:
+            self.cache.clear()
+            self._filling.clear()
+
+    def _read_invalidations(self, context, wakeup: int) -> None:
+        """Background thread: drops invalidated keys until woken up."""
+
+        read_available = self._invalidation._redis_read_available
+        fds = [context.fd, wakeup]
+        try:
+            while True:
+                readable = select.select(fds, [], [])[0]
+                if wakeup in readable:
+                    return
+                for reply in read_available(context):
+                    if type(reply) is tuple and reply[0] in _MESSAGE:
+                        self._invalidate(reply[2])
+        except (FastredisError, OSError) as e:
+            self._lost(e)
+
+    def _invalidate(self, keys) -> None:
+        with self._lock:
+            if keys is None:
+                # FLUSHDB, FLUSHALL, or the server dropped its tracking table
+                self.cache.clear()
+                self._filling.clear()
+                return
+            for key in keys:
+                self.cache.invalidate(key)
+                self._filling.discard(key)
+
+    def _lost(self, error: Exception) -> None:
+        with self._lock:
+            self.error = error
+            self.cache.clear()
+            self._filling.clear()
+
+    def _key(self, arg: CommandArg):
+        """Returns `arg` as the server names it in invalidation messages."""
+
+        if isinstance(arg, (bytearray, memoryview)):
+            arg = bytes(arg)
+        if self._bytes:
+            if isinstance(arg, bytes):
+                return arg
+            if isinstance(arg, str):
+                return arg.encode('utf-8', 'surrogateescape')
+            return str(arg).encode()
+        if isinstance(arg, str):
+            return arg
+        if isinstance(arg, bytes):
+            return arg.decode('utf-8', 'surrogateescape')
+        return str(arg)
+
+    def command(self, command: Command, deadline: float = None) -> ReplyValue:
+        """Like SyncConnection.command(), served from the cache if possible.
+
+        A format string is split on whitespace into arguments, as hiredis
+        does, and handled by command_args().
+        """
+
+        return self.command_args(*command.split(), deadline=deadline)
+
+    def command_args(
+            self,
+            *args: CommandArg,
+            deadline: float = None
+        ) -> ReplyValue:
+        """Like SyncConnection.command_args(), served from the cache if possible.
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if the server replies with an error
+                * ContextError if there are connection issues
+            * FastredisError if invalid response types
+        """
+
+        name = args[0]
+        if not isinstance(name, str):
+            name = bytes(name).decode()
+        name = name.upper()
+        if name in self.commands and len(args) > 1 and self.error is None:
+            return self._cached(args, deadline)
+
+        with self._lock:
+            if name in _FLUSH_COMMANDS:
+                self.cache.clear()
+            elif self.cache.keys:
+                for arg in args[1:]:
+                    self.cache.invalidate(self._key(arg))
+        return self._send(args, deadline)
+
+    def _send(self, args: Tuple, deadline: Optional[float]) -> ReplyValue:
+        try:
+            return self.connection.command_args(*args, deadline=deadline)
+        except ContextError as e:
+            # The server stops tracking reads made on a lost connection.
+            self._lost(e)
+            raise
+
+    def _cached(self, args: Tuple, deadline: Optional[float]) -> ReplyValue:
+        key = self._key(args[1])
+        command = args
+        if any(isinstance(arg, (bytearray, memoryview)) for arg in args):
+            # hashable, and not changed by the caller while cached
+            command = tuple(
+                bytes(arg) if isinstance(arg, (bytearray, memoryview)) else arg
+                for arg in args
+            )
+        with self._lock:
+            value = self.cache.get(command, _MISS)
+            if value is not _MISS:
+                return value
+            self._filling.add(key)
+        try:
+            value = self._send(args, deadline)
+        except BaseException:
+            with self._lock:
+                self._filling.discard(key)
+            raise
+        with self._lock:
+            # Not cached if the key was invalidated while the reply was read.
+            if key in self._filling:
+                self._filling.discard(key)
+                self.cache.put(command, key, value)
+        return value
@@ -0,0 +1,662 @@
+"""Clients for Redis Cluster."""
+
+import asyncio
+import random
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from fastredis.connections import AsyncConnection, SyncConnection
+from fastredis.exceptions import ContextError, FastredisError, ReplyError
+import fastredis.hiredis as hiredis
+from fastredis.wrapper_tools import CommandArg, CommandArgs, ReplyValue
+
+
+SLOT_COUNT = 16384
+
+# (host, port) of a node, with host as str or bytes to match the encoding
+Node = Tuple[Union[str, bytes], int]
+
+
+def key_slot(key: CommandArg) -> int:
+    """Return the cluster hash slot of a str, bytes or int key.
+
+    This is CRC16 of the key modulo 16384. If the key contains a non-empty
+    hash tag, such as the `user1` in `{user1}.name`, only the tag is hashed,
+    so keys with the same tag are stored on the same node.
+    """
+
+    return hiredis.redisKeySlot(key)
+
+
+def command_key(args: CommandArgs) -> Optional[CommandArg]:
+    """Return the key a command is routed by: its first argument, if any."""
+
+    return args[1] if len(args) > 1 else None
+
+
+class _ClusterBase:
+    """Slot map and redirect handling shared by the sync and async clients."""
+
+    def __init__(self,
+            startup_nodes: Sequence[Node],
+            encoding: Optional[str] = 'utf-8',
+            max_redirects: int = 5,
+            **kwargs
+        ):
+        if not startup_nodes:
+            raise ValueError('at least one startup node is required')
+        if max_redirects < 0:
+            raise ValueError('max_redirects must be nonnegative')
+        self.startup_nodes = [tuple(node) for node in startup_nodes]
+        self.encoding = encoding
+        self.max_redirects = max_redirects
+        self.kwargs = kwargs
+
+        self.slots: List[Optional[Node]] = [None] * SLOT_COUNT
+        self.nodes: Dict[Node, object] = {}
+        self.stale = True
+
+    def _load_slots(self, reply: ReplyValue, queried: Node) -> None:
+        """Rebuilds the slot map from a CLUSTER SLOTS reply."""
+
+        slots = [None] * SLOT_COUNT
+        for start, end, master, *replicas in reply:
+            host = master[0] or queried[0]
+            node = (host, master[1])
+            slots[start:end + 1] = [node] * (end - start + 1)
+        self.slots = slots
+        self.stale = False
+
+    def _known_nodes(self) -> List[Node]:
+        """Nodes to ask for the slot map, connected ones first."""
+
+        nodes = list(self.nodes)
+        nodes += [node for node in self.startup_nodes if node not in self.nodes]
+        return nodes
+
+    def _node_for(self, key: Optional[CommandArg]) -> Node:
+        if key is None:
+            if self.nodes:
+                return next(iter(self.nodes))
+            return random.choice(self.startup_nodes)
+        node = self.slots[hiredis.redisKeySlot(key)]
+        if node is None:
+            raise FastredisError(f'No node serves the slot of key {key!r}')
+        return node
+
+    def _redirect(
+            self,
+            error: Exception,
+            node: Node
+        ) -> Optional[Tuple[bool, Node]]:
+        """Parses a MOVED or ASK error into (is ASK, node to send to).
+
+        MOVED also updates the slot map and marks it stale, so it is reloaded
+        before the next command. Returns None for any other error.
+        """
+
+        if not isinstance(error, ReplyError):
+            return None
+        message = str(error)
+        if not (message.startswith('MOVED ') or message.startswith('ASK ')):
+            return None
+        kind, slot, address = message.split(' ', 2)
+        host, _, port = address.rpartition(':')
+        if not host:
+            new_node = (node[0], int(port))
+        elif self.encoding is None:
+            new_node = (host.encode(), int(port))
+        else:
+            new_node = (host, int(port))
+        if kind == 'MOVED':
+            self.slots[int(slot)] = new_node
+            self.stale = True
+            return False, new_node
+        return True, new_node
+
+    def _group(
+            self,
+            commands: List[Tuple[CommandArgs, Optional[CommandArg]]]
+        ) -> Dict[Node, List[int]]:
+        """Groups command indices by the node that serves their keys."""
+
+        groups: Dict[Node, List[int]] = {}
+        for i, (args, key) in enumerate(commands):
+            node = self._node_for(key)
+            group = groups.get(node)
+            if group is None:
+                groups[node] = [i]
+            else:
+                group.append(i)
+        return groups
+
+
+class ClusterConnection(_ClusterBase):
+    """Synchronous client for a Redis Cluster.
+
+    The slot map is loaded with CLUSTER SLOTS from the first reachable
+    startup node, and one SyncConnection is opened per node on first use.
+    Keyword arguments such as `connect_timeout` and `command_timeout` are
+    passed to SyncConnection(). With `encoding` None, hosts in
+    `startup_nodes` are bytes and replies are bytes:
+
+        with ClusterConnection([('127.0.0.1', 7000)]) as cluster:
+            cluster.command_args('SET', 'key', 'value')
+
+    Commands are routed by the slot of their first argument, or of `key` if
+    given. MOVED replies update the slot map and are followed, and the whole
+    map is reloaded before the next command. ASK replies are followed with
+    ASKING for that command only. At most `max_redirects` redirects are
+    followed per command.
+
+    Not thread safe.
+    """
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
+
+    def connect(self) -> None:
+        """Load the slot map. Raises the last ContextError if no node answers."""
+
+        self.refresh()
+
+    def disconnect(self) -> None:
+        """Disconnect from all nodes. This call is idempotent."""
+
+        nodes = self.nodes
+        self.nodes = {}
+        for conn in nodes.values():
+            conn.disconnect()
+        self.stale = True
+
+    def connection(self, node: Node) -> SyncConnection:
+        """Return the connection to `node`, connecting if needed."""
+
+        conn = self.nodes.get(node)
+        if conn is None:
+            conn = SyncConnection(
+                node[0],
+                node[1],
+                encoding=self.encoding,
+                **self.kwargs
+            )
+            conn.connect()
+            self.nodes[node] = conn
+        return conn
+
+    def _drop(self, node: Node) -> None:
+        conn = self.nodes.pop(node, None)
+        if conn is not None:
+            conn.disconnect()
+        self.stale = True
+
+    def refresh(self) -> None:
+        """Reload the slot map from any node that answers."""
+
+        error = None
+        for node in self._known_nodes():
+            try:
+                reply = self.connection(node).command_args('CLUSTER', 'SLOTS')
+            except ContextError as e:
+                self._drop(node)
+                error = e
+                continue
+            self._load_slots(reply, node)
+            return
+        raise error
+
+    def command(self, command: str) -> ReplyValue:
+        """Send a command given as a format string, routed by its first argument.
+
+        See SyncConnection.command().
+        """
+
+        parts = command.split(None, 2)
+        key = parts[1] if len(parts) > 1 else None
+        return self._execute(command, key, None)
+
+    def command_args(
+            self,
+            *args: CommandArg,
+            key: Optional[CommandArg] = None
+        ) -> ReplyValue:
+        """Send a command given as separate arguments and retrieve the reply.
+
+        The command is routed by `key`, which defaults to the first argument
+        after the command name. Pass it for commands such as EVAL whose key
+        comes later. Commands without arguments go to any node.
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if the server replies with an error
+                * ContextError if there are connection issues
+            * FastredisError if too many redirects, or if no node serves the
+              slot
+        """
+
+        if key is None:
+            key = command_key(args)
+        return self._execute(args, key, None)
+
+    def _execute(
+            self,
+            command,
+            key: Optional[CommandArg],
+            redirect: Optional[Tuple[bool, Node]]
+        ) -> ReplyValue:
+        """Runs one command, following redirects.
+
+        `redirect` is a redirect already received for this command, if any.
+        """
+
+        for _ in range(self.max_redirects + 1):
+            if redirect is None:
+                if self.stale:
+                    self.refresh()
+                asking, node = False, self._node_for(key)
+            else:
+                asking, node = redirect
+            conn = self.connection(node)
+            try:
+                if asking:
+                    reply = conn._redis_pipeline(
+                        conn.context,
+                        (('ASKING',), command),
+                        False
+                    )[1]
+                    if isinstance(reply, Exception):
+                        raise reply
+                    return reply
+                if isinstance(command, (str, bytes)):
+                    return conn.command(command)
+                return conn.command_args(*command)
+            except ReplyError as e:
+                redirect = self._redirect(e, node)
+                if redirect is None:
+                    raise
+            except ContextError:
+                self._drop(node)
+                raise
+        raise FastredisError('Too many cluster redirects')
+
+    def pipeline(self, raise_on_error: bool = True) -> 'ClusterPipeline':
+        """Create a pipeline that sends commands to all nodes at once.
+
+        See ClusterPipeline for details.
+        """
+
+        return ClusterPipeline(self, raise_on_error=raise_on_error)
+
+
+class ClusterPipeline:
+    """Queues commands, split by node and sent to all nodes in parallel.
+
+    On execute(), each node's commands are written to its connection and
+    flushed before any replies are read, so every node works on its batch
+    at the same time. Commands answered with MOVED or ASK are then retried
+    one by one. Results are returned in the order the commands were queued:
+
+        with cluster.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('GET', key)
+            values = pipe.execute()
+    """
+
+    def __init__(self, cluster: ClusterConnection, raise_on_error: bool = True):
+        self.cluster = cluster
+        self.raise_on_error = raise_on_error
+        self.commands: List[Tuple[CommandArgs, Optional[CommandArg]]] = []
+        self.results: List[Union[ReplyValue, ReplyError]] = None
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self.commands:
+            self.execute()
+        else:
+            self.reset()
+
+    def command_args(
+            self,
+            *args: CommandArg,
+            key: Optional[CommandArg] = None
+        ) -> 'ClusterPipeline':
+        """Queue a command, given as for ClusterConnection.command_args()."""
+
+        if key is None:
+            key = command_key(args)
+        self.commands.append((args, key))
+        return self
+
+    def reset(self) -> None:
+        """Discard all queued commands."""
+
+        self.commands = []
+
+    def execute(
+            self,
+            raise_on_error: bool = None
+        ) -> List[Union[ReplyValue, ReplyError]]:
+        """Send all queued commands and return their replies in order.
+
+        See Pipeline.execute().
+        """
+
+        if raise_on_error is None:
+            raise_on_error = self.raise_on_error
+        commands = self.commands
+        self.commands = []
+        cluster = self.cluster
+        results = [None] * len(commands)
+
+        if cluster.stale:
+            cluster.refresh()
+        groups = cluster._group(commands)
+        unread = {}
+        try:
+            for node, indices in groups.items():
+                conn = cluster.connection(node)
+                unread[node] = conn
+                conn._redis_write_many(
+                    conn.context,
+                    [commands[i][0] for i in indices]
+                )
+                conn._redis_flush(conn.context)
+            for node, indices in groups.items():
+                conn = unread[node]
+                replies = conn._redis_read_many(conn.context, len(indices), False)
+                del unread[node]
+                for i, reply in zip(indices, replies):
+                    results[i] = reply
+        except BaseException:
+            # their replies would be read by the next commands
+            for node in unread:
+                cluster._drop(node)
+            raise
+
+        self._follow_redirects(commands, results)
+        self.results = results
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def _follow_redirects(
+            self,
+            commands: List[Tuple[CommandArgs, Optional[CommandArg]]],
+            results: List[Union[ReplyValue, ReplyError]]
+        ) -> None:
+        cluster = self.cluster
+
+        for i, result in enumerate(results):
+            if not isinstance(result, ReplyError):
+                continue
+            redirect = cluster._redirect(result, cluster._node_for(commands[i][1]))
+            if redirect is None:
+                continue
+            args, key = commands[i]
+            try:
+                results[i] = cluster._execute(args, key, redirect)
+            except ReplyError as e:
+                results[i] = e
+
+
+class AsyncClusterConnection(_ClusterBase):
+    """Asynchronous client for a Redis Cluster.
+
+    The asynchronous version of ClusterConnection, with one AsyncConnection
+    per node. Keyword arguments such as `connect_timeout` are passed to
+    AsyncConnection().
+    """
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.disconnect()
+
+    async def connect(self) -> None:
+        """Load the slot map. Raises the last error if no node answers."""
+
+        await self.refresh()
+
+    async def disconnect(self) -> None:
+        """Disconnect from all nodes. This call is idempotent."""
+
+        nodes = self.nodes
+        self.nodes = {}
+        await asyncio.gather(*(conn.disconnect() for conn in nodes.values()))
+        self.stale = True
+
+    async def connection(self, node: Node) -> AsyncConnection:
+        """Return the connection to `node`, connecting if needed."""
+
+        conn = self.nodes.get(node)
+        if conn is None:
+            conn = AsyncConnection(
+                node[0],
+                node[1],
+                encoding=self.encoding,
+                **self.kwargs
+            )
+            await conn.connect()
+            # another coroutine may have connected meanwhile
+            if node in self.nodes:
+                await conn.disconnect()
+                return self.nodes[node]
+            self.nodes[node] = conn
+        return conn
+
+    async def _drop(self, node: Node) -> None:
+        conn = self.nodes.pop(node, None)
+        if conn is not None:
+            if conn.disconnected.done():
+                # hiredis frees the context itself when the server closes it
+                if not conn.disconnected.cancelled():
+                    conn.disconnected.exception()
+                conn.context = None
+            else:
+                await conn.disconnect(timeout=0)
+        self.stale = True
+
+    async def refresh(self) -> None:
+        """Reload the slot map from any node that answers."""
+
+        error = None
+        for node in self._known_nodes():
+            try:
+                conn = await self.connection(node)
+                reply = await conn.command_args('CLUSTER', 'SLOTS')
+            except ReplyError:
+                raise
+            except FastredisError as e:
+                # ContextError, or a connect timeout
+                await self._drop(node)
+                error = e
+                continue
+            self._load_slots(reply, node)
+            return
+        raise error
+
+    async def command(self, command: str) -> ReplyValue:
+        """Send a command given as a format string. See ClusterConnection."""
+
+        parts = command.split(None, 2)
+        key = parts[1] if len(parts) > 1 else None
+        return await self._execute(command, key, None)
+
+    async def command_args(
+            self,
+            *args: CommandArg,
+            key: Optional[CommandArg] = None
+        ) -> ReplyValue:
+        """Send a command given as separate arguments and retrieve the reply.
+
+        See ClusterConnection.command_args().
+        """
+
+        if key is None:
+            key = command_key(args)
+        return await self._execute(args, key, None)
+
+    async def _execute(
+            self,
+            command,
+            key: Optional[CommandArg],
+            redirect: Optional[Tuple[bool, Node]]
+        ) -> ReplyValue:
+        """See ClusterConnection._execute()."""
+
+        for _ in range(self.max_redirects + 1):
+            if redirect is None:
+                if self.stale:
+                    await self.refresh()
+                asking, node = False, self._node_for(key)
+            else:
+                asking, node = redirect
+            conn = await self.connection(node)
+            try:
+                if asking:
+                    reply = (await conn._redis_pipeline(
+                        conn.context,
+                        (('ASKING',), command),
+                        False,
+                        conn.replies
+                    ))[1]
+                    if isinstance(reply, Exception):
+                        raise reply
+                    return reply
+                if isinstance(command, (str, bytes)):
+                    return await conn.command(command)
+                return await conn.command_args(*command)
+            except ReplyError as e:
+                redirect = self._redirect(e, node)
+                if redirect is None:
+                    raise
+            except ContextError:
+                await self._drop(node)
+                raise
+        raise FastredisError('Too many cluster redirects')
+
+    def pipeline(self, raise_on_error: bool = True) -> 'AsyncClusterPipeline':
+        """Create a pipeline that sends commands to all nodes at once.
+
+        See AsyncClusterPipeline for details.
+        """
+
+        return AsyncClusterPipeline(self, raise_on_error=raise_on_error)
+
+
+class AsyncClusterPipeline:
+    """The asynchronous version of ClusterPipeline.
+
+    Each node's batch is sent as an AsyncConnection pipeline, and all of
+    them are awaited together.
+    """
+
+    def __init__(
+            self,
+            cluster: AsyncClusterConnection,
+            raise_on_error: bool = True
+        ):
+        self.cluster = cluster
+        self.raise_on_error = raise_on_error
+        self.commands: List[Tuple[CommandArgs, Optional[CommandArg]]] = []
+        self.results: List[Union[ReplyValue, ReplyError]] = None
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self.commands:
+            await self.execute()
+        else:
+            self.reset()
+
+    def command_args(
+            self,
+            *args: CommandArg,
+            key: Optional[CommandArg] = None
+        ) -> 'AsyncClusterPipeline':
+        """Queue a command, given as for ClusterConnection.command_args()."""
+
+        if key is None:
+            key = command_key(args)
+        self.commands.append((args, key))
+        return self
+
+    def reset(self) -> None:
+        """Discard all queued commands."""
+
+        self.commands = []
+
+    async def _send(self, node: Node, commands: List[CommandArgs]):
+        conn = await self.cluster.connection(node)
+        try:
+            return await conn._redis_pipeline(
+                conn.context,
+                commands,
+                False,
+                conn.replies
+            )
+        except ContextError:
+            await self.cluster._drop(node)
+            raise
+
+    async def execute(
+            self,
+            raise_on_error: bool = None
+        ) -> List[Union[ReplyValue, ReplyError]]:
+        """Send all queued commands and return their replies in order.
+
+        See Pipeline.execute().
+        """
+
+        if raise_on_error is None:
+            raise_on_error = self.raise_on_error
+        commands = self.commands
+        self.commands = []
+        cluster = self.cluster
+        results = [None] * len(commands)
+
+        if cluster.stale:
+            await cluster.refresh()
+        groups = cluster._group(commands)
+        batches = await asyncio.gather(*(
+            self._send(node, [commands[i][0] for i in indices])
+            for node, indices in groups.items()
+        ))
+        for indices, replies in zip(groups.values(), batches):
+            for i, reply in zip(indices, replies):
+                results[i] = reply
+
+        for i, result in enumerate(results):
+            if not isinstance(result, ReplyError):
+                continue
+            redirect = cluster._redirect(result, cluster._node_for(commands[i][1]))
+            if redirect is None:
+                continue
+            args, key = commands[i]
+            try:
+                results[i] = await cluster._execute(args, key, redirect)
+            except ReplyError as e:
+                results[i] = e
+
+        self.results = results
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
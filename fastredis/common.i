@@ -0,0 +1,977 @@
+/* Helpers shared by the hiredis and hiredisb SWIG mappings.
+
+This file is %include'd by both hiredis.i and hiredisb.i, so everything here is
+compiled once into each extension module.
+*/
+
+%{
+
+/* Argument vector for the *Argv family of hiredis functions, converted from a
+python sequence of str, bytes, int or other objects supporting the buffer
+protocol, such as memoryview, bytearray or mmap.
+
+`keep` holds a reference to the sequence so the str and bytes buffers pointed
+to by `argv` stay alive. `temps` holds the encoded forms of int arguments.
+`views` holds the `nviews` buffers exported by other objects, which are
+released when the argument vector is freed. hiredis copies the arguments when
+a command is formatted, so none of them need to outlive that call.
+*/
+typedef struct {
+    int argc;
+    const char** argv;
+    size_t* argvlen;
+    PyObject* keep;
+    PyObject* temps;
+    Py_buffer* views;
+    int nviews;
+} fr_argv;
+
+static void fr_argv_free(fr_argv* args) {
+    int i;
+    for (i = 0; i < args->nviews; i++) {
+        PyBuffer_Release(&args->views[i]);
+    }
+    PyMem_Free(args->views);
+    PyMem_Free((void*)args->argv);
+    PyMem_Free(args->argvlen);
+    Py_XDECREF(args->keep);
+    Py_XDECREF(args->temps);
+    args->argv = NULL;
+    args->argvlen = NULL;
+    args->keep = NULL;
+    args->temps = NULL;
+    args->views = NULL;
+    args->nviews = 0;
+}
+
+static int fr_argv_from_seq(PyObject* seq, fr_argv* args) {
+    Py_ssize_t i, n;
+    PyObject** items;
+
+    args->keep = PySequence_Fast(seq, "command arguments must be a sequence");
+    if (args->keep == NULL) {
+        return -1;
+    }
+    n = PySequence_Fast_GET_SIZE(args->keep);
+    if (n == 0) {
+        PyErr_SetString(PyExc_ValueError, "command must have at least one argument");
+        return -1;
+    }
+    if (n > INT_MAX) {
+        PyErr_SetString(PyExc_OverflowError, "too many command arguments");
+        return -1;
+    }
+    args->argc = (int)n;
+    args->argv = (const char**)PyMem_Malloc(n * sizeof(char*));
+    args->argvlen = (size_t*)PyMem_Malloc(n * sizeof(size_t));
+    if (args->argv == NULL || args->argvlen == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    items = PySequence_Fast_ITEMS(args->keep);
+    for (i = 0; i < n; i++) {
+        PyObject* item = items[i];
+        char* buf;
+        Py_ssize_t len;
+
+        if (PyBytes_Check(item)) {
+            if (PyBytes_AsStringAndSize(item, &buf, &len) < 0) {
+                return -1;
+            }
+        } else if (PyUnicode_Check(item)) {
+            /* The UTF-8 form is cached on the str object itself. */
+            buf = (char*)PyUnicode_AsUTF8AndSize(item, &len);
+            if (buf == NULL) {
+                return -1;
+            }
+        } else if (PyLong_Check(item) && !PyBool_Check(item)) {
+            PyObject* text = PyObject_Str(item);
+            int appended;
+            if (text == NULL) {
+                return -1;
+            }
+            if (args->temps == NULL && (args->temps = PyList_New(0)) == NULL) {
+                Py_DECREF(text);
+                return -1;
+            }
+            appended = PyList_Append(args->temps, text);
+            Py_DECREF(text);
+            if (appended < 0) {
+                return -1;
+            }
+            buf = (char*)PyUnicode_AsUTF8AndSize(text, &len);
+            if (buf == NULL) {
+                return -1;
+            }
+        } else if (PyObject_CheckBuffer(item)) {
+            Py_buffer* view;
+            if (args->views == NULL) {
+                args->views = (Py_buffer*)PyMem_Malloc(n * sizeof(Py_buffer));
+                if (args->views == NULL) {
+                    PyErr_NoMemory();
+                    return -1;
+                }
+            }
+            view = &args->views[args->nviews];
+            if (PyObject_GetBuffer(item, view, PyBUF_SIMPLE) < 0) {
+                return -1;
+            }
+            args->nviews++;
+            buf = (char*)view->buf;
+            len = view->len;
+        } else {
+            PyErr_Format(
+                PyExc_TypeError,
+                "command arguments must be str, bytes, int or a buffer, not %.200s",
+                Py_TYPE(item)->tp_name
+            );
+            return -1;
+        }
+        args->argv[i] = buf;
+        args->argvlen[i] = (size_t)len;
+    }
+    return 0;
+}
+
+
+/* Returns a new reference to an exception class in fastredis.exceptions.
+
+The module is imported lazily because it imports this extension module.
+*/
+static PyObject* fr_exception_class(const char* name) {
+    PyObject* module = PyImport_ImportModule("fastredis.exceptions");
+    PyObject* cls;
+    if (module == NULL) {
+        return NULL;
+    }
+    cls = PyObject_GetAttrString(module, name);
+    Py_DECREF(module);
+    return cls;
+}
+
+/* Sets the fastredis exception matching the error code in `c`.
+
+Mirrors raise_context_error() in exceptions.py. `fallback` is the message used
+when no error code is set. Always returns NULL.
+*/
+static PyObject* fr_set_context_error(redisContext* c, const char* fallback) {
+    const char* name;
+    PyObject* cls;
+
+    if (c == NULL) {
+        name = "ContextError";
+        fallback = "Empty context";
+    } else {
+        switch (c->err) {
+            case 0: name = "ContextError"; break;
+            case REDIS_ERR_IO: name = "IOError"; break;
+            case REDIS_ERR_EOF: name = "EOFError"; break;
+            case REDIS_ERR_PROTOCOL: name = "ProtocolError"; break;
+            case REDIS_ERR_OTHER: name = "OtherError"; break;
+            case REDIS_ERR_OOM: name = "OutOfMemoryError"; break;
+            default: name = "ContextError"; break;
+        }
+        if (c->err != 0) {
+            fallback = c->errstr;
+        }
+    }
+    cls = fr_exception_class(name);
+    if (cls == NULL) {
+        return NULL;
+    }
+    PyErr_SetString(cls, fallback);
+    Py_DECREF(cls);
+    return NULL;
+}
+
+/* Returns a new ReplyError instance for an error reply. */
+static PyObject* fr_reply_error_new(redisReply* r) {
+    PyObject* cls = fr_exception_class("ReplyError");
+    PyObject* exc;
+    if (cls == NULL) {
+        return NULL;
+    }
+    exc = PyObject_CallFunction(cls, "s#", r->str, (Py_ssize_t)r->len);
+    Py_DECREF(cls);
+    return exc;
+}
+
+/* Takes the current exception and returns it as a normalized instance. */
+static PyObject* fr_fetch_exception(void) {
+    PyObject *type, *exc, *tb;
+    PyErr_Fetch(&type, &exc, &tb);
+    PyErr_NormalizeException(&type, &exc, &tb);
+    if (tb != NULL) {
+        PyException_SetTraceback(exc, tb);
+    }
+    Py_XDECREF(type);
+    Py_XDECREF(tb);
+    return exc;
+}
+
+/* Converts a reply tree to python objects in a single pass.
+
+Strings and statuses become str if `decode` is set, otherwise bytes. Arrays
+become tuples. Error replies at any depth raise ReplyError. Returns a new
+reference, or NULL with an exception set. The reply is not freed.
+*/
+static PyObject* fr_reduce_reply(redisReply* r, int decode) {
+    PyObject* tuple;
+    PyObject* exc;
+    size_t i;
+
+    switch (r->type) {
+        case REDIS_REPLY_STRING:
+        case REDIS_REPLY_STATUS:
+            if (decode) {
+                return PyUnicode_DecodeUTF8(
+                    r->str, (Py_ssize_t)r->len, "surrogateescape"
+                );
+            }
+            return PyBytes_FromStringAndSize(r->str, (Py_ssize_t)r->len);
+        case REDIS_REPLY_INTEGER:
+            return PyLong_FromLongLong(r->integer);
+        case REDIS_REPLY_NIL:
+            Py_RETURN_NONE;
+        case REDIS_REPLY_ARRAY:
+            tuple = PyTuple_New((Py_ssize_t)r->elements);
+            if (tuple == NULL) {
+                return NULL;
+            }
+            for (i = 0; i < r->elements; i++) {
+                PyObject* item = fr_reduce_reply(r->element[i], decode);
+                if (item == NULL) {
+                    Py_DECREF(tuple);
+                    return NULL;
+                }
+                PyTuple_SET_ITEM(tuple, (Py_ssize_t)i, item);
+            }
+            return tuple;
+        case REDIS_REPLY_ERROR:
+            exc = fr_reply_error_new(r);
+            if (exc != NULL) {
+                PyErr_SetObject((PyObject*)Py_TYPE(exc), exc);
+                Py_DECREF(exc);
+            }
+            return NULL;
+        default:
+            exc = fr_exception_class("FastredisError");
+            if (exc != NULL) {
+                PyErr_Format(exc, "Invalid reply type: %d", r->type);
+                Py_DECREF(exc);
+            }
+            return NULL;
+    }
+}
+
+/* Reduces and frees a reply returned from a blocking hiredis call. */
+static PyObject* fr_reduce_and_free(redisContext* c, redisReply* r, int decode) {
+    PyObject* ret;
+    if (r == NULL) {
+        return fr_set_context_error(c, "Reply is empty and no error code is set.");
+    }
+    ret = fr_reduce_reply(r, decode);
+    freeReplyObject(r);
+    return ret;
+}
+
+/* Reads, reduces and frees the next reply from the receive buffer. */
+static PyObject* fr_get_reply_reduced(redisContext* c, int decode) {
+    void* reply = NULL;
+    if (redisGetReply(c, &reply) == REDIS_ERR) {
+        return fr_set_context_error(c, "redisGetReply error and no error code is set.");
+    }
+    return fr_reduce_and_free(c, (redisReply*)reply, decode);
+}
+
+
+/* Appends every command in `commands` to the send buffer without sending.
+
+A command is either a format string (str or bytes) or a sequence of arguments
+for the argv functions. All commands are converted before any is appended, so
+a bad argument appends nothing and the context stays in step with its replies.
+Returns the number of commands appended, or -1 with an exception set.
+*/
+static Py_ssize_t fr_append_commands(redisContext* c, PyObject* commands) {
+    PyObject* fast;
+    fr_argv* args;
+    Py_ssize_t i, n;
+    int ret = REDIS_OK;
+
+    fast = PySequence_Fast(commands, "commands must be a sequence");
+    if (fast == NULL) {
+        return -1;
+    }
+    n = PySequence_Fast_GET_SIZE(fast);
+    args = (fr_argv*)PyMem_Calloc(n > 0 ? n : 1, sizeof(fr_argv));
+    if (args == NULL) {
+        Py_DECREF(fast);
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    for (i = 0; i < n; i++) {
+        PyObject* command = PySequence_Fast_GET_ITEM(fast, i);
+        if (PyUnicode_Check(command)) {
+            if (PyUnicode_AsUTF8(command) == NULL) {
+                break;
+            }
+        } else if (!PyBytes_Check(command)) {
+            if (fr_argv_from_seq(command, &args[i]) < 0) {
+                break;
+            }
+        }
+    }
+
+    if (i == n) {
+        for (i = 0; i < n && ret == REDIS_OK; i++) {
+            PyObject* command = PySequence_Fast_GET_ITEM(fast, i);
+            if (PyUnicode_Check(command)) {
+                ret = redisAppendCommand(c, PyUnicode_AsUTF8(command));
+            } else if (PyBytes_Check(command)) {
+                ret = redisAppendCommand(c, PyBytes_AS_STRING(command));
+            } else {
+                ret = redisAppendCommandArgv(
+                    c, args[i].argc, args[i].argv, args[i].argvlen
+                );
+            }
+        }
+        if (ret != REDIS_OK) {
+            fr_set_context_error(c, "redisAppendCommand error and no error code is set.");
+        }
+    }
+
+    for (i = 0; i < n; i++) {
+        fr_argv_free(&args[i]);
+    }
+    PyMem_Free(args);
+    Py_DECREF(fast);
+    if (PyErr_Occurred()) {
+        return -1;
+    }
+    return n;
+}
+
+
+/* Writes the whole send buffer to the socket, blocking until it is sent.
+
+Returns 0, or -1 with an exception set.
+*/
+static int fr_flush(redisContext* c) {
+    int done = 0;
+    do {
+        if (redisBufferWrite(c, &done) == REDIS_ERR) {
+            fr_set_context_error(c, "redisBufferWrite error and no error code is set.");
+            return -1;
+        }
+    } while (!done);
+    return 0;
+}
+
+
+/* Reads and reduces the next `n` replies into a new list.
+
+Every reply is read even if some are errors, so the context stays usable.
+Errors are stored in place as exception instances. If `raise_on_error` is set
+the first one is raised after all replies are read. Returns a new list, or NULL
+with an exception set.
+*/
+static PyObject* fr_get_replies_reduced(
+    redisContext* c,
+    Py_ssize_t n,
+    int raise_on_error,
+    int decode
+) {
+    PyObject* results;
+    PyObject* first_error = NULL;
+    Py_ssize_t i;
+
+    if (n < 0) {
+        PyErr_SetString(PyExc_ValueError, "count must be nonnegative");
+        return NULL;
+    }
+    results = PyList_New(n);
+    if (results == NULL) {
+        return NULL;
+    }
+    for (i = 0; i < n; i++) {
+        PyObject* value = fr_get_reply_reduced(c, decode);
+        if (value == NULL) {
+            if (c->err != 0) {
+                // The connection is broken, so the remaining replies are lost.
+                Py_DECREF(results);
+                Py_XDECREF(first_error);
+                return NULL;
+            }
+            value = fr_fetch_exception();
+            if (first_error == NULL) {
+                Py_INCREF(value);
+                first_error = value;
+            }
+        }
+        PyList_SET_ITEM(results, i, value);
+    }
+
+    if (raise_on_error && first_error != NULL) {
+        PyErr_SetObject((PyObject*)Py_TYPE(first_error), first_error);
+        Py_DECREF(first_error);
+        Py_DECREF(results);
+        return NULL;
+    }
+    Py_XDECREF(first_error);
+    return results;
+}
+
+
+/* Reads from the socket once and reduces every reply that is now complete.
+
+Blocks only until the socket is readable, so callers that wait with select()
+first never block here. Returns a new list, empty if no reply is complete yet.
+Error replies are stored in place as exception instances. Returns NULL with an
+exception set if the read fails.
+*/
+static PyObject* fr_read_available(redisContext* c, int decode) {
+    PyObject* results;
+    void* reply;
+
+    if (redisBufferRead(c) == REDIS_ERR) {
+        return fr_set_context_error(c, "redisBufferRead error and no error code is set.");
+    }
+    results = PyList_New(0);
+    if (results == NULL) {
+        return NULL;
+    }
+    for (;;) {
+        PyObject* value;
+        int ret;
+        reply = NULL;
+        if (redisGetReplyFromReader(c, &reply) == REDIS_ERR) {
+            Py_DECREF(results);
+            return fr_set_context_error(c, "redisGetReplyFromReader error and no error code is set.");
+        }
+        if (reply == NULL) {
+            return results;
+        }
+        value = fr_reduce_reply((redisReply*)reply, decode);
+        freeReplyObject(reply);
+        if (value == NULL) {
+            value = fr_fetch_exception();
+        }
+        ret = PyList_Append(results, value);
+        Py_DECREF(value);
+        if (ret < 0) {
+            Py_DECREF(results);
+            return NULL;
+        }
+    }
+}
+
+
+/* Read-only buffer over the string of a reply, which it owns.
+
+Returned wrapped in a memoryview by fr_get_reply_view(). The reply is freed
+when the last view of it is released, so the string is never copied again
+after hiredis parses it.
+*/
+typedef struct {
+    PyObject_HEAD
+    redisReply* reply;
+} fr_ReplyBuffer;
+
+static void fr_reply_buffer_dealloc(fr_ReplyBuffer* self) {
+    if (self->reply != NULL) {
+        freeReplyObject(self->reply);
+    }
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static int fr_reply_buffer_getbuffer(fr_ReplyBuffer* self, Py_buffer* view, int flags) {
+    return PyBuffer_FillInfo(
+        view, (PyObject*)self, self->reply->str, (Py_ssize_t)self->reply->len, 1, flags
+    );
+}
+
+static PyBufferProcs fr_reply_buffer_as_buffer = {
+    (getbufferproc)fr_reply_buffer_getbuffer,
+    NULL
+};
+
+static PyTypeObject fr_ReplyBufferType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "fastredis.ReplyBuffer",
+    .tp_basicsize = sizeof(fr_ReplyBuffer),
+    .tp_dealloc = (destructor)fr_reply_buffer_dealloc,
+    .tp_as_buffer = &fr_reply_buffer_as_buffer,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = "Read-only buffer over the string of a redis reply.",
+};
+
+/* Reads the next reply, which must be a string or nil.
+
+Sets `*reply` to the reply, or to NULL for a nil reply, which is freed. Error
+replies raise ReplyError and other types raise FastredisError, after freeing.
+Returns 0, or -1 with an exception set.
+*/
+static int fr_get_string_reply(redisContext* c, redisReply** reply) {
+    redisReply* r = NULL;
+    PyObject* cls;
+
+    if (redisGetReply(c, (void**)&r) == REDIS_ERR || r == NULL) {
+        fr_set_context_error(c, "redisGetReply error and no error code is set.");
+        return -1;
+    }
+    switch (r->type) {
+        case REDIS_REPLY_STRING:
+        case REDIS_REPLY_STATUS:
+            *reply = r;
+            return 0;
+        case REDIS_REPLY_NIL:
+            freeReplyObject(r);
+            *reply = NULL;
+            return 0;
+        case REDIS_REPLY_ERROR:
+            fr_reduce_reply(r, 0);
+            break;
+        default:
+            cls = fr_exception_class("FastredisError");
+            if (cls != NULL) {
+                PyErr_Format(cls, "Reply is not a string, type: %d", r->type);
+                Py_DECREF(cls);
+            }
+            break;
+    }
+    freeReplyObject(r);
+    return -1;
+}
+
+/* Reads the next reply and copies its string into the writable buffer `out`.
+
+Returns the number of bytes copied, None for a nil reply, or NULL with an
+exception set. A reply longer than `out` raises ValueError, and an unwritable
+`out` raises BufferError. Either way the reply is still read, so the context
+stays in step with its replies.
+*/
+static PyObject* fr_get_reply_into(redisContext* c, PyObject* out) {
+    Py_buffer view;
+    redisReply* r;
+    PyObject* ret = NULL;
+
+    // Read the reply first, so it is consumed even if `out` is not usable.
+    if (fr_get_string_reply(c, &r) < 0) {
+        return NULL;
+    }
+    if (PyObject_GetBuffer(out, &view, PyBUF_WRITABLE) < 0) {
+        if (r != NULL) {
+            freeReplyObject(r);
+        }
+        return NULL;
+    }
+    if (r == NULL) {
+        PyBuffer_Release(&view);
+        Py_RETURN_NONE;
+    }
+    if ((Py_ssize_t)r->len > view.len) {
+        PyErr_Format(
+            PyExc_ValueError,
+            "Reply of %zu bytes does not fit in a buffer of %zd bytes",
+            r->len,
+            view.len
+        );
+    } else {
+        memcpy(view.buf, r->str, r->len);
+        ret = PyLong_FromSize_t(r->len);
+    }
+    freeReplyObject(r);
+    PyBuffer_Release(&view);
+    return ret;
+}
+
+/* Reads the next reply and returns a read-only memoryview of its string.
+
+The view owns the reply. Returns None for a nil reply, or NULL with an
+exception set.
+*/
+static PyObject* fr_get_reply_view(redisContext* c) {
+    fr_ReplyBuffer* buffer;
+    PyObject* view;
+    redisReply* r;
+
+    if (!(fr_ReplyBufferType.tp_flags & Py_TPFLAGS_READY)
+            && PyType_Ready(&fr_ReplyBufferType) < 0) {
+        return NULL;
+    }
+    if (fr_get_string_reply(c, &r) < 0) {
+        return NULL;
+    }
+    if (r == NULL) {
+        Py_RETURN_NONE;
+    }
+    buffer = PyObject_New(fr_ReplyBuffer, &fr_ReplyBufferType);
+    if (buffer == NULL) {
+        freeReplyObject(r);
+        return NULL;
+    }
+    buffer->reply = r;
+    view = PyMemoryView_FromObject((PyObject*)buffer);
+    Py_DECREF(buffer);
+    return view;
+}
+
+
+/* Appends every command in `commands`, then reads and reduces one reply per
+command. See fr_append_commands() and fr_get_replies_reduced().
+*/
+static PyObject* fr_pipeline_reduced(
+    redisContext* c,
+    PyObject* commands,
+    int raise_on_error,
+    int decode
+) {
+    Py_ssize_t n = fr_append_commands(c, commands);
+    if (n < 0) {
+        return NULL;
+    }
+    return fr_get_replies_reduced(c, n, raise_on_error, decode);
+}
+
+
+/* Replies of one read event on an asynchronous context.
+
+fr_async_handle_read() in hiredis.i points `ac->ev.data` at one of these for
+the duration of redisAsyncHandleRead(), and fr_async_reply() then appends the
+sequence number and reduced value of each reply to `replies` instead of
+calling the reply handler. `data` and `cleanup` keep the event library's own
+hooks, and `freed` is set if the read freed the context. The struct is shared by the str and bytes modules, which each
+have their own copy of fr_async_reply(), so it is recognized by `magic`
+rather than by address. The event hooks set up by wrappers_async.py ignore
+their privdata, so they are not affected by the swapped `ev.data`.
+*/
+#define FR_READ_BATCH_MAGIC 0x66726262
+
+typedef struct fr_read_batch {
+    unsigned int magic;
+    PyObject* replies;
+    void* data;
+    void (*cleanup)(void* privdata);
+    int freed;
+} fr_read_batch;
+
+/* Appends `seq` and `value` to a batch, stealing the reference to `value`.
+
+On failure the batch is left as it was and the exception is set.
+*/
+static int fr_read_batch_append(fr_read_batch* batch, void* seq, PyObject* value) {
+    Py_ssize_t size = PyList_GET_SIZE(batch->replies);
+    PyObject* number = PyLong_FromSsize_t((Py_ssize_t)seq);
+    int ret = -1;
+
+    if (number != NULL && PyList_Append(batch->replies, number) == 0) {
+        ret = PyList_Append(batch->replies, value);
+        if (ret < 0) {
+            PyList_SetSlice(batch->replies, size, size + 1, NULL);
+        }
+    }
+    Py_XDECREF(number);
+    Py_DECREF(value);
+    return ret;
+}
+
+/* Reply trampoline for asynchronous commands.
+
+hiredis calls this once per reply. The reply is reduced in C and passed to the
+python reply handler stored in `ac->data` (see redisAsyncSetReplyHandler() in
+hiredis.i) together with `privdata`, which holds the sequence number that was
+given when the command was queued. Error replies, and a missing reply when the
+context is freed with commands pending, are passed as exception instances.
+The handler is a borrowed reference that must outlive the context.
+
+During fr_async_handle_read() in hiredis.i, the reply is added to the read's batch instead,
+and the handler receives the whole batch once the read is done.
+*/
+static void fr_async_reply(
+    redisAsyncContext* ac,
+    void* reply,
+    void* privdata,
+    int decode
+) {
+    PyObject* handler = (PyObject*)ac->data;
+    fr_read_batch* batch = (fr_read_batch*)ac->ev.data;
+    PyObject* value;
+    PyObject* ret;
+
+    if (handler == NULL) {
+        return;
+    }
+    if (reply == NULL) {
+        fr_set_context_error(&ac->c, "Disconnected before the reply was received.");
+        value = fr_fetch_exception();
+    } else {
+        value = fr_reduce_reply((redisReply*)reply, decode);
+        if (value == NULL) {
+            value = fr_fetch_exception();
+        }
+    }
+    if (value == NULL) {
+        PyErr_WriteUnraisable(handler);
+        return;
+    }
+    if (batch != NULL && batch->magic == FR_READ_BATCH_MAGIC) {
+        if (fr_read_batch_append(batch, privdata, value) < 0) {
+            PyErr_WriteUnraisable(handler);
+        }
+        return;
+    }
+    ret = PyObject_CallFunction(handler, "nN", (Py_ssize_t)privdata, value);
+    if (ret == NULL) {
+        PyErr_WriteUnraisable(handler);
+        return;
+    }
+    Py_DECREF(ret);
+}
+
+/* Queues every command in `commands` on an asynchronous context, then sends
+them all with a single redisAsyncHandleWrite().
+
+The addWrite event hook is suspended while queueing, so the event loop is not
+asked to write once per command. Commands are format strings or sequences of
+arguments, as for fr_pipeline_reduced(). All commands are converted before
+any is queued, so a bad argument queues nothing. Every command uses the same
+callback and privdata. Returns None, or NULL with an exception set.
+*/
+static PyObject* fr_async_commands(
+    redisAsyncContext* ac,
+    PyObject* commands,
+    redisCallbackFn* fn,
+    void* privdata
+) {
+    PyObject* fast;
+    fr_argv* args;
+    Py_ssize_t i, n;
+    void (*add_write)(void*);
+    int ret = REDIS_OK;
+
+    fast = PySequence_Fast(commands, "commands must be a sequence");
+    if (fast == NULL) {
+        return NULL;
+    }
+    n = PySequence_Fast_GET_SIZE(fast);
+    args = (fr_argv*)PyMem_Calloc(n > 0 ? n : 1, sizeof(fr_argv));
+    if (args == NULL) {
+        Py_DECREF(fast);
+        return PyErr_NoMemory();
+    }
+
+    for (i = 0; i < n; i++) {
+        PyObject* command = PySequence_Fast_GET_ITEM(fast, i);
+        if (PyUnicode_Check(command)) {
+            if (PyUnicode_AsUTF8(command) == NULL) {
+                break;
+            }
+        } else if (!PyBytes_Check(command)) {
+            if (fr_argv_from_seq(command, &args[i]) < 0) {
+                break;
+            }
+        }
+    }
+
+    if (i == n) {
+        add_write = ac->ev.addWrite;
+        ac->ev.addWrite = NULL;
+        for (i = 0; i < n && ret == REDIS_OK; i++) {
+            PyObject* command = PySequence_Fast_GET_ITEM(fast, i);
+            if (PyUnicode_Check(command)) {
+                ret = redisAsyncCommand(ac, fn, privdata, PyUnicode_AsUTF8(command));
+            } else if (PyBytes_Check(command)) {
+                ret = redisAsyncCommand(ac, fn, privdata, PyBytes_AS_STRING(command));
+            } else {
+                ret = redisAsyncCommandArgv(
+                    ac, fn, privdata, args[i].argc, args[i].argv, args[i].argvlen
+                );
+            }
+        }
+        ac->ev.addWrite = add_write;
+        if (n > 0) {
+            redisAsyncHandleWrite(ac);
+        }
+        if (ret != REDIS_OK) {
+            fr_set_context_error(&ac->c, "Cannot add command to write queue.");
+        }
+    }
+
+    for (i = 0; i < n; i++) {
+        fr_argv_free(&args[i]);
+    }
+    PyMem_Free(args);
+    Py_DECREF(fast);
+    if (PyErr_Occurred()) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+
+/* Formats every command in `commands` into a single bytes object of RESP, for
+callers that write to the socket themselves.
+
+Commands are format strings or sequences of arguments, as for
+fr_pipeline_reduced(). Returns a new reference, or NULL with an exception set.
+*/
+static PyObject* fr_format_commands(PyObject* commands) {
+    PyObject* fast;
+    PyObject* ret = NULL;
+    char** formatted;
+    int* lens;
+    Py_ssize_t i, n, total = 0;
+
+    fast = PySequence_Fast(commands, "commands must be a sequence");
+    if (fast == NULL) {
+        return NULL;
+    }
+    n = PySequence_Fast_GET_SIZE(fast);
+    formatted = (char**)PyMem_Calloc(n > 0 ? n : 1, sizeof(char*));
+    lens = (int*)PyMem_Calloc(n > 0 ? n : 1, sizeof(int));
+    if (formatted == NULL || lens == NULL) {
+        PyMem_Free(formatted);
+        PyMem_Free(lens);
+        Py_DECREF(fast);
+        return PyErr_NoMemory();
+    }
+
+    for (i = 0; i < n; i++) {
+        PyObject* command = PySequence_Fast_GET_ITEM(fast, i);
+        int len;
+        if (PyUnicode_Check(command)) {
+            const char* format = PyUnicode_AsUTF8(command);
+            if (format == NULL) {
+                break;
+            }
+            len = redisFormatCommand(&formatted[i], format);
+        } else if (PyBytes_Check(command)) {
+            len = redisFormatCommand(&formatted[i], PyBytes_AS_STRING(command));
+        } else {
+            fr_argv args;
+            memset(&args, 0, sizeof(fr_argv));
+            if (fr_argv_from_seq(command, &args) < 0) {
+                fr_argv_free(&args);
+                break;
+            }
+            len = redisFormatCommandArgv(
+                &formatted[i], args.argc, args.argv, args.argvlen
+            );
+            fr_argv_free(&args);
+        }
+        if (len < 0) {
+            PyObject* cls = fr_exception_class("OtherError");
+            formatted[i] = NULL;
+            if (cls != NULL) {
+                PyErr_SetString(cls, "Cannot format command.");
+                Py_DECREF(cls);
+            }
+            break;
+        }
+        lens[i] = len;
+        total += len;
+    }
+
+    if (i == n) {
+        ret = PyBytes_FromStringAndSize(NULL, total);
+        if (ret != NULL) {
+            char* out = PyBytes_AS_STRING(ret);
+            for (i = 0; i < n; i++) {
+                memcpy(out, formatted[i], (size_t)lens[i]);
+                out += lens[i];
+            }
+        }
+    }
+
+    for (i = 0; i < n; i++) {
+        if (formatted[i] != NULL) {
+            redisFreeCommand(formatted[i]);
+        }
+    }
+    PyMem_Free(formatted);
+    PyMem_Free(lens);
+    Py_DECREF(fast);
+    return ret;
+}
+
+/* Feeds bytes read from a socket to `r`, then reduces and frees every complete
+reply it now holds.
+
+Returns a list of the replies in order, with error replies in place as
+exception instances, as fr_async_reply() passes them. A malformed reply
+raises ProtocolError, after which the reader must not be used again.
+*/
+static PyObject* fr_reader_feed(redisReader* r, PyObject* data, int decode) {
+    Py_buffer view;
+    PyObject* replies;
+    PyObject* cls;
+    void* reply;
+    int ret;
+
+    if (PyObject_GetBuffer(data, &view, PyBUF_SIMPLE) < 0) {
+        return NULL;
+    }
+    ret = redisReaderFeed(r, (const char*)view.buf, (size_t)view.len);
+    PyBuffer_Release(&view);
+    if (ret != REDIS_OK) {
+        goto protocol_error;
+    }
+
+    replies = PyList_New(0);
+    if (replies == NULL) {
+        return NULL;
+    }
+    for (;;) {
+        PyObject* value;
+        reply = NULL;
+        if (redisReaderGetReply(r, &reply) != REDIS_OK) {
+            Py_DECREF(replies);
+            goto protocol_error;
+        }
+        if (reply == NULL) {
+            return replies;
+        }
+        value = fr_reduce_reply((redisReply*)reply, decode);
+        freeReplyObject(reply);
+        if (value == NULL) {
+            value = fr_fetch_exception();
+        }
+        if (value == NULL || PyList_Append(replies, value) < 0) {
+            Py_XDECREF(value);
+            Py_DECREF(replies);
+            return NULL;
+        }
+        Py_DECREF(value);
+    }
+
+protocol_error:
+    cls = fr_exception_class("ProtocolError");
+    if (cls != NULL) {
+        PyErr_SetString(cls, r->errstr[0] ? r->errstr : "Protocol error.");
+        Py_DECREF(cls);
+    }
+    return NULL;
+}
+
+%}
+
+// A single python sequence is accepted in place of argc, argv and argvlen.
+%typemap(arginit) (int argc, const char** argv, const size_t* argvlen) {
+    memset(&args$argnum, 0, sizeof(fr_argv));
+}
+
+%typemap(in) (int argc, const char** argv, const size_t* argvlen) (fr_argv args) {
+    if (fr_argv_from_seq($input, &args) < 0) {
+        SWIG_fail;
+    }
+    $1 = args.argc;
+    $2 = ($2_ltype)args.argv;
+    $3 = ($3_ltype)args.argvlen;
+}
+
+%typemap(freearg) (int argc, const char** argv, const size_t* argvlen) {
+    fr_argv_free(&args$argnum);
+}
+
@@ -1,26 +1,59 @@
 """Connection class for a synchronous client."""
 
 import asyncio
+import time
 from abc import ABC, abstractmethod
 from functools import wraps
-from typing import Optional
-
+from typing import (
+    AnyStr,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+from fastredis.exceptions import FastredisError, IOError, raise_context_error
+import fastredis.instrument as instrument
+import fastredis.profile as profile
 import fastredis.wrappers as wrappers
 from fastredis.wrappers import ReplyValue
+from fastredis.wrapper_tools import CommandArg
 import fastredis.wrappersb as wrappersb
 import fastredis.wrappers_async as wa
+import fastredis.wrappers_asyncb as wab
+import fastredis.wrappers_protocol as wp
+import fastredis.wrappers_protocolb as wpb
+from fastredis.pipeline import AsyncPipeline, Pipeline
+from fastredis.pubsub import Subscription
+import fastredis.bulk as bulk
+import fastredis.scan as scan
+from fastredis.script import AsyncScript, Script
+import fastredis.transfer as transfer
 
 
 class SyncConnection(ABC):
 
+    observer = None
+    profiler = None
+
     def __init__(self,
-            ip: bytes,
+            ip: bytes = None,
             port: int = 6379,
-            connect_timeout: float = None
+            connect_timeout: float = None,
+            path: bytes = None,
+            command_timeout: float = None
         ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
         self.ip = ip
         self.port = port
         self.connect_timeout = connect_timeout
+        self.path = path
+        self.command_timeout = command_timeout
 
         self.context = None
 
@@ -29,9 +62,15 @@ class SyncConnection(ABC):
     def _redis_connect():
         pass
     @abstractmethod
+    def _redis_connect_unix():
+        pass
+    @abstractmethod
     def _redis_free():
         pass
     @abstractmethod
+    def _redis_set_timeout():
+        pass
+    @abstractmethod
     def _redis_command():
         pass
     @abstractmethod
@@ -40,6 +79,39 @@ class SyncConnection(ABC):
     @abstractmethod
     def _redis_read():
         pass
+    @abstractmethod
+    def _redis_command_args():
+        pass
+    @abstractmethod
+    def _redis_write_args():
+        pass
+    @abstractmethod
+    def _redis_pipeline():
+        pass
+    @abstractmethod
+    def _redis_write_many():
+        pass
+    @abstractmethod
+    def _redis_flush():
+        pass
+    @abstractmethod
+    def _redis_read_many():
+        pass
+    @abstractmethod
+    def _redis_read_available():
+        pass
+    @abstractmethod
+    def _redis_read_into():
+        pass
+    @abstractmethod
+    def _redis_read_view():
+        pass
+    @abstractmethod
+    def _redis_read_reply():
+        pass
+    @abstractmethod
+    def _redis_reduce_reply():
+        pass
 
     def connect(self) -> None:
         """Connect to redis.
@@ -54,11 +126,23 @@ class SyncConnection(ABC):
         if self.context is not None:
             self.disconnect()
 
-        self.context = self._redis_connect(
-            ip=self.ip,
-            port=self.port,
-            timeout=self.connect_timeout
-        )
+        if self.path is not None:
+            self.context = self._redis_connect_unix(
+                path=self.path,
+                timeout=self.connect_timeout
+            )
+        else:
+            self.context = self._redis_connect(
+                ip=self.ip,
+                port=self.port,
+                timeout=self.connect_timeout
+            )
+        if self.command_timeout:
+            try:
+                self._redis_set_timeout(self.context, self.command_timeout)
+            except BaseException:
+                self.disconnect()
+                raise
 
     def disconnect(self) -> None:
         """Disconnect from redis.
@@ -71,6 +155,67 @@ class SyncConnection(ABC):
         self._redis_free(self.context)
         self.context = None
 
+    def set_observer(self, observer: Optional[instrument.Observer]) -> None:
+        """Report every command to `observer`, or stop if it is None.
+
+        See fastredis.instrument. Connections without an observer are not
+        slowed down at all.
+        """
+
+        self.observer = observer
+        self._instrument()
+
+    def set_profiler(self, profiler: Optional[profile.Profiler]) -> None:
+        """Time the phases of every command with `profiler`, or stop if it
+        is None.
+
+        See fastredis.profile. Profiling slows commands down a little, and
+        connections without a profiler not at all.
+        """
+
+        self.profiler = profiler
+        self._instrument()
+
+    def _instrument(self) -> None:
+        methods = None
+        if self.profiler is not None:
+            methods = self.profiler.sync_methods(self)
+        instrument.bind_sync(self, methods)
+
+    @property
+    def usable(self) -> bool:
+        """False if not connected, or if the connection has hit an error.
+
+        After a timeout or any other ContextError the connection must be
+        reconnected with connect() before it can be used again.
+        """
+
+        return self.context is not None and self.context.err == 0
+
+    def _check_deadline(self, deadline: Optional[float]) -> None:
+        """Raises IOError if `deadline` passed, before anything is queued."""
+
+        if deadline is not None and deadline <= time.monotonic():
+            raise IOError('Deadline passed before the command was sent')
+
+    def _call_by(self, deadline: float, func, *args):
+        """Call `func` with the socket timeout set to reach `deadline`.
+
+        `deadline` is an absolute time.monotonic() value. The timeout applies
+        to each read from and write to the socket, so it is approximate for
+        replies that take several reads.
+        """
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise IOError('Deadline passed before the command was sent')
+        self._redis_set_timeout(self.context, remaining)
+        try:
+            return func(*args)
+        finally:
+            if self.context is not None and self.context.err == 0:
+                self._redis_set_timeout(self.context, self.command_timeout)
+
     def __enter__(self):
         self.connect()
         return self
@@ -78,9 +223,21 @@ class SyncConnection(ABC):
     def __exit__(self, exc_type, exc_value, traceback):
         self.disconnect()
 
-    def command(self, command: str) -> ReplyValue:
+    def command(
+            self,
+            command: str,
+            deadline: float = None,
+            out=None
+        ) -> ReplyValue:
         """Send a command to redis and retrieve the reply.
 
+        If `deadline` is given as a time.monotonic() value, it overrides the
+        command timeout for this call. Timing out raises IOError and leaves
+        the connection unusable.
+
+        If `out` is given, the reply must be a string or nil, and is copied
+        straight into `out` as by read_into(), which returns its length.
+
         Raises:
             * Any type of HiredisError
                 * ReplyError if the server replies with an error
@@ -88,6 +245,17 @@ class SyncConnection(ABC):
             * FastredisError if invalid response types
         """
 
+        if out is not None:
+            self._check_deadline(deadline)
+            self._redis_write(self.context, command)
+            return self.read_into(out, deadline=deadline)
+        if deadline is not None:
+            return self._call_by(
+                deadline,
+                self._redis_command,
+                self.context,
+                command
+            )
         return self._redis_command(context=self.context, command=command)
 
     def write(self, command: str) -> None:
@@ -102,18 +270,343 @@ class SyncConnection(ABC):
 
         self._redis_write(self.context, command)
 
-    def read(self) -> ReplyValue:
+    def command_args(
+            self,
+            *args: CommandArg,
+            deadline: float = None,
+            out=None
+        ) -> ReplyValue:
+        """Send a command given as separate arguments and retrieve the reply.
+
+        Each argument is a str, bytes, int or other buffer, such as a
+        memoryview, and is sent to redis as is, so values may contain spaces
+        or binary data. For example:
+            command_args('SET', key, value)
+
+        `deadline` and `out` are as for command().
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if the server replies with an error
+                * ContextError if there are connection issues
+            * FastredisError if invalid response types
+        """
+
+        if out is not None:
+            self._check_deadline(deadline)
+            self._redis_write_args(self.context, args)
+            return self.read_into(out, deadline=deadline)
+        if deadline is not None:
+            return self._call_by(
+                deadline,
+                self._redis_command_args,
+                self.context,
+                args
+            )
+        return self._redis_command_args(self.context, args)
+
+    def write_args(self, *args: CommandArg) -> None:
+        """Write a command given as separate arguments to the send buffer.
+
+        This is the command_args() version of write().
+
+        Raises:
+            * ContextError (any type)
+        """
+
+        self._redis_write_args(self.context, args)
+
+    def read(self, deadline: float = None) -> ReplyValue:
         """Flush the send buffer and read a reply from the receive buffer.
 
-        If no message in the buffer, block until one arrives.
+        If no message in the buffer, block until one arrives, the command
+        timeout passes, or `deadline` (as for command()) passes.
 
         Raises:
             * HiredisError (any type)
             * FastredisError
         """
 
+        if deadline is not None:
+            return self._call_by(deadline, self._redis_read, self.context)
         return self._redis_read(self.context)
 
+    def read_into(self, out, deadline: float = None) -> Optional[int]:
+        """Flush the send buffer and read a string reply into a buffer.
+
+        `out` is any writable object supporting the buffer protocol, such as
+        a bytearray, mmap or numpy array. The reply is copied into it in C,
+        without creating a bytes or str object. Returns the number of bytes
+        copied, or None for a nil reply. `deadline` is as for command().
+
+        Raises:
+            * HiredisError (any type)
+            * FastredisError if the reply is not a string or nil
+            * ValueError if the reply does not fit in `out`, or BufferError
+              if `out` is not writable. The reply is still read, so the
+              connection stays usable.
+        """
+
+        if deadline is not None:
+            return self._call_by(
+                deadline,
+                self._redis_read_into,
+                self.context,
+                out
+            )
+        return self._redis_read_into(self.context, out)
+
+    def read_view(self, deadline: float = None) -> Optional[memoryview]:
+        """Flush the send buffer and read a string reply as a memoryview.
+
+        The read-only view points at the reply as parsed by hiredis, so large
+        values are never copied again. The reply is freed when the view is
+        released, or garbage collected. Returns None for a nil reply.
+        `deadline` is as for command().
+
+        Raises:
+            * HiredisError (any type)
+            * FastredisError if the reply is not a string or nil
+        """
+
+        if deadline is not None:
+            return self._call_by(deadline, self._redis_read_view, self.context)
+        return self._redis_read_view(self.context)
+
+    def get_into(
+            self,
+            key: CommandArg,
+            out,
+            deadline: float = None
+        ) -> Optional[int]:
+        """GET `key` straight into the buffer `out`. See read_into()."""
+
+        self._check_deadline(deadline)
+        self._redis_write_args(self.context, ('GET', key))
+        return self.read_into(out, deadline=deadline)
+
+    def get_view(
+            self,
+            key: CommandArg,
+            deadline: float = None
+        ) -> Optional[memoryview]:
+        """GET `key` as a read-only memoryview. See read_view()."""
+
+        self._check_deadline(deadline)
+        self._redis_write_args(self.context, ('GET', key))
+        return self.read_view(deadline=deadline)
+
+    def pipeline(self, raise_on_error: bool = True) -> Pipeline:
+        """Create a pipeline that sends queued commands in a single write.
+
+        See Pipeline for details. If `raise_on_error` is False, errors are
+        returned in place in the list of replies instead of being raised.
+        """
+
+        return Pipeline(self, raise_on_error=raise_on_error)
+
+    def register_script(self, source: AnyStr) -> Script:
+        """Return a callable that runs a Lua script with EVALSHA.
+
+        Nothing is sent until the script is first called. See Script.
+        """
+
+        return Script(self, source)
+
+    def mget(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List:
+        """Get the values of many keys, in order, with chunked MGETs.
+
+        The keys are split into MGET commands of up to `chunk_size` keys,
+        which are all sent in a single pipeline. Returns a list with the
+        value of each key, or None for missing keys.
+
+        Raises:
+            * Any type of HiredisError
+        """
+
+        return bulk.run(self, *bulk.mget_plan(keys, chunk_size))
+
+    def mset(
+            self,
+            mapping: Mapping[CommandArg, CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> None:
+        """Set many keys, with an MSET per `chunk_size` key-value pairs.
+
+        The MSET commands are all sent in a single pipeline. Each chunk is
+        atomic, but the whole mapping is not.
+
+        Raises:
+            * Any type of HiredisError
+        """
+
+        return bulk.run(self, *bulk.mset_plan(mapping, chunk_size))
+
+    def delete_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> int:
+        """Delete many keys, with a DEL per `chunk_size` keys.
+
+        Returns the number of keys that were deleted.
+
+        Raises:
+            * Any type of HiredisError
+        """
+
+        return bulk.run(self, *bulk.delete_many_plan(keys, chunk_size))
+
+    def hgetall_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List[Dict]:
+        """Get many hashes, in order, with one HGETALL per key.
+
+        The commands are sent in a single pipeline. `chunk_size` is the
+        number of commands sent together to one connection when spreading
+        them over a pool. Returns a list with a dict per key, empty for
+        missing keys.
+
+        Raises:
+            * Any type of HiredisError
+        """
+
+        return bulk.run(self, *bulk.hgetall_many_plan(keys, chunk_size))
+
+    def upload(
+            self,
+            key: CommandArg,
+            source: transfer.FileArg,
+            chunk_size: int = transfer.DEFAULT_CHUNK_SIZE,
+            window: int = transfer.DEFAULT_WINDOW
+        ) -> int:
+        """Store the contents of a file at `key`, without reading it whole.
+
+        `source` is a path or a binary file object, read from its current
+        position to the end. The file is read `chunk_size` bytes at a time
+        into a single reused buffer and sent with SET and APPEND commands,
+        pipelined `window` at a time, so memory use is bounded by about
+        `window * chunk_size` whatever the size of the file.
+
+        The chunks are written to a temporary key that is renamed to `key`
+        at the end. Readers never see a partial value, and on failure the
+        temporary key is deleted. Returns the number of bytes stored.
+
+        Raises:
+            * Any type of HiredisError
+            * OSError if the file cannot be read
+        """
+
+        return transfer.upload(self, key, source, chunk_size, window)
+
+    def download(
+            self,
+            key: CommandArg,
+            target: transfer.FileArg,
+            chunk_size: int = transfer.DEFAULT_CHUNK_SIZE,
+            window: int = transfer.DEFAULT_WINDOW
+        ) -> Optional[int]:
+        """Write the value at `key` to a file, without reading it whole.
+
+        The value is read with GETRANGE commands of `chunk_size` bytes,
+        pipelined `window` at a time. If `target` is a path, the file is
+        created at the full size and memory mapped, and each range is copied
+        by read_into() straight into its place. If it is a binary file
+        object, each range is read into a reused buffer and written at the
+        current position. Either way memory use is bounded by about
+        `window * chunk_size`.
+
+        Returns the size of the value, or None, leaving `target` untouched,
+        if the key does not exist.
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if the value is not a string
+            * FastredisError if the value changes size during the download
+            * OSError if the file cannot be written
+        """
+
+        return transfer.download(self, key, target, chunk_size, window)
+
+    def scan_iter(
+            self,
+            match: CommandArg = None,
+            count: int = None,
+            type: CommandArg = None
+        ) -> Iterator:
+        """Iterate over the keys in the database with SCAN.
+
+        `match`, `count` and `type` are passed as the MATCH, COUNT and TYPE
+        options. Each page of keys is requested as soon as the previous page
+        arrives, so the server works on it while the caller processes the
+        current page. Because of that, send no other commands on this
+        connection until the iteration ends or the iterator is closed; use
+        another connection for commands on the keys found.
+
+        Raises:
+            * Any type of HiredisError
+        """
+
+        return scan.items(scan.scan_pages(
+            self,
+            ('SCAN',),
+            scan.scan_options(match, count, type)
+        ))
+
+    def hscan_iter(
+            self,
+            key: CommandArg,
+            match: CommandArg = None,
+            count: int = None
+        ) -> Iterator[Tuple]:
+        """Iterate over the (field, value) pairs of a hash with HSCAN.
+
+        See scan_iter().
+        """
+
+        return scan.pairs(scan.scan_pages(
+            self,
+            ('HSCAN', key),
+            scan.scan_options(match, count)
+        ))
+
+    def sscan_iter(
+            self,
+            key: CommandArg,
+            match: CommandArg = None,
+            count: int = None
+        ) -> Iterator:
+        """Iterate over the members of a set with SSCAN. See scan_iter()."""
+
+        return scan.items(scan.scan_pages(
+            self,
+            ('SSCAN', key),
+            scan.scan_options(match, count)
+        ))
+
+    def zscan_iter(
+            self,
+            key: CommandArg,
+            match: CommandArg = None,
+            count: int = None
+        ) -> Iterator[Tuple]:
+        """Iterate over the (member, score) pairs of a sorted set with ZSCAN.
+
+        Scores are converted to float. See scan_iter().
+        """
+
+        return scan.scored(scan.scan_pages(
+            self,
+            ('ZSCAN', key),
+            scan.scan_options(match, count)
+        ))
+
 
 def makemethod(func):
     @wraps(func)
@@ -125,45 +618,89 @@ def makemethod(func):
 class SyncConnectionStr(SyncConnection):
 
     def __init__(self,
-            ip: str,
+            ip: str = None,
             port: int = 6379,
             connect_timeout: float = None,
+            path: str = None,
+            command_timeout: float = None
         ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
         self.ip = ip
         self.port = port
         self.connect_timeout = connect_timeout
+        self.path = path
+        self.command_timeout = command_timeout
 
         self.context = None
 
     _redis_connect = makemethod(wrappers.redis_connect)
+    _redis_connect_unix = makemethod(wrappers.redis_connect_unix)
     _redis_free = makemethod(wrappers.redis_free)
+    _redis_set_timeout = makemethod(wrappers.redis_set_timeout)
     _redis_command = makemethod(wrappers.redis_command)
     _redis_write = makemethod(wrappers.redis_write)
     _redis_read = makemethod(wrappers.redis_read)
+    _redis_command_args = makemethod(wrappers.redis_command_args)
+    _redis_write_args = makemethod(wrappers.redis_write_args)
+    _redis_pipeline = makemethod(wrappers.redis_pipeline)
+    _redis_write_many = makemethod(wrappers.redis_write_many)
+    _redis_flush = makemethod(wrappers.redis_flush)
+    _redis_read_many = makemethod(wrappers.redis_read_many)
+    _redis_read_available = makemethod(wrappers.redis_read_available)
+    _redis_read_into = makemethod(wrappers.redis_read_into)
+    _redis_read_view = makemethod(wrappers.redis_read_view)
+    _redis_read_reply = makemethod(wrappers.redis_read_reply)
+    _redis_reduce_reply = makemethod(wrappers.redis_reduce_reply)
 
 
 class SyncConnectionBytes(SyncConnection):
 
     def __init__(self,
-            ip: bytes,
+            ip: bytes = None,
             port: int = 6379,
-            connect_timeout: float = None
+            connect_timeout: float = None,
+            path: bytes = None,
+            command_timeout: float = None
         ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
         self.ip = ip
         self.port = port
         self.connect_timeout = connect_timeout
+        self.path = path
+        self.command_timeout = command_timeout
 
         self.context = None
 
     _redis_connect = makemethod(wrappersb.redis_connect)
+    _redis_connect_unix = makemethod(wrappersb.redis_connect_unix)
     _redis_free = makemethod(wrappersb.redis_free)
+    _redis_set_timeout = makemethod(wrappersb.redis_set_timeout)
     _redis_command = makemethod(wrappersb.redis_command)
     _redis_write = makemethod(wrappersb.redis_write)
     _redis_read = makemethod(wrappersb.redis_read)
+    _redis_command_args = makemethod(wrappersb.redis_command_args)
+    _redis_write_args = makemethod(wrappersb.redis_write_args)
+    _redis_pipeline = makemethod(wrappersb.redis_pipeline)
+    _redis_write_many = makemethod(wrappersb.redis_write_many)
+    _redis_flush = makemethod(wrappersb.redis_flush)
+    _redis_read_many = makemethod(wrappersb.redis_read_many)
+    _redis_read_available = makemethod(wrappersb.redis_read_available)
+    _redis_read_into = makemethod(wrappersb.redis_read_into)
+    _redis_read_view = makemethod(wrappersb.redis_read_view)
+    _redis_read_reply = makemethod(wrappersb.redis_read_reply)
+    _redis_reduce_reply = makemethod(wrappersb.redis_reduce_reply)
 
 
 def SyncConnection(*args, **kwargs):
-    """Create a synchronous connection object."""
+    """Create a synchronous connection object.
+
+    Pass `path` instead of `ip` to connect over a unix domain socket.
+    `command_timeout` limits, in seconds, each read from and write to the
+    socket once connected. `observer` and `profiler` are installed with
+    set_observer() and set_profiler().
+    """
 
     if 'encoding' in kwargs:
         encoding = kwargs['encoding']
@@ -173,27 +710,77 @@ def SyncConnection(*args, **kwargs):
     else:
         encoding = 'utf-8'
 
+    observer = kwargs.pop('observer', None)
+    profiler = kwargs.pop('profiler', None)
+
     if encoding == 'utf-8':
-        return SyncConnectionStr(*args, **kwargs)
+        conn = SyncConnectionStr(*args, **kwargs)
     elif encoding is None:
-        return SyncConnectionBytes(*args, **kwargs)
+        conn = SyncConnectionBytes(*args, **kwargs)
     else:
         raise ValueError('`encoding` must be "utf-8" or None')
+    if observer is not None:
+        conn.set_observer(observer)
+    if profiler is not None:
+        conn.set_profiler(profiler)
+    return conn
+
 
+class AsyncConnection(ABC):
 
-class AsyncConnectionStr:
+    observer = None
+    profiler = None
+    auto_pipeline = None
 
     def __init__(self,
-            ip: str,
+            ip: str = None,
             port: int = 6379,
-            connect_timeout: float = None
+            connect_timeout: float = None,
+            path: str = None
         ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
         self.ip = ip
         self.port = port
         self.connect_timeout = connect_timeout
+        self.path = path
 
         self.context = None
 
+    @abstractmethod
+    def _redis_connect():
+        pass
+    @abstractmethod
+    def _redis_connect_unix():
+        pass
+    @abstractmethod
+    def _redis_command():
+        pass
+    @abstractmethod
+    def _redis_command_args():
+        pass
+    @abstractmethod
+    def _redis_pipeline():
+        pass
+    @abstractmethod
+    def _redis_subscribe():
+        pass
+    @abstractmethod
+    def _redis_unsubscribe():
+        pass
+    @abstractmethod
+    def _redis_disconnect():
+        pass
+    @abstractmethod
+    def _redis_free():
+        pass
+    @abstractmethod
+    def _redis_set_reply_queue():
+        pass
+    @abstractmethod
+    def _redis_set_read_hook():
+        pass
+
     async def connect(self) -> None:
         """Connect to redis.
 
@@ -209,10 +796,18 @@ class AsyncConnectionStr:
         if self.context is not None:
             await self.disconnect()
 
-        self.context, self.not_garbage = wa.redis_connect(
-            ip=self.ip,
-            port=self.port
-        )
+        if self.path is not None:
+            self.context, self.not_garbage = self._redis_connect_unix(
+                path=self.path,
+                auto_pipeline=self.auto_pipeline
+            )
+        else:
+            self.context, self.not_garbage = self._redis_connect(
+                ip=self.ip,
+                port=self.port,
+                auto_pipeline=self.auto_pipeline
+            )
+        self.replies = wa.redis_reply_queue(self.context)
         connected = loop.create_future()
         self.disconnected = loop.create_future()
 
@@ -236,6 +831,8 @@ class AsyncConnectionStr:
 
         self.not_garbage += wa.redis_set_connect_cb(self.context, connected_cb)
         self.not_garbage += wa.redis_set_disconnect_cb(self.context, disconnected_cb)
+        if self.profiler is not None:
+            self.profiler.attach(self)
 
         done, pending = await asyncio.wait(
             {connected},
@@ -258,9 +855,16 @@ class AsyncConnectionStr:
         if timeout is not None and timeout < 0:
             raise ValueError('timeout must be nonnegative or None')
 
+        if self.disconnected.done():
+            # hiredis already freed the context when the connection closed
+            if not self.disconnected.cancelled():
+                self.disconnected.exception()
+            self.context = None
+            return
+
         if (timeout is None) or (timeout is not None and timeout > 0):
             # attempt a graceful disconnect first
-            wa.redis_disconnect(self.context)
+            self._redis_disconnect(self.context)
             done, pending = await asyncio.wait(
                 {self.disconnected},
                 timeout=timeout
@@ -270,9 +874,31 @@ class AsyncConnectionStr:
                 return
 
         # timeout = 0 or time ran up, disconnect now
-        wa.redis_free(self.context)
+        self._redis_free(self.context)
         self.context = None
 
+    def set_observer(self, observer: Optional[instrument.Observer]) -> None:
+        """Report every command to `observer`, or stop if it is None.
+
+        See SyncConnection.set_observer().
+        """
+
+        self.observer = observer
+        instrument.bind_async(self)
+
+    def set_profiler(self, profiler: Optional[profile.Profiler]) -> None:
+        """Time the phases of every command with `profiler`, or stop if it
+        is None.
+
+        See SyncConnection.set_profiler().
+        """
+
+        if self.profiler is not None:
+            self.profiler.detach(self)
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(self)
+
     async def __aenter__(self):
         await self.connect()
         return self
@@ -290,14 +916,372 @@ class AsyncConnectionStr:
             * FastredisError if invalid response types
         """
 
-        return await wa.redis_command(
-            context=self.context,
-            command=command
+        return await self._redis_command(
+            self.context,
+            command,
+            self.replies
         )
 
+    async def command_args(self, *args: CommandArg) -> ReplyValue:
+        """Send a command given as separate arguments and retrieve the reply.
+
+        Each argument is a str, bytes, int or other buffer, such as a
+        memoryview, and is sent to redis as is, so values may contain spaces
+        or binary data.
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if the server replies with an error
+                * ContextError if there are connection issues
+            * FastredisError if invalid response types
+        """
+
+        return await self._redis_command_args(self.context, args, self.replies)
+
+    def pipeline(self, raise_on_error: bool = True) -> AsyncPipeline:
+        """Create a pipeline that sends queued commands in a single write.
+
+        See AsyncPipeline for details.
+        """
+
+        return AsyncPipeline(self, raise_on_error=raise_on_error)
+
+    def register_script(self, source: AnyStr) -> AsyncScript:
+        """Return an async callable that runs a Lua script with EVALSHA.
+
+        Nothing is sent until the script is first called. See AsyncScript.
+        """
+
+        return AsyncScript(self, source)
+
+    async def mget(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List:
+        """See SyncConnection.mget()."""
+
+        return await bulk.run_async(self, *bulk.mget_plan(keys, chunk_size))
+
+    async def mset(
+            self,
+            mapping: Mapping[CommandArg, CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> None:
+        """See SyncConnection.mset()."""
+
+        return await bulk.run_async(self, *bulk.mset_plan(mapping, chunk_size))
+
+    async def delete_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> int:
+        """See SyncConnection.delete_many()."""
+
+        return await bulk.run_async(self, *bulk.delete_many_plan(keys, chunk_size))
+
+    async def hgetall_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List[Dict]:
+        """See SyncConnection.hgetall_many()."""
+
+        return await bulk.run_async(self, *bulk.hgetall_many_plan(keys, chunk_size))
+
+    def scan_iter(
+            self,
+            match: CommandArg = None,
+            count: int = None,
+            type: CommandArg = None
+        ) -> AsyncIterator:
+        """Iterate over the keys in the database with SCAN, asynchronously.
+
+        `match`, `count` and `type` are passed as the MATCH, COUNT and TYPE
+        options. Each page of keys is requested as soon as the previous page
+        arrives, concurrently with the caller processing the current page.
+        Other commands may be sent on the connection meanwhile.
+
+            async for key in conn.scan_iter(match='user:*', count=1000):
+                ...
+
+        Raises:
+            * Any type of HiredisError
+        """
+
+        return scan.async_items(scan.async_scan_pages(
+            self,
+            ('SCAN',),
+            scan.scan_options(match, count, type)
+        ))
+
+    def hscan_iter(
+            self,
+            key: CommandArg,
+            match: CommandArg = None,
+            count: int = None
+        ) -> AsyncIterator[Tuple]:
+        """Iterate over the (field, value) pairs of a hash with HSCAN.
+
+        See scan_iter().
+        """
+
+        return scan.async_pairs(scan.async_scan_pages(
+            self,
+            ('HSCAN', key),
+            scan.scan_options(match, count)
+        ))
+
+    def sscan_iter(
+            self,
+            key: CommandArg,
+            match: CommandArg = None,
+            count: int = None
+        ) -> AsyncIterator:
+        """Iterate over the members of a set with SSCAN. See scan_iter()."""
+
+        return scan.async_items(scan.async_scan_pages(
+            self,
+            ('SSCAN', key),
+            scan.scan_options(match, count)
+        ))
+
+    def zscan_iter(
+            self,
+            key: CommandArg,
+            match: CommandArg = None,
+            count: int = None
+        ) -> AsyncIterator[Tuple]:
+        """Iterate over the (member, score) pairs of a sorted set with ZSCAN.
+
+        Scores are converted to float. See scan_iter().
+        """
+
+        return scan.async_scored(scan.async_scan_pages(
+            self,
+            ('ZSCAN', key),
+            scan.scan_options(match, count)
+        ))
+
+    async def subscribe(
+            self,
+            *channels: CommandArg,
+            max_batches: int = 1000
+        ) -> Subscription:
+        """Subscribe to channels and return an async iterator of messages.
+
+        Returns once redis has confirmed every channel. Use a connection for
+        subscriptions only; other commands must not be sent on it while it
+        is subscribed. See Subscription for details.
+
+        Raises:
+            * ContextError (any type)
+        """
+
+        subscription = Subscription(self, channels, max_batches=max_batches)
+        await subscription.start()
+        return subscription
+
+    async def psubscribe(
+            self,
+            *patterns: CommandArg,
+            max_batches: int = 1000
+        ) -> Subscription:
+        """Subscribe to glob-style patterns. See subscribe()."""
+
+        subscription = Subscription(
+            self,
+            patterns,
+            pattern=True,
+            max_batches=max_batches
+        )
+        await subscription.start()
+        return subscription
+
+
+class AsyncConnectionStr(AsyncConnection):
+
+    def __init__(self,
+            ip: str = None,
+            port: int = 6379,
+            connect_timeout: float = None,
+            path: str = None
+        ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.path = path
+
+        self.context = None
+
+    _redis_connect = makemethod(wa.redis_connect)
+    _redis_connect_unix = makemethod(wa.redis_connect_unix)
+    _redis_command = makemethod(wa.redis_command)
+    _redis_command_args = makemethod(wa.redis_command_args)
+    _redis_pipeline = makemethod(wa.redis_pipeline)
+    _redis_subscribe = makemethod(wa.redis_subscribe)
+    _redis_unsubscribe = makemethod(wa.redis_unsubscribe)
+    _redis_disconnect = makemethod(wa.redis_disconnect)
+    _redis_free = makemethod(wa.redis_free)
+    _redis_set_reply_queue = makemethod(wa.redis_set_reply_queue)
+    _redis_set_read_hook = makemethod(wa.redis_set_read_hook)
+
+
+class AsyncConnectionBytes(AsyncConnection):
+
+    def __init__(self,
+            ip: bytes = None,
+            port: int = 6379,
+            connect_timeout: float = None,
+            path: bytes = None
+        ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.path = path
+
+        self.context = None
+
+    _redis_connect = makemethod(wab.redis_connect)
+    _redis_connect_unix = makemethod(wab.redis_connect_unix)
+    _redis_command = makemethod(wab.redis_command)
+    _redis_command_args = makemethod(wab.redis_command_args)
+    _redis_pipeline = makemethod(wab.redis_pipeline)
+    _redis_subscribe = makemethod(wab.redis_subscribe)
+    _redis_unsubscribe = makemethod(wab.redis_unsubscribe)
+    _redis_disconnect = makemethod(wab.redis_disconnect)
+    _redis_free = makemethod(wab.redis_free)
+    _redis_set_reply_queue = makemethod(wab.redis_set_reply_queue)
+    _redis_set_read_hook = makemethod(wab.redis_set_read_hook)
+
+
+class AsyncProtocolConnection(AsyncConnection):
+    """An AsyncConnection whose socket is owned by the event loop.
+
+    Commands are formatted and replies parsed by hiredis, but all socket I/O
+    goes through an asyncio transport, as for any asyncio.Protocol. See
+    wrappers_protocol.py. Created by AsyncConnection() with
+    `backend='protocol'`.
+    """
+
+    async def connect(self) -> None:
+        """Connect to redis.
+
+        If already connected, disconnect first.
+
+        Raises:
+            * IOError if the connection fails
+            * FastredisError if the connection timeout is exceeded
+        """
+
+        if self.context is not None:
+            await self.disconnect()
+
+        if self.path is not None:
+            connecting = self._redis_connect_unix(
+                path=self.path,
+                auto_pipeline=self.auto_pipeline
+            )
+        else:
+            connecting = self._redis_connect(
+                ip=self.ip,
+                port=self.port,
+                auto_pipeline=self.auto_pipeline
+            )
+        try:
+            self.context = await asyncio.wait_for(
+                connecting,
+                self.connect_timeout
+            )
+        except asyncio.TimeoutError:
+            raise FastredisError('timeout exceeded while connecting') from None
+        self.replies = self.context.replies
+        self.disconnected = self.context.disconnected
+        self.not_garbage = []
+        if self.profiler is not None:
+            self.profiler.attach(self)
+
+
+class AsyncProtocolConnectionStr(AsyncProtocolConnection):
+
+    def __init__(self,
+            ip: str = None,
+            port: int = 6379,
+            connect_timeout: float = None,
+            path: str = None
+        ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.path = path
+
+        self.context = None
+
+    _redis_connect = makemethod(wp.redis_connect)
+    _redis_connect_unix = makemethod(wp.redis_connect_unix)
+    _redis_command = makemethod(wp.redis_command)
+    _redis_command_args = makemethod(wp.redis_command_args)
+    _redis_pipeline = makemethod(wp.redis_pipeline)
+    _redis_subscribe = makemethod(wp.redis_subscribe)
+    _redis_unsubscribe = makemethod(wp.redis_unsubscribe)
+    _redis_disconnect = makemethod(wp.redis_disconnect)
+    _redis_free = makemethod(wp.redis_free)
+    _redis_set_reply_queue = makemethod(wp.redis_set_reply_queue)
+    _redis_set_read_hook = makemethod(wp.redis_set_read_hook)
+
+
+class AsyncProtocolConnectionBytes(AsyncProtocolConnection):
+
+    def __init__(self,
+            ip: bytes = None,
+            port: int = 6379,
+            connect_timeout: float = None,
+            path: bytes = None
+        ):
+        if (ip is None) == (path is None):
+            raise ValueError('exactly one of `ip` and `path` is required')
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.path = path
+
+        self.context = None
+
+    _redis_connect = makemethod(wpb.redis_connect)
+    _redis_connect_unix = makemethod(wpb.redis_connect_unix)
+    _redis_command = makemethod(wpb.redis_command)
+    _redis_command_args = makemethod(wpb.redis_command_args)
+    _redis_pipeline = makemethod(wpb.redis_pipeline)
+    _redis_subscribe = makemethod(wpb.redis_subscribe)
+    _redis_unsubscribe = makemethod(wpb.redis_unsubscribe)
+    _redis_disconnect = makemethod(wpb.redis_disconnect)
+    _redis_free = makemethod(wpb.redis_free)
+    _redis_set_reply_queue = makemethod(wpb.redis_set_reply_queue)
+    _redis_set_read_hook = makemethod(wpb.redis_set_read_hook)
+
 
 def AsyncConnection(*args, **kwargs):
-    """Create an asynchronous connection object."""
+    """Create an asynchronous connection object.
+
+    Pass `path` instead of `ip` to connect over a unix domain socket.
+    `observer` and `profiler` are installed with set_observer() and
+    set_profiler(). `backend` is 'hiredis', the default, to use the hiredis
+    async API, or 'protocol' to let the event loop own the socket through an
+    asyncio.Protocol. See AsyncProtocolConnection.
+
+    With `auto_pipeline`, True or an AutoPipeline, commands that concurrent
+    tasks send on their own are written together, once per iteration of the
+    event loop by default, as if they were pipelined. See AutoPipeline. It
+    is set as the `auto_pipeline` attribute, which applies from the next
+    connect().
+    """
 
     if 'encoding' in kwargs:
         encoding = kwargs['encoding']
@@ -307,10 +1291,33 @@ def AsyncConnection(*args, **kwargs):
     else:
         encoding = 'utf-8'
 
+    observer = kwargs.pop('observer', None)
+    profiler = kwargs.pop('profiler', None)
+    backend = kwargs.pop('backend', 'hiredis')
+    auto_pipeline = kwargs.pop('auto_pipeline', None)
+    if auto_pipeline is True:
+        auto_pipeline = wa.AutoPipeline()
+    elif auto_pipeline is False:
+        auto_pipeline = None
+    wa.check_auto_pipeline(auto_pipeline)
+
+    if backend == 'hiredis':
+        classes = AsyncConnectionStr, AsyncConnectionBytes
+    elif backend == 'protocol':
+        classes = AsyncProtocolConnectionStr, AsyncProtocolConnectionBytes
+    else:
+        raise ValueError('`backend` must be "hiredis" or "protocol"')
+
     if encoding == 'utf-8':
-        return AsyncConnectionStr(*args, **kwargs)
+        conn = classes[0](*args, **kwargs)
     elif encoding is None:
-        raise NotImplementedError
-        # return AsyncConnectionBytes(*args, **kwargs)
+        conn = classes[1](*args, **kwargs)
     else:
         raise ValueError('`encoding` must be "utf-8" or None')
+    if auto_pipeline is not None:
+        conn.auto_pipeline = auto_pipeline
+    if observer is not None:
+        conn.set_observer(observer)
+    if profiler is not None:
+        conn.set_profiler(profiler)
+    return conn
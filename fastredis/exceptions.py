@@ -11,6 +11,7 @@ Excpetion
                 EOFError (REDIS_ERR_EOF)
                 ProtocolError (REDIS_ERR_PROTOCOL)
                 OtherError (REDIS_ERR_OTHER)
+        PoolExhaustedError (no pooled connection available)
 
 """
 
@@ -69,6 +70,10 @@ class OutOfMemoryError(ContextError):
     """Raised on REDIS_ERR_OOM."""
     pass
 
+class PoolExhaustedError(FastredisError):
+    """Raised when a connection pool has no connection to hand out."""
+    pass
+
 
 def raise_context_error(context) -> None:
     """Raises an exception if `context` contains an error."""
@@ -7,6 +7,74 @@
 #include <sys/time.h> // struct timeval
 %}
 
+%include "common.i"
+
+%{
+/* Redis Cluster hash slot of a key: CRC16 (XMODEM) of the key, or of the part
+between the first '{' and the next '}' if that part is not empty, modulo 16384.
+*/
+static const uint16_t fr_crc16_table[256] = {
+    0x0000,0x1021,0x2042,0x3063,0x4084,0x50a5,0x60c6,0x70e7,
+    0x8108,0x9129,0xa14a,0xb16b,0xc18c,0xd1ad,0xe1ce,0xf1ef,
+    0x1231,0x0210,0x3273,0x2252,0x52b5,0x4294,0x72f7,0x62d6,
+    0x9339,0x8318,0xb37b,0xa35a,0xd3bd,0xc39c,0xf3ff,0xe3de,
+    0x2462,0x3443,0x0420,0x1401,0x64e6,0x74c7,0x44a4,0x5485,
+    0xa56a,0xb54b,0x8528,0x9509,0xe5ee,0xf5cf,0xc5ac,0xd58d,
+    0x3653,0x2672,0x1611,0x0630,0x76d7,0x66f6,0x5695,0x46b4,
+    0xb75b,0xa77a,0x9719,0x8738,0xf7df,0xe7fe,0xd79d,0xc7bc,
+    0x48c4,0x58e5,0x6886,0x78a7,0x0840,0x1861,0x2802,0x3823,
+    0xc9cc,0xd9ed,0xe98e,0xf9af,0x8948,0x9969,0xa90a,0xb92b,
+    0x5af5,0x4ad4,0x7ab7,0x6a96,0x1a71,0x0a50,0x3a33,0x2a12,
+    0xdbfd,0xcbdc,0xfbbf,0xeb9e,0x9b79,0x8b58,0xbb3b,0xab1a,
+    0x6ca6,0x7c87,0x4ce4,0x5cc5,0x2c22,0x3c03,0x0c60,0x1c41,
+    0xedae,0xfd8f,0xcdec,0xddcd,0xad2a,0xbd0b,0x8d68,0x9d49,
+    0x7e97,0x6eb6,0x5ed5,0x4ef4,0x3e13,0x2e32,0x1e51,0x0e70,
+    0xff9f,0xefbe,0xdfdd,0xcffc,0xbf1b,0xaf3a,0x9f59,0x8f78,
+    0x9188,0x81a9,0xb1ca,0xa1eb,0xd10c,0xc12d,0xf14e,0xe16f,
+    0x1080,0x00a1,0x30c2,0x20e3,0x5004,0x4025,0x7046,0x6067,
+    0x83b9,0x9398,0xa3fb,0xb3da,0xc33d,0xd31c,0xe37f,0xf35e,
+    0x02b1,0x1290,0x22f3,0x32d2,0x4235,0x5214,0x6277,0x7256,
+    0xb5ea,0xa5cb,0x95a8,0x8589,0xf56e,0xe54f,0xd52c,0xc50d,
+    0x34e2,0x24c3,0x14a0,0x0481,0x7466,0x6447,0x5424,0x4405,
+    0xa7db,0xb7fa,0x8799,0x97b8,0xe75f,0xf77e,0xc71d,0xd73c,
+    0x26d3,0x36f2,0x0691,0x16b0,0x6657,0x7676,0x4615,0x5634,
+    0xd94c,0xc96d,0xf90e,0xe92f,0x99c8,0x89e9,0xb98a,0xa9ab,
+    0x5844,0x4865,0x7806,0x6827,0x18c0,0x08e1,0x3882,0x28a3,
+    0xcb7d,0xdb5c,0xeb3f,0xfb1e,0x8bf9,0x9bd8,0xabbb,0xbb9a,
+    0x4a75,0x5a54,0x6a37,0x7a16,0x0af1,0x1ad0,0x2ab3,0x3a92,
+    0xfd2e,0xed0f,0xdd6c,0xcd4d,0xbdaa,0xad8b,0x9de8,0x8dc9,
+    0x7c26,0x6c07,0x5c64,0x4c45,0x3ca2,0x2c83,0x1ce0,0x0cc1,
+    0xef1f,0xff3e,0xcf5d,0xdf7c,0xaf9b,0xbfba,0x8fd9,0x9ff8,
+    0x6e17,0x7e36,0x4e55,0x5e74,0x2e93,0x3eb2,0x0ed1,0x1ef0
+};
+
+static unsigned int fr_key_slot(const char* key, size_t len) {
+    size_t start, end;
+    uint16_t crc = 0;
+
+    for (start = 0; start < len; start++) {
+        if (key[start] == '{') {
+            break;
+        }
+    }
+    if (start < len) {
+        for (end = start + 1; end < len; end++) {
+            if (key[end] == '}') {
+                break;
+            }
+        }
+        if (end < len && end != start + 1) {
+            key += start + 1;
+            len = end - start - 1;
+        }
+    }
+    for (start = 0; start < len; start++) {
+        crc = (crc << 8) ^ fr_crc16_table[((crc >> 8) ^ (unsigned char)key[start]) & 0xff];
+    }
+    return crc & 16383;
+}
+%}
+
 struct timeval {
     long tv_sec;
     long tv_usec;
@@ -63,11 +131,32 @@ redisContext* redisConnectWithTimeout(
     int port,
     const struct timeval tv
 );
+redisContext* redisConnectUnix(const char* path);
+redisContext* redisConnectUnixWithTimeout(
+    const char* path,
+    const struct timeval tv
+);
 redisReply* redisCommand(redisContext* c, const char* format);
 void freeReplyObject(redisReply* reply);
 void redisFree(redisContext* c);
+int redisSetTimeout(redisContext* c, const struct timeval tv);
 int redisAppendCommand(redisContext* c, const char* format);
 
+// The argv functions take a python sequence of str, bytes, int or buffer
+// objects in place of argc, argv and argvlen. See common.i.
+redisReply* redisCommandArgv(
+    redisContext* c,
+    int argc,
+    const char** argv,
+    const size_t* argvlen
+);
+int redisAppendCommandArgv(
+    redisContext* c,
+    int argc,
+    const char** argv,
+    const size_t* argvlen
+);
+
 %inline {
 
 redisReply* replies_index(redisReply** replies, size_t index) {
@@ -86,6 +175,113 @@ void redisGetReplyOL(redisContext* c, struct redisReplyOut* out) {
     out->ret = redisGetReply(c, (void**)&out->reply);
 }
 
+// The *Reduced functions convert the reply to python objects in C and free it
+// before returning. Error replies raise ReplyError, and a missing reply raises
+// the ContextError for the context's error code.
+
+PyObject* redisReplyReduce(redisReply* reply) {
+    // Converts a reply without freeing it.
+    return fr_reduce_reply(reply, 1);
+}
+
+PyObject* redisCommandReduced(redisContext* c, const char* command) {
+    return fr_reduce_and_free(c, (redisReply*)redisCommand(c, command), 1);
+}
+
+PyObject* redisCommandArgvReduced(
+    redisContext* c,
+    int argc,
+    const char** argv,
+    const size_t* argvlen
+) {
+    return fr_reduce_and_free(
+        c, (redisReply*)redisCommandArgv(c, argc, argv, argvlen), 1
+    );
+}
+
+PyObject* redisGetReplyReduced(redisContext* c) {
+    return fr_get_reply_reduced(c, 1);
+}
+
+PyObject* redisPipelineReduced(
+    redisContext* c,
+    PyObject* commands,
+    int raise_on_error
+) {
+    // Appends all commands, then collects all replies into a list. A command
+    // is a format string or a sequence of arguments.
+    return fr_pipeline_reduced(c, commands, raise_on_error, 1);
+}
+
+// The two halves of redisPipelineReduced(), with redisFlush() to send the
+// appended commands in between. Used to keep several connections busy at
+// once: append and flush to each, then collect the replies from each.
+PyObject* redisAppendCommands(redisContext* c, PyObject* commands) {
+    Py_ssize_t n = fr_append_commands(c, commands);
+    return n < 0 ? NULL : PyLong_FromSsize_t(n);
+}
+
+PyObject* redisFlush(redisContext* c) {
+    if (fr_flush(c) < 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+PyObject* redisGetRepliesReduced(
+    redisContext* c,
+    long count,
+    int raise_on_error
+) {
+    return fr_get_replies_reduced(c, (Py_ssize_t)count, raise_on_error, 1);
+}
+
+// Reads once and returns every complete reply, for callers that wait on the
+// socket with select(). See fr_read_available().
+PyObject* redisReadAvailable(redisContext* c) {
+    return fr_read_available(c, 1);
+}
+
+// Read the next reply, a string or nil, without creating a bytes or str
+// object for it. See fr_get_reply_into() and fr_get_reply_view().
+PyObject* redisGetReplyInto(redisContext* c, PyObject* out) {
+    return fr_get_reply_into(c, out);
+}
+
+PyObject* redisGetReplyView(redisContext* c) {
+    return fr_get_reply_view(c);
+}
+
+// Redis Cluster hash slot of a str, bytes or int key.
+PyObject* redisKeySlot(PyObject* key) {
+    const char* buf;
+    Py_ssize_t len;
+    PyObject* tmp = NULL;
+    unsigned int slot;
+
+    if (PyBytes_Check(key)) {
+        buf = PyBytes_AS_STRING(key);
+        len = PyBytes_GET_SIZE(key);
+    } else if (PyUnicode_Check(key)) {
+        buf = PyUnicode_AsUTF8AndSize(key, &len);
+        if (buf == NULL) {
+            return NULL;
+        }
+    } else if (PyLong_Check(key) && !PyBool_Check(key)) {
+        tmp = PyObject_Str(key);
+        if (tmp == NULL) {
+            return NULL;
+        }
+        buf = PyUnicode_AsUTF8AndSize(tmp, &len);
+    } else {
+        PyErr_SetString(PyExc_TypeError, "key must be str, bytes or int");
+        return NULL;
+    }
+    slot = fr_key_slot(buf, (size_t)len);
+    Py_XDECREF(tmp);
+    return PyLong_FromUnsignedLong(slot);
+}
+
 } // end %inline
 
 
@@ -134,6 +330,7 @@ typedef struct redisAsyncContext {
 } redisAsyncContext;
 
 redisAsyncContext* redisAsyncConnect(const char* ip, int port);
+redisAsyncContext* redisAsyncConnectUnix(const char* path);
 void redisAsyncDisconnect(redisAsyncContext* ac);
 void redisAsyncFree(redisAsyncContext* ac);
 int redisAsyncSetConnectCallback(redisAsyncContext* ac, void (*fn)(const struct redisAsyncContext*, int));
@@ -141,27 +338,173 @@ int redisAsyncSetDisconnectCallback(redisAsyncContext* ac, void (*fn)(const stru
 void redisAsyncHandleRead(redisAsyncContext* ac);
 void redisAsyncHandleWrite(redisAsyncContext* ac);
 
+%{
+static void fr_read_batch_cleanup(void* privdata) {
+    /* Runs instead of the cleanup hook if the read frees the context. */
+    fr_read_batch* batch = (fr_read_batch*)privdata;
+    batch->freed = 1;
+    if (batch->cleanup != NULL) {
+        batch->cleanup(batch->data);
+    }
+}
+
+/* Passes the replies of one read to `handler` in a single call.
+
+`replies` holds sequence numbers and values alternately. A handler with a
+`resolve` method, such as wrappers_async.ReplyQueue, gets the list. Any other
+handler is called once per reply, as by fr_async_reply().
+*/
+static void fr_resolve_batch(PyObject* handler, PyObject* replies) {
+    PyObject* resolve = PyObject_GetAttrString(handler, "resolve");
+    PyObject* ret;
+    Py_ssize_t i;
+
+    if (resolve != NULL) {
+        ret = PyObject_CallFunctionObjArgs(resolve, replies, NULL);
+        Py_DECREF(resolve);
+        if (ret == NULL) {
+            PyErr_WriteUnraisable(handler);
+        } else {
+            Py_DECREF(ret);
+        }
+        return;
+    }
+    if (!PyErr_ExceptionMatches(PyExc_AttributeError)) {
+        PyErr_WriteUnraisable(handler);
+        return;
+    }
+    PyErr_Clear();
+    for (i = 0; i + 1 < PyList_GET_SIZE(replies); i += 2) {
+        ret = PyObject_CallFunctionObjArgs(
+            handler,
+            PyList_GET_ITEM(replies, i),
+            PyList_GET_ITEM(replies, i + 1),
+            NULL
+        );
+        if (ret == NULL) {
+            PyErr_WriteUnraisable(handler);
+        } else {
+            Py_DECREF(ret);
+        }
+    }
+}
+
+/* Reads from an asynchronous context, then resolves all the replies it
+completed with one call to the reply handler.
+
+Every reply is reduced in C as it is parsed, as with redisAsyncHandleRead()
+alone, but the handler runs once per read event instead of once per reply.
+The read may free the context, after which it is not touched again. Contexts
+without a handler, or with other event library data, are read as usual.
+*/
+static void fr_async_handle_read(redisAsyncContext* ac) {
+    PyObject* handler = (PyObject*)ac->data;
+    fr_read_batch batch;
+
+    if (handler == NULL || ac->ev.data != NULL) {
+        redisAsyncHandleRead(ac);
+        return;
+    }
+    batch.replies = PyList_New(0);
+    if (batch.replies == NULL) {
+        PyErr_WriteUnraisable(handler);
+        redisAsyncHandleRead(ac);
+        return;
+    }
+    batch.magic = FR_READ_BATCH_MAGIC;
+    batch.data = ac->ev.data;
+    batch.cleanup = ac->ev.cleanup;
+    batch.freed = 0;
+    // the handler may only be referenced by the context, which the read can free
+    Py_INCREF(handler);
+    ac->ev.data = &batch;
+    ac->ev.cleanup = fr_read_batch_cleanup;
+    redisAsyncHandleRead(ac);
+    if (!batch.freed) {
+        ac->ev.data = batch.data;
+        ac->ev.cleanup = batch.cleanup;
+    }
+    if (PyList_GET_SIZE(batch.replies) > 0) {
+        fr_resolve_batch(handler, batch.replies);
+    }
+    Py_DECREF(batch.replies);
+    Py_DECREF(handler);
+}
+%}
+
 %inline {
 
 void redisAsyncCommandCBWrapper(
     struct redisAsyncContext* ac, void* reply, void* privdata
 ) {
-    void (*cb)(redisReply*) = (void (*)(redisReply*))privdata;
-    if (reply != NULL) {
-        cb((redisReply*)reply);
-    }
+    // The one callback used for every asynchronous command. See
+    // fr_async_reply() in common.i.
+    fr_async_reply(ac, reply, privdata, 1);
+}
+
+void redisAsyncSetReplyHandler(redisAsyncContext* ac, PyObject* handler) {
+    /* Sets the python callable that receives every reply on this context.
+
+    It is called as handler(seq, value) for each reply, where `seq` is the
+    sequence number the command was queued with, or as handler.resolve()
+    once per read by redisAsyncHandleReadBatched(). Only a borrowed reference
+    is kept, so the caller must keep the handler alive as long as the context.
+    */
+    ac->data = handler == Py_None ? NULL : handler;
+}
+
+void redisAsyncHandleReadBatched(redisAsyncContext* ac) {
+    /* Version of redisAsyncHandleRead() that passes all the replies of the
+    read to the reply handler at once, as handler.resolve(replies), where
+    `replies` alternates sequence numbers and values. See
+    fr_async_handle_read() above.
+    */
+    fr_async_handle_read(ac);
+}
+
+PyObject* redisAsyncGetReplyHandler(redisAsyncContext* ac) {
+    PyObject* handler = ac->data != NULL ? (PyObject*)ac->data : Py_None;
+    Py_INCREF(handler);
+    return handler;
 }
 
 int redisAsyncCommandOL(
     redisAsyncContext * ac,
     const char* command,
-    void (*cb)(void*)
+    size_t seq
+) {
+    /* Queues a command whose reply is passed to the reply handler along with
+    `seq`. This overload passes the sequence number as privdata, and uses
+    redisAsyncCommandCBWrapper() as the real callback.
+    */
+    return redisAsyncCommand(
+        ac, redisAsyncCommandCBWrapper, (void*)seq, command
+    );
+}
+
+int redisAsyncCommandArgvOL(
+    redisAsyncContext* ac,
+    int argc,
+    const char** argv,
+    const size_t* argvlen,
+    size_t seq
+) {
+    /* Argv version of redisAsyncCommandOL(). */
+    return redisAsyncCommandArgv(
+        ac, redisAsyncCommandCBWrapper, (void*)seq, argc, argv, argvlen
+    );
+}
+
+PyObject* redisAsyncCommandsOL(
+    redisAsyncContext* ac,
+    PyObject* commands,
+    size_t seq
 ) {
-    /* void (*cb)(void*) is really void (*cb)(redisReply*), but casting makes
-    using ctypes easier. This overload is to pass the callback as privdata, and
-    use redisAsyncCommandCBWrapper() as the real callback.
+    /* Queues a list of commands and writes them all at once. A command is a
+    format string or a sequence of arguments. Every reply is passed to the
+    reply handler with the same `seq`, in order.
     */
-    return redisAsyncCommand(ac, redisAsyncCommandCBWrapper, cb, command);
+    return fr_async_commands(ac, commands, redisAsyncCommandCBWrapper, (void*)seq);
 }
 
 redisReply* castRedisReply(unsigned long long reply_ptr) {
@@ -179,3 +522,30 @@ size_t writeBufferLen(redisAsyncContext* ac) {
 }
 
 } // end %inline
+
+
+/****************************
+ * Reader mappings
+ ****************************/
+
+
+// For event loop transports that read the socket themselves, such as the
+// asyncio.Protocol backend in wrappers_protocol.py.
+redisReader* redisReaderCreate(void);
+void redisReaderFree(redisReader* r);
+
+%inline {
+
+PyObject* redisReaderFeedReduced(redisReader* r, PyObject* data) {
+    // Feeds data to the reader and returns every complete reply, reduced.
+    // See fr_reader_feed().
+    return fr_reader_feed(r, data, 1);
+}
+
+PyObject* redisFormatCommands(PyObject* commands) {
+    // Formats a list of commands into one bytes object of RESP. A command is
+    // a format string or a sequence of arguments.
+    return fr_format_commands(commands);
+}
+
+} // end %inline
@@ -12,9 +12,12 @@ objects, not python str objects.
 
 %{
 #include <hiredis.h>
+#include <async.h>
 #include <sys/time.h> // struct timeval
 %}
 
+%include "common.i"
+
 
 %inline {
 
@@ -63,6 +66,21 @@ redisContext_b* redisConnectWithTimeout_b(
     return (redisContext_b*)redisConnectWithTimeout(ip, port, tv);
 }
 
+redisContext_b* redisConnectUnix_b(const char* path) {
+    return (redisContext_b*)redisConnectUnix(path);
+}
+
+redisContext_b* redisConnectUnixWithTimeout_b(
+    const char* path,
+    const struct timeval tv
+) {
+    return (redisContext_b*)redisConnectUnixWithTimeout(path, tv);
+}
+
+int redisSetTimeout_b(redisContext_b* c, const struct timeval tv) {
+    return redisSetTimeout((redisContext*)c, tv);
+}
+
 redisReply_b* redisCommand_b(redisContext_b* c, const char* format) {
     return (redisReply_b*)redisCommand((redisContext*)c, format);
 }
@@ -79,6 +97,24 @@ int redisAppendCommand_b(redisContext_b* c, const char* format) {
     return redisAppendCommand((redisContext*)c, format);
 }
 
+redisReply_b* redisCommandArgv_b(
+    redisContext_b* c,
+    int argc,
+    const char** argv,
+    const size_t* argvlen
+) {
+    return (redisReply_b*)redisCommandArgv((redisContext*)c, argc, argv, argvlen);
+}
+
+int redisAppendCommandArgv_b(
+    redisContext_b* c,
+    int argc,
+    const char** argv,
+    const size_t* argvlen
+) {
+    return redisAppendCommandArgv((redisContext*)c, argc, argv, argvlen);
+}
+
 struct redisReplyOut_b {
     redisReply_b* reply;
     int ret;
@@ -88,4 +124,156 @@ void redisGetReplyOL_b(redisContext_b* c, struct redisReplyOut_b* out) {
     out->ret = redisGetReply((redisContext*)c, (void**)&out->reply);
 }
 
+// Bytes versions of the *Reduced functions in hiredis.i.
+
+PyObject* redisReplyReduce_b(redisReply_b* reply) {
+    return fr_reduce_reply((redisReply*)reply, 0);
+}
+
+PyObject* redisCommandReduced_b(redisContext_b* c, const char* command) {
+    return fr_reduce_and_free(
+        (redisContext*)c, (redisReply*)redisCommand((redisContext*)c, command), 0
+    );
+}
+
+PyObject* redisCommandArgvReduced_b(
+    redisContext_b* c,
+    int argc,
+    const char** argv,
+    const size_t* argvlen
+) {
+    return fr_reduce_and_free(
+        (redisContext*)c,
+        (redisReply*)redisCommandArgv((redisContext*)c, argc, argv, argvlen),
+        0
+    );
+}
+
+PyObject* redisGetReplyReduced_b(redisContext_b* c) {
+    return fr_get_reply_reduced((redisContext*)c, 0);
+}
+
+PyObject* redisPipelineReduced_b(
+    redisContext_b* c,
+    PyObject* commands,
+    int raise_on_error
+) {
+    return fr_pipeline_reduced((redisContext*)c, commands, raise_on_error, 0);
+}
+
+PyObject* redisAppendCommands_b(redisContext_b* c, PyObject* commands) {
+    Py_ssize_t n = fr_append_commands((redisContext*)c, commands);
+    return n < 0 ? NULL : PyLong_FromSsize_t(n);
+}
+
+PyObject* redisFlush_b(redisContext_b* c) {
+    if (fr_flush((redisContext*)c) < 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+PyObject* redisGetRepliesReduced_b(
+    redisContext_b* c,
+    long count,
+    int raise_on_error
+) {
+    return fr_get_replies_reduced((redisContext*)c, (Py_ssize_t)count, raise_on_error, 0);
+}
+
+PyObject* redisReadAvailable_b(redisContext_b* c) {
+    return fr_read_available((redisContext*)c, 0);
+}
+
+PyObject* redisGetReplyInto_b(redisContext_b* c, PyObject* out) {
+    return fr_get_reply_into((redisContext*)c, out);
+}
+
+PyObject* redisGetReplyView_b(redisContext_b* c) {
+    return fr_get_reply_view((redisContext*)c);
+}
+
+} // end %inline
+
+
+/****************************
+ * Async mappings
+ ****************************/
+
+// Asynchronous contexts are created and driven by the hiredis module. Only the
+// functions that send commands or read replies need bytes versions, so the
+// context type is shared with the hiredis module and left opaque here.
+typedef struct redisAsyncContext redisAsyncContext;
+
+%{
+static void redisAsyncCommandCBWrapper_b(
+    struct redisAsyncContext* ac, void* reply, void* privdata
+) {
+    fr_async_reply(ac, reply, privdata, 0);
+}
+%}
+
+// Bytes versions of the asynchronous command functions in hiredis.i. Replies
+// go to the reply handler set with hiredis.redisAsyncSetReplyHandler().
+
+%inline {
+
+int redisAsyncCommandOL_b(
+    redisAsyncContext* ac,
+    const char* command,
+    size_t seq
+) {
+    return redisAsyncCommand(
+        ac, redisAsyncCommandCBWrapper_b, (void*)seq, command
+    );
+}
+
+int redisAsyncCommandArgvOL_b(
+    redisAsyncContext* ac,
+    int argc,
+    const char** argv,
+    const size_t* argvlen,
+    size_t seq
+) {
+    return redisAsyncCommandArgv(
+        ac, redisAsyncCommandCBWrapper_b, (void*)seq, argc, argv, argvlen
+    );
+}
+
+PyObject* redisAsyncCommandsOL_b(
+    redisAsyncContext* ac,
+    PyObject* commands,
+    size_t seq
+) {
+    return fr_async_commands(
+        ac, commands, redisAsyncCommandCBWrapper_b, (void*)seq
+    );
+}
+
+} // end %inline
+
+
+/****************************
+ * Reader mappings
+ ****************************/
+
+
+%inline {
+
+redisReader* redisReaderCreate_b(void) {
+    return redisReaderCreate();
+}
+
+void redisReaderFree_b(redisReader* r) {
+    redisReaderFree(r);
+}
+
+PyObject* redisReaderFeedReduced_b(redisReader* r, PyObject* data) {
+    return fr_reader_feed(r, data, 0);
+}
+
+PyObject* redisFormatCommands_b(PyObject* commands) {
+    return fr_format_commands(commands);
+}
+
 } // end %inline
@@ -0,0 +1,534 @@
+"""Per-command instrumentation of connections.
+
+An Observer installed on a connection with set_observer(), or passed to
+SyncConnection() or AsyncConnection() as `observer`, is told about every
+command the connection completes: its name, how long it took, the size of
+its reply and the error it raised, if any. CommandStats is an observer that
+keeps counts, error counts and fixed-memory latency and reply size
+histograms per command name:
+
+    stats = CommandStats()
+    pool = ConnectionPool('127.0.0.1', observer=stats)
+    ...
+    print(stats.report())
+
+The observer is installed by shadowing the connection's `_redis_*` methods
+on the instance, so connections without one run exactly the same code as
+before and pay nothing for it.
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, List, Optional
+
+from fastredis.exceptions import ContextError
+from fastredis.wrapper_tools import Command, CommandArg, ReplyValue
+
+
+class Histogram:
+    """Counts of integer values in log-linear buckets, HDR histogram style.
+
+    Values below 2 ** (`significant_bits` + 1) get a bucket each, and every
+    power of two above that is split into 2 ** `significant_bits` buckets,
+    so a value is known to within a relative error of 2 ** -significant_bits
+    (about 3% for the default of 5). Values above `max_value` are counted in
+    the last bucket. Memory use is fixed when the histogram is created.
+
+    Not thread-safe; CommandStats locks around it.
+    """
+
+    def __init__(self, significant_bits: int = 5, max_value: int = 1 << 40):
+        if not 1 <= significant_bits <= 16:
+            raise ValueError('significant_bits must be between 1 and 16')
+        if max_value < 1:
+            raise ValueError('max_value must be positive')
+        self.significant_bits = significant_bits
+        self.max_value = max_value
+        self.counts = [0] * (self._index(max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self.significant_bits - 1
+        if shift <= 0:
+            return value
+        return (shift << self.significant_bits) + (value >> shift)
+
+    def _highest(self, index: int) -> int:
+        """The highest value counted in bucket `index`."""
+
+        shift = (index >> self.significant_bits) - 1
+        if shift <= 0:
+            return index
+        mantissa = index - (shift << self.significant_bits)
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        """Count one value. Negative values are counted as 0."""
+
+        if value < 0:
+            value = 0
+        self.counts[self._index(min(value, self.max_value))] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> int:
+        """The nearest-rank `p`th percentile, 0 <= p <= 100.
+
+        Returns the highest value of the bucket holding it, but never more
+        than the largest value recorded.
+
+        Raises:
+            * ValueError if no values are recorded, or `p` is out of range
+        """
+
+        if not self.count:
+            raise ValueError('no values recorded')
+        if not 0 <= p <= 100:
+            raise ValueError('p must be between 0 and 100')
+        if p == 0:
+            return self.min
+        rank = max(1, math.ceil(p * self.count / 100 - 1e-9))
+        seen = 0
+        for index, count in enumerate(self.counts[:-1]):
+            seen += count
+            if seen >= rank:
+                return min(self._highest(index), self.max)
+        # the last bucket also holds every value above max_value
+        return self.max
+
+    def merge(self, other: 'Histogram') -> None:
+        """Add the counts of `other`, which must have the same buckets.
+
+        Raises:
+            * ValueError if the histograms have different buckets
+        """
+
+        if (other.significant_bits, other.max_value) != (
+                self.significant_bits, self.max_value
+            ):
+            raise ValueError('histograms have different buckets')
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def clear(self) -> None:
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+
+class Observer(ABC):
+    """Receives a record of every command a connection completes."""
+
+    @abstractmethod
+    def record(
+            self,
+            command: str,
+            elapsed_ns: int,
+            reply_size: int,
+            error: Optional[Exception]
+        ) -> None:
+        """Called once per command, after its reply is read.
+
+        `command` is the command name in upper case, as str for both str and
+        bytes connections. `elapsed_ns` runs from sending the command, or
+        writing it to the send buffer, to reading its reply; commands of a
+        pipeline share the time of the whole pipeline. `reply_size` is the
+        total length of the strings in the reply. `error` is the ReplyError
+        or ContextError the command failed with, if any.
+
+        Called on the thread, or in the event loop, that ran the command,
+        so it must be quick and must not raise.
+        """
+
+
+class CommandMetrics:
+    """What CommandStats knows about one command name."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency_ns = Histogram()
+        self.reply_size = Histogram()
+
+
+class CommandStats(Observer):
+    """An Observer keeping CommandMetrics per command name.
+
+    It is thread-safe, so it can be shared by all the connections of a pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: Dict[str, CommandMetrics] = {}
+
+    def record(
+            self,
+            command: str,
+            elapsed_ns: int,
+            reply_size: int,
+            error: Optional[Exception]
+        ) -> None:
+        with self._lock:
+            metrics = self.commands.get(command)
+            if metrics is None:
+                metrics = self.commands[command] = CommandMetrics()
+            metrics.count += 1
+            if error is not None:
+                metrics.errors += 1
+            metrics.latency_ns.record(elapsed_ns)
+            metrics.reply_size.record(reply_size)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.commands = {}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Counts, latency in microseconds and mean reply size per command."""
+
+        with self._lock:
+            summary = {}
+            for command, metrics in sorted(self.commands.items()):
+                latency = metrics.latency_ns
+                summary[command] = {
+                    'count': metrics.count,
+                    'errors': metrics.errors,
+                    'mean_us': latency.mean / 1e3,
+                    'p50_us': latency.percentile(50) / 1e3,
+                    'p99_us': latency.percentile(99) / 1e3,
+                    'p999_us': latency.percentile(99.9) / 1e3,
+                    'max_us': latency.max / 1e3,
+                    'mean_reply_bytes': metrics.reply_size.mean,
+                }
+            return summary
+
+    def report(self) -> str:
+        """summary() as a table, busiest command first."""
+
+        columns = (
+            'count', 'errors', 'mean_us', 'p50_us', 'p99_us', 'p999_us',
+            'max_us', 'mean_reply_bytes'
+        )
+        rows = sorted(
+            self.summary().items(),
+            key=lambda item: -item[1]['count']
+        )
+        width = max([len('command')] + [len(command) for command, _ in rows])
+        lines = [
+            'command'.ljust(width) + ''.join(
+                column.replace('_', ' ').rjust(14) for column in columns
+            )
+        ]
+        for command, row in rows:
+            lines.append(command.ljust(width) + ''.join(
+                f'{row[column]:14.1f}' if isinstance(row[column], float)
+                else f'{row[column]:14d}'
+                for column in columns
+            ))
+        return '\n'.join(lines)
+
+
+def reply_size(reply: ReplyValue) -> int:
+    """Total length of the strings in a reply, nested ones included."""
+
+    if isinstance(reply, (str, bytes)):
+        return len(reply)
+    if isinstance(reply, memoryview):
+        return reply.nbytes
+    if isinstance(reply, (tuple, list)):
+        return sum(reply_size(item) for item in reply)
+    return 0
+
+
+def _arg_name(arg: CommandArg) -> str:
+    if isinstance(arg, str):
+        return arg.upper()
+    if isinstance(arg, int):
+        return str(arg)
+    return bytes(arg).decode('utf-8', 'replace').upper()
+
+
+def command_name(command: Command) -> str:
+    """The name of a command given as a format string or as arguments."""
+
+    if isinstance(command, (str, bytes)):
+        command = command.split(None, 1)
+    if not command:
+        return ''
+    return _arg_name(command[0])
+
+
+def _first_error(replies: List) -> None:
+    for reply in replies:
+        if isinstance(reply, Exception):
+            raise reply
+
+
+SYNC_METHODS = (
+    '_redis_free', '_redis_command', '_redis_command_args', '_redis_pipeline',
+    '_redis_write', '_redis_write_args', '_redis_write_many',
+    '_redis_read', '_redis_read_into', '_redis_read_view', '_redis_read_many',
+)
+ASYNC_METHODS = ('_redis_command', '_redis_command_args', '_redis_pipeline')
+
+
+def _sync_methods(original: dict, observer: Observer) -> dict:
+    """Versions of a SyncConnection's `_redis_*` methods reporting to
+    `observer`, calling the `original` ones."""
+
+    clock = time.perf_counter_ns
+    record = observer.record
+    # (name, time written) of each command whose reply is not read yet
+    written = deque()
+
+    def call(name, func, *args):
+        start = clock()
+        try:
+            reply = func(*args)
+        except Exception as e:
+            record(name, clock() - start, 0, e)
+            if isinstance(e, ContextError):
+                written.clear()
+            raise
+        record(name, clock() - start, reply_size(reply), None)
+        return reply
+
+    def call_many(names, func, *args):
+        start = clock()
+        try:
+            replies = func(*args)
+        except Exception as e:
+            elapsed = clock() - start
+            for name in names:
+                record(name, elapsed, 0, e)
+            if isinstance(e, ContextError):
+                written.clear()
+            raise
+        elapsed = clock() - start
+        for name, reply in zip(names, replies):
+            if isinstance(reply, Exception):
+                record(name, elapsed, 0, reply)
+            else:
+                record(name, elapsed, reply_size(reply), None)
+        return replies
+
+    def read_one(func, size, *args):
+        try:
+            reply = func(*args)
+        except Exception as e:
+            if written:
+                name, start = written.popleft()
+                record(name, clock() - start, 0, e)
+            if isinstance(e, ContextError):
+                written.clear()
+            raise
+        if written:
+            name, start = written.popleft()
+            record(name, clock() - start, size(reply), None)
+        return reply
+
+    def _redis_free(context):
+        written.clear()
+        original['_redis_free'](context)
+
+    def _redis_command(context, command):
+        return call(command_name(command), original['_redis_command'], context, command)
+
+    def _redis_command_args(context, args):
+        return call(command_name(args), original['_redis_command_args'], context, args)
+
+    def _redis_pipeline(context, commands, raise_on_error=True):
+        replies = call_many(
+            [command_name(command) for command in commands],
+            original['_redis_pipeline'],
+            context,
+            commands,
+            False
+        )
+        if raise_on_error:
+            _first_error(replies)
+        return replies
+
+    def _redis_write(context, command):
+        original['_redis_write'](context, command)
+        written.append((command_name(command), clock()))
+
+    def _redis_write_args(context, args):
+        original['_redis_write_args'](context, args)
+        written.append((command_name(args), clock()))
+
+    def _redis_write_many(context, commands):
+        count = original['_redis_write_many'](context, commands)
+        now = clock()
+        written.extend((command_name(command), now) for command in commands)
+        return count
+
+    def _redis_read(context):
+        return read_one(original['_redis_read'], reply_size, context)
+
+    def _redis_read_into(context, out):
+        return read_one(
+            original['_redis_read_into'],
+            lambda copied: copied or 0,
+            context,
+            out
+        )
+
+    def _redis_read_view(context):
+        return read_one(original['_redis_read_view'], reply_size, context)
+
+    def _redis_read_many(context, count, raise_on_error=True):
+        try:
+            replies = original['_redis_read_many'](context, count, False)
+        except Exception as e:
+            if written:
+                name, start = written.popleft()
+                record(name, clock() - start, 0, e)
+            if isinstance(e, ContextError):
+                written.clear()
+            raise
+        now = clock()
+        for reply in replies:
+            if not written:
+                break
+            name, start = written.popleft()
+            if isinstance(reply, Exception):
+                record(name, now - start, 0, reply)
+            else:
+                record(name, now - start, reply_size(reply), None)
+        if raise_on_error:
+            _first_error(replies)
+        return replies
+
+    return {
+        '_redis_free': _redis_free,
+        '_redis_command': _redis_command,
+        '_redis_command_args': _redis_command_args,
+        '_redis_pipeline': _redis_pipeline,
+        '_redis_write': _redis_write,
+        '_redis_write_args': _redis_write_args,
+        '_redis_write_many': _redis_write_many,
+        '_redis_read': _redis_read,
+        '_redis_read_into': _redis_read_into,
+        '_redis_read_view': _redis_read_view,
+        '_redis_read_many': _redis_read_many,
+    }
+
+
+def _async_methods(original: dict, observer: Observer) -> dict:
+    """_sync_methods() for an AsyncConnection."""
+
+    clock = time.perf_counter_ns
+    record = observer.record
+
+    async def call(name, func, *args):
+        start = clock()
+        try:
+            reply = await func(*args)
+        except Exception as e:
+            record(name, clock() - start, 0, e)
+            raise
+        record(name, clock() - start, reply_size(reply), None)
+        return reply
+
+    async def _redis_command(context, command, replies=None):
+        return await call(
+            command_name(command),
+            original['_redis_command'],
+            context,
+            command,
+            replies
+        )
+
+    async def _redis_command_args(context, args, replies=None):
+        return await call(
+            command_name(args),
+            original['_redis_command_args'],
+            context,
+            args,
+            replies
+        )
+
+    async def _redis_pipeline(context, commands, raise_on_error=True, replies=None):
+        names = [command_name(command) for command in commands]
+        start = clock()
+        try:
+            results = await original['_redis_pipeline'](
+                context,
+                commands,
+                False,
+                replies
+            )
+        except Exception as e:
+            elapsed = clock() - start
+            for name in names:
+                record(name, elapsed, 0, e)
+            raise
+        elapsed = clock() - start
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                record(name, elapsed, 0, result)
+            else:
+                record(name, elapsed, reply_size(result), None)
+        if raise_on_error:
+            _first_error(results)
+        return results
+
+    return {
+        '_redis_command': _redis_command,
+        '_redis_command_args': _redis_command_args,
+        '_redis_pipeline': _redis_pipeline,
+    }
+
+
+def _bind(connection, names, observed, methods: Optional[dict]) -> None:
+    for name in names:
+        connection.__dict__.pop(name, None)
+    methods = dict(methods or {})
+    if connection.observer is not None:
+        cls = type(connection)
+        original = {
+            name: methods.get(name) or getattr(cls, name).__get__(connection, cls)
+            for name in names
+        }
+        methods = observed(original, connection.observer)
+    connection.__dict__.update(methods)
+
+
+def bind_sync(connection, methods: Optional[dict] = None) -> None:
+    """Shadows the `_redis_*` methods of a SyncConnection for its observer.
+
+    `methods` are installed in place of the class methods of the same
+    names, such as the profiled ones of a Profiler, and are wrapped for the
+    observer like the others. A connection with no observer and no
+    `methods` is left with the class methods only.
+    """
+
+    _bind(connection, SYNC_METHODS, _sync_methods, methods)
+
+
+def bind_async(connection, methods: Optional[dict] = None) -> None:
+    """bind_sync() for an AsyncConnection."""
+
+    _bind(connection, ASYNC_METHODS, _async_methods, methods)
@@ -0,0 +1,309 @@
+"""Pipeline classes for synchronous and asynchronous clients."""
+
+from typing import Dict, List, Sequence, Union
+
+from fastredis.exceptions import ReplyError
+from fastredis.script import Script, is_noscript
+from fastredis.wrapper_tools import Command, CommandArg, ReplyValue
+
+
+def _noscript_calls(scripts: Dict[int, Script], results: list) -> List[int]:
+    """Returns the indices of script calls that failed with NOSCRIPT.
+
+    Also records on each script whether the server had it cached.
+    """
+
+    failed = []
+    for i, script in scripts.items():
+        if is_noscript(results[i]):
+            script.loaded = False
+            failed.append(i)
+        else:
+            script.loaded = True
+    return failed
+
+
+def _finish(results: list, hidden: Sequence[int], raise_on_error: bool) -> list:
+    """Drops the replies to SCRIPT LOAD commands queued by script().
+
+    Then raises the first error if `raise_on_error` is True.
+    """
+
+    if hidden:
+        hidden = set(hidden)
+        results = [r for i, r in enumerate(results) if i not in hidden]
+    if raise_on_error:
+        for r in results:
+            if isinstance(r, Exception):
+                raise r
+    return results
+
+
+class Pipeline:
+    """Queues commands and sends them to redis in a single write.
+
+    All replies are collected in one call when execute() is called. Used as a
+    context manager, queued commands that were not executed yet are executed
+    on a clean exit and discarded if an exception was raised:
+
+        with conn.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('GET', key)
+            values = pipe.execute()
+
+    A pipeline is bound to one connection and is not thread safe.
+    """
+
+    def __init__(self, connection, raise_on_error: bool = True):
+        self.connection = connection
+        self.raise_on_error = raise_on_error
+        self.commands: List[Command] = []
+        self.results: List[Union[ReplyValue, ReplyError]] = None
+        # index in commands -> script, for calls queued with script()
+        self._scripts = {}
+        # script -> index of the SCRIPT LOAD queued before its first call
+        self._preloads = {}
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self.commands:
+            self.execute()
+        else:
+            self.reset()
+
+    def command(self, command: Command) -> 'Pipeline':
+        """Queue a command, formatted as for SyncConnection.command()."""
+
+        self.commands.append(command)
+        return self
+
+    def command_args(self, *args: CommandArg) -> 'Pipeline':
+        """Queue a command, given as for SyncConnection.command_args()."""
+
+        self.commands.append(args)
+        return self
+
+    def script(
+            self,
+            script,
+            keys: Sequence[CommandArg] = (),
+            args: Sequence[CommandArg] = ()
+        ) -> 'Pipeline':
+        """Queue a call to a Script from register_script(), with EVALSHA.
+
+        If the script is not known to be cached on the server, a SCRIPT LOAD
+        is queued before its first call. Its reply is left out of the
+        results. If a call still fails with NOSCRIPT, for example after a
+        SCRIPT FLUSH, the script is loaded and the call is sent again once
+        the rest of the pipeline has run, and its reply is put in place.
+        """
+
+        if not script.loaded and script not in self._preloads:
+            self._preloads[script] = len(self.commands)
+            self.commands.append(('SCRIPT', 'LOAD', script.source))
+        self._scripts[len(self.commands)] = script
+        self.commands.append(script.args(keys, args))
+        return self
+
+    def reset(self) -> None:
+        """Discard all queued commands."""
+
+        self.commands = []
+        self._scripts = {}
+        self._preloads = {}
+
+    def execute(
+            self,
+            raise_on_error: bool = None,
+            deadline: float = None
+        ) -> List[Union[ReplyValue, ReplyError]]:
+        """Send all queued commands and return their replies in order.
+
+        If `raise_on_error` is True, the first ReplyError is raised after all
+        replies are read. If it is False, errors are returned in place as
+        exception instances. Defaults to the value given to the constructor.
+        `deadline` is as for SyncConnection.command().
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if raising on errors and the server replied with
+                  an error
+                * ContextError if there are connection issues
+            * FastredisError if invalid response types
+        """
+
+        if raise_on_error is None:
+            raise_on_error = self.raise_on_error
+        commands = self.commands
+        scripts = self._scripts
+        hidden = self._preloads.values()
+        self.reset()
+        if not commands:
+            self.results = []
+            return self.results
+        if not scripts:
+            self.results = self._run(commands, raise_on_error, deadline)
+            return self.results
+
+        results = self._run(commands, False, deadline)
+        failed = _noscript_calls(scripts, results)
+        if failed:
+            for script in {scripts[i] for i in failed}:
+                try:
+                    script.load(self.connection)
+                except ReplyError as e:
+                    for i in failed:
+                        if scripts[i] is script:
+                            results[i] = e
+            retry = [i for i in failed if scripts[i].loaded]
+            if retry:
+                retried = self._run([commands[i] for i in retry], False, deadline)
+                for i, result in zip(retry, retried):
+                    results[i] = result
+        self.results = _finish(results, hidden, raise_on_error)
+        return self.results
+
+    def _run(
+            self,
+            commands: List[Command],
+            raise_on_error: bool,
+            deadline: float
+        ) -> List[Union[ReplyValue, ReplyError]]:
+        if deadline is not None:
+            return self.connection._call_by(
+                deadline,
+                self.connection._redis_pipeline,
+                self.connection.context,
+                commands,
+                raise_on_error
+            )
+        return self.connection._redis_pipeline(
+            self.connection.context,
+            commands,
+            raise_on_error
+        )
+
+
+class AsyncPipeline:
+    """Queues commands and sends them to redis in a single write.
+
+    The asynchronous version of Pipeline. execute() queues every command on
+    the connection without yielding to the event loop, writes them all at
+    once, and resolves a single future with the list of replies:
+
+        async with conn.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('SET', key, key)
+            await pipe.execute()
+    """
+
+    def __init__(self, connection, raise_on_error: bool = True):
+        self.connection = connection
+        self.raise_on_error = raise_on_error
+        self.commands: List[Command] = []
+        self.results: List[Union[ReplyValue, ReplyError]] = None
+        # index in commands -> script, for calls queued with script()
+        self._scripts = {}
+        # script -> index of the SCRIPT LOAD queued before its first call
+        self._preloads = {}
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self.commands:
+            await self.execute()
+        else:
+            self.reset()
+
+    def command(self, command: Command) -> 'AsyncPipeline':
+        """Queue a command, formatted as for AsyncConnection.command()."""
+
+        self.commands.append(command)
+        return self
+
+    def command_args(self, *args: CommandArg) -> 'AsyncPipeline':
+        """Queue a command, given as for AsyncConnection.command_args()."""
+
+        self.commands.append(args)
+        return self
+
+    def script(
+            self,
+            script,
+            keys: Sequence[CommandArg] = (),
+            args: Sequence[CommandArg] = ()
+        ) -> 'AsyncPipeline':
+        """Queue a call to an AsyncScript. See Pipeline.script()."""
+
+        if not script.loaded and script not in self._preloads:
+            self._preloads[script] = len(self.commands)
+            self.commands.append(('SCRIPT', 'LOAD', script.source))
+        self._scripts[len(self.commands)] = script
+        self.commands.append(script.args(keys, args))
+        return self
+
+    def reset(self) -> None:
+        """Discard all queued commands."""
+
+        self.commands = []
+        self._scripts = {}
+        self._preloads = {}
+
+    async def execute(
+            self,
+            raise_on_error: bool = None
+        ) -> List[Union[ReplyValue, ReplyError]]:
+        """Send all queued commands and return their replies in order.
+
+        See Pipeline.execute().
+        """
+
+        if raise_on_error is None:
+            raise_on_error = self.raise_on_error
+        commands = self.commands
+        scripts = self._scripts
+        hidden = self._preloads.values()
+        self.reset()
+        if not scripts:
+            self.results = await self._run(commands, raise_on_error)
+            return self.results
+
+        results = await self._run(commands, False)
+        failed = _noscript_calls(scripts, results)
+        if failed:
+            for script in {scripts[i] for i in failed}:
+                try:
+                    await script.load(self.connection)
+                except ReplyError as e:
+                    for i in failed:
+                        if scripts[i] is script:
+                            results[i] = e
+            retry = [i for i in failed if scripts[i].loaded]
+            if retry:
+                retried = await self._run([commands[i] for i in retry], False)
+                for i, result in zip(retry, retried):
+                    results[i] = result
+        self.results = _finish(results, hidden, raise_on_error)
+        return self.results
+
+    async def _run(
+            self,
+            commands: List[Command],
+            raise_on_error: bool
+        ) -> List[Union[ReplyValue, ReplyError]]:
+        return await self.connection._redis_pipeline(
+            self.connection.context,
+            commands,
+            raise_on_error,
+            self.connection.replies
+        )
+
@@ -0,0 +1,536 @@
+"""Connection pools shared by many threads or coroutines."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+import fastredis.bulk as bulk
+from fastredis.connections import AsyncConnection, SyncConnection
+from fastredis.pipeline import AsyncPipeline
+from fastredis.exceptions import FastredisError, PoolExhaustedError
+from fastredis.wrapper_tools import Command, CommandArg, ReplyValue
+
+
+class ConnectionPool:
+    """Thread-safe pool of synchronous connections.
+
+    Connections are created lazily, up to `max_size` at once, and handed to
+    one thread at a time. Positional and keyword arguments, including
+    `encoding`, are passed to SyncConnection(), so a pool hands out either
+    SyncConnectionStr or SyncConnectionBytes instances:
+
+        pool = ConnectionPool('127.0.0.1', max_size=8)
+        with pool.connection() as conn:
+            conn.command_args('GET', key)
+
+    Idle connections are kept most recently used first. Connections idle for
+    longer than `idle_timeout` seconds are disconnected whenever the pool is
+    used, or when reap() is called. If `health_check` is True, an idle
+    connection is sent a PING before being handed out and is reconnected if
+    that fails.
+
+    The bulk helpers mget(), mset(), delete_many() and hgetall_many() spread
+    their chunks over as many connections as are free, up to one per chunk.
+    Every connection is written to before any reply is read, so they all
+    work at once. Results are still in input order.
+    """
+
+    def __init__(self,
+            *args,
+            max_size: int = 10,
+            idle_timeout: float = None,
+            health_check: bool = False,
+            **kwargs
+        ):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        if idle_timeout is not None and idle_timeout < 0:
+            raise ValueError('idle_timeout must be nonnegative or None')
+
+        self.args = args
+        self.kwargs = kwargs
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+
+        self._cond = threading.Condition(threading.Lock())
+        # (connection, time it was released), oldest on the left
+        self._idle: Deque[Tuple[SyncConnection, float]] = deque()
+        self._size = 0
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle or in use."""
+
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Number of idle connections."""
+
+        return len(self._idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _take_expired(self, now: float) -> list:
+        """Removes idle connections past the idle timeout. Call with the lock."""
+
+        expired = []
+        if self.idle_timeout is None:
+            return expired
+        limit = now - self.idle_timeout
+        while self._idle and self._idle[0][1] <= limit:
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        return expired
+
+    def _discard(self) -> None:
+        """Frees the slot of a connection that was dropped while in use."""
+
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def acquire(self, block: bool = True, timeout: float = None) -> SyncConnection:
+        """Take a connected connection from the pool.
+
+        If all `max_size` connections are in use, wait up to `timeout`
+        seconds (forever if None) for one to be released, or fail at once if
+        `block` is False. The connection must be given back with release().
+
+        Raises:
+            * PoolExhaustedError if no connection became available
+            * ContextError (any type) if a new connection cannot be made
+            * FastredisError if the pool is closed
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise FastredisError('Connection pool is closed')
+                expired = self._take_expired(time.monotonic())
+                if self._idle:
+                    conn = self._idle.pop()[0]
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                if not block:
+                    raise PoolExhaustedError('No idle connection in the pool')
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolExhaustedError(
+                            'Timed out waiting for a connection'
+                        )
+                self._cond.wait(remaining)
+
+        for old in expired:
+            old.disconnect()
+
+        try:
+            if conn is None:
+                conn = SyncConnection(*self.args, **self.kwargs)
+                conn.connect()
+            elif self.health_check:
+                try:
+                    conn.command_args('PING')
+                except FastredisError:
+                    conn.connect()
+        except BaseException:
+            if conn is not None:
+                conn.disconnect()
+            self._discard()
+            raise
+        return conn
+
+    def release(self, conn: SyncConnection) -> None:
+        """Give a connection back to the pool.
+
+        A connection that is no longer usable, for example after a timeout,
+        is disconnected instead of being reused.
+        """
+
+        usable = conn.usable
+        with self._cond:
+            if self._closed or not usable:
+                self._size -= 1
+                keep = False
+            else:
+                self._idle.append((conn, time.monotonic()))
+                keep = True
+            expired = self._take_expired(time.monotonic())
+            self._cond.notify()
+        if not keep:
+            conn.disconnect()
+        for old in expired:
+            old.disconnect()
+
+    @contextmanager
+    def connection(
+            self,
+            block: bool = True,
+            timeout: float = None
+        ) -> Iterator[SyncConnection]:
+        """Context manager version of acquire() and release()."""
+
+        conn = self.acquire(block=block, timeout=timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def command(self, command: Command) -> ReplyValue:
+        """Run SyncConnection.command() on a pooled connection."""
+
+        conn = self.acquire()
+        try:
+            return conn.command(command)
+        finally:
+            self.release(conn)
+
+    def command_args(self, *args: CommandArg) -> ReplyValue:
+        """Run SyncConnection.command_args() on a pooled connection."""
+
+        conn = self.acquire()
+        try:
+            return conn.command_args(*args)
+        finally:
+            self.release(conn)
+
+    def mget(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List:
+        """SyncConnection.mget(), spread over free pooled connections."""
+
+        return bulk.run_pool(self, *bulk.mget_plan(keys, chunk_size))
+
+    def mset(
+            self,
+            mapping: Mapping[CommandArg, CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> None:
+        """SyncConnection.mset(), spread over free pooled connections."""
+
+        return bulk.run_pool(self, *bulk.mset_plan(mapping, chunk_size))
+
+    def delete_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> int:
+        """SyncConnection.delete_many(), spread over free pooled connections."""
+
+        return bulk.run_pool(self, *bulk.delete_many_plan(keys, chunk_size))
+
+    def hgetall_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List[Dict]:
+        """SyncConnection.hgetall_many(), spread over free pooled connections."""
+
+        return bulk.run_pool(self, *bulk.hgetall_many_plan(keys, chunk_size))
+
+    def reap(self) -> int:
+        """Disconnect connections idle for longer than `idle_timeout`.
+
+        Returns the number of connections disconnected.
+        """
+
+        with self._cond:
+            expired = self._take_expired(time.monotonic())
+            if expired:
+                self._cond.notify(len(expired))
+        for conn in expired:
+            conn.disconnect()
+        return len(expired)
+
+    def close(self) -> None:
+        """Disconnect all idle connections and refuse further acquires.
+
+        Connections still in use are disconnected when they are released.
+        This call is idempotent.
+        """
+
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.disconnect()
+
+
+class AsyncConnectionPool:
+    """Spreads commands from many coroutines across several async connections.
+
+    A single AsyncConnection writes every command to one socket and reads
+    every reply from it. The pool opens `min_size` connections in parallel
+    with open() and sends each command over the connection with the fewest
+    replies pending. Positional and keyword arguments, including `encoding`,
+    are passed to AsyncConnection():
+
+        async with AsyncConnectionPool('127.0.0.1', max_size=8) as pool:
+            await pool.command_args('GET', key)
+
+    When every connection has at least `max_pending` replies pending, one
+    more connection is opened in the background, up to `max_size`. Commands
+    never wait for it. Connections beyond `min_size` with nothing pending for
+    `idle_timeout` seconds are disconnected, if `idle_timeout` is not None.
+    The bulk helpers mget(), mset(), delete_many() and hgetall_many() send
+    their chunks as one pipeline per open connection and await them together.
+
+    Pools must be used from the event loop they were opened in.
+    """
+
+    def __init__(self,
+            *args,
+            min_size: int = 1,
+            max_size: int = 4,
+            max_pending: int = 32,
+            idle_timeout: float = None,
+            **kwargs
+        ):
+        if min_size < 1:
+            raise ValueError('min_size must be at least 1')
+        if max_size < min_size:
+            raise ValueError('max_size must be at least min_size')
+        if max_pending < 1:
+            raise ValueError('max_pending must be at least 1')
+        if idle_timeout is not None and idle_timeout < 0:
+            raise ValueError('idle_timeout must be nonnegative or None')
+
+        self.args = args
+        self.kwargs = kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+
+        self.connections: List[AsyncConnection] = []
+        # connection -> last time it was picked with no replies pending
+        self._last_busy: Dict[AsyncConnection, float] = {}
+        self._growing = None
+        self._closing = set()
+        self._closed = True
+
+    @property
+    def size(self) -> int:
+        """Number of open connections."""
+
+        return len(self.connections)
+
+    @property
+    def pending(self) -> int:
+        """Number of replies pending over all connections."""
+
+        return sum(len(conn.replies) for conn in self.connections)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _connect(self) -> AsyncConnection:
+        conn = AsyncConnection(*self.args, **self.kwargs)
+        await conn.connect()
+        return conn
+
+    async def open(self) -> None:
+        """Open `min_size` connections in parallel.
+
+        Raises the first connection error, after closing any connections
+        that were made.
+        """
+
+        if not self._closed:
+            return
+        results = await asyncio.gather(
+            *(self._connect() for _ in range(self.min_size)),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await asyncio.gather(*(
+                conn.disconnect(timeout=0)
+                for conn in results
+                if not isinstance(conn, BaseException)
+            ))
+            raise errors[0]
+        now = time.monotonic()
+        self.connections = list(results)
+        self._last_busy = {conn: now for conn in results}
+        self._closed = False
+
+    async def close(self, timeout: float = None) -> None:
+        """Disconnect every connection, waiting up to `timeout` for each.
+
+        This call is idempotent.
+        """
+
+        self._closed = True
+        if self._growing is not None:
+            self._growing.cancel()
+            self._growing = None
+        connections = self.connections
+        self.connections = []
+        self._last_busy = {}
+        await asyncio.gather(
+            *(conn.disconnect(timeout=timeout) for conn in connections),
+            *self._closing
+        )
+
+    def _grow_done(self, task: asyncio.Task) -> None:
+        self._growing = None
+        if task.cancelled() or task.exception() is not None:
+            return
+        conn = task.result()
+        if self._closed:
+            self._retire(conn)
+            return
+        self.connections.append(conn)
+        self._last_busy[conn] = time.monotonic()
+
+    def _retire(self, conn: AsyncConnection) -> None:
+        task = asyncio.ensure_future(conn.disconnect())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _drop_lost(self) -> None:
+        """Forgets connections whose disconnect callback has run.
+
+        hiredis frees the context itself after that callback.
+        """
+
+        for conn in list(self.connections):
+            if conn.disconnected.done():
+                if not conn.disconnected.cancelled():
+                    conn.disconnected.exception()
+                self.connections.remove(conn)
+                del self._last_busy[conn]
+                conn.context = None
+
+    def _shrink(self, now: float, keep: AsyncConnection) -> None:
+        """Retires idle connections, other than `keep`, which was just picked."""
+
+        limit = now - self.idle_timeout
+        for conn in list(self.connections):
+            if len(self.connections) <= self.min_size:
+                return
+            if conn is keep:
+                continue
+            if len(conn.replies) == 0 and self._last_busy[conn] <= limit:
+                self.connections.remove(conn)
+                del self._last_busy[conn]
+                self._retire(conn)
+
+    def connection(self) -> AsyncConnection:
+        """Return the open connection with the fewest replies pending.
+
+        This also drops connections that were lost, and grows or shrinks the
+        pool as described in the class docstring.
+
+        Raises:
+            * FastredisError if the pool is not open or has no connections
+        """
+
+        if self._closed:
+            raise FastredisError('Connection pool is not open')
+
+        connections = self.connections
+        for conn in connections:
+            if conn.disconnected.done():
+                self._drop_lost()
+                break
+        if not connections:
+            raise FastredisError('Connection pool has no open connections')
+
+        best = connections[0]
+        best_pending = len(best.replies)
+        for conn in connections:
+            n = len(conn.replies)
+            if n < best_pending:
+                best, best_pending = conn, n
+
+        if best_pending == 0:
+            now = time.monotonic()
+            self._last_busy[best] = now
+            if self.idle_timeout is not None:
+                self._shrink(now, best)
+        elif (best_pending >= self.max_pending
+                and self._growing is None
+                and len(connections) < self.max_size):
+            self._growing = asyncio.ensure_future(self._connect())
+            self._growing.add_done_callback(self._grow_done)
+        return best
+
+    async def command(self, command: Command) -> ReplyValue:
+        """Run AsyncConnection.command() on the least busy connection."""
+
+        return await self.connection().command(command)
+
+    async def command_args(self, *args: CommandArg) -> ReplyValue:
+        """Run AsyncConnection.command_args() on the least busy connection."""
+
+        return await self.connection().command_args(*args)
+
+    def pipeline(self, raise_on_error: bool = True) -> AsyncPipeline:
+        """Create a pipeline on the least busy connection.
+
+        See AsyncPipeline for details.
+        """
+
+        return AsyncPipeline(self.connection(), raise_on_error=raise_on_error)
+
+    async def mget(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List:
+        """SyncConnection.mget(), spread over the open connections."""
+
+        return await bulk.run_async_pool(self, *bulk.mget_plan(keys, chunk_size))
+
+    async def mset(
+            self,
+            mapping: Mapping[CommandArg, CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> None:
+        """SyncConnection.mset(), spread over the open connections."""
+
+        return await bulk.run_async_pool(self, *bulk.mset_plan(mapping, chunk_size))
+
+    async def delete_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> int:
+        """SyncConnection.delete_many(), spread over the open connections."""
+
+        return await bulk.run_async_pool(self, *bulk.delete_many_plan(keys, chunk_size))
+
+    async def hgetall_many(
+            self,
+            keys: Sequence[CommandArg],
+            chunk_size: int = bulk.DEFAULT_CHUNK_SIZE
+        ) -> List[Dict]:
+        """SyncConnection.hgetall_many(), spread over the open connections."""
+
+        return await bulk.run_async_pool(self, *bulk.hgetall_many_plan(keys, chunk_size))
@@ -0,0 +1,397 @@
+"""Where the time of each command goes, phase by phase.
+
+A Profiler installed on a connection with set_profiler(), passed to
+SyncConnection() or AsyncConnection() as `profiler`, or around a block with
+profiling(), times these phases of every command, and keeps a histogram of
+each per connection:
+
+    send      formatting the command and writing it to the socket. Async
+              commands are written as they are queued, unless the socket
+              is full.
+    wait      from then until the socket is readable (sync), or until the
+              read event that brings the reply starts (async).
+    read      reading and parsing the reply (sync), or the whole read event
+              up to the reply's future being resolved, including parsing
+              and reducing in C every reply before it (async).
+    reduce    converting the reply to python objects and freeing it. Sync
+              only; async replies are reduced in C within the read event.
+    dispatch  from the reply's future being resolved to the awaiting task
+              running again (async only).
+
+    with profiling(conn) as profiler:
+        ...
+    print(profiler.report())
+
+A pipeline is timed as one round trip of all its commands. Sync commands
+are profiled by running them through the lower level hiredis calls one
+phase at a time, which is a little slower than the single call they are
+otherwise sent with. Async commands are profiled by resolving their
+replies into futures that time themselves. Other ways of reading replies,
+such as read() after write(), are not profiled.
+"""
+
+import asyncio
+import select
+import socket
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from fastredis.exceptions import ReplyError
+from fastredis.instrument import Histogram
+import fastredis.wrappers_async as wa
+
+
+PHASES = ('send', 'wait', 'read', 'reduce', 'dispatch')
+
+clock = time.perf_counter_ns
+
+# struct timeval, as hiredis sets SO_RCVTIMEO
+_TIMEVAL = struct.Struct('@ll')
+
+
+def _read_timeout(fd: int) -> float:
+    """The receive timeout currently set on a socket, or 0 for none.
+
+    This is the command timeout, or what is left of the deadline of a
+    command sent with one.
+    """
+
+    sock = socket.socket(fileno=fd)
+    try:
+        seconds, micros = _TIMEVAL.unpack(sock.getsockopt(
+            socket.SOL_SOCKET,
+            socket.SO_RCVTIMEO,
+            _TIMEVAL.size
+        ))
+    finally:
+        sock.detach()
+    return seconds + micros / 1e6
+
+
+class ConnectionProfile:
+    """Phase timings of the commands of one connection, in nanoseconds."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.round_trips = 0
+        self.commands = 0
+        self.phases = {phase: Histogram() for phase in PHASES}
+
+    def add(self, commands: int, **phases: int) -> None:
+        """Records one round trip of `commands` commands."""
+
+        self.round_trips += 1
+        self.commands += commands
+        for phase, elapsed in phases.items():
+            self.phases[phase].record(elapsed)
+
+    def merge(self, other: 'ConnectionProfile') -> None:
+        self.round_trips += other.round_trips
+        self.commands += other.commands
+        for phase, hist in other.phases.items():
+            self.phases[phase].merge(hist)
+
+    def summary(self) -> Dict[str, object]:
+        """round_trips, commands, and count, total_ms, mean_us, p50_us,
+        p99_us and share of the total time per phase."""
+
+        total = sum(hist.total for hist in self.phases.values())
+        phases = {}
+        for phase, hist in self.phases.items():
+            if not hist.count:
+                continue
+            phases[phase] = {
+                'count': hist.count,
+                'total_ms': hist.total / 1e6,
+                'mean_us': hist.mean / 1e3,
+                'p50_us': hist.percentile(50) / 1e3,
+                'p99_us': hist.percentile(99) / 1e3,
+                'share': hist.total / total if total else 0.0,
+            }
+        return {
+            'round_trips': self.round_trips,
+            'commands': self.commands,
+            'phases': phases,
+        }
+
+    def report(self) -> str:
+        summary = self.summary()
+        lines = [
+            f'{self.label}: {summary["round_trips"]} round trips, '
+            f'{summary["commands"]} commands',
+            'phase'.ljust(10) + ''.join(
+                column.rjust(12) for column in
+                ('count', 'total ms', 'mean us', 'p50 us', 'p99 us', 'share')
+            )
+        ]
+        for phase, row in summary['phases'].items():
+            lines.append(
+                phase.ljust(10)
+                + f'{row["count"]:12d}'
+                + ''.join(
+                    f'{row[column]:12.1f}'
+                    for column in ('total_ms', 'mean_us', 'p50_us', 'p99_us')
+                )
+                + f'{row["share"]:12.1%}'
+            )
+        return '\n'.join(lines)
+
+
+def _address(connection) -> str:
+    if connection.path is not None:
+        address = connection.path
+    else:
+        address = connection.ip
+    if isinstance(address, bytes):
+        address = address.decode()
+    if connection.path is None:
+        address = f'{address}:{connection.port}'
+    return address
+
+
+class Profiler:
+    """Keeps a ConnectionProfile per connection it is installed on.
+
+    One profiler may be shared by many connections, such as those of a
+    pool, on any threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections: Dict[object, ConnectionProfile] = {}
+
+    def _profile(self, connection) -> ConnectionProfile:
+        with self._lock:
+            profile = self.connections.get(connection)
+            if profile is None:
+                label = f'#{len(self.connections) + 1} {_address(connection)}'
+                profile = self.connections[connection] = ConnectionProfile(label)
+            return profile
+
+    def profiles(self) -> List[ConnectionProfile]:
+        with self._lock:
+            return list(self.connections.values())
+
+    def total(self) -> ConnectionProfile:
+        """The profiles of all connections merged into one."""
+
+        total = ConnectionProfile('all connections')
+        for profile in self.profiles():
+            total.merge(profile)
+        return total
+
+    def reset(self) -> None:
+        """Forgets all timings. Connections stay profiled."""
+
+        for profile in self.profiles():
+            profile.__init__(profile.label)
+
+    def report(self) -> str:
+        """A table of phase timings per connection, and of their total if
+        there are several."""
+
+        profiles = self.profiles()
+        if len(profiles) > 1:
+            profiles.append(self.total())
+        return '\n\n'.join(profile.report() for profile in profiles)
+
+    def sync_methods(self, connection) -> dict:
+        """Profiled versions of a SyncConnection's command methods.
+
+        Installed by SyncConnection.set_profiler().
+        """
+
+        profile = self._profile(connection)
+        cls = type(connection)
+        write = cls._redis_write.__get__(connection, cls)
+        write_args = cls._redis_write_args.__get__(connection, cls)
+        write_many = cls._redis_write_many.__get__(connection, cls)
+        flush = cls._redis_flush.__get__(connection, cls)
+        read_reply = cls._redis_read_reply.__get__(connection, cls)
+        reduce_reply = cls._redis_reduce_reply.__get__(connection, cls)
+        set_timeout = cls._redis_set_timeout.__get__(connection, cls)
+
+        def round_trip(context, append, command, count):
+            timeout = _read_timeout(context.fd)
+            start = clock()
+            append(context, command)
+            flush(context)
+            sent = clock()
+            if not select.select([context.fd], [], [], timeout or None)[0]:
+                # the timeout ran out here, so the read fails at once as it
+                # would have without the profiler
+                set_timeout(context, 1e-6)
+            waited = clock()
+            read = reduce = 0
+            replies = []
+            for _ in range(count):
+                t0 = clock()
+                reply = read_reply(context)
+                t1 = clock()
+                try:
+                    replies.append(reduce_reply(reply))
+                except ReplyError as e:
+                    replies.append(e)
+                read += t1 - t0
+                reduce += clock() - t1
+            profile.add(
+                count,
+                send=sent - start,
+                wait=waited - sent,
+                read=read,
+                reduce=reduce
+            )
+            return replies
+
+        def _redis_command(context, command):
+            reply = round_trip(context, write, command, 1)[0]
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        def _redis_command_args(context, args):
+            reply = round_trip(context, write_args, args, 1)[0]
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        def _redis_pipeline(context, commands, raise_on_error=True):
+            if not commands:
+                return []
+            replies = round_trip(context, write_many, commands, len(commands))
+            if raise_on_error:
+                for reply in replies:
+                    if isinstance(reply, Exception):
+                        raise reply
+            return replies
+
+        return {
+            '_redis_command': _redis_command,
+            '_redis_command_args': _redis_command_args,
+            '_redis_pipeline': _redis_pipeline,
+        }
+
+    def attach(self, connection) -> None:
+        """Starts profiling an AsyncConnection, if it is connected.
+
+        Called by AsyncConnection.set_profiler(), and by connect() for every
+        new connection.
+        """
+
+        if connection.context is None or connection.disconnected.done():
+            return
+        replies = _ProfiledReplyQueue(connection.replies, self._profile(connection))
+        connection._redis_set_reply_queue(connection.context, replies)
+        connection._redis_set_read_hook(connection.context, replies.mark_read)
+        connection.not_garbage.append(replies)
+        connection.replies = replies
+
+    def detach(self, connection) -> None:
+        """Stops profiling an AsyncConnection."""
+
+        replies = getattr(connection, 'replies', None)
+        if not isinstance(replies, _ProfiledReplyQueue):
+            return
+        connection.replies = replies.original
+        if connection.context is None or connection.disconnected.done():
+            return
+        replies.original.next_seq = replies.next_seq
+        connection._redis_set_reply_queue(connection.context, replies.original)
+        connection._redis_set_read_hook(connection.context)
+
+
+class _TimedFuture(asyncio.Future):
+    """The reply future of a profiled async command, which times its phases.
+
+    `start` is when the command was queued, and `read_start` the start of
+    the read event that resolved the future. The send phase ends when the
+    command awaits the future, and the dispatch phase when it resumes.
+    """
+
+    def __init__(self, replies: '_ProfiledReplyQueue', commands: int):
+        super().__init__(loop=replies.loop)
+        self.replies = replies
+        self.commands = commands
+        self.start = clock()
+        self.read_start = 0
+        self.resolved = 0
+
+    def set_result(self, result) -> None:
+        self.read_start = self.replies.read_start
+        self.resolved = clock()
+        super().set_result(result)
+
+    def set_exception(self, exception) -> None:
+        self.read_start = self.replies.read_start
+        self.resolved = clock()
+        super().set_exception(exception)
+
+    def __await__(self):
+        sent = clock()
+        try:
+            return (yield from super().__await__())
+        finally:
+            if self.resolved:
+                # a lost connection fails replies outside of a read event
+                read_start = min(max(self.read_start, sent), self.resolved)
+                self.replies.profile.add(
+                    self.commands,
+                    send=sent - self.start,
+                    wait=read_start - sent,
+                    read=self.resolved - read_start,
+                    dispatch=clock() - self.resolved
+                )
+
+
+class _ProfiledReplyQueue(wa.ReplyQueue):
+    """Takes over from the ReplyQueue of a connection, with timed futures."""
+
+    __slots__ = ('original', 'profile', 'read_start')
+
+    def __init__(self, original: wa.ReplyQueue, profile: ConnectionProfile):
+        super().__init__(original.loop)
+        self.pending = original.pending
+        self.subscriptions = original.subscriptions
+        self.next_seq = original.next_seq
+        self.original = original
+        self.profile = profile
+        self.read_start = 0
+
+    def mark_read(self) -> None:
+        self.read_start = clock()
+
+    def push(self):
+        seq, _ = super().push()
+        future = self.pending[seq] = _TimedFuture(self, 1)
+        return seq, future
+
+    def push_pipeline(self, count: int):
+        seq, _ = super().push_pipeline(count)
+        entry = self.pending[seq]
+        entry.future = _TimedFuture(self, count)
+        return seq, entry.future
+
+
+@contextmanager
+def profiling(*connections) -> Iterator[Profiler]:
+    """Profile the given sync or async connections for a block of code.
+
+        with profiling(conn) as profiler:
+            ...
+        print(profiler.report())
+
+    The connections get their previous profilers back afterwards.
+    """
+
+    profiler = Profiler()
+    previous = [connection.profiler for connection in connections]
+    for connection in connections:
+        connection.set_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        for connection, old in zip(connections, previous):
+            connection.set_profiler(old)
@@ -0,0 +1,220 @@
+"""Pub/sub subscriptions for asynchronous clients."""
+
+import asyncio
+from typing import AnyStr, List, NamedTuple, Optional, Sequence
+
+from fastredis.exceptions import FastredisError
+
+
+class Message(NamedTuple):
+    """A message published to a subscribed channel.
+
+    `pattern` is the pattern that matched for PSUBSCRIBE, otherwise None.
+    """
+
+    channel: AnyStr
+    data: AnyStr
+    pattern: Optional[AnyStr] = None
+
+
+# reply kinds, for both str and bytes connections
+_MESSAGE = 0
+_PMESSAGE = 1
+_SUBSCRIBE = 2
+_UNSUBSCRIBE = 3
+_KINDS = {
+    name: kind
+    for kind, names in (
+        (_MESSAGE, ('message',)),
+        (_PMESSAGE, ('pmessage',)),
+        (_SUBSCRIBE, ('subscribe', 'psubscribe')),
+        (_UNSUBSCRIBE, ('unsubscribe', 'punsubscribe'))
+    )
+    for name in names + tuple(name.encode() for name in names)
+}
+
+
+class Subscription:
+    """Messages from a set of channels or patterns, as an async iterator.
+
+    Created by AsyncConnection.subscribe() and psubscribe(). hiredis calls a
+    single persistent callback for every message. Messages that arrive in
+    the same socket read are collected into one batch, which is put on a
+    bounded asyncio.Queue once the read is done:
+
+        sub = await conn.subscribe('invalidations')
+        async for message in sub:
+            handle(message.channel, message.data)
+
+    Consumers that can handle many messages at once may call get_batch()
+    instead. If the consumer falls behind by more than `max_batches` batches,
+    further messages are dropped and the iterator raises FastredisError at
+    the point they were lost. Iterating again continues with newer messages.
+
+    Iteration stops after unsubscribe(). If the connection is closed or
+    lost first, the iterator raises a ContextError.
+    """
+
+    def __init__(self,
+            connection,
+            names: Sequence[AnyStr],
+            pattern: bool = False,
+            max_batches: int = 1000
+        ):
+        if not names:
+            raise ValueError('at least one channel or pattern is required')
+        if max_batches < 1:
+            raise ValueError('max_batches must be at least 1')
+        loop = asyncio.get_event_loop()
+        self.connection = connection
+        self.names = tuple(dict.fromkeys(names))
+        self.pattern = pattern
+        self.active = set()
+        self.queue = asyncio.Queue(max_batches)
+
+        self._loop = loop
+        self._seq = None
+        self._batch: List[Message] = []
+        self._current: List[Message] = []
+        self._index = 0
+        self._dropped = 0
+        self._error = None
+        self._ready = loop.create_future()
+        self._done = loop.create_future()
+
+    async def start(self) -> None:
+        """Send the (P)SUBSCRIBE command and wait until it is confirmed."""
+
+        command = 'PSUBSCRIBE' if self.pattern else 'SUBSCRIBE'
+        self._seq = self.connection._redis_subscribe(
+            self.connection.context,
+            (command, *self.names),
+            self,
+            self.connection.replies
+        )
+        await self._ready
+
+    async def unsubscribe(self) -> None:
+        """Unsubscribe from all channels or patterns and end iteration."""
+
+        if self._done.done() or not self.active:
+            return
+        command = 'PUNSUBSCRIBE' if self.pattern else 'UNSUBSCRIBE'
+        self.connection._redis_unsubscribe(
+            self.connection.context,
+            (command, *self.active)
+        )
+        await asyncio.shield(self._done)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.unsubscribe()
+
+    def __call__(self, value) -> None:
+        """Receives every reply for this subscription from the ReplyQueue."""
+
+        if isinstance(value, Exception):
+            self._finish(value)
+            return
+        kind = _KINDS.get(value[0])
+        if kind == _MESSAGE:
+            message = Message(value[1], value[2])
+        elif kind == _PMESSAGE:
+            message = Message(value[2], value[3], value[1])
+        elif kind == _SUBSCRIBE:
+            self.active.add(value[1])
+            if len(self.active) == len(self.names) and not self._ready.done():
+                self._ready.set_result(None)
+            return
+        elif kind == _UNSUBSCRIBE:
+            self.active.discard(value[1])
+            if not self.active:
+                self._finish(None)
+            return
+        else:
+            return
+
+        batch = self._batch
+        batch.append(message)
+        if len(batch) == 1:
+            self._loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        batch = self._batch
+        if not batch:
+            return
+        self._batch = []
+        if self._dropped:
+            self._dropped += len(batch)
+            return
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            self._dropped = len(batch)
+
+    def _finish(self, error: Optional[Exception]) -> None:
+        if self._done.done():
+            return
+        self._flush()
+        self.connection.replies.unsubscribe(self._seq)
+        self._error = error
+        if not self._ready.done():
+            self._ready.set_exception(error or FastredisError(
+                'Unsubscribed before the subscription was confirmed'
+            ))
+        self._done.set_result(None)
+        try:
+            # wake up a waiting consumer
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def get_batch(self) -> List[Message]:
+        """Return all messages received in the next socket read.
+
+        Raises:
+            * StopAsyncIteration after unsubscribing
+            * FastredisError if messages were dropped here
+            * ContextError if the connection was lost
+        """
+
+        if self._index < len(self._current):
+            batch = self._current[self._index:]
+            self._current = []
+            self._index = 0
+            return batch
+        while True:
+            if self.queue.empty():
+                if self._dropped:
+                    dropped = self._dropped
+                    self._dropped = 0
+                    raise FastredisError(
+                        f'Subscriber fell behind, {dropped} messages dropped'
+                    )
+                if self._done.done():
+                    self._raise_done()
+            batch = await self.queue.get()
+            if batch is not None:
+                return batch
+
+    def _raise_done(self) -> None:
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+        raise StopAsyncIteration
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Message:
+        index = self._index
+        current = self._current
+        if index < len(current):
+            self._index = index + 1
+            return current[index]
+        self._current = await self.get_batch()
+        self._index = 1
+        return self._current[0]
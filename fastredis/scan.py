@@ -0,0 +1,159 @@
+"""Iterators over the SCAN family of commands, with cursor prefetch."""
+
+import asyncio
+from typing import AsyncIterator, Iterator, Optional, Sequence, Tuple
+
+from fastredis.wrapper_tools import CommandArg
+
+
+# the cursor that ends an iteration, for str and bytes connections
+_DONE = ('0', b'0')
+
+
+def scan_options(
+        match: Optional[CommandArg] = None,
+        count: Optional[int] = None,
+        type: Optional[CommandArg] = None
+    ) -> Tuple[CommandArg, ...]:
+    """Returns the MATCH, COUNT and TYPE arguments that follow the cursor."""
+
+    options = ()
+    if match is not None:
+        options += ('MATCH', match)
+    if count is not None:
+        options += ('COUNT', count)
+    if type is not None:
+        options += ('TYPE', type)
+    return options
+
+
+def scan_pages(
+        connection,
+        head: Sequence[CommandArg],
+        options: Sequence[CommandArg]
+    ) -> Iterator[tuple]:
+    """Yields each page of a SCAN-family command on a SyncConnection.
+
+    `head` is the command name and key, if any, and `options` the arguments
+    after the cursor. As soon as a page arrives, the command for the next
+    page is sent, so the server works on it while the caller processes the
+    current page. If the generator is closed early, the prefetched reply is
+    read and discarded, so the connection stays in step with its replies.
+    """
+
+    context = connection.context
+    write_args = connection._redis_write_args
+    read = connection._redis_read
+    write_args(context, (*head, 0, *options))
+    pending = True
+    try:
+        while True:
+            pending = False
+            cursor, items = read(context)
+            if cursor in _DONE:
+                yield items
+                return
+            write_args(context, (*head, cursor, *options))
+            connection._redis_flush(context)
+            pending = True
+            yield items
+    finally:
+        if pending and connection.usable:
+            read(context)
+
+
+async def async_scan_pages(
+        connection,
+        head: Sequence[CommandArg],
+        options: Sequence[CommandArg]
+    ) -> AsyncIterator[tuple]:
+    """Yields each page of a SCAN-family command on an AsyncConnection.
+
+    The command for the next page is sent as soon as a page arrives, as for
+    scan_pages(). If the generator is closed early, the prefetch is
+    cancelled.
+    """
+
+    command_args = connection.command_args
+    fetch = asyncio.ensure_future(command_args(*head, 0, *options))
+    try:
+        while True:
+            cursor, items = await fetch
+            if cursor in _DONE:
+                yield items
+                return
+            fetch = asyncio.ensure_future(command_args(*head, cursor, *options))
+            yield items
+    finally:
+        if not fetch.done():
+            fetch.cancel()
+
+
+def items(pages: Iterator[tuple]) -> Iterator:
+    """Keys or set members from SCAN or SSCAN pages."""
+
+    try:
+        for page in pages:
+            yield from page
+    finally:
+        pages.close()
+
+
+def pairs(pages: Iterator[tuple]) -> Iterator[tuple]:
+    """(field, value) pairs from HSCAN pages."""
+
+    try:
+        for page in pages:
+            it = iter(page)
+            yield from zip(it, it)
+    finally:
+        pages.close()
+
+
+def scored(pages: Iterator[tuple]) -> Iterator[Tuple[object, float]]:
+    """(member, score) pairs from ZSCAN pages, with float scores."""
+
+    try:
+        for page in pages:
+            it = iter(page)
+            for member, score in zip(it, it):
+                yield member, float(score)
+    finally:
+        pages.close()
+
+
+async def async_items(pages: AsyncIterator[tuple]) -> AsyncIterator:
+    """Async version of items()."""
+
+    try:
+        async for page in pages:
+            for item in page:
+                yield item
+    finally:
+        await pages.aclose()
+
+
+async def async_pairs(pages: AsyncIterator[tuple]) -> AsyncIterator[tuple]:
+    """Async version of pairs()."""
+
+    try:
+        async for page in pages:
+            it = iter(page)
+            for pair in zip(it, it):
+                yield pair
+    finally:
+        await pages.aclose()
+
+
+async def async_scored(
+        pages: AsyncIterator[tuple]
+    ) -> AsyncIterator[Tuple[object, float]]:
+    """Async version of scored()."""
+
+    try:
+        async for page in pages:
+            it = iter(page)
+            for member, score in zip(it, it):
+                yield member, float(score)
+    finally:
+        await pages.aclose()
@@ -0,0 +1,114 @@
+"""Lua scripts run by SHA1 with EVALSHA."""
+
+import hashlib
+from typing import AnyStr, Sequence, Tuple
+
+from fastredis.exceptions import ReplyError
+from fastredis.wrapper_tools import CommandArg, ReplyValue
+
+
+def is_noscript(error: Exception) -> bool:
+    """True if `error` is the NOSCRIPT reply to EVALSHA of an unknown script."""
+
+    return isinstance(error, ReplyError) and str(error).startswith('NOSCRIPT')
+
+
+class Script:
+    """A Lua script registered with SyncConnection.register_script().
+
+    The SHA1 of the source is computed once, locally, and each call sends
+    EVALSHA with the SHA1 and the arguments only:
+
+        limiter = conn.register_script(RATE_LIMIT_LUA)
+        allowed = limiter(keys=[key], args=[limit, window])
+
+    If the server does not have the script cached, which happens the first
+    time and after a restart or SCRIPT FLUSH, it is loaded with SCRIPT LOAD
+    and the call is retried once. Calls can also be queued on a pipeline
+    with Pipeline.script().
+    """
+
+    def __init__(self, connection, source: AnyStr):
+        self.connection = connection
+        self.source = source
+        if isinstance(source, str):
+            source = source.encode()
+        self.sha = hashlib.sha1(source).hexdigest()
+        # False until the server is known to have the script cached
+        self.loaded = False
+
+    def args(
+            self,
+            keys: Sequence[CommandArg] = (),
+            args: Sequence[CommandArg] = ()
+        ) -> Tuple[CommandArg, ...]:
+        """Returns the EVALSHA command for a call, as command arguments."""
+
+        return ('EVALSHA', self.sha, len(keys), *keys, *args)
+
+    def load(self, connection=None) -> None:
+        """Cache the script on the server with SCRIPT LOAD.
+
+        Uses the connection the script was registered with, unless another
+        `connection` is given.
+        """
+
+        (connection or self.connection).command_args('SCRIPT', 'LOAD', self.source)
+        self.loaded = True
+
+    def __call__(
+            self,
+            keys: Sequence[CommandArg] = (),
+            args: Sequence[CommandArg] = ()
+        ) -> ReplyValue:
+        """Run the script with the given KEYS and ARGV and return its reply.
+
+        Raises:
+            * Any type of HiredisError
+                * ReplyError if the script fails or cannot be loaded
+        """
+
+        command = self.args(keys, args)
+        try:
+            reply = self.connection.command_args(*command)
+        except ReplyError as e:
+            if not is_noscript(e):
+                raise
+            self.load()
+            reply = self.connection.command_args(*command)
+        self.loaded = True
+        return reply
+
+
+class AsyncScript(Script):
+    """A Lua script registered with AsyncConnection.register_script().
+
+    The asynchronous version of Script. Calls are awaited, and can be queued
+    on a pipeline with AsyncPipeline.script().
+    """
+
+    async def load(self, connection=None) -> None:
+        """Cache the script on the server with SCRIPT LOAD. See Script.load()."""
+
+        await (connection or self.connection).command_args(
+            'SCRIPT', 'LOAD', self.source
+        )
+        self.loaded = True
+
+    async def __call__(
+            self,
+            keys: Sequence[CommandArg] = (),
+            args: Sequence[CommandArg] = ()
+        ) -> ReplyValue:
+        """Run the script and return its reply. See Script.__call__()."""
+
+        command = self.args(keys, args)
+        try:
+            reply = await self.connection.command_args(*command)
+        except ReplyError as e:
+            if not is_noscript(e):
+                raise
+            await self.load()
+            reply = await self.connection.command_args(*command)
+        self.loaded = True
+        return reply
@@ -0,0 +1,204 @@
+"""Chunked upload and download of large values to and from files."""
+
+import mmap
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+from fastredis.exceptions import FastredisError, ReplyError
+from fastredis.wrapper_tools import CommandArg
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_WINDOW = 8
+
+# A path, or a binary file object
+FileArg = Union[str, bytes, os.PathLike, BinaryIO]
+
+
+def _check(chunk_size: int, window: int) -> None:
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1')
+    if window < 1:
+        raise ValueError('window must be at least 1')
+
+
+def _is_path(file: FileArg) -> bool:
+    return isinstance(file, (str, bytes, os.PathLike))
+
+
+@contextmanager
+def _opened(file: FileArg, mode: str) -> Iterator[BinaryIO]:
+    """Opens a path, or passes a file object through without closing it."""
+
+    if _is_path(file):
+        with open(file, mode, buffering=0) as f:
+            yield f
+    else:
+        yield file
+
+
+def _temp_key(key: CommandArg) -> CommandArg:
+    token = os.urandom(8).hex()
+    if isinstance(key, bytes):
+        return b'%s.upload.%s' % (key, token.encode())
+    return f'{key}.upload.{token}'
+
+
+def upload(
+        connection,
+        key: CommandArg,
+        source: FileArg,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        window: int = DEFAULT_WINDOW
+    ) -> int:
+    """Store the contents of a file at `key`, `chunk_size` bytes at a time.
+
+    See SyncConnection.upload(). Returns the number of bytes stored.
+    """
+
+    _check(chunk_size, window)
+    context = connection.context
+    write_args = connection._redis_write_args
+    temp = _temp_key(key)
+    buf = bytearray(chunk_size)
+    total = 0
+    command = 'SET'
+    # commands written whose replies were not read yet
+    pending = 0
+    with _opened(source, 'rb') as f, memoryview(buf) as view:
+        try:
+            while True:
+                while pending < window:
+                    n = f.readinto(buf)
+                    if not n:
+                        break
+                    # hiredis copies the chunk into its send buffer here,
+                    # so `buf` can be reused at once.
+                    write_args(context, (command, temp, view[:n]))
+                    command = 'APPEND'
+                    total += n
+                    pending += 1
+                if pending == 0:
+                    break
+                # every reply is read before an error is raised
+                count, pending = pending, 0
+                connection._redis_read_many(context, count)
+            if command == 'SET':
+                write_args(context, ('SET', temp, b''))
+                command = 'APPEND'
+                connection._redis_read_many(context, 1)
+            connection.command_args('RENAME', temp, key)
+        except BaseException:
+            if connection.usable and command != 'SET':
+                try:
+                    # Read the replies to the chunks already written, so the
+                    # connection stays in step with its replies.
+                    if pending:
+                        connection._redis_read_many(context, pending, False)
+                    connection.command_args('DEL', temp)
+                except FastredisError:
+                    pass
+            raise
+    return total
+
+
+def _windows(
+        size: int,
+        chunk_size: int,
+        window: int
+    ) -> Iterator[List[Tuple[int, int]]]:
+    """Yields lists of up to `window` (start, length) ranges covering `size`."""
+
+    ranges = []
+    for start in range(0, size, chunk_size):
+        ranges.append((start, min(chunk_size, size - start)))
+        if len(ranges) == window:
+            yield ranges
+            ranges = []
+    if ranges:
+        yield ranges
+
+
+def _read_ranges(
+        connection,
+        key: CommandArg,
+        size: int,
+        chunk_size: int,
+        window: int,
+        out: memoryview,
+        sink: Optional[BinaryIO] = None
+    ) -> None:
+    """Reads `key` with pipelined GETRANGE commands, `window` at a time.
+
+    Each range is read straight into its place in `out`, which holds the
+    whole value, or, if `sink` is given, into the start of `out` and then
+    written to `sink`.
+    """
+
+    context = connection.context
+    write_args = connection._redis_write_args
+    read_into = connection._redis_read_into
+    for ranges in _windows(size, chunk_size, window):
+        for start, length in ranges:
+            write_args(context, ('GETRANGE', key, start, start + length - 1))
+        error = None
+        # Read every reply even after an error, so the connection stays in
+        # step with its replies.
+        for start, length in ranges:
+            if sink is not None:
+                start = 0
+            with out[start:start + length] as dest:
+                try:
+                    n = read_into(context, dest)
+                except ReplyError as e:
+                    error = error or e
+                    continue
+                if n != length:
+                    error = error or FastredisError(
+                        'Value changed size while it was downloaded'
+                    )
+                elif sink is not None and error is None:
+                    try:
+                        sink.write(dest)
+                    except Exception as e:
+                        error = e
+        if error is not None:
+            raise error
+
+
+def download(
+        connection,
+        key: CommandArg,
+        target: FileArg,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        window: int = DEFAULT_WINDOW
+    ) -> Optional[int]:
+    """Write the value at `key` to a file, `chunk_size` bytes at a time.
+
+    See SyncConnection.download(). Returns the size of the value, or None if
+    the key does not exist.
+    """
+
+    _check(chunk_size, window)
+    exists, size = connection._redis_pipeline(
+        connection.context,
+        [('EXISTS', key), ('STRLEN', key)]
+    )
+    if not exists:
+        return None
+
+    if not _is_path(target):
+        buf = bytearray(min(chunk_size, size))
+        with memoryview(buf) as out:
+            _read_ranges(connection, key, size, chunk_size, window, out, target)
+    else:
+        with open(target, 'w+b') as f:
+            f.truncate(size)
+            if size > 0:
+                with mmap.mmap(f.fileno(), size) as m, memoryview(m) as out:
+                    _read_ranges(connection, key, size, chunk_size, window, out)
+    # A value that shrank is caught by a short range, one that grew only here.
+    if connection.command_args('STRLEN', key) != size:
+        raise FastredisError('Value changed size while it was downloaded')
+    return size
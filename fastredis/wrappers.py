@@ -1,10 +1,13 @@
 """Low-level wrappers around the exposed hiredis API."""
 
+from typing import List, Optional, Sequence, Union
+
 from fastredis.exceptions import *
 import fastredis.hiredis as hiredis
 from fastredis.wrapper_tools import (
-    ReplyValue,
-    reduce_reply
+    Command,
+    CommandArgs,
+    ReplyValue
 )
 
 
@@ -26,12 +29,35 @@ def redis_connect(
     else:
         timeval = hiredis.timeval()
         timeval.tv_sec = int(timeout)
-        timeval.tv_usec = (timeout - int(timeout)) * (10 ** 6)
+        timeval.tv_usec = int((timeout - int(timeout)) * (10 ** 6))
         context = hiredis.redisConnectWithTimeout(ip, port, timeval)
     raise_context_error(context)
     return context
 
 
+def redis_connect_unix(
+        path: str,
+        timeout: Optional[float] = None
+    ) -> hiredis.redisContext:
+    """Connects to redis over a unix domain socket.
+
+    Wrapper around hiredis.redisConnectUnix().
+    Raises:
+        * ContextError (any type)
+    In the event of a timeout, the subclass of ContextError raised is IOError.
+    """
+
+    if timeout is None:
+        context = hiredis.redisConnectUnix(path)
+    else:
+        timeval = hiredis.timeval()
+        timeval.tv_sec = int(timeout)
+        timeval.tv_usec = int((timeout - int(timeout)) * (10 ** 6))
+        context = hiredis.redisConnectUnixWithTimeout(path, timeval)
+    raise_context_error(context)
+    return context
+
+
 def redis_free(context: hiredis.redisContext) -> None:
     """Frees the redis context object.
 
@@ -41,23 +67,66 @@ def redis_free(context: hiredis.redisContext) -> None:
     hiredis.redisFree(context)
 
 
+def redis_set_timeout(
+        context: hiredis.redisContext,
+        timeout: Optional[float]
+    ) -> None:
+    """Sets the timeout of each read from and write to the socket.
+
+    Wrapper around hiredis.redisSetTimeout(). A timeout of None or 0 blocks forever.
+    When a read or write times out, IOError is raised and the context keeps
+    the error, so the connection can no longer be used.
+    Raises:
+        * ContextError (any type)
+    """
+
+    timeval = hiredis.timeval()
+    if timeout:
+        if timeout < 0:
+            raise ValueError('timeout must be nonnegative or None')
+        timeval.tv_sec = int(timeout)
+        # a zero timeval would mean no timeout at all
+        timeval.tv_usec = max(int((timeout - int(timeout)) * (10 ** 6)), 1)
+    else:
+        timeval.tv_sec = 0
+        timeval.tv_usec = 0
+    if hiredis.redisSetTimeout(context, timeval) != REDIS_OK:
+        raise_context_error(context)
+        raise ContextError('Setting the timeout failed.')
+
+
 def redis_command(
         context: hiredis.redisContext,
         command: str
     ) -> ReplyValue:
     """Sends the command and retrieves the response (write and read).
 
-    Wrapper around hiredis.redisCommand().
+    Wrapper around hiredis.redisCommandReduced().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    return hiredis.redisCommandReduced(context, command)
+
+
+def redis_command_args(
+        context: hiredis.redisContext,
+        args: CommandArgs
+    ) -> ReplyValue:
+    """Sends the command as an argument vector and retrieves the response.
+
+    Each argument is a str, bytes, int or other buffer, such as a memoryview.
+    Unlike redis_command(), no format string is parsed, so arguments may
+    contain spaces or binary data.
+
+    Wrapper around hiredis.redisCommandArgvReduced().
     Raises:
         * HiredisError (any type)
         * FastredisError
     """
 
-    rep = hiredis.redisCommand(context, command)
-    raise_empty_reply_error(context, rep)
-    ret = reduce_reply(rep)
-    hiredis.freeReplyObject(rep)
-    return ret
+    return hiredis.redisCommandArgvReduced(context, args)
 
 
 def redis_write(context: hiredis.redisContext, command: str) -> None:
@@ -73,22 +142,183 @@ def redis_write(context: hiredis.redisContext, command: str) -> None:
         raise ContextError('redisAppendCommand error and no error code is set.')
 
 
+def redis_write_args(
+        context: hiredis.redisContext,
+        args: CommandArgs
+    ) -> None:
+    """Writes a command given as an argument vector to the send buffer.
+
+    Wrapper around hiredis.redisAppendCommandArgv().
+    Raises:
+        * ContextError (any type)
+    """
+
+    if hiredis.redisAppendCommandArgv(context, args) == REDIS_ERR:
+        raise_context_error(context)
+        raise ContextError('redisAppendCommandArgv error and no error code is set.')
+
+
 def redis_read(context: hiredis.redisContext) -> ReplyValue:
     """Reads a reply value from the redis receive buffer.
 
-    Wrapper around hiredis.redisGetReply().
+    Wrapper around hiredis.redisGetReplyReduced().
     Raises:
         * HiredisError (any type)
         * FastredisError
     """
 
+    return hiredis.redisGetReplyReduced(context)
+
+
+def redis_read_reply(context: hiredis.redisContext) -> hiredis.redisReply:
+    """Reads the next reply without converting it to python objects.
+
+    The reply must be passed to redis_reduce_reply(), which frees it. Used
+    to time reading and converting replies separately.
+
+    Wrapper around hiredis.redisGetReplyOL().
+    Raises:
+        * ContextError (any type)
+    """
+
     out = hiredis.redisReplyOut()
     hiredis.redisGetReplyOL(context, out)
     if out.ret == REDIS_ERR:
         raise_context_error(context)
         raise ContextError('redisGetReply error and no error code is set.')
-    rep = out.reply
-    raise_empty_reply_error(context, rep)
-    ret = reduce_reply(rep)
-    hiredis.freeReplyObject(rep)
-    return ret
+    return out.reply
+
+
+def redis_reduce_reply(reply: hiredis.redisReply) -> ReplyValue:
+    """Converts a reply from redis_read_reply() and frees it.
+
+    Wrapper around hiredis.redisReplyReduce() and hiredis.freeReplyObject().
+    Raises:
+        * ReplyError if the reply, or any nested reply, is an error
+        * FastredisError if invalid response types
+    """
+
+    try:
+        return hiredis.redisReplyReduce(reply)
+    finally:
+        hiredis.freeReplyObject(reply)
+
+
+def redis_read_into(
+        context: hiredis.redisContext,
+        out
+    ) -> Optional[int]:
+    """Reads a string reply straight into the writable buffer `out`.
+
+    `out` is any object supporting the buffer protocol, such as a bytearray,
+    mmap or numpy array. Returns the number of bytes copied, or None for a
+    nil reply. No bytes or str object is created for the reply.
+
+    Wrapper around hiredis.redisGetReplyInto().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError if the reply is not a string or nil
+        * ValueError if the reply does not fit in `out`
+        * BufferError if `out` is not writable
+    """
+
+    return hiredis.redisGetReplyInto(context, out)
+
+
+def redis_read_view(context: hiredis.redisContext) -> Optional[memoryview]:
+    """Reads a string reply as a read-only memoryview, or None for nil.
+
+    The view points at the reply as parsed by hiredis, without copying it,
+    and keeps the reply alive until the view is released.
+
+    Wrapper around hiredis.redisGetReplyView().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError if the reply is not a string or nil
+    """
+
+    return hiredis.redisGetReplyView(context)
+
+
+def redis_pipeline(
+        context: hiredis.redisContext,
+        commands: Sequence[Command],
+        raise_on_error: bool = True
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Sends all commands in one write and collects all of their replies.
+
+    Each command is a format string, as for redis_command(), or a sequence of
+    arguments, as for redis_command_args(). Every reply is read even when some
+    are errors, so the connection stays usable. If `raise_on_error` is True,
+    the first error is raised after all replies are read. Otherwise errors are
+    returned in place as exception instances.
+
+    Wrapper around hiredis.redisPipelineReduced().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    return hiredis.redisPipelineReduced(context, commands, raise_on_error)
+
+
+def redis_write_many(
+        context: hiredis.redisContext,
+        commands: Sequence[Command]
+    ) -> int:
+    """Writes all commands to the send buffer, but does not send yet.
+
+    Each command is as for redis_pipeline(). Returns the number of commands
+    written, which is the number of replies to read with redis_read_many().
+
+    Wrapper around hiredis.redisAppendCommands().
+    Raises:
+        * ContextError (any type)
+    """
+
+    return hiredis.redisAppendCommands(context, commands)
+
+
+def redis_flush(context: hiredis.redisContext) -> None:
+    """Sends the whole send buffer without reading any replies.
+
+    Wrapper around hiredis.redisFlush().
+    Raises:
+        * ContextError (any type)
+    """
+
+    hiredis.redisFlush(context)
+
+
+def redis_read_many(
+        context: hiredis.redisContext,
+        count: int,
+        raise_on_error: bool = True
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Reads the next `count` replies, as redis_pipeline() does.
+
+    Wrapper around hiredis.redisGetRepliesReduced().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    return hiredis.redisGetRepliesReduced(context, count, raise_on_error)
+
+
+def redis_read_available(
+        context: hiredis.redisContext
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Reads from the socket once and returns every complete reply.
+
+    Blocks until the socket is readable, so wait for that with select() to
+    never block. Returns an empty list if no reply is complete yet. Error
+    replies are returned in place as exception instances.
+
+    Wrapper around hiredis.redisReadAvailable().
+    Raises:
+        * ContextError (any type)
+        * FastredisError
+    """
+
+    return hiredis.redisReadAvailable(context)
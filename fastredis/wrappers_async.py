@@ -2,14 +2,25 @@
 
 import asyncio
 import ctypes
-from typing import Any, AnyStr, Callable, Tuple, Union
+from typing import (
+    Any,
+    AnyStr,
+    Callable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union
+)
 
 from fastredis.exceptions import *
 import fastredis.hiredis as hiredis
 from fastredis.hiredis import REDIS_OK
 from fastredis.wrapper_tools import (
-    ReplyValue,
-    reduce_reply
+    Command,
+    CommandArgs,
+    ReplyValue
 )
 
 
@@ -24,9 +35,185 @@ def copy_reply(reply: hiredis.redisReply) -> hiredis.redisReply:
     return new
 
 
+class _PipelineReplies:
+    """Collects the replies of a pipeline queued under one sequence number."""
+
+    __slots__ = ('future', 'count', 'replies')
+
+    def __init__(self, future: asyncio.Future, count: int):
+        self.future = future
+        self.count = count
+        self.replies = []
+
+    def add(self, value) -> bool:
+        """Adds a reply. Returns True once all replies have arrived."""
+
+        self.replies.append(value)
+        if len(self.replies) < self.count:
+            return False
+        if not self.future.done():
+            self.future.set_result(self.replies)
+        return True
+
+
+class ReplyQueue:
+    """Pending replies of an asynchronous context, keyed by sequence number.
+
+    One instance is registered per context as its reply handler. Each command
+    is queued with the next sequence number as its hiredis privdata, and
+    hiredis calls the single C reply callback, which reduces the reply and
+    collects it with its sequence number. Once the read is done, all of its
+    replies are passed to resolve() together. Replies arrive in the order the
+    commands were sent, and the pending dict keeps that order.
+
+    This replaces creating a ctypes callback per command. A cancelled command
+    only leaves a sequence number behind, not a callback pointer that hiredis
+    could call after it was garbage collected.
+
+    (P)SUBSCRIBE commands instead register a handler under their sequence
+    number in `subscriptions`. hiredis keeps calling back with that number
+    for every message on the subscribed channels, and the handler stays
+    registered until unsubscribe() is called.
+    """
+
+    __slots__ = ('loop', 'pending', 'subscriptions', 'next_seq')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pending = {}
+        self.subscriptions = {}
+        self.next_seq = 0
+
+    def __len__(self) -> int:
+        """Number of commands still waiting for replies."""
+
+        return len(self.pending)
+
+    def __call__(self, seq: int, value: Union[ReplyValue, Exception]) -> None:
+        entry = self.pending.get(seq)
+        if entry is None:
+            handler = self.subscriptions.get(seq)
+            if handler is not None:
+                handler(value)
+            return
+        if entry.__class__ is _PipelineReplies:
+            if entry.add(value):
+                del self.pending[seq]
+            return
+        del self.pending[seq]
+        if entry.done():
+            return
+        if isinstance(value, Exception):
+            entry.set_exception(value)
+        else:
+            entry.set_result(value)
+
+    def resolve(self, replies: list) -> None:
+        """Delivers all the replies of one socket read, in order.
+
+        `replies` alternates sequence numbers and values, as collected in C
+        by hiredis.redisAsyncHandleReadBatched(). Command and pipeline replies
+        are resolved inline here rather than by a call per reply, and
+        subscription replies go through __call__().
+        """
+
+        pending = self.pending
+        values = iter(replies)
+        for seq, value in zip(values, values):
+            entry = pending.get(seq)
+            if entry is None:
+                try:
+                    self(seq, value)
+                except Exception as e:
+                    # one broken subscription handler must not strand the
+                    # rest of the read
+                    self.loop.call_exception_handler({
+                        'message': 'Exception in a reply handler',
+                        'exception': e
+                    })
+                continue
+            if entry.__class__ is _PipelineReplies:
+                if entry.add(value):
+                    del pending[seq]
+                continue
+            del pending[seq]
+            if entry.done():
+                continue
+            if isinstance(value, Exception):
+                entry.set_exception(value)
+            else:
+                entry.set_result(value)
+
+    def push(self) -> Tuple[int, asyncio.Future]:
+        """Reserves a sequence number for a command and a future for its reply."""
+
+        seq = self.next_seq
+        self.next_seq = seq + 1
+        future = self.loop.create_future()
+        self.pending[seq] = future
+        return seq, future
+
+    def push_pipeline(self, count: int) -> Tuple[int, asyncio.Future]:
+        """Reserves one sequence number for `count` commands.
+
+        The future resolves to the list of their replies.
+        """
+
+        seq = self.next_seq
+        self.next_seq = seq + 1
+        future = self.loop.create_future()
+        self.pending[seq] = _PipelineReplies(future, count)
+        return seq, future
+
+    def discard(self, seq: int) -> None:
+        """Forgets a sequence number whose command could not be queued."""
+
+        self.pending.pop(seq, None)
+
+    def subscribe(self, handler: Callable[[Any], None]) -> int:
+        """Reserves a sequence number whose replies all go to `handler`."""
+
+        seq = self.next_seq
+        self.next_seq = seq + 1
+        self.subscriptions[seq] = handler
+        return seq
+
+    def unsubscribe(self, seq: int) -> None:
+        """Stops delivering replies with sequence number `seq`."""
+
+        self.subscriptions.pop(seq, None)
+
+
+class AutoPipeline(NamedTuple):
+    """Settings for writing commands sent on their own together.
+
+    With auto-pipelining, a command is not written as soon as it is sent.
+    The commands sent by all tasks are written with one write once
+    `max_batch` of them are waiting, or else `max_delay` seconds after the
+    first of them, where 0 means at the end of the current iteration of the
+    event loop. Pipelines are written at once, together with any waiting
+    commands.
+    """
+
+    max_batch: int = 512
+    max_delay: float = 0.0
+
+
+def check_auto_pipeline(auto_pipeline: Optional[AutoPipeline]) -> None:
+    """Raises ValueError for settings that would never write."""
+
+    if auto_pipeline is None:
+        return
+    if auto_pipeline.max_batch < 1:
+        raise ValueError('max_batch must be at least 1')
+    if auto_pipeline.max_delay < 0:
+        raise ValueError('max_delay must be nonnegative')
+
+
 def redis_connect(
         ip: str,
         port: int = 6379,
+        auto_pipeline: Optional[AutoPipeline] = None
     ) -> Tuple[hiredis.redisAsyncContext, list]:
     """Initiate an asynchronous connection to redis.
 
@@ -34,28 +221,74 @@ def redis_connect(
     connection is established. To determine when redis is connected, set a
     connected callback. The second element returned is a list of callback
     objects that should not be garbage collected while the underlying
-    hiredis library is still using them.
+    hiredis library is still using them. It includes the context's
+    ReplyQueue, which redis_reply_queue() also returns. See AutoPipeline
+    for `auto_pipeline`.
 
     Raises:
         * ContextError (any type)
     """
 
-    loop = asyncio.get_event_loop()
+    check_auto_pipeline(auto_pipeline)
     context = hiredis.redisAsyncConnect(ip, port)
     raise_context_error(context)
+    return _attach(context, auto_pipeline)
+
+
+def redis_connect_unix(
+        path: str,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> Tuple[hiredis.redisAsyncContext, list]:
+    """Initiate an asynchronous connection over a unix domain socket.
+
+    Wrapper around hiredis.redisAsyncConnectUnix(). Otherwise the same as
+    redis_connect().
+
+    Raises:
+        * ContextError (any type)
+    """
+
+    check_auto_pipeline(auto_pipeline)
+    context = hiredis.redisAsyncConnectUnix(path)
+    raise_context_error(context)
+    return _attach(context, auto_pipeline)
+
+
+def _attach(
+        context: hiredis.redisAsyncContext,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> Tuple[hiredis.redisAsyncContext, list]:
+    """Hooks a new asynchronous context into the running event loop."""
+
+    loop = asyncio.get_event_loop()
+    replies = ReplyQueue(loop)
+    hiredis.redisAsyncSetReplyHandler(context, replies)
     create_callback = ctypes.CFUNCTYPE(None, ctypes.c_void_p)
     fd_cannot_write = False
-
-    def fd_ready_for_read():
-        hiredis.redisAsyncHandleRead(context)
+    # auto-pipelining: commands waiting to be written, and the pending flush
+    waiting = 0
+    flush_handle = None
 
     def fd_ready_for_write():
         nonlocal fd_cannot_write
         fd_cannot_write = False
         hiredis.redisAsyncHandleWrite(context)
 
+    def flush():
+        """Writes everything hiredis has buffered, as addwrite() does."""
+
+        nonlocal fd_cannot_write, waiting, flush_handle
+        if flush_handle is not None:
+            flush_handle.cancel()
+            flush_handle = None
+        waiting = 0
+        fd_cannot_write = True
+        hiredis.redisAsyncHandleWrite(context)
+        if hiredis.writeBufferLen(context) == 0:
+            fd_cannot_write = False
+
     def addread(privdata):
-        loop.add_reader(context.c.fd, fd_ready_for_read)
+        loop.add_reader(context.c.fd, hiredis.redisAsyncHandleReadBatched, context)
 
     def delread(privdata):
         loop.remove_reader(context.c.fd)
@@ -69,15 +302,27 @@ def redis_connect(
         buffer, it calls this callback function. On the second call of
         addwrite(), the loop writer gets added. Only a successful flush of the
         entire buffer or `fd_ready_for_write()` can set `fd_cannot_write` to
-        False.
+        False. With auto-pipelining, writing is left to flush() instead.
         """
 
-        nonlocal fd_cannot_write
+        nonlocal fd_cannot_write, waiting, flush_handle
 
         if fd_cannot_write:
             loop.add_writer(context.c.fd, fd_ready_for_write)
             return
 
+        if auto_pipeline is not None:
+            # hiredis calls this once per command sent on its own
+            waiting += 1
+            if waiting >= auto_pipeline.max_batch:
+                flush()
+            elif flush_handle is None:
+                if auto_pipeline.max_delay:
+                    flush_handle = loop.call_later(auto_pipeline.max_delay, flush)
+                else:
+                    flush_handle = loop.call_soon(flush)
+            return
+
         fd_cannot_write = True
         hiredis.redisAsyncHandleWrite(context)
         if hiredis.writeBufferLen(context) == 0:
@@ -87,6 +332,11 @@ def redis_connect(
         loop.remove_writer(context.c.fd)
 
     def cleanup(privdata):
+        nonlocal flush_handle
+        if flush_handle is not None:
+            # the context is being freed
+            flush_handle.cancel()
+            flush_handle = None
         delwrite(None)
         delread(None)
 
@@ -108,6 +358,7 @@ def redis_connect(
     cucb, context.ev.cleanup = get_cb_ptr(cleanup)
 
     return context, [
+        replies,
         # addread,
         delread,
         addwrite,
@@ -121,6 +372,41 @@ def redis_connect(
     ]
 
 
+def redis_set_read_hook(
+        context: hiredis.redisAsyncContext,
+        hook: Optional[Callable[[], None]] = None
+    ) -> None:
+    """Calls `hook` at the start of every read event, or stops if it is None.
+
+    The hook runs just before hiredis.redisAsyncHandleReadBatched(), which the
+    event loop otherwise calls directly when the socket is readable.
+    """
+
+    if hook is None:
+        reader = hiredis.redisAsyncHandleReadBatched
+    else:
+        def reader(context):
+            hook()
+            hiredis.redisAsyncHandleReadBatched(context)
+    asyncio.get_event_loop().add_reader(context.c.fd, reader, context)
+
+
+def redis_set_reply_queue(
+        context: hiredis.redisAsyncContext,
+        replies: ReplyQueue
+    ) -> None:
+    """Passes every reply of the context to `replies` from now on.
+
+    `replies` takes over from the ReplyQueue registered by redis_connect(),
+    sharing its pending replies. The caller must keep it alive as long as
+    the context.
+
+    Wrapper around hiredis.redisAsyncSetReplyHandler().
+    """
+
+    hiredis.redisAsyncSetReplyHandler(context, replies)
+
+
 def redis_set_connect_cb(
         context: hiredis.redisAsyncConnect,
         cb: Callable[[Any, int], None]
@@ -190,44 +476,203 @@ def redis_free(context: hiredis.redisAsyncConnect) -> None:
     hiredis.redisAsyncFree(context)
 
 
-# Helper func for redis_command()
-_create_reply_callback = ctypes.CFUNCTYPE(None, ctypes.c_void_p)
+def redis_reply_queue(context: hiredis.redisAsyncContext) -> ReplyQueue:
+    """Returns the ReplyQueue registered by redis_connect().
+
+    Wrapper around hiredis.redisAsyncGetReplyHandler(). Passing the queue to
+    the command functions saves looking it up on every command.
+    """
+
+    return hiredis.redisAsyncGetReplyHandler(context)
+
+
+def _queue_failed(
+        context: hiredis.redisAsyncContext,
+        replies: ReplyQueue,
+        seq: int
+    ) -> None:
+    replies.discard(seq)
+    raise_context_error(context)
+    raise ContextError('Cannot add command to write queue.')
 
 
 async def redis_command(
         context: hiredis.redisAsyncContext,
-        command: str
+        command: str,
+        replies: Optional[ReplyQueue] = None
     ) -> ReplyValue:
     """Sends the command and retrieves the response.
 
-    Wrapper around hiredis.redisAsyncCommand().
+    Wrapper around hiredis.redisAsyncCommandOL(). `replies` is the context's
+    ReplyQueue, looked up if not given.
     Raises:
         * HiredisError (any type)
         * FastredisError
     """
 
-    reply_fut = asyncio.get_event_loop().create_future()
-    def reply_cb(reply: int):
-        if reply is None:
-            try:
-                raise_empty_reply_error(context)
-            except Exception as e:
-                reply_fut.set_exception(e)
-            return
-        try:
-            reply: hiredis.redisReply = hiredis.castRedisReply(reply)
-            # A copy is required because hiredis deletes the reply after this
-            # callback is finished. reduce_reply() will return the reply value.
-            reply_fut.set_result(reduce_reply(reply))
-        except Exception as e:
-            reply_fut.set_exception(e)
-
-    c_cb = _create_reply_callback(reply_cb)
-    ptr = ctypes.cast(c_cb, ctypes.c_void_p).value
-
-    status = hiredis.redisAsyncCommandOL(context, command, ptr)
-    if status != hiredis.REDIS_OK:
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq, reply_fut = replies.push()
+
+    try:
+        status = hiredis.redisAsyncCommandOL(context, command, seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+    if status != REDIS_OK:
+        _queue_failed(context, replies, seq)
+
+    return await reply_fut
+
+
+async def redis_command_args(
+        context: hiredis.redisAsyncContext,
+        args: CommandArgs,
+        replies: Optional[ReplyQueue] = None
+    ) -> ReplyValue:
+    """Sends the command as an argument vector and retrieves the response.
+
+    Each argument is a str, bytes, int or other buffer, such as a memoryview.
+    No format string is parsed, so arguments may contain spaces or binary
+    data.
+
+    Wrapper around hiredis.redisAsyncCommandArgvOL().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq, reply_fut = replies.push()
+
+    try:
+        status = hiredis.redisAsyncCommandArgvOL(context, args, seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+    if status != REDIS_OK:
+        _queue_failed(context, replies, seq)
+
+    return await reply_fut
+
+
+def redis_subscribe(
+        context: hiredis.redisAsyncContext,
+        args: CommandArgs,
+        handler: Callable[[Any], None],
+        replies: Optional[ReplyQueue] = None
+    ) -> int:
+    """Sends a SUBSCRIBE or PSUBSCRIBE command given as arguments.
+
+    hiredis calls back once per subscribed channel or pattern with the
+    confirmation, then once per message, and once per channel or pattern
+    with the confirmation of a later (P)UNSUBSCRIBE. Each of these reduced
+    replies is passed to `handler`, as is a ContextError if the connection
+    is lost. Returns the sequence number `handler` is registered under,
+    which the caller unregisters with ReplyQueue.unsubscribe().
+
+    A channel or pattern can only be subscribed to once per context; a
+    second subscription replaces the handler of the first. Other commands
+    must not be sent on a subscribed context, since hiredis gives regular
+    callbacks precedence over message dispatch.
+
+    Wrapper around hiredis.redisAsyncCommandArgvOL().
+    Raises:
+        * ContextError (any type)
+    """
+
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq = replies.subscribe(handler)
+
+    try:
+        status = hiredis.redisAsyncCommandArgvOL(context, args, seq)
+    except BaseException:
+        replies.unsubscribe(seq)
+        raise
+    if status != REDIS_OK:
+        replies.unsubscribe(seq)
         raise_context_error(context)
         raise ContextError('Cannot add command to write queue.')
+    return seq
 
-    return await reply_fut
+
+def redis_unsubscribe(
+        context: hiredis.redisAsyncContext,
+        args: CommandArgs
+    ) -> None:
+    """Sends an UNSUBSCRIBE or PUNSUBSCRIBE command given as arguments.
+
+    The confirmations are delivered to the handlers given to
+    redis_subscribe(). hiredis refuses this command on a context that is not
+    subscribed to anything.
+
+    Wrapper around hiredis.redisAsyncCommandArgvOL().
+    Raises:
+        * ContextError (any type)
+    """
+
+    # hiredis does not register a callback for (P)UNSUBSCRIBE, so the
+    # sequence number is never used.
+    if hiredis.redisAsyncCommandArgvOL(context, args, 0) != REDIS_OK:
+        raise_context_error(context)
+        raise ContextError('Cannot add command to write queue.')
+
+
+async def _pipeline(
+        context: hiredis.redisAsyncContext,
+        commands: Sequence[Command],
+        raise_on_error: bool,
+        replies: Optional[ReplyQueue],
+        queue: Callable[[hiredis.redisAsyncContext, Sequence[Command], int], None]
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Implementation of redis_pipeline(), shared with the bytes wrappers."""
+
+    if not commands:
+        return []
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq, replies_fut = replies.push_pipeline(len(commands))
+
+    try:
+        queue(context, commands, seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+    results = await replies_fut
+
+    if raise_on_error:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
+async def redis_pipeline(
+        context: hiredis.redisAsyncContext,
+        commands: Sequence[Command],
+        raise_on_error: bool = True,
+        replies: Optional[ReplyQueue] = None
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Sends all commands in one write and retrieves all of their replies.
+
+    Each command is a format string, as for redis_command(), or a sequence of
+    arguments, as for redis_command_args(). The commands are queued without
+    yielding to the event loop and sent with a single write. If
+    `raise_on_error` is True, the first error is raised once all replies have
+    arrived. Otherwise errors are returned in place as exception instances.
+
+    Wrapper around hiredis.redisAsyncCommandsOL().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    return await _pipeline(
+        context,
+        commands,
+        raise_on_error,
+        replies,
+        hiredis.redisAsyncCommandsOL
+    )
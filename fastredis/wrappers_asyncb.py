@@ -0,0 +1,159 @@
+"""Low-level wrappers around the exposed hiredis API."""
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from fastredis.exceptions import *
+import fastredis.hiredis as hiredis
+import fastredis.hiredisb as hiredisb
+from fastredis.hiredis import REDIS_OK
+from fastredis.wrapper_tools import (
+    Command,
+    CommandArgs,
+    ReplyValue
+)
+import fastredis.wrappers_async as wa
+from fastredis.wrappers_async import (
+    AutoPipeline,
+    ReplyQueue,
+    redis_set_connect_cb,
+    redis_set_disconnect_cb,
+    redis_disconnect,
+    redis_free,
+    redis_reply_queue,
+    redis_set_reply_queue,
+    redis_set_read_hook
+)
+
+
+def redis_connect(
+        ip: bytes,
+        port: int = 6379,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> Tuple[hiredis.redisAsyncContext, list]:
+    """Bytes version of redis_connect().
+
+    The asynchronous context and its ReplyQueue are shared with the str
+    wrappers. Only sending commands and reducing replies differ.
+    """
+
+    return wa.redis_connect(ip.decode(), port, auto_pipeline)
+
+
+def redis_connect_unix(
+        path: bytes,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> Tuple[hiredis.redisAsyncContext, list]:
+    """Bytes version of redis_connect_unix()."""
+
+    return wa.redis_connect_unix(path.decode(), auto_pipeline)
+
+
+async def redis_command(
+        context: hiredis.redisAsyncContext,
+        command: bytes,
+        replies: Optional[ReplyQueue] = None
+    ) -> ReplyValue:
+    """Bytes version of redis_command().
+
+    Wrapper around hiredisb.redisAsyncCommandOL_b().
+    """
+
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq, reply_fut = replies.push()
+
+    try:
+        status = hiredisb.redisAsyncCommandOL_b(context, command, seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+    if status != REDIS_OK:
+        wa._queue_failed(context, replies, seq)
+
+    return await reply_fut
+
+
+async def redis_command_args(
+        context: hiredis.redisAsyncContext,
+        args: CommandArgs,
+        replies: Optional[ReplyQueue] = None
+    ) -> ReplyValue:
+    """Bytes version of redis_command_args().
+
+    Wrapper around hiredisb.redisAsyncCommandArgvOL_b().
+    """
+
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq, reply_fut = replies.push()
+
+    try:
+        status = hiredisb.redisAsyncCommandArgvOL_b(context, args, seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+    if status != REDIS_OK:
+        wa._queue_failed(context, replies, seq)
+
+    return await reply_fut
+
+
+async def redis_pipeline(
+        context: hiredis.redisAsyncContext,
+        commands: Sequence[Command],
+        raise_on_error: bool = True,
+        replies: Optional[ReplyQueue] = None
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Bytes version of redis_pipeline().
+
+    Wrapper around hiredisb.redisAsyncCommandsOL_b().
+    """
+
+    return await wa._pipeline(
+        context,
+        commands,
+        raise_on_error,
+        replies,
+        hiredisb.redisAsyncCommandsOL_b
+    )
+
+
+def redis_subscribe(
+        context: hiredis.redisAsyncContext,
+        args: CommandArgs,
+        handler: Callable[[Any], None],
+        replies: Optional[ReplyQueue] = None
+    ) -> int:
+    """Bytes version of redis_subscribe().
+
+    Wrapper around hiredisb.redisAsyncCommandArgvOL_b().
+    """
+
+    if replies is None:
+        replies = hiredis.redisAsyncGetReplyHandler(context)
+    seq = replies.subscribe(handler)
+
+    try:
+        status = hiredisb.redisAsyncCommandArgvOL_b(context, args, seq)
+    except BaseException:
+        replies.unsubscribe(seq)
+        raise
+    if status != REDIS_OK:
+        replies.unsubscribe(seq)
+        raise_context_error(context)
+        raise ContextError('Cannot add command to write queue.')
+    return seq
+
+
+def redis_unsubscribe(
+        context: hiredis.redisAsyncContext,
+        args: CommandArgs
+    ) -> None:
+    """Bytes version of redis_unsubscribe().
+
+    Wrapper around hiredisb.redisAsyncCommandArgvOL_b().
+    """
+
+    if hiredisb.redisAsyncCommandArgvOL_b(context, args, 0) != REDIS_OK:
+        raise_context_error(context)
+        raise ContextError('Cannot add command to write queue.')
@@ -0,0 +1,475 @@
+"""Low-level wrappers for the asyncio.Protocol backend.
+
+The hiredis async API owns its socket, and is driven through the ctypes
+event callbacks set up in wrappers_async.py. With this backend the event
+loop's transport owns the socket instead, as for any asyncio.Protocol, and
+hiredis only formats commands and parses replies: every read is fed to a
+redisReader, and the complete replies are reduced in C and resolved together
+through the same ReplyQueue as with the hiredis backend. Event loops that implement
+transports natively, such as uvloop, then do all socket I/O without calling
+back into python per event.
+
+The context passed to the functions here is the RedisProtocol instance.
+"""
+
+import asyncio
+from collections import deque
+from itertools import repeat
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+from fastredis.exceptions import *
+import fastredis.hiredis as hiredis
+from fastredis.wrapper_tools import (
+    Command,
+    CommandArg,
+    CommandArgs,
+    ReplyValue
+)
+import fastredis.wrappers_async as wa
+from fastredis.wrappers_async import AutoPipeline, ReplyQueue, check_auto_pipeline
+
+
+# (P)SUBSCRIBE replies, for both str and bytes connections, mapped to whether
+# they are for a pattern and whether they end a subscription
+_PUSH_KINDS = {
+    name: kind
+    for kind, names in (
+        ((False, False), ('message', 'subscribe')),
+        ((True, False), ('pmessage', 'psubscribe')),
+        ((False, True), ('unsubscribe',)),
+        ((True, True), ('punsubscribe',))
+    )
+    for name in names + tuple(name.encode() for name in names)
+}
+
+
+class RedisProtocol(asyncio.Protocol):
+    """Connection state of the asyncio.Protocol backend, with str replies.
+
+    `order` holds the sequence number of every reply still owed, in the
+    order the commands were sent. A pipeline's sequence number is repeated
+    once per command. Subscribed channels and patterns map to the sequence
+    numbers of their handlers instead, and while any are subscribed, replies
+    that look like pub/sub messages are routed by channel or pattern.
+
+    With `auto_pipeline`, single commands are formatted into `buffer` and
+    written together by flush(). See AutoPipeline.
+    """
+
+    create_reader = staticmethod(hiredis.redisReaderCreate)
+    free_reader = staticmethod(hiredis.redisReaderFree)
+    feed = staticmethod(hiredis.redisReaderFeedReduced)
+    format_commands = staticmethod(hiredis.redisFormatCommands)
+
+    def __init__(self,
+            loop: asyncio.AbstractEventLoop,
+            auto_pipeline: Optional[AutoPipeline] = None
+        ):
+        self.loop = loop
+        self.auto_pipeline = auto_pipeline
+        self.buffer = []
+        self.waiting = 0
+        self.flush_handle = None
+        self.replies = ReplyQueue(loop)
+        self.transport = None
+        self.reader = None
+        self.order = deque()
+        self.channels = {}
+        self.patterns = {}
+        self.closing = False
+        self.read_hook = None
+        self.disconnected = loop.create_future()
+
+    @staticmethod
+    def key(name: CommandArg) -> str:
+        """The channel or pattern `name` as redis will send it back."""
+
+        if isinstance(name, str):
+            return name
+        if isinstance(name, int):
+            return str(name)
+        return bytes(name).decode('utf-8', 'surrogateescape')
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.reader = self.create_reader()
+
+    def data_received(self, data: bytes) -> None:
+        if self.read_hook is not None:
+            self.read_hook()
+        try:
+            values = self.feed(self.reader, data)
+        except ProtocolError as e:
+            self._close(e)
+            self.transport.abort()
+            return
+
+        # resolved together, as the hiredis backend does per read
+        batch = []
+        append = batch.append
+        order = self.order
+        subscribed = self.channels or self.patterns
+        for value in values:
+            if (
+                subscribed
+                and value.__class__ is tuple
+                and value
+                and value[0] in _PUSH_KINDS
+            ):
+                seq = self._route(value)
+                subscribed = self.channels or self.patterns
+                if seq is None:
+                    continue
+            elif order:
+                seq = order.popleft()
+            else:
+                if batch:
+                    self.replies.resolve(batch)
+                self._close(FastredisError(
+                    f'Unexpected reply with no command waiting: {value!r:.100}'
+                ))
+                self.transport.abort()
+                return
+            append(seq)
+            append(value)
+        if batch:
+            self.replies.resolve(batch)
+        if self.closing and not order:
+            self.transport.close()
+
+    def _route(self, value: tuple) -> Optional[int]:
+        """The sequence number of the handler for a pub/sub reply, if any."""
+
+        pattern, ends = _PUSH_KINDS[value[0]]
+        names = self.patterns if pattern else self.channels
+        if ends:
+            return names.pop(value[1], None)
+        return names.get(value[1])
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if exc is not None:
+            error = IOError(str(exc))
+        elif self.closing:
+            error = None
+        else:
+            error = EOFError('Server closed the connection')
+        self._close(error)
+
+    def _close(self, error: Optional[Exception]) -> None:
+        """Fails every pending reply and subscription, and frees the reader.
+
+        `error` is what the replies fail with, and what `disconnected` is
+        set to. None fails the replies with ContextError, and sets
+        `disconnected` to True.
+        """
+
+        if self.disconnected.done():
+            return
+        self.closing = True
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.buffer.clear()
+        if error is None:
+            lost = ContextError('Disconnected before the reply was received.')
+        else:
+            lost = error
+        replies = self.replies
+        seqs = list(self.order)
+        seqs += dict.fromkeys((*self.channels.values(), *self.patterns.values()))
+        self.order.clear()
+        self.channels.clear()
+        self.patterns.clear()
+        for seq in seqs:
+            # a new instance per reply, as hiredis sets one per callback
+            replies(seq, type(lost)(*lost.args))
+        if self.reader is not None:
+            self.free_reader(self.reader)
+            self.reader = None
+        if error is None:
+            self.disconnected.set_result(True)
+        else:
+            self.disconnected.set_exception(error)
+
+    def send(self, commands: Sequence[Command], seq: Optional[int]) -> None:
+        """Writes commands whose replies all resolve sequence number `seq`.
+
+        No reply is expected if `seq` is None. All commands are formatted
+        before any is written.
+
+        Raises:
+            * ContextError if the connection is closing or closed
+        """
+
+        if self.closing:
+            raise ContextError('Cannot add command to write queue.')
+        data = self.format_commands(commands)
+        auto_pipeline = self.auto_pipeline
+        if auto_pipeline is None:
+            self.transport.write(data)
+        else:
+            self.buffer.append(data)
+            self.waiting += len(commands)
+            if (
+                seq is None
+                or len(commands) > 1
+                or self.waiting >= auto_pipeline.max_batch
+            ):
+                self.flush()
+            elif self.flush_handle is None:
+                if auto_pipeline.max_delay:
+                    self.flush_handle = self.loop.call_later(
+                        auto_pipeline.max_delay,
+                        self.flush
+                    )
+                else:
+                    self.flush_handle = self.loop.call_soon(self.flush)
+        if seq is not None:
+            self.order.extend(repeat(seq, len(commands)))
+
+    def flush(self) -> None:
+        """Writes the commands waiting to be auto-pipelined."""
+
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.waiting = 0
+        if self.buffer:
+            data = b''.join(self.buffer)
+            self.buffer.clear()
+            self.transport.write(data)
+
+
+async def _connect(
+        protocol: Callable[..., RedisProtocol],
+        ip: Optional[str] = None,
+        port: int = 6379,
+        path: Optional[str] = None,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> RedisProtocol:
+    check_auto_pipeline(auto_pipeline)
+    loop = asyncio.get_event_loop()
+    try:
+        if path is None:
+            _, context = await loop.create_connection(
+                lambda: protocol(loop, auto_pipeline),
+                ip,
+                port
+            )
+        else:
+            _, context = await loop.create_unix_connection(
+                lambda: protocol(loop, auto_pipeline),
+                path
+            )
+    except OSError as e:
+        raise IOError(str(e)) from e
+    return context
+
+
+async def redis_connect(
+        ip: str,
+        port: int = 6379,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> RedisProtocol:
+    """Connect to redis with a transport of the running event loop.
+
+    Unlike wrappers_async.redis_connect(), this returns once connected.
+
+    Raises:
+        * IOError
+    """
+
+    return await _connect(
+        RedisProtocol,
+        ip=ip,
+        port=port,
+        auto_pipeline=auto_pipeline
+    )
+
+
+async def redis_connect_unix(
+        path: str,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> RedisProtocol:
+    """Connect over a unix domain socket. See redis_connect().
+
+    Raises:
+        * IOError
+    """
+
+    return await _connect(RedisProtocol, path=path, auto_pipeline=auto_pipeline)
+
+
+def redis_disconnect(context: RedisProtocol) -> None:
+    """Waits for the replies to all sent commands, then disconnects.
+
+    `context.disconnected` is set once the connection is closed.
+    """
+
+    context.closing = True
+    if context.transport is not None and not context.order:
+        context.transport.close()
+
+
+def redis_free(context: RedisProtocol) -> None:
+    """Closes the connection now.
+
+    Replies still pending fail with ContextError.
+    """
+
+    context.closing = True
+    if context.transport is not None:
+        context.transport.abort()
+    context._close(None)
+
+
+def redis_reply_queue(context: RedisProtocol) -> ReplyQueue:
+    """Returns the ReplyQueue of the connection."""
+
+    return context.replies
+
+
+def redis_set_reply_queue(context: RedisProtocol, replies: ReplyQueue) -> None:
+    """Passes every reply of the connection to `replies` from now on.
+
+    See wrappers_async.redis_set_reply_queue().
+    """
+
+    context.replies = replies
+
+
+def redis_set_read_hook(
+        context: RedisProtocol,
+        hook: Optional[Callable[[], None]] = None
+    ) -> None:
+    """Calls `hook` at the start of every read, or stops if it is None."""
+
+    context.read_hook = hook
+
+
+async def redis_command(
+        context: RedisProtocol,
+        command: str,
+        replies: Optional[ReplyQueue] = None
+    ) -> ReplyValue:
+    """Sends the command and retrieves the response.
+
+    `replies` is the connection's ReplyQueue, looked up if not given.
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    if replies is None:
+        replies = context.replies
+    seq, reply_fut = replies.push()
+
+    try:
+        context.send((command,), seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+
+    return await reply_fut
+
+
+async def redis_command_args(
+        context: RedisProtocol,
+        args: CommandArgs,
+        replies: Optional[ReplyQueue] = None
+    ) -> ReplyValue:
+    """Sends the command as an argument vector and retrieves the response.
+
+    See wrappers_async.redis_command_args().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    if replies is None:
+        replies = context.replies
+    seq, reply_fut = replies.push()
+
+    try:
+        context.send((args,), seq)
+    except BaseException:
+        replies.discard(seq)
+        raise
+
+    return await reply_fut
+
+
+async def redis_pipeline(
+        context: RedisProtocol,
+        commands: Sequence[Command],
+        raise_on_error: bool = True,
+        replies: Optional[ReplyQueue] = None
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Sends all commands in one write and retrieves all of their replies.
+
+    See wrappers_async.redis_pipeline().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    return await wa._pipeline(
+        context,
+        commands,
+        raise_on_error,
+        replies if replies is not None else context.replies,
+        RedisProtocol.send
+    )
+
+
+def redis_subscribe(
+        context: RedisProtocol,
+        args: CommandArgs,
+        handler: Callable[[Any], None],
+        replies: Optional[ReplyQueue] = None
+    ) -> int:
+    """Sends a SUBSCRIBE or PSUBSCRIBE command given as arguments.
+
+    Replies are passed to `handler` as for wrappers_async.redis_subscribe(),
+    including that a second subscription to a channel or pattern replaces
+    the handler of the first.
+
+    Raises:
+        * ContextError (any type)
+    """
+
+    if replies is None:
+        replies = context.replies
+    command = args[0]
+    if not isinstance(command, str):
+        command = bytes(command).decode()
+    if command.upper() == 'PSUBSCRIBE':
+        names = context.patterns
+    else:
+        names = context.channels
+    seq = replies.subscribe(handler)
+
+    try:
+        context.send((args,), None)
+    except BaseException:
+        replies.unsubscribe(seq)
+        raise
+    for name in args[1:]:
+        names[context.key(name)] = seq
+    return seq
+
+
+def redis_unsubscribe(context: RedisProtocol, args: CommandArgs) -> None:
+    """Sends an UNSUBSCRIBE or PUNSUBSCRIBE command given as arguments.
+
+    The confirmations are delivered to the handlers given to
+    redis_subscribe(). Like hiredis, this refuses the command on a
+    connection that is not subscribed to anything.
+
+    Raises:
+        * ContextError (any type)
+    """
+
+    if not (context.channels or context.patterns):
+        raise ContextError('Cannot add command to write queue.')
+    context.send((args,), None)
@@ -0,0 +1,68 @@
+"""Low-level wrappers for the asyncio.Protocol backend, with bytes replies."""
+
+from typing import Optional
+
+import fastredis.hiredisb as hiredisb
+from fastredis.wrapper_tools import CommandArg
+from fastredis.wrappers_async import AutoPipeline
+import fastredis.wrappers_protocol as wp
+from fastredis.wrappers_protocol import (
+    redis_disconnect,
+    redis_free,
+    redis_reply_queue,
+    redis_set_reply_queue,
+    redis_set_read_hook,
+    redis_command,
+    redis_command_args,
+    redis_pipeline,
+    redis_subscribe,
+    redis_unsubscribe
+)
+
+
+class RedisProtocolBytes(wp.RedisProtocol):
+    """Bytes version of RedisProtocol.
+
+    Only parsing replies differs. Commands are formatted the same way.
+    """
+
+    create_reader = staticmethod(hiredisb.redisReaderCreate_b)
+    free_reader = staticmethod(hiredisb.redisReaderFree_b)
+    feed = staticmethod(hiredisb.redisReaderFeedReduced_b)
+    format_commands = staticmethod(hiredisb.redisFormatCommands_b)
+
+    @staticmethod
+    def key(name: CommandArg) -> bytes:
+        if isinstance(name, str):
+            return name.encode()
+        if isinstance(name, int):
+            return str(name).encode()
+        return bytes(name)
+
+
+async def redis_connect(
+        ip: bytes,
+        port: int = 6379,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> RedisProtocolBytes:
+    """Bytes version of redis_connect()."""
+
+    return await wp._connect(
+        RedisProtocolBytes,
+        ip=ip.decode(),
+        port=port,
+        auto_pipeline=auto_pipeline
+    )
+
+
+async def redis_connect_unix(
+        path: bytes,
+        auto_pipeline: Optional[AutoPipeline] = None
+    ) -> RedisProtocolBytes:
+    """Bytes version of redis_connect_unix()."""
+
+    return await wp._connect(
+        RedisProtocolBytes,
+        path=path.decode(),
+        auto_pipeline=auto_pipeline
+    )
@@ -1,13 +1,14 @@
 """Low-level wrappers around the exposed hiredis API."""
 
-from typing import AnyStr, Union
+from typing import AnyStr, List, Optional, Sequence, Union
 
 from fastredis.exceptions import *
 import fastredis.hiredis as hiredis
 import fastredis.hiredisb as hiredisb
 from fastredis.wrapper_tools import (
-    ReplyValue,
-    reduce_reply_b
+    Command,
+    CommandArgs,
+    ReplyValue
 )
 
 
@@ -29,12 +30,35 @@ def redis_connect(
     else:
         timeval = hiredis.timeval()
         timeval.tv_sec = int(timeout)
-        timeval.tv_usec = (timeout - int(timeout)) * (10 ** 6)
+        timeval.tv_usec = int((timeout - int(timeout)) * (10 ** 6))
         context = hiredisb.redisConnectWithTimeout_b(ip, port, timeval)
     raise_context_error(context)
     return context
 
 
+def redis_connect_unix(
+        path: bytes,
+        timeout: Optional[float] = None
+    ) -> hiredisb.redisContext_b:
+    """Connects to redis over a unix domain socket.
+
+    Wrapper around hiredisb.redisConnectUnix_b().
+    Raises:
+        * ContextError (any type)
+    In the event of a timeout, the subclass of ContextError raised is IOError.
+    """
+
+    if timeout is None:
+        context = hiredisb.redisConnectUnix_b(path)
+    else:
+        timeval = hiredis.timeval()
+        timeval.tv_sec = int(timeout)
+        timeval.tv_usec = int((timeout - int(timeout)) * (10 ** 6))
+        context = hiredisb.redisConnectUnixWithTimeout_b(path, timeval)
+    raise_context_error(context)
+    return context
+
+
 def redis_free(context: hiredisb.redisContext_b) -> None:
     """Frees the redis context object.
 
@@ -44,20 +68,56 @@ def redis_free(context: hiredisb.redisContext_b) -> None:
     hiredisb.redisFree_b(context)
 
 
+def redis_set_timeout(
+        context: hiredisb.redisContext_b,
+        timeout: Optional[float]
+    ) -> None:
+    """Sets the timeout of each read from and write to the socket.
+
+    Wrapper around hiredisb.redisSetTimeout_b(). A timeout of None or 0 blocks forever.
+    When a read or write times out, IOError is raised and the context keeps
+    the error, so the connection can no longer be used.
+    Raises:
+        * ContextError (any type)
+    """
+
+    timeval = hiredis.timeval()
+    if timeout:
+        if timeout < 0:
+            raise ValueError('timeout must be nonnegative or None')
+        timeval.tv_sec = int(timeout)
+        # a zero timeval would mean no timeout at all
+        timeval.tv_usec = max(int((timeout - int(timeout)) * (10 ** 6)), 1)
+    else:
+        timeval.tv_sec = 0
+        timeval.tv_usec = 0
+    if hiredisb.redisSetTimeout_b(context, timeval) != REDIS_OK:
+        raise_context_error(context)
+        raise ContextError('Setting the timeout failed.')
+
+
 def redis_command(
         context: hiredisb.redisContext_b,
         command: bytes
     ) -> ReplyValue:
     """Bytes version of redis_command().
 
-    Wrapper around hiredisb.redisCommand_b().
+    Wrapper around hiredisb.redisCommandReduced_b().
     """
 
-    rep = hiredisb.redisCommand_b(context, command)
-    raise_empty_reply_error(context, rep)
-    ret = reduce_reply_b(rep)
-    hiredisb.freeReplyObject_b(rep)
-    return ret
+    return hiredisb.redisCommandReduced_b(context, command)
+
+
+def redis_command_args(
+        context: hiredisb.redisContext_b,
+        args: CommandArgs
+    ) -> ReplyValue:
+    """Bytes version of redis_command_args().
+
+    Wrapper around hiredisb.redisCommandArgvReduced_b().
+    """
+
+    return hiredisb.redisCommandArgvReduced_b(context, args)
 
 
 def redis_write(context: hiredisb.redisContext_b, command: bytes) -> None:
@@ -71,18 +131,159 @@ def redis_write(context: hiredisb.redisContext_b, command: bytes) -> None:
         raise ContextError('redisAppendCommand error and no error code is set.')
 
 
+def redis_write_args(
+        context: hiredisb.redisContext_b,
+        args: CommandArgs
+    ) -> None:
+    """Bytes version of redis_write_args().
+
+    Wrapper around hiredisb.redisAppendCommandArgv_b().
+    """
+
+    if hiredisb.redisAppendCommandArgv_b(context, args) == REDIS_ERR:
+        raise_context_error(context)
+        raise ContextError('redisAppendCommandArgv error and no error code is set.')
+
+
 def redis_read(context: hiredisb.redisContext_b) -> ReplyValue:
     """Bytes version of redis_read().
 
-    Wrapper around hiredisb.redisGetReplyOL()."""
+    Wrapper around hiredisb.redisGetReplyReduced_b()."""
+
+    return hiredisb.redisGetReplyReduced_b(context)
+
+
+def redis_read_reply(context: hiredisb.redisContext_b) -> hiredisb.redisReply_b:
+    """Bytes version of redis_read_reply().
+
+    Wrapper around hiredisb.redisGetReplyOL_b()."""
 
     out = hiredisb.redisReplyOut_b()
     hiredisb.redisGetReplyOL_b(context, out)
     if out.ret == REDIS_ERR:
         raise_context_error(context)
         raise ContextError('redisGetReply error and no error code is set.')
-    rep = out.reply
-    raise_empty_reply_error(context, rep)
-    ret = reduce_reply_b(rep)
-    hiredisb.freeReplyObject_b(rep)
-    return ret
+    return out.reply
+
+
+def redis_reduce_reply(reply: hiredisb.redisReply_b) -> ReplyValue:
+    """Bytes version of redis_reduce_reply().
+
+    Wrapper around hiredisb.redisReplyReduce_b() and
+    hiredisb.freeReplyObject_b()."""
+
+    try:
+        return hiredisb.redisReplyReduce_b(reply)
+    finally:
+        hiredisb.freeReplyObject_b(reply)
+
+
+def redis_read_into(
+        context: hiredisb.redisContext_b,
+        out
+    ) -> Optional[int]:
+    """Reads a string reply straight into the writable buffer `out`.
+
+    `out` is any object supporting the buffer protocol, such as a bytearray,
+    mmap or numpy array. Returns the number of bytes copied, or None for a
+    nil reply. No bytes or str object is created for the reply.
+
+    Wrapper around hiredisb.redisGetReplyInto_b().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError if the reply is not a string or nil
+        * ValueError if the reply does not fit in `out`
+        * BufferError if `out` is not writable
+    """
+
+    return hiredisb.redisGetReplyInto_b(context, out)
+
+
+def redis_read_view(context: hiredisb.redisContext_b) -> Optional[memoryview]:
+    """Reads a string reply as a read-only memoryview, or None for nil.
+
+    The view points at the reply as parsed by hiredis, without copying it,
+    and keeps the reply alive until the view is released.
+
+    Wrapper around hiredisb.redisGetReplyView_b().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError if the reply is not a string or nil
+    """
+
+    return hiredisb.redisGetReplyView_b(context)
+
+
+def redis_pipeline(
+        context: hiredisb.redisContext_b,
+        commands: Sequence[Command],
+        raise_on_error: bool = True
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Bytes version of redis_pipeline().
+
+    Wrapper around hiredisb.redisPipelineReduced_b().
+    """
+
+    return hiredisb.redisPipelineReduced_b(context, commands, raise_on_error)
+
+
+def redis_write_many(
+        context: hiredisb.redisContext_b,
+        commands: Sequence[Command]
+    ) -> int:
+    """Writes all commands to the send buffer, but does not send yet.
+
+    Each command is as for redis_pipeline(). Returns the number of commands
+    written, which is the number of replies to read with redis_read_many().
+
+    Wrapper around hiredisb.redisAppendCommands_b().
+    Raises:
+        * ContextError (any type)
+    """
+
+    return hiredisb.redisAppendCommands_b(context, commands)
+
+
+def redis_flush(context: hiredisb.redisContext_b) -> None:
+    """Sends the whole send buffer without reading any replies.
+
+    Wrapper around hiredisb.redisFlush_b().
+    Raises:
+        * ContextError (any type)
+    """
+
+    hiredisb.redisFlush_b(context)
+
+
+def redis_read_many(
+        context: hiredisb.redisContext_b,
+        count: int,
+        raise_on_error: bool = True
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Reads the next `count` replies, as redis_pipeline() does.
+
+    Wrapper around hiredisb.redisGetRepliesReduced_b().
+    Raises:
+        * HiredisError (any type)
+        * FastredisError
+    """
+
+    return hiredisb.redisGetRepliesReduced_b(context, count, raise_on_error)
+
+
+def redis_read_available(
+        context: hiredisb.redisContext_b
+    ) -> List[Union[ReplyValue, ReplyError]]:
+    """Reads from the socket once and returns every complete reply.
+
+    Blocks until the socket is readable, so wait for that with select() to
+    never block. Returns an empty list if no reply is complete yet. Error
+    replies are returned in place as exception instances.
+
+    Wrapper around hiredisb.redisReadAvailable_b().
+    Raises:
+        * ContextError (any type)
+        * FastredisError
+    """
+
+    return hiredisb.redisReadAvailable_b(context)
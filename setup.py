@@ -4,6 +4,7 @@ from setuptools import Extension, setup
 hiredis_module = Extension(
     name='_hiredis',
     sources=['fastredis/hiredis.i'],
+    depends=['fastredis/common.i'],
     include_dirs=['/usr/include/hiredis'],
     libraries=['hiredis'],
 )
@@ -11,6 +12,7 @@ hiredis_module = Extension(
 hiredisb_module = Extension(
     name='_hiredisb',
     sources=['fastredis/hiredisb.i'],
+    depends=['fastredis/common.i'],
     include_dirs=['/usr/include/hiredis'],
     libraries=['hiredis'],
 )
@@ -25,7 +27,7 @@ setup(
     #download_url
     #license
     #platforms
-    packages=['fastredis'],
+    packages=['fastredis', 'fastredis.benchmarks'],
     ext_package='fastredis',
     ext_modules=[hiredis_module, hiredisb_module],
 )
@@ -1,13 +1,19 @@
 import asyncio
+import os
 import pytest
 
 
-REDIS_IP = '127.0.0.1'
-REDIS_PORT = 6379
+# Point these at another server, such as tests/resp_server.py, with
+# FASTREDIS_BENCH_IP, FASTREDIS_BENCH_PORT and FASTREDIS_BENCH_SOCKET.
+REDIS_IP = os.environ.get('FASTREDIS_BENCH_IP', '127.0.0.1')
+REDIS_PORT = int(os.environ.get('FASTREDIS_BENCH_PORT', 6379))
+REDIS_SOCKET = os.environ.get('FASTREDIS_BENCH_SOCKET', '/tmp/redis.sock')
+CLUSTER_NODES = [('127.0.0.1', 7000)]
 KEY = 'testkey'
 VAL = 'testvalue'
 
 REDIS_IP_B = REDIS_IP.encode()
+REDIS_SOCKET_B = REDIS_SOCKET.encode()
 KEY_B = KEY.encode()
 VAL_B = VAL.encode()
 
@@ -34,6 +40,15 @@ def test_connect_disconnect_fastredis(benchmark):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='connect_disconnect')
+def test_connect_disconnect_fastredis_unix(benchmark):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET) as r:
+            pass
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='connect_disconnect')
 def test_connect_disconnect_redis(benchmark):
     import redis
@@ -70,6 +85,17 @@ def test_single_set_get_del_fastredis(benchmark):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='single_set_get_del')
+def test_single_set_get_del_fastredis_unix(benchmark):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET) as r:
+            assert r.command('SET testkey testvalue') == 'OK'
+            assert r.command('GET testkey') == 'testvalue'
+            assert r.command('DEL testkey') == 1
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='single_set_get_del')
 def test_single_set_get_del_redis(benchmark):
     import redis
@@ -124,6 +150,18 @@ def test_set_del_fastredis(benchmark, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='set_del')
+def test_set_del_fastredis_unix(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET) as r:
+            for key in keys:
+                assert r.command(f'SET {key} {key}') == 'OK'
+            for key in keys:
+                assert r.command(f'DEL {key}') == 1
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='set_del')
 def test_set_del_redis(benchmark, keys):
     import redis
@@ -168,6 +206,52 @@ def test_set_get_del_fastredis(benchmark, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='set_get_del')
+def test_set_get_del_fastredis_unix(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET) as r:
+            for key in keys:
+                assert r.command(f'SET {key} {key}') == 'OK'
+            for key in keys:
+                assert r.command(f'GET {key}') == key
+            for key in keys:
+                assert r.command(f'DEL {key}') == 1
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='set_get_del')
+def test_set_get_del_fastredis_args(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            for key in keys:
+                assert r.command_args('SET', key, key) == 'OK'
+            for key in keys:
+                assert r.command_args('GET', key) == key
+            for key in keys:
+                assert r.command_args('DEL', key) == 1
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='set_get_del')
+def test_set_get_del_fastredis_pipeline(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            with r.pipeline() as pipe:
+                for key in keys:
+                    pipe.command_args('SET', key, key)
+                assert pipe.execute() == ['OK'] * len(keys)
+                for key in keys:
+                    pipe.command_args('GET', key)
+                assert pipe.execute() == keys
+                for key in keys:
+                    pipe.command_args('DEL', key)
+                assert pipe.execute() == [1] * len(keys)
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='set_get_del')
 def test_set_get_del_redis(benchmark, keys):
     import redis
@@ -182,6 +266,24 @@ def test_set_get_del_redis(benchmark, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='set_get_del')
+def test_set_get_del_redis_pipeline(benchmark, keys):
+    import redis
+    def work():
+        with redis.Redis(REDIS_IP, REDIS_PORT, decode_responses=True) as r:
+            pipe = r.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(key, key)
+            assert all(pipe.execute())
+            for key in keys:
+                pipe.get(key)
+            assert pipe.execute() == keys
+            for key in keys:
+                pipe.delete(key)
+            assert pipe.execute() == [1] * len(keys)
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='set_get_del')
 def test_set_get_del_pyredis(benchmark, keys):
     import pyredis
@@ -217,6 +319,15 @@ def test_b_connect_disconnect_fastredis(benchmark):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='b_connect_disconnect')
+def test_b_connect_disconnect_fastredis_unix(benchmark):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET) as r:
+            pass
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='b_connect_disconnect')
 def test_b_connect_disconnect_redis(benchmark):
     import redis
@@ -253,6 +364,17 @@ def test_b_single_set_get_del_fastredis(benchmark):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='b_single_set_get_del')
+def test_b_single_set_get_del_fastredis_unix(benchmark):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET_B, encoding=None) as r:
+            assert r.command(b'SET testkey testvalue') == b'OK'
+            assert r.command(b'GET testkey') == b'testvalue'
+            assert r.command(b'DEL testkey') == 1
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='b_single_set_get_del')
 def test_b_single_set_get_del_redis(benchmark):
     import redis
@@ -293,6 +415,18 @@ def test_b_set_del_fastredis(benchmark, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='b_set_del')
+def test_b_set_del_fastredis_unix(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET_B, encoding=None) as r:
+            for key in keys:
+                assert r.command(f'SET {key} {key}'.encode()) == b'OK'
+            for key in keys:
+                assert r.command(f'DEL {key}'.encode()) == 1
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='b_set_del')
 def test_b_set_del_redis(benchmark, keys):
     import redis
@@ -338,6 +472,55 @@ def test_b_set_get_del_fastredis(benchmark, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='b_set_get_del')
+def test_b_set_get_del_fastredis_unix(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(path=REDIS_SOCKET_B, encoding=None) as r:
+            for key in keys:
+                assert r.command(f'SET {key} {key}'.encode()) == b'OK'
+            for key in keys:
+                assert r.command(f'GET {key}'.encode()) == key.encode()
+            for key in keys:
+                assert r.command(f'DEL {key}'.encode()) == 1
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='b_set_get_del')
+def test_b_set_get_del_fastredis_args(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+            for key in keys:
+                key = key.encode()
+                assert r.command_args(b'SET', key, key) == b'OK'
+            for key in keys:
+                key = key.encode()
+                assert r.command_args(b'GET', key) == key
+            for key in keys:
+                assert r.command_args(b'DEL', key.encode()) == 1
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='b_set_get_del')
+def test_b_set_get_del_fastredis_pipeline(benchmark, keys):
+    import fastredis as fr
+    keys_b = [key.encode() for key in keys]
+    def work():
+        with fr.SyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+            with r.pipeline() as pipe:
+                for key in keys_b:
+                    pipe.command_args(b'SET', key, key)
+                assert pipe.execute() == [b'OK'] * len(keys_b)
+                for key in keys_b:
+                    pipe.command_args(b'GET', key)
+                assert pipe.execute() == keys_b
+                for key in keys_b:
+                    pipe.command_args(b'DEL', key)
+                assert pipe.execute() == [1] * len(keys_b)
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='b_set_get_del')
 def test_b_set_get_del_redis(benchmark, keys):
     import redis
@@ -375,6 +558,344 @@ def test_b_set_get_del_pyredis(benchmark, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='cluster_set_get_del')
+def test_cluster_set_get_del_fastredis(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.ClusterConnection(CLUSTER_NODES) as r:
+            for key in keys:
+                assert r.command_args('SET', key, key) == 'OK'
+            for key in keys:
+                assert r.command_args('GET', key) == key
+            for key in keys:
+                assert r.command_args('DEL', key) == 1
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='cluster_set_get_del')
+def test_cluster_set_get_del_fastredis_pipeline(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.ClusterConnection(CLUSTER_NODES) as r:
+            with r.pipeline() as pipe:
+                for key in keys:
+                    pipe.command_args('SET', key, key)
+                assert pipe.execute() == ['OK'] * len(keys)
+                for key in keys:
+                    pipe.command_args('GET', key)
+                assert pipe.execute() == keys
+                for key in keys:
+                    pipe.command_args('DEL', key)
+                assert pipe.execute() == [1] * len(keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='cluster_set_get_del')
+def test_cluster_set_get_del_redis(benchmark, keys):
+    from redis.cluster import RedisCluster
+    def work():
+        host, port = CLUSTER_NODES[0]
+        with RedisCluster(host, port, decode_responses=True) as r:
+            for key in keys:
+                assert r.set(key, key)
+            for key in keys:
+                assert r.get(key) == key
+            for key in keys:
+                assert r.delete(key) == 1
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='cluster_set_get_del')
+def test_cluster_set_get_del_redis_pipeline(benchmark, keys):
+    from redis.cluster import RedisCluster
+    def work():
+        host, port = CLUSTER_NODES[0]
+        with RedisCluster(host, port, decode_responses=True) as r:
+            pipe = r.pipeline()
+            for key in keys:
+                pipe.set(key, key)
+            assert pipe.execute() == [True] * len(keys)
+            for key in keys:
+                pipe.get(key)
+            assert pipe.execute() == keys
+            for key in keys:
+                pipe.delete(key)
+            assert pipe.execute() == [1] * len(keys)
+    benchmark(work)
+
+
+############################################################
+
+@pytest.fixture(scope='function', autouse=False)
+def hot_keys():
+    HOT_KEY_COUNT = 100
+    keys = [f'testkey{i}' for i in range(HOT_KEY_COUNT)]
+    import fastredis as fr
+    with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+        for key in keys:
+            r.command_args('SET', key, key)
+        yield keys
+        r.command_args('DEL', *keys)
+
+
+@pytest.mark.benchmark(group='repeated_get')
+def test_repeated_get_fastredis(benchmark, hot_keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            for _ in range(100):
+                for key in hot_keys:
+                    assert r.command_args('GET', key) == key
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='repeated_get')
+def test_repeated_get_fastredis_cached(benchmark, hot_keys):
+    import fastredis as fr
+    def work():
+        with fr.CachedConnection(REDIS_IP, REDIS_PORT) as r:
+            for _ in range(100):
+                for key in hot_keys:
+                    assert r.command_args('GET', key) == key
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='repeated_get')
+def test_repeated_get_redis(benchmark, hot_keys):
+    import redis
+    def work():
+        with redis.Redis(REDIS_IP, REDIS_PORT, decode_responses=True) as r:
+            for _ in range(100):
+                for key in hot_keys:
+                    assert r.get(key) == key
+    benchmark(work)
+
+
+############################################################
+
+@pytest.fixture(scope='function', autouse=False)
+def large_value():
+    SIZE = 4 << 20
+    value = b'x' * SIZE
+    import fastredis as fr
+    with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+        r.command_args('SET', KEY, value)
+        yield value
+        r.command_args('DEL', KEY)
+
+
+@pytest.mark.benchmark(group='large_get')
+def test_large_get_fastredis(benchmark, large_value):
+    import fastredis as fr
+    with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+        def work():
+            for _ in range(10):
+                assert len(r.command_args('GET', KEY)) == len(large_value)
+        benchmark(work)
+
+
+@pytest.mark.benchmark(group='large_get')
+def test_large_get_fastredis_bytes(benchmark, large_value):
+    import fastredis as fr
+    with fr.SyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+        def work():
+            for _ in range(10):
+                assert len(r.command_args(b'GET', KEY_B)) == len(large_value)
+        benchmark(work)
+
+
+@pytest.mark.benchmark(group='large_get')
+def test_large_get_fastredis_into(benchmark, large_value):
+    import fastredis as fr
+    out = bytearray(len(large_value))
+    with fr.SyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+        def work():
+            for _ in range(10):
+                assert r.get_into(KEY_B, out) == len(large_value)
+        benchmark(work)
+
+
+@pytest.mark.benchmark(group='large_get')
+def test_large_get_fastredis_view(benchmark, large_value):
+    import fastredis as fr
+    with fr.SyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+        def work():
+            for _ in range(10):
+                with r.get_view(KEY_B) as view:
+                    assert view.nbytes == len(large_value)
+        benchmark(work)
+
+
+@pytest.mark.benchmark(group='large_get')
+def test_large_get_redis(benchmark, large_value):
+    import redis
+    with redis.Redis(REDIS_IP, REDIS_PORT) as r:
+        def work():
+            for _ in range(10):
+                assert len(r.get(KEY)) == len(large_value)
+        benchmark(work)
+
+
+############################################################
+
+@pytest.fixture(scope='function', autouse=False)
+def scan_keys(keys):
+    import fastredis as fr
+    with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+        with r.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('SET', key, key)
+        yield keys
+        r.command_args('DEL', *keys)
+
+
+@pytest.mark.benchmark(group='scan')
+def test_scan_fastredis_loop(benchmark, scan_keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            found = 0
+            cursor = '0'
+            while True:
+                cursor, page = r.command(f'SCAN {cursor} MATCH testkey* COUNT 100')
+                for _ in page:
+                    found += 1
+                if cursor == '0':
+                    break
+            assert found == len(scan_keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='scan')
+def test_scan_fastredis_scan_iter(benchmark, scan_keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            found = 0
+            for _ in r.scan_iter(match='testkey*', count=100):
+                found += 1
+            assert found == len(scan_keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='scan')
+def test_scan_redis(benchmark, scan_keys):
+    import redis
+    def work():
+        with redis.Redis(REDIS_IP, REDIS_PORT, decode_responses=True) as r:
+            found = sum(1 for _ in r.scan_iter(match='testkey*', count=100))
+            assert found == len(scan_keys)
+    benchmark(work)
+
+
+############################################################
+
+# A rate limiter with a body much larger than its arguments
+RATE_LIMIT_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return current <= tonumber(ARGV[1]) and 1 or 0
+""" + '-- padding\n' * 200
+
+
+@pytest.mark.benchmark(group='lua')
+def test_lua_fastredis_eval(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            for key in keys:
+                assert r.command_args('EVAL', RATE_LIMIT_LUA, 1, key, 10, 1000) == 1
+            r.command_args('DEL', *keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='lua')
+def test_lua_fastredis_script(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            limiter = r.register_script(RATE_LIMIT_LUA)
+            for key in keys:
+                assert limiter([key], [10, 1000]) == 1
+            r.command_args('DEL', *keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='lua')
+def test_lua_fastredis_script_pipeline(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            limiter = r.register_script(RATE_LIMIT_LUA)
+            with r.pipeline() as pipe:
+                for key in keys:
+                    pipe.script(limiter, [key], [10, 1000])
+                assert pipe.execute() == [1] * len(keys)
+            r.command_args('DEL', *keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='lua')
+def test_lua_redis_script(benchmark, keys):
+    import redis
+    def work():
+        with redis.Redis(REDIS_IP, REDIS_PORT, decode_responses=True) as r:
+            limiter = r.register_script(RATE_LIMIT_LUA)
+            for key in keys:
+                assert limiter([key], [10, 1000]) == 1
+            r.delete(*keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='bulk')
+def test_bulk_fastredis_loop(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            for key in keys:
+                r.command_args('SET', key, key)
+            for key in keys:
+                assert r.command_args('GET', key) == key
+            for key in keys:
+                r.command_args('DEL', key)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='bulk')
+def test_bulk_fastredis_bulk(benchmark, keys):
+    import fastredis as fr
+    def work():
+        with fr.SyncConnection(REDIS_IP, REDIS_PORT) as r:
+            r.mset({key: key for key in keys})
+            assert r.mget(keys) == keys
+            assert r.delete_many(keys) == len(keys)
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='bulk')
+def test_bulk_fastredis_pool(benchmark, keys):
+    import fastredis as fr
+    with fr.ConnectionPool(REDIS_IP, REDIS_PORT, max_size=4) as pool:
+        def work():
+            pool.mset({key: key for key in keys})
+            assert pool.mget(keys) == keys
+            assert pool.delete_many(keys) == len(keys)
+        benchmark(work)
+
+
+@pytest.mark.benchmark(group='bulk')
+def test_bulk_redis(benchmark, keys):
+    import redis
+    def work():
+        with redis.Redis(REDIS_IP, REDIS_PORT, decode_responses=True) as r:
+            r.mset({key: key for key in keys})
+            assert r.mget(keys) == keys
+            assert r.delete(*keys) == len(keys)
+    benchmark(work)
+
+
 ############################################################
 ############################################################
 # Async Str Benchmarks
@@ -407,6 +928,18 @@ def test_a_connect_disconnect_fastredis(benchmark, loop):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='async_connect_disconnect')
+def test_a_connect_disconnect_fastredis_unix(benchmark, loop):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET) as r:
+                pass
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='async_connect_disconnect')
 def test_a_connect_disconnect_aioredis(benchmark, loop):
     import aioredis
@@ -439,6 +972,20 @@ def test_a_single_set_get_del_fastredis(benchmark, loop):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='async_single_set_get_del')
+def test_a_single_set_get_del_fastredis_unix(benchmark, loop):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET) as r:
+                assert await r.command('SET testkey testvalue') == 'OK'
+                assert await r.command('GET testkey') == 'testvalue'
+                assert await r.command('DEL testkey') == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='async_single_set_get_del')
 def test_a_single_set_get_del_aioredis(benchmark, loop):
     import aioredis
@@ -478,6 +1025,21 @@ def test_a_set_del_fastredis(benchmark, loop, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='async_set_del')
+def test_a_set_del_fastredis_unix(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET) as r:
+                for key in keys:
+                    assert await r.command(f'SET {key} {key}') == 'OK'
+                for key in keys:
+                    assert await r.command(f'DEL {key}') == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='async_set_del')
 def test_a_set_del_aioredis(benchmark, loop, keys):
     import aioredis
@@ -520,6 +1082,44 @@ def test_a_set_get_del_fastredis(benchmark, loop, keys):
     benchmark(work)
 
 
+@pytest.mark.benchmark(group='async_set_get_del')
+def test_a_set_get_del_fastredis_unix(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET) as r:
+                for key in keys:
+                    assert await r.command(f'SET {key} {key}') == 'OK'
+                for key in keys:
+                    assert await r.command(f'GET {key}') == key
+                for key in keys:
+                    assert await r.command(f'DEL {key}') == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_set_get_del')
+def test_a_set_get_del_fastredis_pipeline(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(REDIS_IP, REDIS_PORT) as r:
+                async with r.pipeline() as pipe:
+                    for key in keys:
+                        pipe.command_args('SET', key, key)
+                    assert await pipe.execute() == ['OK'] * len(keys)
+                    for key in keys:
+                        pipe.command_args('GET', key)
+                    assert await pipe.execute() == keys
+                    for key in keys:
+                        pipe.command_args('DEL', key)
+                    assert await pipe.execute() == [1] * len(keys)
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
 @pytest.mark.benchmark(group='async_set_get_del')
 def test_a_set_get_del_aioredis(benchmark, loop, keys):
     import aioredis
@@ -542,3 +1142,264 @@ def test_a_set_get_del_aioredis(benchmark, loop, keys):
 
         loop.run_until_complete(async_work())
     benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_concurrent_set_get_del')
+def test_a_concurrent_set_get_del_fastredis(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(REDIS_IP, REDIS_PORT) as r:
+                await asyncio.gather(
+                    *(r.command_args('SET', key, key) for key in keys)
+                )
+                await asyncio.gather(*(r.command_args('GET', key) for key in keys))
+                await asyncio.gather(*(r.command_args('DEL', key) for key in keys))
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_concurrent_set_get_del')
+def test_a_concurrent_set_get_del_fastredis_unix(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET) as r:
+                await asyncio.gather(
+                    *(r.command_args('SET', key, key) for key in keys)
+                )
+                await asyncio.gather(*(r.command_args('GET', key) for key in keys))
+                await asyncio.gather(*(r.command_args('DEL', key) for key in keys))
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_concurrent_set_get_del')
+def test_a_concurrent_set_get_del_fastredis_auto_pipeline(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(
+                    REDIS_IP,
+                    REDIS_PORT,
+                    auto_pipeline=True
+                ) as r:
+                await asyncio.gather(
+                    *(r.command_args('SET', key, key) for key in keys)
+                )
+                await asyncio.gather(*(r.command_args('GET', key) for key in keys))
+                await asyncio.gather(*(r.command_args('DEL', key) for key in keys))
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_concurrent_set_get_del')
+def test_a_concurrent_set_get_del_fastredis_pool(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnectionPool(
+                    REDIS_IP,
+                    REDIS_PORT,
+                    min_size=4,
+                    max_size=4
+                ) as r:
+                await asyncio.gather(
+                    *(r.command_args('SET', key, key) for key in keys)
+                )
+                await asyncio.gather(*(r.command_args('GET', key) for key in keys))
+                await asyncio.gather(*(r.command_args('DEL', key) for key in keys))
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_pubsub')
+def test_a_pubsub_fastredis(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(REDIS_IP, REDIS_PORT) as s, \
+                    fr.AsyncConnection(REDIS_IP, REDIS_PORT) as p:
+                sub = await s.subscribe('testchannel')
+                async with p.pipeline() as pipe:
+                    for key in keys:
+                        pipe.command_args('PUBLISH', 'testchannel', key)
+                count = 0
+                async for message in sub:
+                    count += 1
+                    if count == len(keys):
+                        break
+                await sub.unsubscribe()
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_pubsub')
+def test_a_pubsub_fastredis_unix(benchmark, loop, keys):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET) as s, \
+                    fr.AsyncConnection(path=REDIS_SOCKET) as p:
+                sub = await s.subscribe('testchannel')
+                async with p.pipeline() as pipe:
+                    for key in keys:
+                        pipe.command_args('PUBLISH', 'testchannel', key)
+                count = 0
+                async for message in sub:
+                    count += 1
+                    if count == len(keys):
+                        break
+                await sub.unsubscribe()
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_pubsub')
+def test_a_pubsub_aioredis(benchmark, loop, keys):
+    import aioredis
+    def work():
+        async def async_work():
+            try:
+                s = await aioredis.create_redis(
+                    (REDIS_IP, REDIS_PORT),
+                    encoding='utf-8'
+                )
+                p = await aioredis.create_redis(
+                    (REDIS_IP, REDIS_PORT),
+                    encoding='utf-8'
+                )
+                channel, = await s.subscribe('testchannel')
+                for key in keys:
+                    p.publish('testchannel', key)
+                for key in keys:
+                    await channel.get()
+                await s.unsubscribe('testchannel')
+            finally:
+                s.close()
+                p.close()
+                await s.wait_closed()
+                await p.wait_closed()
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+############################################################
+############################################################
+# Async Byte Benchmarks
+############################################################
+############################################################
+
+
+@pytest.mark.benchmark(group='async_b_single_set_get_del')
+def test_a_b_single_set_get_del_fastredis(benchmark, loop):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+                assert await r.command(b'SET testkey testvalue') == b'OK'
+                assert await r.command(b'GET testkey') == b'testvalue'
+                assert await r.command(b'DEL testkey') == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_b_single_set_get_del')
+def test_a_b_single_set_get_del_fastredis_unix(benchmark, loop):
+    import fastredis as fr
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET_B, encoding=None) as r:
+                assert await r.command(b'SET testkey testvalue') == b'OK'
+                assert await r.command(b'GET testkey') == b'testvalue'
+                assert await r.command(b'DEL testkey') == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_b_single_set_get_del')
+def test_a_b_single_set_get_del_aioredis(benchmark, loop):
+    import aioredis
+    def work():
+        async def async_work():
+            try:
+                r = await aioredis.create_redis((REDIS_IP, REDIS_PORT))
+                assert await r.set(KEY_B, VAL_B)
+                assert await r.get(KEY_B) == VAL_B
+                assert await r.delete(KEY_B) == 1
+            finally:
+                r.close()
+                await r.wait_closed()
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+# ############################################################
+
+
+@pytest.mark.benchmark(group='async_b_set_get_del')
+def test_a_b_set_get_del_fastredis(benchmark, loop, keys):
+    import fastredis as fr
+    keys_b = [key.encode() for key in keys]
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(REDIS_IP_B, REDIS_PORT, encoding=None) as r:
+                for key in keys_b:
+                    assert await r.command_args(b'SET', key, key) == b'OK'
+                for key in keys_b:
+                    assert await r.command_args(b'GET', key) == key
+                for key in keys_b:
+                    assert await r.command_args(b'DEL', key) == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_b_set_get_del')
+def test_a_b_set_get_del_fastredis_unix(benchmark, loop, keys):
+    import fastredis as fr
+    keys_b = [key.encode() for key in keys]
+    def work():
+        async def async_work():
+            async with fr.AsyncConnection(path=REDIS_SOCKET_B, encoding=None) as r:
+                for key in keys_b:
+                    assert await r.command_args(b'SET', key, key) == b'OK'
+                for key in keys_b:
+                    assert await r.command_args(b'GET', key) == key
+                for key in keys_b:
+                    assert await r.command_args(b'DEL', key) == 1
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
+
+
+@pytest.mark.benchmark(group='async_b_set_get_del')
+def test_a_b_set_get_del_aioredis(benchmark, loop, keys):
+    import aioredis
+    keys_b = [key.encode() for key in keys]
+    def work():
+        async def async_work():
+            try:
+                r = await aioredis.create_redis((REDIS_IP, REDIS_PORT))
+                for key in keys_b:
+                    assert await r.set(key, key)
+                for key in keys_b:
+                    assert await r.get(key) == key
+                for key in keys_b:
+                    assert await r.delete(key) == 1
+            finally:
+                r.close()
+                await r.wait_closed()
+
+        loop.run_until_complete(async_work())
+    benchmark(work)
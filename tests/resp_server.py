@@ -0,0 +1,437 @@
+"""A small RESP server for testing clients against slow or faulty servers.
+
+RespServer implements PING, ECHO, GET, SET, DEL, MGET, PUBLISH, SUBSCRIBE
+and UNSUBSCRIBE over TCP, a unix socket or both, in an asyncio loop in a
+process of its own, so sync and async clients can both use it:
+
+    with RespServer(delays={'GET': exponential(0.001)}, seed=1) as server:
+        with SyncConnection('127.0.0.1', server.port) as conn:
+            conn.command_args('GET', 'key')
+
+Faults are injected per connection, in order, so they are reproducible:
+
+    * `delays` maps command names, or '*' for any other command, to a delay
+      distribution, such as constant(), uniform(), exponential() or spikes().
+      The delay is waited before the reply is sent, and commands on one
+      connection are handled one after the other, as by redis.
+    * With `fragment_size`, replies are written `fragment_size` bytes at a
+      time, `fragment_delay` seconds apart.
+    * With `drop_after`, each connection is closed instead of replying to
+      the command after its first `drop_after` commands.
+    * pause_reading() stops reading commands until resume_reading(), so
+      clients sending large commands fill their socket buffers.
+    * drop_connections() closes every client connection at once.
+
+Run it standalone to point tests/benchmarks.py or fastredis.benchmarks at:
+
+    python tests/resp_server.py --port 6390 --delay 'GET=exp:0.001'
+    FASTREDIS_BENCH_PORT=6390 pytest tests/benchmarks.py -k single_set_get
+    python -m fastredis.benchmarks run --port 6390 --transports tcp
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set
+
+# A delay distribution: returns a delay in seconds, drawn with the given rng
+Delay = Callable[[random.Random], float]
+
+
+def constant(seconds: float) -> Delay:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Delay:
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential(mean: float) -> Delay:
+    return lambda rng: rng.expovariate(1 / mean) if mean else 0.0
+
+
+def spikes(base: float, spike: float, probability: float) -> Delay:
+    """`base` seconds, or `spike` seconds with the given probability."""
+
+    return lambda rng: spike if rng.random() < probability else base
+
+
+_DISTRIBUTIONS = {
+    'const': constant,
+    'uniform': uniform,
+    'exp': exponential,
+    'spike': spikes,
+}
+
+
+def parse_delay(text: str) -> Delay:
+    """Parse a delay such as const:0.01, uniform:0,0.01, exp:0.001 or
+    spike:0.0001,0.05,0.01 (base, spike and probability)."""
+
+    name, _, args = text.partition(':')
+    if name not in _DISTRIBUTIONS:
+        raise ValueError(f'unknown delay distribution: {name}')
+    return _DISTRIBUTIONS[name](*(float(arg) for arg in args.split(',') if arg))
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _array(items: List[bytes]) -> bytes:
+    return b'*%d\r\n' % len(items) + b''.join(items)
+
+
+def _int(n: int) -> bytes:
+    return b':%d\r\n' % n
+
+
+def _error(message: str) -> bytes:
+    return b'-ERR %s\r\n' % message.encode()
+
+
+class _Client:
+    """A client connection, its subscriptions and its commands so far."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.channels: Set[bytes] = set()
+        self.count = 0
+        self.lock = asyncio.Lock()
+
+
+class RespServer:
+    """Serves RESP on `host` and `port`, and on the unix socket `path`.
+
+    The server runs in a child process, forked by start(). A thread would
+    not do: fastredis holds the GIL while it waits for a reply, so the
+    server could never send it. Pass `port=None` to serve on the unix
+    socket only. With `port=0`, the default, a free port is picked; it is
+    available as `port` after start(). `seed` makes the delays drawn the
+    same in every run.
+    """
+
+    def __init__(self,
+            host: str = '127.0.0.1',
+            port: Optional[int] = 0,
+            path: Optional[str] = None,
+            delays: Optional[Dict[str, Delay]] = None,
+            fragment_size: Optional[int] = None,
+            fragment_delay: float = 0.0,
+            drop_after: Optional[int] = None,
+            seed: Optional[int] = None
+        ):
+        if port is None and path is None:
+            raise ValueError('a port, a path or both are required')
+        if fragment_size is not None and fragment_size < 1:
+            raise ValueError('fragment_size must be at least 1')
+        self.host = host
+        self.port = port
+        self.path = path
+        self.delays = {
+            name.upper(): delay for name, delay in (delays or {}).items()
+        }
+        self.fragment_size = fragment_size
+        self.fragment_delay = fragment_delay
+        self.drop_after = drop_after
+        self.seed = seed
+
+        self._process = None
+        self._pipe = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self) -> None:
+        """Start serving in a child process, and return once listening."""
+
+        context = multiprocessing.get_context('fork')
+        self._pipe, child = context.Pipe()
+        self._process = context.Process(
+            target=self._run,
+            args=(child,),
+            name='resp-server',
+            daemon=True
+        )
+        self._process.start()
+        child.close()
+        self.port = self._request('port')
+
+    def stop(self) -> None:
+        """Close every connection and stop serving."""
+
+        if self._process is None:
+            return
+        try:
+            self._request('stop')
+        except (EOFError, OSError):
+            pass
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._pipe.close()
+        self._process = None
+
+    def _request(self, name: str, *args):
+        self._pipe.send((name, args))
+        return self._pipe.recv()
+
+    def pause_reading(self) -> None:
+        """Stop reading commands from every connection."""
+
+        self._request('pause')
+
+    def resume_reading(self) -> None:
+        """Read commands again after pause_reading()."""
+
+        self._request('resume')
+
+    def drop_connections(self) -> None:
+        """Close every client connection now."""
+
+        self._request('drop')
+
+    def publish(self, channel: bytes, message: bytes) -> int:
+        """Send a message to the subscribers of a channel, like PUBLISH."""
+
+        return self._request('publish', channel, message)
+
+    def stats(self) -> dict:
+        """The number of `connections` accepted, of each command received
+        under `counts`, and of `keys` stored."""
+
+        return self._request('stats')
+
+    # The rest runs in the child process.
+
+    def _run(self, pipe) -> None:
+        try:
+            asyncio.run(self._main(pipe))
+        finally:
+            # Skip the exit handlers inherited from the parent.
+            os._exit(0)
+
+    async def _main(self, pipe) -> None:
+        self.rng = random.Random(self.seed)
+        self.data: Dict[bytes, bytes] = {}
+        self.counts = Counter()
+        self.connections = 0
+        self._clients: Set[_Client] = set()
+        self._reading = asyncio.Event()
+        self._reading.set()
+        self._servers = []
+        if self.port is not None:
+            server = await asyncio.start_server(self._serve, self.host, self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+        if self.path is not None:
+            self._servers.append(
+                await asyncio.start_unix_server(self._serve, self.path)
+            )
+
+        loop = asyncio.get_running_loop()
+        requests = asyncio.Queue()
+        loop.add_reader(pipe.fileno(), lambda: requests.put_nowait(pipe.recv()))
+        while True:
+            name, args = await requests.get()
+            if name == 'stop':
+                break
+            pipe.send(await self._control(name, args))
+        loop.remove_reader(pipe.fileno())
+        for server in self._servers:
+            server.close()
+        await self._drop()
+        pipe.send(None)
+
+    async def _control(self, name: str, args: tuple):
+        if name == 'port':
+            return self.port
+        if name == 'pause':
+            self._reading.clear()
+        elif name == 'resume':
+            self._reading.set()
+        elif name == 'drop':
+            await self._drop()
+        elif name == 'publish':
+            return await self._publish(*args)
+        elif name == 'stats':
+            return {
+                'connections': self.connections,
+                'counts': dict(self.counts),
+                'keys': len(self.data),
+            }
+
+    async def _drop(self) -> None:
+        for client in list(self._clients):
+            client.writer.close()
+
+    async def _publish(self, channel: bytes, message: bytes) -> int:
+        payload = _array([_bulk(b'message'), _bulk(channel), _bulk(message)])
+        subscribers = [c for c in self._clients if channel in c.channels]
+        for client in subscribers:
+            await self._send(client, payload)
+        return len(subscribers)
+
+    async def _serve(
+            self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+        ) -> None:
+        client = _Client(writer)
+        self._clients.add(client)
+        self.connections += 1
+        try:
+            while True:
+                await self._reading.wait()
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                client.count += 1
+                if self.drop_after is not None and client.count > self.drop_after:
+                    break
+                name = args[0].upper().decode(errors='replace')
+                self.counts[name] += 1
+                delay = self.delays.get(name, self.delays.get('*'))
+                if delay is not None:
+                    await asyncio.sleep(delay(self.rng))
+                await self._send(client, await self._execute(client, name, args))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        """Reads a multi-bulk or inline command, or None at end of stream.
+
+        A pause also holds back the rest of a command already being read,
+        such as one that arrived while waiting for the next.
+        """
+
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split() or [b'']
+        args = []
+        for _ in range(int(line[1:])):
+            await self._reading.wait()
+            header = await reader.readline()
+            size = int(header[1:])
+            args.append((await self._read_exactly(reader, size + 2))[:-2])
+        return args
+
+    async def _read_exactly(self, reader: asyncio.StreamReader, size: int) -> bytes:
+        """readexactly() that stops between chunks while paused."""
+
+        chunks = []
+        while size:
+            await self._reading.wait()
+            chunk = await reader.read(min(size, 1 << 16))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b''.join(chunks), None)
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    async def _send(self, client: _Client, payload: bytes) -> None:
+        async with client.lock:
+            writer = client.writer
+            if self.fragment_size is None:
+                writer.write(payload)
+                await writer.drain()
+                return
+            for i in range(0, len(payload), self.fragment_size):
+                writer.write(payload[i:i + self.fragment_size])
+                await writer.drain()
+                if self.fragment_delay:
+                    await asyncio.sleep(self.fragment_delay)
+
+    async def _execute(self, client: _Client, name: str, args: List[bytes]) -> bytes:
+        argc = len(args)
+        if client.channels and name not in ('SUBSCRIBE', 'UNSUBSCRIBE', 'PING'):
+            return _error(f"'{name.lower()}' is not allowed while subscribed")
+        if name == 'PING':
+            return b'+PONG\r\n' if argc == 1 else _bulk(args[1])
+        if name == 'ECHO' and argc == 2:
+            return _bulk(args[1])
+        if name == 'GET' and argc == 2:
+            return _bulk(self.data.get(args[1]))
+        if name == 'SET' and argc == 3:
+            self.data[args[1]] = args[2]
+            return b'+OK\r\n'
+        if name == 'DEL' and argc > 1:
+            return _int(sum(self.data.pop(key, None) is not None for key in args[1:]))
+        if name == 'MGET' and argc > 1:
+            return _array([_bulk(self.data.get(key)) for key in args[1:]])
+        if name == 'PUBLISH' and argc == 3:
+            return _int(await self._publish(args[1], args[2]))
+        if name == 'SUBSCRIBE' and argc > 1:
+            replies = []
+            for channel in args[1:]:
+                client.channels.add(channel)
+                replies.append(_array([
+                    _bulk(b'subscribe'), _bulk(channel), _int(len(client.channels))
+                ]))
+            return b''.join(replies)
+        if name == 'UNSUBSCRIBE':
+            replies = []
+            for channel in args[1:] or sorted(client.channels) or [None]:
+                client.channels.discard(channel)
+                replies.append(_array([
+                    _bulk(b'unsubscribe'), _bulk(channel), _int(len(client.channels))
+                ]))
+            return b''.join(replies)
+        return _error(f"unknown command or wrong number of arguments for '{name}'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    parser.add_argument('--path', help='also serve on this unix socket')
+    parser.add_argument('--delay', action='append', default=[],
+        help="COMMAND=DISTRIBUTION, such as 'GET=exp:0.001' or '*=const:0'")
+    parser.add_argument('--fragment-size', type=int)
+    parser.add_argument('--fragment-delay', type=float, default=0.0)
+    parser.add_argument('--drop-after', type=int)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    delays = {}
+    for spec in args.delay:
+        name, _, distribution = spec.partition('=')
+        delays[name] = parse_delay(distribution)
+    server = RespServer(
+        args.host,
+        args.port,
+        args.path,
+        delays=delays,
+        fragment_size=args.fragment_size,
+        fragment_delay=args.fragment_delay,
+        drop_after=args.drop_after,
+        seed=args.seed
+    )
+    server.start()
+    print(f'serving RESP on {args.host}:{server.port}', flush=True)
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
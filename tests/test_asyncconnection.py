@@ -1,12 +1,16 @@
 import asyncio
 from fastredis.connections import (
+    SyncConnection,
     AsyncConnection,
+    AsyncConnectionBytes,
     AsyncConnectionStr
 )
+from fastredis.exceptions import ContextError
 import pytest
 
 
 REDIS_IP = '127.0.0.1'
+REDIS_SOCKET = '/tmp/redis.sock'
 
 
 @pytest.fixture(scope='function', autouse=False)
@@ -26,6 +30,23 @@ def test_connect(loop):
     loop.run_until_complete(test())
 
 
+def test_disconnect_after_server_close(loop):
+    async def test():
+        for timeout in (0, None):
+            redis = AsyncConnection(REDIS_IP)
+            await redis.connect()
+            client_id = await redis.command_args('CLIENT', 'ID')
+            with SyncConnection(REDIS_IP) as killer:
+                killer.command_args('CLIENT', 'KILL', 'ID', client_id)
+            with pytest.raises(ContextError):
+                await redis.command_args('PING')
+            # hiredis has freed the context already
+            await redis.disconnect(timeout=timeout)
+            assert redis.context is None
+            await redis.disconnect()
+    loop.run_until_complete(test())
+
+
 def test_command(loop):
     KEY = 'testkey'
     VALUE = 'testvalue'
@@ -37,3 +58,48 @@ def test_command(loop):
     loop.run_until_complete(test())
 
 
+def test_command_args(loop):
+    KEY = 'test key'
+    VALUE = 'test value'
+    async def test():
+        async with AsyncConnection(REDIS_IP) as redis:
+            assert await redis.command_args('SET', KEY, VALUE) == 'OK'
+            assert await redis.command_args('GET', KEY) == VALUE
+            assert await redis.command_args('DEL', KEY) == 1
+    loop.run_until_complete(test())
+
+
+def test_bytes(loop):
+    KEY = b'testkey'
+    VALUE = b'test\x00value'
+    async def test():
+        async with AsyncConnection(REDIS_IP.encode(), encoding=None) as r:
+            assert isinstance(r, AsyncConnectionBytes)
+            assert await r.command(b'SET testkey testvalue') == b'OK'
+            assert await r.command(b'GET testkey') == b'testvalue'
+            assert await r.command_args(b'SET', KEY, VALUE) == b'OK'
+            assert await r.command_args(b'GET', KEY) == VALUE
+            assert await r.command(b'DEL testkey') == 1
+    loop.run_until_complete(test())
+
+
+
+def test_unix(loop):
+    async def test():
+        async with AsyncConnection(path=REDIS_SOCKET) as redis:
+            assert isinstance(redis, AsyncConnectionStr)
+            assert await redis.command_args('PING') == 'PONG'
+        async with AsyncConnection(
+                path=REDIS_SOCKET.encode(),
+                encoding=None
+            ) as redis:
+            assert isinstance(redis, AsyncConnectionBytes)
+            assert await redis.command_args(b'PING') == b'PONG'
+    loop.run_until_complete(test())
+
+
+def test_ip_or_path():
+    with pytest.raises(ValueError):
+        AsyncConnection()
+    with pytest.raises(ValueError):
+        AsyncConnection(REDIS_IP, path=REDIS_SOCKET)
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from fastredis import AsyncConnection, AsyncConnectionPool, AutoPipeline
+import fastredis.hiredis as hiredis
+from fastredis.exceptions import ContextError, ReplyError
+
+
+REDIS_IP = '127.0.0.1'
+BACKENDS = ('hiredis', 'protocol')
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def _waiting(redis) -> int:
+    """Bytes of commands sent but not yet written to the socket."""
+
+    if redis.context.__class__ is hiredis.redisAsyncContext:
+        return hiredis.writeBufferLen(redis.context)
+    return sum(len(data) for data in redis.context.buffer)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_one_write_per_tick(loop, backend):
+    async def test():
+        async with AsyncConnection(
+                REDIS_IP,
+                auto_pipeline=True,
+                backend=backend
+            ) as redis:
+            assert redis.auto_pipeline == AutoPipeline()
+            tasks = [
+                asyncio.ensure_future(redis.command_args('ECHO', i))
+                for i in range(100)
+            ]
+            # let every task send its command
+            await asyncio.sleep(0)
+            assert _waiting(redis) > 0
+            assert await asyncio.gather(*tasks) == [str(i) for i in range(100)]
+            assert _waiting(redis) == 0
+            with pytest.raises(ReplyError):
+                await redis.command_args('NOSUCHCOMMAND')
+            # a pipeline writes the waiting commands along with its own
+            echo = asyncio.ensure_future(redis.command_args('ECHO', 'a'))
+            await asyncio.sleep(0)
+            async with redis.pipeline() as pipe:
+                pipe.command_args('PING')
+            assert _waiting(redis) == 0
+            assert await echo == 'a'
+    loop.run_until_complete(test())
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_max_batch_and_delay(loop, backend):
+    async def test():
+        redis = AsyncConnection(
+            REDIS_IP.encode(),
+            auto_pipeline=AutoPipeline(max_batch=10, max_delay=0.2),
+            backend=backend,
+            encoding=None
+        )
+        await redis.connect()
+        start = time.perf_counter()
+        # a full batch is written at once
+        await asyncio.gather(*(redis.command_args(b'PING') for _ in range(10)))
+        assert time.perf_counter() - start < 0.15
+        start = time.perf_counter()
+        assert await redis.command_args(b'PING') == b'PONG'
+        assert time.perf_counter() - start >= 0.19
+        # waiting commands fail if the connection is freed first
+        pending = asyncio.ensure_future(redis.command_args(b'PING'))
+        await asyncio.sleep(0)
+        await redis.disconnect(timeout=0)
+        with pytest.raises(ContextError):
+            await pending
+    loop.run_until_complete(test())
+
+
+def test_settings(loop):
+    for bad in (AutoPipeline(max_batch=0), AutoPipeline(max_delay=-1)):
+        with pytest.raises(ValueError):
+            AsyncConnection(REDIS_IP, auto_pipeline=bad)
+    assert AsyncConnection(REDIS_IP, auto_pipeline=False).auto_pipeline is None
+
+    async def test():
+        async with AsyncConnectionPool(
+                REDIS_IP,
+                max_size=2,
+                auto_pipeline=True
+            ) as pool:
+            replies = await asyncio.gather(*(
+                pool.command_args('PING') for _ in range(50)
+            ))
+        assert replies == ['PONG'] * 50
+    loop.run_until_complete(test())
@@ -0,0 +1,180 @@
+import json
+
+import pytest
+
+from fastredis import SyncConnection
+from fastredis.benchmarks import Case, compare, load, run, save, sweep, versus
+from fastredis.benchmarks.__main__ import main, parse_size
+from fastredis.benchmarks.stats import percentile, summarize
+
+
+REDIS_IP = '127.0.0.1'
+FAST = dict(duration=0.01, min_samples=5, warmup=1)
+
+
+def test_percentile():
+    ordered = list(range(1, 1001))
+    assert percentile(ordered, 50) == 500
+    assert percentile(ordered, 99) == 990
+    assert percentile(ordered, 99.9) == 999
+    assert percentile(ordered, 100) == 1000
+    assert percentile(ordered, 0) == 1
+    assert percentile([7], 99.9) == 7
+    with pytest.raises(ValueError):
+        percentile([], 50)
+    with pytest.raises(ValueError):
+        percentile(ordered, 101)
+
+
+def test_summarize():
+    stats = summarize([1000, 3000, 2000, 2000], 10, 100)
+    assert stats['samples'] == 4
+    assert stats['mean_us'] == 2.0
+    assert stats['p50_us'] == 2.0
+    assert stats['p999_us'] == 3.0
+    assert stats['ops_per_sec'] == pytest.approx(40 / 8e-6)
+    assert stats['mb_per_sec'] == pytest.approx(400 / 8e-6 / 1e6)
+
+
+def test_parse_size():
+    assert parse_size('16') == 16
+    assert parse_size('16B') == 16
+    assert parse_size('4K') == 4096
+    assert parse_size('16MB') == 16 << 20
+    with pytest.raises(ValueError):
+        parse_size('big')
+
+
+def test_sweep():
+    cases = list(sweep(
+        libraries=['fastredis', 'aioredis'],
+        modes=['sync', 'async'],
+        encodings=['str'],
+        transports=['tcp'],
+        sizes=[16, 1 << 20],
+        depths=[1, 100],
+        key_counts=[1, 1000],
+        max_batch_bytes=10 << 20,
+        max_dataset_bytes=100 << 20
+    ))
+    # there is no sync aioredis
+    assert not [c for c in cases if c.library == 'aioredis' and c.mode == 'sync']
+    assert not [c for c in cases if c.size * c.depth > 10 << 20]
+    assert not [c for c in cases if c.size * c.keys > 100 << 20]
+    assert Case('fastredis', 'sync', 'str', 'tcp', 'get', 16, 100, 1000) in cases
+    assert len({c.id for c in cases}) == len(cases)
+    with pytest.raises(ValueError):
+        list(sweep(commands=['incr']))
+    with pytest.raises(ValueError):
+        list(sweep(depths=[0]))
+
+
+def test_run_fastredis():
+    cases = list(sweep(
+        commands=['set', 'get'],
+        sizes=[100],
+        depths=[1, 4],
+        key_counts=[3]
+    ))
+    assert len(cases) == 32
+    seen = []
+    results = run(cases, progress=seen.append, **FAST)
+    assert seen == results
+    for case, result in zip(cases, results):
+        assert result['id'] == case.id
+        assert Case(**result['case']) == case
+        stats = result['stats']
+        assert stats['samples'] >= 5
+        assert stats['p50_us'] <= stats['p99_us'] <= stats['p999_us']
+        assert stats['ops_per_sec'] > 0
+    with SyncConnection(REDIS_IP) as redis:
+        assert redis.command_args('KEYS', 'fastredis-benchmark:*') == ()
+
+
+def test_run_redis_py():
+    pytest.importorskip('redis')
+    cases = list(sweep(
+        libraries=['fastredis', 'redis-py'],
+        transports=['tcp'],
+        encodings=['bytes'],
+        commands=['get'],
+        depths=[2]
+    ))
+    results = run(cases, **FAST)
+    changes = versus(results, threshold=1e9)
+    assert {c.id for c in changes} == {
+        f'{case.id} vs redis-py'
+        for case in cases if case.library == 'fastredis'
+    }
+    assert not any(c.regression for c in changes)
+
+
+def test_run_protocol_backend():
+    cases = list(sweep(
+        libraries=['fastredis', 'fastredis-protocol'],
+        modes=['sync', 'async'],
+        transports=['unix'],
+        commands=['get'],
+        depths=[1, 8]
+    ))
+    # the protocol backend is async only
+    assert len(cases) == 12
+    results = run(cases, **FAST)
+    uvloop = pytest.importorskip('uvloop')
+    results += run(
+        [case for case in cases if case.library == 'fastredis-protocol'],
+        loop_factory=uvloop.new_event_loop,
+        **FAST
+    )
+    assert all(result['stats']['samples'] >= 5 for result in results)
+
+
+def _result(id, p50, ops):
+    case = Case('fastredis', 'sync', 'str', 'tcp', 'get', 16, 1, int(id))
+    stats = {'p50_us': p50, 'p99_us': p50, 'p999_us': p50, 'ops_per_sec': ops}
+    return {'id': id, 'case': case._asdict(), 'stats': stats}
+
+
+def test_compare():
+    baseline = [_result('1', 10.0, 1000.0), _result('2', 10.0, 1000.0)]
+    candidate = [
+        _result('1', 10.5, 960.0),
+        _result('2', 20.0, 500.0),
+        _result('3', 1.0, 1.0)
+    ]
+    changes = compare(baseline, candidate, threshold=0.1)
+    assert {c.id for c in changes} == {'1', '2'}
+    assert not [c for c in changes if c.id == '1' and c.regression]
+    regressions = {c.metric for c in changes if c.id == '2' and c.regression}
+    assert regressions == {'p50_us', 'p99_us', 'p999_us', 'ops_per_sec'}
+    p50 = [c for c in changes if c.id == '2' and c.metric == 'p50_us'][0]
+    assert p50.change == pytest.approx(1.0)
+
+
+def test_save_load_and_main(tmp_path):
+    old = tmp_path / 'old.json'
+    new = tmp_path / 'new.json'
+    save(str(old), [_result('1', 10.0, 1000.0)])
+    report = json.loads(old.read_text())
+    assert 'python' in report['meta']
+    assert load(str(old)) == [_result('1', 10.0, 1000.0)]
+    save(str(new), [_result('1', 10.0, 1000.0)], meta={})
+    assert main(['compare', str(old), str(new)]) == 0
+    save(str(new), [_result('1', 30.0, 1000.0)], meta={})
+    assert main(['compare', str(old), str(new)]) == 1
+    assert main(['compare', '--threshold', '5', str(old), str(new)]) == 0
+
+
+def test_main_run(tmp_path, capsys):
+    out = tmp_path / 'run.json'
+    assert main([
+        'run', '-o', str(out), '--libraries', 'fastredis', '--modes', 'sync',
+        '--encodings', 'str', '--transports', 'unix', '--sizes', '1K',
+        '--depths', '1', '--keys', '1', '--duration', '0.01'
+    ]) == 0
+    results = load(str(out))
+    assert [r['id'] for r in results] == [
+        'fastredis/sync/str/unix set size=1024 depth=1 keys=1',
+        'fastredis/sync/str/unix get size=1024 depth=1 keys=1',
+    ]
+    assert 'p999 us' in capsys.readouterr().out
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from fastredis import (
+    AsyncConnection,
+    AsyncConnectionPool,
+    ConnectionPool,
+    SyncConnection
+)
+from fastredis.exceptions import ReplyError
+
+
+REDIS_IP = '127.0.0.1'
+KEYS = [f'bulkkey{i}' for i in range(25)]
+MAPPING = {key: str(i) for i, key in enumerate(KEYS)}
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='function', autouse=False)
+def redis():
+    with SyncConnection(REDIS_IP) as redis:
+        yield redis
+        redis.command_args('DEL', *KEYS, 'testhash1', 'testhash2')
+
+
+def test_mget_mset_delete(redis):
+    assert redis.mset(MAPPING, chunk_size=4) is None
+    assert redis.mget(KEYS, chunk_size=4) == list(MAPPING.values())
+    assert redis.mget(['missing', KEYS[3]], chunk_size=1) == [None, '3']
+    assert redis.delete_many(KEYS[:10] + ['missing'], chunk_size=3) == 10
+    assert redis.mget(KEYS[8:12]) == [None, None, '10', '11']
+    assert redis.delete_many(KEYS) == 15
+
+
+def test_hgetall_many(redis):
+    redis.command_args('HSET', 'testhash1', 'a', '1', 'b', '2')
+    redis.command_args('HSET', 'testhash2', 'c', '3')
+    assert redis.hgetall_many(['testhash1', 'missing', 'testhash2'], 2) == [
+        {'a': '1', 'b': '2'},
+        {},
+        {'c': '3'}
+    ]
+
+
+def test_bytes_connection():
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+        redis.mset({b'bulkkey0': b'\0', b'bulkkey1': b'\xff'}, chunk_size=1)
+        assert redis.mget([b'bulkkey0', b'bulkkey1']) == [b'\0', b'\xff']
+        assert redis.delete_many([b'bulkkey0', b'bulkkey1']) == 2
+
+
+def test_empty_and_invalid(redis):
+    assert redis.mget([]) == []
+    assert redis.mset({}) is None
+    assert redis.delete_many([]) == 0
+    assert redis.hgetall_many([]) == []
+    with pytest.raises(ValueError):
+        redis.mget(KEYS, chunk_size=0)
+
+
+def test_errors(redis):
+    redis.command_args('SET', 'testhash1', 'not a hash')
+    with pytest.raises(ReplyError):
+        redis.hgetall_many(['testhash2', 'testhash1', 'testhash2'], 1)
+    assert redis.command_args('PING') == 'PONG'
+
+
+def test_pool(redis):
+    with ConnectionPool(REDIS_IP, max_size=3) as pool:
+        pool.mset(MAPPING, chunk_size=2)
+        assert pool.mget(KEYS, chunk_size=2) == list(MAPPING.values())
+        # every chunk got a connection of its own, up to max_size
+        assert pool.size == 3
+        redis.command_args('SET', 'testhash1', 'not a hash')
+        with pytest.raises(ReplyError):
+            pool.hgetall_many(['testhash2', 'testhash1'], 1)
+        assert pool.idle == 3
+        assert pool.delete_many(KEYS, chunk_size=7) == len(KEYS)
+        # one connection is enough when the others are taken
+        with pool.connection(), pool.connection():
+            assert pool.mget(KEYS[:3], chunk_size=1) == [None] * 3
+
+
+def test_async(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as redis:
+            await redis.mset(MAPPING, chunk_size=4)
+            assert await redis.mget(KEYS, chunk_size=4) == list(MAPPING.values())
+            await redis.command_args('HSET', 'testhash1', 'a', '1')
+            assert await redis.hgetall_many(['testhash1', 'missing']) == [
+                {'a': '1'},
+                {}
+            ]
+            assert await redis.delete_many(KEYS + ['testhash1'], 5) == 26
+    loop.run_until_complete(test())
+
+
+def test_async_pool(loop):
+    async def test():
+        async with AsyncConnectionPool(REDIS_IP, min_size=3) as pool:
+            await pool.mset(MAPPING, chunk_size=2)
+            assert await pool.mget(KEYS, chunk_size=2) == list(MAPPING.values())
+            await pool.command_args('SET', 'testhash1', 'not a hash')
+            with pytest.raises(ReplyError):
+                await pool.hgetall_many(['testhash1', 'missing'], 1)
+            assert await pool.command_args('PING') == 'PONG'
+            assert await pool.delete_many(KEYS + ['testhash1'], 3) == 26
+    loop.run_until_complete(test())
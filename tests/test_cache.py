@@ -0,0 +1,170 @@
+import time
+
+from fastredis import CachedConnection, SyncConnection
+from fastredis.cache import LRUCache
+from fastredis.connections import SyncConnectionBytes
+
+
+REDIS_IP = '127.0.0.1'
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_lru_entries():
+    cache = LRUCache(max_entries=2)
+    cache.put(('GET', 'a'), 'a', '1')
+    cache.put(('GET', 'b'), 'b', '2')
+    assert cache.get(('GET', 'a')) == '1'
+    cache.put(('GET', 'c'), 'c', '3')
+    assert cache.get(('GET', 'b')) is None
+    assert cache.get(('GET', 'a')) == '1'
+    assert len(cache) == 2
+    assert cache.hits == 2
+    assert cache.misses == 1
+    assert cache.evictions == 1
+
+
+def test_lru_bytes():
+    cache = LRUCache(max_bytes=30)
+    cache.put(('GET', 'a'), 'a', 'x' * 10)
+    assert cache.bytes == 22
+    cache.put(('GET', 'b'), 'b', 'y' * 10)
+    assert len(cache) == 1
+    assert cache.get(('GET', 'b')) == 'y' * 10
+    cache.put(('GET', 'c'), 'c', 'z' * 100)
+    assert cache.get(('GET', 'c')) is None
+    assert cache.bytes == 22
+
+
+def test_lru_invalidate():
+    cache = LRUCache()
+    cache.put(('HGET', 'h', 'f1'), 'h', '1')
+    cache.put(('HGET', 'h', 'f2'), 'h', '2')
+    cache.put(('GET', 'k'), 'k', 'v')
+    cache.invalidate('h')
+    cache.invalidate('missing')
+    assert len(cache) == 1
+    assert cache.invalidations == 2
+    assert cache.bytes == 13
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.bytes == 0
+    assert cache.invalidations == 3
+
+
+def test_cached_reads():
+    with CachedConnection(REDIS_IP) as conn:
+        assert conn.tracking
+        conn.command_args('SET', 'testkey', 'testvalue')
+        assert conn.command_args('GET', 'testkey') == 'testvalue'
+        assert conn.command('GET testkey') == 'testvalue'
+        assert conn.cache.misses == 1
+        assert conn.cache.hits == 1
+        conn.command_args('DEL', 'testkey')
+
+
+def test_own_writes():
+    with CachedConnection(REDIS_IP) as conn:
+        conn.command_args('SET', 'testkey', 'a')
+        assert conn.command_args('GET', 'testkey') == 'a'
+        conn.command_args('SET', 'testkey', 'b')
+        assert conn.command_args('GET', 'testkey') == 'b'
+        conn.command_args('DEL', 'testkey')
+        assert conn.command_args('GET', 'testkey') is None
+
+
+def test_invalidated_by_other_client():
+    with CachedConnection(REDIS_IP) as conn, SyncConnection(REDIS_IP) as other:
+        other.command_args('HSET', 'testkey', 'f1', '1', 'f2', '2')
+        assert conn.command_args('HGET', 'testkey', 'f1') == '1'
+        assert conn.command_args('HGET', 'testkey', 'f2') == '2'
+        assert len(conn.cache) == 2
+        other.command_args('HSET', 'testkey', 'f1', '3')
+        assert wait_for(lambda: len(conn.cache) == 0)
+        assert conn.command_args('HGET', 'testkey', 'f1') == '3'
+        other.command_args('DEL', 'testkey')
+
+
+def test_flush_clears_cache():
+    with CachedConnection(REDIS_IP) as conn, SyncConnection(REDIS_IP) as other:
+        other.command_args('SET', 'testkey', 'a')
+        conn.command_args('GET', 'testkey')
+        assert len(conn.cache) == 1
+        other.command_args('FLUSHDB')
+        assert wait_for(lambda: len(conn.cache) == 0)
+
+
+def test_bytes():
+    with CachedConnection(REDIS_IP.encode(), encoding=None) as conn:
+        assert isinstance(conn.connection, SyncConnectionBytes)
+        with SyncConnection(REDIS_IP) as other:
+            other.command_args('SET', 'testkey', 'a')
+            assert conn.command_args(b'GET', b'testkey') == b'a'
+            assert conn.command_args(b'GET', b'testkey') == b'a'
+            assert conn.cache.hits == 1
+            other.command_args('SET', 'testkey', 'b')
+            assert wait_for(lambda: len(conn.cache) == 0)
+            assert conn.command_args(b'GET', b'testkey') == b'b'
+            other.command_args('DEL', 'testkey')
+
+
+def test_buffer_args():
+    with CachedConnection(REDIS_IP) as conn, SyncConnection(REDIS_IP) as other:
+        other.command_args('SET', 'testkey', 'a')
+        key = bytearray(b'testkey')
+        assert conn.command_args('GET', key) == 'a'
+        assert conn.command_args('GET', key) == 'a'
+        assert conn.command_args('GET', memoryview(key)) == 'a'
+        assert conn.command_args(memoryview(b'GET'), key) == 'a'
+        assert conn.cache.hits == 2
+        # changing the buffer afterwards does not change the cached command
+        key[:] = b'otherkey'
+        assert conn.command_args('GET', key) is None
+        conn.command_args('SET', bytearray(b'testkey'), 'b')
+        assert conn.command_args('GET', 'testkey') == 'b'
+        other.command_args('SET', 'testkey', 'c')
+        assert wait_for(lambda: conn.command_args('GET', memoryview(b'testkey')) == 'c')
+        other.command_args('DEL', 'testkey')
+
+
+def test_lost_invalidation_connection():
+    with CachedConnection(REDIS_IP) as conn:
+        conn.command_args('SET', 'testkey', 'a')
+        conn.command_args('GET', 'testkey')
+        redirect = conn.command_args('CLIENT', 'GETREDIR')
+        with SyncConnection(REDIS_IP) as other:
+            other.command_args('CLIENT', 'KILL', 'ID', redirect)
+        assert wait_for(lambda: conn.error is not None)
+        assert not conn.tracking
+        assert len(conn.cache) == 0
+        assert conn.command_args('GET', 'testkey') == 'a'
+        assert len(conn.cache) == 0
+        conn.connect()
+        assert conn.tracking
+        conn.command_args('DEL', 'testkey')
+
+
+def test_uncached_commands():
+    with CachedConnection(REDIS_IP, commands=('HGET',)) as conn:
+        conn.command_args('SET', 'testkey', 'a')
+        conn.command_args('GET', 'testkey')
+        assert len(conn.cache) == 0
+        conn.command_args('DEL', 'testkey')
+
+
+def test_disconnect():
+    conn = CachedConnection(REDIS_IP)
+    conn.connect()
+    conn.command_args('GET', 'testkey')
+    conn.disconnect()
+    assert not conn.tracking
+    assert not conn.usable
+    assert len(conn.cache) == 0
+    conn.disconnect()
@@ -0,0 +1,207 @@
+"""Tests for the cluster clients.
+
+Most tests need a Redis Cluster with its slots spread over masters at
+127.0.0.1:7000-7002, and are skipped without one. For example, start three
+`redis-server --port 700N --cluster-enabled yes` and run
+`redis-cli --cluster create 127.0.0.1:7000 127.0.0.1:7001 127.0.0.1:7002`.
+"""
+
+import asyncio
+import pytest
+
+from fastredis import AsyncClusterConnection, ClusterConnection
+from fastredis.cluster import key_slot
+from fastredis.connections import SyncConnection
+from fastredis.exceptions import *
+
+
+CLUSTER_NODES = [('127.0.0.1', 7000), ('127.0.0.1', 7001), ('127.0.0.1', 7002)]
+
+
+def cluster_available() -> bool:
+    try:
+        with SyncConnection(*CLUSTER_NODES[0], connect_timeout=0.2) as conn:
+            return 'cluster_state:ok' in conn.command_args('CLUSTER', 'INFO')
+    except FastredisError:
+        return False
+
+
+needs_cluster = pytest.mark.skipif(
+    not cluster_available(),
+    reason='no Redis Cluster at 127.0.0.1:7000'
+)
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def keys_on_every_node(cluster, count=30):
+    keys = [f'testkey{i}' for i in range(count)]
+    assert len({cluster.slots[key_slot(key)] for key in keys}) == 3
+    return keys
+
+
+def test_key_slot():
+    assert key_slot('123456789') == 0x31c3
+    assert key_slot(b'foo') == 12182
+    assert key_slot(12) == key_slot('12')
+    assert key_slot('{user1000}.following') == key_slot('user1000')
+    assert key_slot('{user1000}.followers') == key_slot('user1000')
+    # empty or unclosed hash tags hash the whole key
+    assert key_slot('foo{}{bar}') != key_slot('bar')
+    assert key_slot('foo{bar') != key_slot('bar')
+    with pytest.raises(TypeError):
+        key_slot(1.5)
+
+
+@needs_cluster
+def test_command():
+    with ClusterConnection(CLUSTER_NODES[:1]) as cluster:
+        assert set(cluster.slots) == set(CLUSTER_NODES)
+        keys = keys_on_every_node(cluster)
+        for key in keys:
+            assert cluster.command_args('SET', key, key) == 'OK'
+        for key in keys:
+            assert cluster.command(f'GET {key}') == key
+        assert len(cluster.nodes) == 3
+        for key in keys:
+            assert cluster.command_args('DEL', key) == 1
+        assert cluster.command_args('PING') == 'PONG'
+
+
+@needs_cluster
+def test_bytes():
+    nodes = [(host.encode(), port) for host, port in CLUSTER_NODES[:1]]
+    with ClusterConnection(nodes, encoding=None) as cluster:
+        assert cluster.command_args(b'SET', b'testkey', b'\xff') == b'OK'
+        assert cluster.command_args(b'GET', b'testkey') == b'\xff'
+        assert cluster.command_args(b'DEL', b'testkey') == 1
+
+
+@needs_cluster
+def test_moved():
+    with ClusterConnection(CLUSTER_NODES[:1]) as cluster:
+        slot = key_slot('testkey')
+        owner = cluster.slots[slot]
+        wrong = next(node for node in CLUSTER_NODES if node != owner)
+        cluster.slots[slot] = wrong
+        assert cluster.command_args('SET', 'testkey', 'x') == 'OK'
+        assert cluster.slots[slot] == owner
+        assert cluster.stale
+        assert cluster.command_args('DEL', 'testkey') == 1
+        assert not cluster.stale
+
+
+@needs_cluster
+def test_ask():
+    with ClusterConnection(CLUSTER_NODES[:1]) as cluster:
+        key = 'testkey'
+        slot = key_slot(key)
+        source = cluster.connection(cluster.slots[slot])
+        target_node = next(n for n in CLUSTER_NODES if n != cluster.slots[slot])
+        target = cluster.connection(target_node)
+        source_id = source.command_args('CLUSTER', 'MYID')
+        target_id = target.command_args('CLUSTER', 'MYID')
+        target.command_args('CLUSTER', 'SETSLOT', slot, 'IMPORTING', source_id)
+        source.command_args('CLUSTER', 'SETSLOT', slot, 'MIGRATING', target_id)
+        try:
+            # missing keys of a migrating slot are served by the target
+            assert cluster.command_args('SET', key, 'x') == 'OK'
+            assert target.command_args('ASKING') == 'OK'
+            assert target.command_args('GET', key) == 'x'
+            assert cluster.command_args('DEL', key) == 1
+            assert not cluster.stale
+        finally:
+            target.command_args('CLUSTER', 'SETSLOT', slot, 'STABLE')
+            source.command_args('CLUSTER', 'SETSLOT', slot, 'STABLE')
+
+
+@needs_cluster
+def test_pipeline():
+    with ClusterConnection(CLUSTER_NODES[:1]) as cluster:
+        keys = keys_on_every_node(cluster)
+        with cluster.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('SET', key, key)
+        assert pipe.results == ['OK'] * len(keys)
+        with cluster.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('GET', key)
+            pipe.command_args('LLEN', keys[0])
+            results = pipe.execute(raise_on_error=False)
+        assert results[:-1] == keys
+        assert isinstance(results[-1], ReplyError)
+        # a wrong slot map only costs redirects
+        for slot in range(len(cluster.slots)):
+            cluster.slots[slot] = CLUSTER_NODES[0]
+        with cluster.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('DEL', key)
+        assert pipe.results == [1] * len(keys)
+
+
+@needs_cluster
+def test_pipeline_bad_argument():
+    with ClusterConnection(CLUSTER_NODES[:1]) as cluster:
+        keys = keys_on_every_node(cluster)
+        pipe = cluster.pipeline()
+        for key in keys:
+            pipe.command_args('GET', key)
+        pipe.command_args('SET', keys[0], 1.5)
+        with pytest.raises(TypeError):
+            pipe.execute()
+        for key in keys:
+            assert cluster.command_args('GET', key) is None
+
+
+@needs_cluster
+def test_async(loop):
+    async def test():
+        async with AsyncClusterConnection(CLUSTER_NODES[:1]) as cluster:
+            keys = keys_on_every_node(cluster)
+            replies = await asyncio.gather(
+                *(cluster.command_args('SET', key, key) for key in keys)
+            )
+            assert replies == ['OK'] * len(keys)
+            assert await cluster.command(f'GET {keys[0]}') == keys[0]
+            async with cluster.pipeline() as pipe:
+                for key in keys:
+                    pipe.command_args('GET', key)
+            assert pipe.results == keys
+            slot = key_slot(keys[0])
+            owner = cluster.slots[slot]
+            cluster.slots[slot] = next(n for n in CLUSTER_NODES if n != owner)
+            async with cluster.pipeline() as pipe:
+                for key in keys:
+                    pipe.command_args('DEL', key)
+            assert pipe.results == [1] * len(keys)
+            assert cluster.slots[slot] == owner
+    loop.run_until_complete(test())
+
+
+@needs_cluster
+def test_async_killed_connection(loop):
+    async def test():
+        async with AsyncClusterConnection(CLUSTER_NODES[:1]) as cluster:
+            key = 'testkey0'
+            await cluster.command_args('SET', key, 'value')
+            node = cluster.slots[key_slot(key)]
+            conn = cluster.nodes[node]
+            client_id = await conn.command_args('CLIENT', 'ID')
+            with SyncConnection(*node) as killer:
+                killer.command_args('CLIENT', 'KILL', 'ID', client_id)
+            with pytest.raises(ContextError):
+                await cluster.command_args('GET', key)
+            assert node not in cluster.nodes
+            assert conn.context is None
+            # a new connection is opened on the next command
+            assert await cluster.command_args('GET', key) == 'value'
+            await cluster.command_args('DEL', key)
+    loop.run_until_complete(test())
@@ -1,6 +1,7 @@
 import pytest
 
 from fastredis import hiredis
+from fastredis.exceptions import ReplyError
 from fastredis.wrapper_tools import reduce_reply
 
 
@@ -188,3 +189,46 @@ def test_redisGetReply(context):
     assert r.ret == hiredis.REDIS_OK
     assert r.reply.integer == 1
     hiredis.freeReplyObject(r.reply)
+
+
+def test_redisCommandReduced(context):
+    KEY = 'testkey'
+    assert hiredis.redisCommandReduced(context, f'DEL {KEY}') in (0, 1)
+    assert hiredis.redisCommandReduced(context, f'RPUSH {KEY} a b c') == 3
+    assert hiredis.redisCommandReduced(context, f'LRANGE {KEY} 0 -1') == (
+        'a', 'b', 'c'
+    )
+    assert hiredis.redisCommandReduced(context, f'GET nosuchkey') is None
+    with pytest.raises(ReplyError):
+        hiredis.redisCommandReduced(context, f'GET {KEY}')
+    assert hiredis.redisCommandReduced(context, f'DEL {KEY}') == 1
+
+
+def test_redisCommandArgvReduced_nested(context):
+    KEY = 'testkey'
+    VALUE = 'a\x00b'
+    hiredis.redisCommandArgvReduced(context, ('DEL', KEY))
+    assert hiredis.redisCommandArgvReduced(context, ('SET', KEY, VALUE)) == 'OK'
+    assert hiredis.redisCommandArgvReduced(context, ('MULTI',)) == 'OK'
+    hiredis.redisCommandArgvReduced(context, ('GET', KEY))
+    hiredis.redisCommandArgvReduced(context, ('STRLEN', KEY))
+    assert hiredis.redisCommandArgvReduced(context, ('EXEC',)) == (VALUE, 3)
+    cleanup_keys(context, (KEY,))
+
+
+def test_redisGetReplyReduced(context):
+    commands = (
+        'SET testkey testvalue',
+        'GET testkey',
+        'HSET testkey field value',
+        'DEL testkey'
+    )
+    for command in commands:
+        assert (hiredis.redisAppendCommand(context, command)
+            == hiredis.REDIS_OK
+        )
+    assert hiredis.redisGetReplyReduced(context) == 'OK'
+    assert hiredis.redisGetReplyReduced(context) == 'testvalue'
+    with pytest.raises(ReplyError):
+        hiredis.redisGetReplyReduced(context)
+    assert hiredis.redisGetReplyReduced(context) == 1
@@ -2,6 +2,7 @@ import pytest
 
 from fastredis import hiredis
 from fastredis import hiredisb
+from fastredis.exceptions import ReplyError
 from fastredis.wrapper_tools import reduce_reply_b
 
 
@@ -162,3 +163,38 @@ def test_redisGetReply_b(context):
     assert r.ret == hiredis.REDIS_OK
     assert r.reply.integer == 1
     hiredisb.freeReplyObject_b(r.reply)
+
+
+def test_redisCommandReduced_b(context):
+    KEY = b'testkey'
+    VALUE = bytes(range(256))
+    hiredisb.redisCommandArgvReduced_b(context, (b'DEL', KEY))
+    assert hiredisb.redisCommandArgvReduced_b(context, (b'SET', KEY, VALUE)) == b'OK'
+    assert hiredisb.redisCommandReduced_b(context, b'GET testkey') == VALUE
+    with pytest.raises(ReplyError):
+        hiredisb.redisCommandReduced_b(context, b'LLEN testkey')
+    cleanup_keys(context, ('testkey',))
+
+
+def test_reduce_reply_b_nested_array(context):
+    """Nested arrays are reduced to bytes, not str."""
+
+    hiredisb.redisCommandReduced_b(context, b'DEL testkey')
+    hiredisb.redisCommandReduced_b(context, b'ZADD testkey 1 a 2 b')
+    r = hiredisb.redisCommand_b(context, b'ZSCAN testkey 0')
+    assert r.type == hiredis.REDIS_REPLY_ARRAY
+    cursor, items = reduce_reply_b(r)
+    hiredisb.freeReplyObject_b(r)
+    assert cursor == b'0'
+    assert items == (b'a', b'1', b'b', b'2')
+    cleanup_keys(context, ('testkey',))
+
+
+def test_redisGetReplyReduced_b(context):
+    for command in (b'SET testkey testvalue', b'GET testkey', b'DEL testkey'):
+        assert (hiredisb.redisAppendCommand_b(context, command)
+            == hiredis.REDIS_OK
+        )
+    assert hiredisb.redisGetReplyReduced_b(context) == b'OK'
+    assert hiredisb.redisGetReplyReduced_b(context) == b'testvalue'
+    assert hiredisb.redisGetReplyReduced_b(context) == 1
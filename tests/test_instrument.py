@@ -0,0 +1,211 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+from fastredis import (
+    AsyncConnection,
+    CommandStats,
+    ConnectionPool,
+    Observer,
+    SyncConnection
+)
+from fastredis.exceptions import ContextError, ReplyError
+from fastredis.instrument import Histogram, command_name
+
+
+REDIS_IP = '127.0.0.1'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+class Recorder(Observer):
+
+    def __init__(self):
+        self.records = []
+
+    def record(self, command, elapsed_ns, reply_size, error):
+        self.records.append((command, reply_size, type(error)))
+        assert elapsed_ns >= 0
+
+
+def test_histogram():
+    hist = Histogram(significant_bits=5)
+    values = [random.randrange(1, 10 ** 9) for _ in range(10000)]
+    for value in values:
+        hist.record(value)
+    ordered = sorted(values)
+    for p in (50, 90, 99, 99.9):
+        exact = ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+        # within one bucket above the exact value
+        assert exact <= hist.percentile(p) <= exact * (1 + 2 ** -5)
+    assert hist.percentile(0) == ordered[0]
+    assert hist.percentile(100) == ordered[-1]
+    assert hist.mean == pytest.approx(sum(values) / len(values))
+
+    small = Histogram(significant_bits=5)
+    for value in range(64):
+        small.record(value)
+    # small values are exact
+    assert small.percentile(50) == 31
+    small.record(1 << 50)
+    assert small.max == 1 << 50
+    assert small.percentile(100) == 1 << 50
+    buckets = len(small.counts)
+    small.merge(hist)
+    assert len(small.counts) == buckets
+    assert small.count == 10065
+    with pytest.raises(ValueError):
+        small.merge(Histogram(significant_bits=3))
+    small.clear()
+    with pytest.raises(ValueError):
+        small.percentile(50)
+
+
+def test_command_name():
+    assert command_name('set a b') == 'SET'
+    assert command_name(b'GET a') == 'GET'
+    assert command_name(('hget', 'h', 'f')) == 'HGET'
+    assert command_name([bytearray(b'del'), b'a']) == 'DEL'
+    assert command_name(()) == ''
+
+
+def test_sync_observer():
+    recorder = Recorder()
+    with SyncConnection(REDIS_IP) as redis:
+        method = redis._redis_command
+        redis.set_observer(recorder)
+        assert redis.observer is recorder
+        redis.command('SET instrumentkey abc')
+        redis.command_args('GET', 'instrumentkey')
+        with pytest.raises(ReplyError):
+            redis.command_args('INCR', 'instrumentkey')
+        with redis.pipeline(raise_on_error=False) as pipe:
+            pipe.command_args('GET', 'instrumentkey')
+            pipe.command_args('LPUSH', 'instrumentkey', 'x')
+        redis.write_args('GET', 'instrumentkey')
+        redis.write('STRLEN instrumentkey')
+        assert redis.read() == 'abc'
+        assert redis.read() == 3
+        out = bytearray(10)
+        assert redis.get_into('instrumentkey', out) == 3
+        assert redis.mget(['instrumentkey', 'instrumentkey']) == ['abc', 'abc']
+        redis.command_args('DEL', 'instrumentkey')
+        redis.set_observer(None)
+        redis.command_args('PING')
+        # without an observer, the class methods are used again
+        assert redis._redis_command == method
+    assert recorder.records == [
+        ('SET', 2, type(None)),
+        ('GET', 3, type(None)),
+        ('INCR', 0, ReplyError),
+        ('GET', 3, type(None)),
+        ('LPUSH', 0, ReplyError),
+        ('GET', 3, type(None)),
+        ('STRLEN', 0, type(None)),
+        ('GET', 3, type(None)),
+        ('MGET', 6, type(None)),
+        ('DEL', 0, type(None)),
+    ]
+
+
+def test_unobserved_connection():
+    redis = SyncConnection(REDIS_IP)
+    assert redis.observer is None
+    assert not [name for name in vars(redis) if name.startswith('_redis')]
+    redis.set_observer(CommandStats())
+    assert '_redis_read' in vars(redis)
+    redis.set_observer(None)
+    assert not [name for name in vars(redis) if name.startswith('_redis')]
+
+
+def test_connection_lost():
+    recorder = Recorder()
+    with SyncConnection(REDIS_IP) as killer:
+        redis = SyncConnection(REDIS_IP, observer=recorder)
+        redis.connect()
+        redis.command_args('CLIENT', 'SETNAME', 'instrumentvictim')
+        killer.command_args('CLIENT', 'KILL', 'SKIPME', 'no', 'TYPE', 'normal')
+        redis.write_args('PING')
+        redis.write_args('PING')
+        with pytest.raises(ContextError):
+            redis.read()
+        redis.connect()
+        # the second PING was lost with the connection
+        redis.write_args('ECHO', 'a')
+        assert redis.read() == 'a'
+        redis.disconnect()
+    assert [r[0] for r in recorder.records] == ['CLIENT', 'PING', 'ECHO']
+    assert issubclass(recorder.records[1][2], ContextError)
+
+
+def test_command_stats_pool():
+    stats = CommandStats()
+    with ConnectionPool(REDIS_IP, max_size=2, observer=stats) as pool:
+        for _ in range(100):
+            pool.command_args('PING')
+        pool.command_args('SET', 'instrumentkey', 'x' * 100)
+        pool.command_args('GET', 'instrumentkey')
+        pool.command_args('DEL', 'instrumentkey')
+        with pytest.raises(ReplyError):
+            pool.command_args('NOSUCHCOMMAND')
+    summary = stats.summary()
+    assert summary['PING']['count'] == 100
+    assert summary['PING']['errors'] == 0
+    assert 0 < summary['PING']['p50_us'] <= summary['PING']['p99_us']
+    assert summary['PING']['p99_us'] <= summary['PING']['max_us']
+    assert summary['GET']['mean_reply_bytes'] == 100
+    assert summary['NOSUCHCOMMAND']['errors'] == 1
+    report = stats.report().splitlines()
+    assert report[0].split()[:3] == ['command', 'count', 'errors']
+    assert report[1].split()[0] == 'PING'
+    stats.reset()
+    assert stats.summary() == {}
+
+
+def test_async_observer(loop):
+    async def test():
+        recorder = Recorder()
+        redis = AsyncConnection(REDIS_IP, observer=recorder)
+        await redis.connect()
+        await redis.command('SET instrumentkey abc')
+        await redis.command_args('GET', 'instrumentkey')
+        with pytest.raises(ReplyError):
+            await redis.command_args('INCR', 'instrumentkey')
+        with pytest.raises(ReplyError):
+            async with redis.pipeline() as pipe:
+                pipe.command_args('GET', 'instrumentkey')
+                pipe.command_args('LPUSH', 'instrumentkey', 'x')
+        await redis.command_args('DEL', 'instrumentkey')
+        redis.set_observer(None)
+        await redis.command_args('PING')
+        await redis.disconnect()
+        assert not [name for name in vars(redis) if name.startswith('_redis')]
+        return recorder.records
+    assert loop.run_until_complete(test()) == [
+        ('SET', 2, type(None)),
+        ('GET', 3, type(None)),
+        ('INCR', 0, ReplyError),
+        ('GET', 3, type(None)),
+        ('LPUSH', 0, ReplyError),
+        ('DEL', 0, type(None)),
+    ]
+
+
+def test_async_bytes(loop):
+    async def test():
+        stats = CommandStats()
+        async with AsyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+            redis.set_observer(stats)
+            await asyncio.gather(*(redis.command_args(b'PING') for _ in range(10)))
+        return stats.summary()
+    assert loop.run_until_complete(test())['PING']['count'] == 10
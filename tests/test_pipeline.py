@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import pytest
+
+from fastredis.connections import AsyncConnection, SyncConnection
+from fastredis.exceptions import *
+
+
+REDIS_IP = '127.0.0.1'
+
+
+def test_execute():
+    keys = [f'testkey{i}' for i in range(100)]
+    with SyncConnection(REDIS_IP) as redis:
+        with redis.pipeline() as pipe:
+            for key in keys:
+                pipe.command_args('SET', key, key)
+            assert len(pipe) == len(keys)
+            assert pipe.execute() == ['OK'] * len(keys)
+            assert len(pipe) == 0
+            for key in keys:
+                pipe.command(f'GET {key}')
+            assert pipe.execute() == keys
+            pipe.command_args('DEL', *keys)
+        assert pipe.results == [len(keys)]
+
+
+def test_execute_empty():
+    with SyncConnection(REDIS_IP) as redis:
+        assert redis.pipeline().execute() == []
+
+
+def test_raise_on_error():
+    with SyncConnection(REDIS_IP) as redis:
+        pipe = redis.pipeline()
+        pipe.command_args('SET', 'testkey', 'testvalue')
+        pipe.command_args('LLEN', 'testkey')
+        pipe.command_args('DEL', 'testkey')
+        with pytest.raises(ReplyError):
+            pipe.execute()
+        # All replies were read, so the connection is still in sync.
+        assert redis.command_args('EXISTS', 'testkey') == 0
+
+
+def test_errors_in_place():
+    with SyncConnection(REDIS_IP) as redis:
+        with redis.pipeline(raise_on_error=False) as pipe:
+            pipe.command_args('SET', 'testkey', 'testvalue')
+            pipe.command_args('LLEN', 'testkey')
+            pipe.command_args('DEL', 'testkey')
+            results = pipe.execute()
+        assert results[0] == 'OK'
+        assert isinstance(results[1], ReplyError)
+        assert results[2] == 1
+
+
+def test_discard_on_exception():
+    with SyncConnection(REDIS_IP) as redis:
+        with pytest.raises(KeyError):
+            with redis.pipeline() as pipe:
+                pipe.command_args('SET', 'testkey', 'testvalue')
+                raise KeyError
+        assert len(pipe) == 0
+        assert redis.command_args('EXISTS', 'testkey') == 0
+
+
+def test_bytes():
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+        with redis.pipeline() as pipe:
+            pipe.command_args(b'SET', b'testkey', b'\x00\xff')
+            pipe.command(b'GET testkey')
+            pipe.command_args(b'DEL', b'testkey')
+            assert pipe.execute() == [b'OK', b'\x00\xff', 1]
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_deadline():
+    with SyncConnection(REDIS_IP) as redis:
+        with redis.pipeline() as pipe:
+            pipe.command_args('PING')
+            pipe.command_args('PING')
+            assert pipe.execute(deadline=time.monotonic() + 1) == ['PONG'] * 2
+            pipe.command_args('BLPOP', 'testlist', 1)
+            with pytest.raises(IOError):
+                pipe.execute(deadline=time.monotonic() + 0.05)
+        assert not redis.usable
+
+
+def test_async_execute(loop):
+    keys = [f'testkey{i}' for i in range(1000)]
+    async def test():
+        async with AsyncConnection(REDIS_IP) as redis:
+            async with redis.pipeline() as pipe:
+                for key in keys:
+                    pipe.command_args('SET', key, key)
+                assert await pipe.execute() == ['OK'] * len(keys)
+                for key in keys:
+                    pipe.command(f'GET {key}')
+                assert await pipe.execute() == keys
+                pipe.command_args('DEL', *keys)
+            assert pipe.results == [len(keys)]
+            assert await redis.pipeline().execute() == []
+    loop.run_until_complete(test())
+
+
+def test_async_errors(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as redis:
+            pipe = redis.pipeline()
+            pipe.command_args('SET', 'testkey', 'testvalue')
+            pipe.command_args('LLEN', 'testkey')
+            pipe.command_args('DEL', 'testkey')
+            with pytest.raises(ReplyError):
+                await pipe.execute()
+            assert await redis.command_args('EXISTS', 'testkey') == 0
+
+            pipe.command_args('SET', 'testkey', 'testvalue')
+            pipe.command_args('LLEN', 'testkey')
+            pipe.command_args('DEL', 'testkey')
+            results = await pipe.execute(raise_on_error=False)
+            assert results[0] == 'OK'
+            assert isinstance(results[1], ReplyError)
+            assert results[2] == 1
+
+            pipe.command_args('SET', 'testkey', 1.5)
+            with pytest.raises(TypeError):
+                await pipe.execute()
+            assert await redis.command_args('EXISTS', 'testkey') == 0
+    loop.run_until_complete(test())
+
+
+def test_async_bytes(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+            async with redis.pipeline() as pipe:
+                pipe.command_args(b'SET', b'testkey', b'\x00\xff')
+                pipe.command(b'GET testkey')
+                pipe.command_args(b'DEL', b'testkey')
+                assert await pipe.execute() == [b'OK', b'\x00\xff', 1]
+    loop.run_until_complete(test())
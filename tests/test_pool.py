@@ -0,0 +1,260 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fastredis import AsyncConnectionPool, ConnectionPool, SyncConnection
+from fastredis.connections import (
+    AsyncConnectionBytes,
+    AsyncConnectionStr,
+    SyncConnectionBytes,
+    SyncConnectionStr
+)
+from fastredis.exceptions import FastredisError, PoolExhaustedError
+
+
+REDIS_IP = '127.0.0.1'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_acquire_release():
+    with ConnectionPool(REDIS_IP, max_size=2) as pool:
+        conn = pool.acquire()
+        assert isinstance(conn, SyncConnectionStr)
+        assert conn.command_args('PING') == 'PONG'
+        assert pool.size == 1
+        assert pool.idle == 0
+        pool.release(conn)
+        assert pool.idle == 1
+        assert pool.acquire() is conn
+        pool.release(conn)
+
+
+def test_bytes():
+    with ConnectionPool(REDIS_IP.encode(), encoding=None) as pool:
+        with pool.connection() as conn:
+            assert isinstance(conn, SyncConnectionBytes)
+        assert pool.command_args(b'PING') == b'PONG'
+
+
+def test_command():
+    with ConnectionPool(REDIS_IP) as pool:
+        assert pool.command_args('SET', 'testkey', 'testvalue') == 'OK'
+        assert pool.command('GET testkey') == 'testvalue'
+        assert pool.command_args('DEL', 'testkey') == 1
+        assert pool.size == 1
+
+
+def test_exhausted():
+    with ConnectionPool(REDIS_IP, max_size=1) as pool:
+        conn = pool.acquire()
+        with pytest.raises(PoolExhaustedError):
+            pool.acquire(block=False)
+        with pytest.raises(PoolExhaustedError):
+            pool.acquire(timeout=0.05)
+        pool.release(conn)
+
+
+def test_waits_for_release():
+    with ConnectionPool(REDIS_IP, max_size=1) as pool:
+        conn = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, (conn,))
+        timer.start()
+        assert pool.acquire(timeout=2) is conn
+        timer.join()
+        pool.release(conn)
+
+
+def test_threads():
+    N_THREADS = 8
+    N_COMMANDS = 50
+    errors = []
+
+    def work(pool, i):
+        try:
+            for j in range(N_COMMANDS):
+                with pool.connection() as conn:
+                    key = f'testkey{i}'
+                    conn.command_args('SET', key, j)
+                    assert conn.command_args('GET', key) == str(j)
+        except Exception as e:
+            errors.append(e)
+
+    with ConnectionPool(REDIS_IP, max_size=3) as pool:
+        threads = [
+            threading.Thread(target=work, args=(pool, i))
+            for i in range(N_THREADS)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors
+        assert pool.size <= 3
+        pool.command_args('DEL', *(f'testkey{i}' for i in range(N_THREADS)))
+
+
+def test_idle_reaping():
+    with ConnectionPool(REDIS_IP, max_size=2, idle_timeout=0.01) as pool:
+        a = pool.acquire()
+        b = pool.acquire()
+        pool.release(a)
+        pool.release(b)
+        assert pool.idle == 2
+        time.sleep(0.02)
+        assert pool.reap() == 2
+        assert pool.size == 0
+        assert pool.idle == 0
+
+
+def test_health_check():
+    with ConnectionPool(REDIS_IP, health_check=True) as pool:
+        conn = pool.acquire()
+        client_id = conn.command_args('CLIENT', 'ID')
+        pool.release(conn)
+        # Have the server drop the idle connection.
+        with SyncConnection(REDIS_IP) as other:
+            other.command_args('CLIENT', 'KILL', 'ID', client_id)
+        conn = pool.acquire()
+        assert conn.command_args('PING') == 'PONG'
+        pool.release(conn)
+        assert pool.size == 1
+
+
+def test_broken_connection_discarded():
+    with ConnectionPool(REDIS_IP) as pool:
+        conn = pool.acquire()
+        conn.context.err = 1
+        pool.release(conn)
+        assert pool.size == 0
+        assert pool.idle == 0
+
+
+def test_close():
+    pool = ConnectionPool(REDIS_IP)
+    conn = pool.acquire()
+    pool.close()
+    with pytest.raises(FastredisError):
+        pool.acquire()
+    pool.release(conn)
+    assert conn.context is None
+    assert pool.size == 0
+    pool.close()
+
+
+def test_async_open_close(loop):
+    async def test():
+        pool = AsyncConnectionPool(REDIS_IP, min_size=3, max_size=3)
+        await pool.open()
+        assert pool.size == 3
+        assert all(isinstance(c, AsyncConnectionStr) for c in pool.connections)
+        assert await pool.command_args('PING') == 'PONG'
+        await pool.close()
+        assert pool.size == 0
+        with pytest.raises(FastredisError):
+            await pool.command_args('PING')
+        await pool.close()
+    loop.run_until_complete(test())
+
+
+def test_async_bytes(loop):
+    async def test():
+        async with AsyncConnectionPool(REDIS_IP.encode(), encoding=None) as pool:
+            assert isinstance(pool.connection(), AsyncConnectionBytes)
+            assert await pool.command(b'PING') == b'PONG'
+    loop.run_until_complete(test())
+
+
+def test_async_least_pending(loop):
+    async def test():
+        async with AsyncConnectionPool(REDIS_IP, min_size=2, max_size=2) as pool:
+            a = pool.connection()
+            future = asyncio.ensure_future(a.command_args('PING'))
+            await asyncio.sleep(0)
+            assert len(a.replies) == 1
+            assert pool.connection() is not a
+            assert await future == 'PONG'
+    loop.run_until_complete(test())
+
+
+def test_async_concurrent(loop):
+    N = 500
+    async def test():
+        async with AsyncConnectionPool(REDIS_IP, min_size=2, max_size=4) as pool:
+            keys = [f'testkey{i}' for i in range(N)]
+            replies = await asyncio.gather(
+                *(pool.command_args('SET', key, key) for key in keys)
+            )
+            assert replies == ['OK'] * N
+            values = await asyncio.gather(
+                *(pool.command_args('GET', key) for key in keys)
+            )
+            assert values == keys
+            async with pool.pipeline() as pipe:
+                for key in keys:
+                    pipe.command_args('DEL', key)
+            assert pipe.results == [1] * N
+    loop.run_until_complete(test())
+
+
+def test_async_grow_shrink(loop):
+    async def test():
+        async with AsyncConnectionPool(
+                REDIS_IP,
+                min_size=1,
+                max_size=2,
+                max_pending=2,
+                idle_timeout=0.01
+            ) as pool:
+            await asyncio.gather(*(pool.command_args('PING') for _ in range(10)))
+            # let the new connection finish connecting
+            for _ in range(100):
+                if pool.size == 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert pool.size == 2
+            await asyncio.sleep(0.02)
+            pool.connection()
+            assert pool.size == 1
+    loop.run_until_complete(test())
+
+
+def test_async_shrink_keeps_picked(loop):
+    async def test():
+        async with AsyncConnectionPool(
+                REDIS_IP,
+                min_size=2,
+                max_size=2,
+                idle_timeout=0
+            ) as pool:
+            pool.min_size = 1
+            for _ in range(3):
+                conn = pool.connection()
+                # the connection handed out is never the one retired
+                assert conn in pool.connections
+                assert await conn.command_args('PING') == 'PONG'
+            assert pool.size == 1
+    loop.run_until_complete(test())
+
+
+def test_async_lost_connection(loop):
+    async def test():
+        async with AsyncConnectionPool(REDIS_IP, min_size=2, max_size=2) as pool:
+            a, b = pool.connections
+            client_id = await a.command_args('CLIENT', 'ID')
+            await b.command_args('CLIENT', 'KILL', 'ID', client_id)
+            await asyncio.wait({a.disconnected}, timeout=1)
+            assert pool.connection() is b
+            assert pool.size == 1
+            assert await pool.command_args('PING') == 'PONG'
+    loop.run_until_complete(test())
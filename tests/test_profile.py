@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+from fastredis import AsyncConnection, CommandStats, ConnectionPool, SyncConnection
+from fastredis.exceptions import IOError, ReplyError
+from fastredis.profile import Profiler, profiling
+
+
+REDIS_IP = '127.0.0.1'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_sync_phases():
+    with SyncConnection(REDIS_IP) as redis:
+        with profiling(redis) as profiler:
+            assert redis.command_args('SET', 'profilekey', 'abc') == 'OK'
+            assert redis.command('GET profilekey') == 'abc'
+            with pytest.raises(ReplyError):
+                redis.command_args('INCR', 'profilekey')
+            with redis.pipeline(raise_on_error=False) as pipe:
+                pipe.command_args('GET', 'profilekey')
+                pipe.command_args('INCR', 'profilekey')
+                pipe.command_args('DEL', 'profilekey')
+            assert isinstance(pipe.results[1], ReplyError)
+            assert pipe.results[2] == 1
+        assert redis.profiler is None
+        assert not [name for name in vars(redis) if name.startswith('_redis')]
+    [profile] = profiler.profiles()
+    assert profile.label == f'#1 {REDIS_IP}:6379'
+    assert (profile.round_trips, profile.commands) == (4, 6)
+    summary = profile.summary()
+    assert set(summary['phases']) == {'send', 'wait', 'read', 'reduce'}
+    assert sum(row['share'] for row in summary['phases'].values()) == pytest.approx(1)
+    assert summary['phases']['send']['count'] == 4
+    report = profiler.report()
+    assert report.splitlines()[0] == f'#1 {REDIS_IP}:6379: 4 round trips, 6 commands'
+    profiler.reset()
+    assert profiler.profiles()[0].round_trips == 0
+
+
+def test_sync_deadline():
+    """A profiled command still times out at its deadline."""
+
+    for command_timeout in (None, 5):
+        redis = SyncConnection(REDIS_IP, command_timeout=command_timeout)
+        redis.connect()
+        redis.set_profiler(Profiler())
+        assert redis.command('PING', deadline=time.monotonic() + 1) == 'PONG'
+        start = time.monotonic()
+        with pytest.raises(IOError):
+            redis.command('BLPOP profileempty 3', deadline=time.monotonic() + 0.3)
+        assert time.monotonic() - start < 1
+        redis.disconnect()
+
+
+def test_sync_bytes_and_observer():
+    stats = CommandStats()
+    profiler = Profiler()
+    with SyncConnection(
+            path=b'/tmp/redis.sock',
+            encoding=None,
+            observer=stats,
+            profiler=profiler
+        ) as redis:
+        assert redis.command_args(b'ECHO', b'hi') == b'hi'
+        redis.set_observer(None)
+        assert redis.command(b'PING') == b'PONG'
+        redis.set_observer(stats)
+        redis.set_profiler(None)
+        assert redis.command(b'PING') == b'PONG'
+    # both saw the commands while both were installed
+    assert stats.summary()['ECHO']['count'] == 1
+    assert stats.summary()['PING']['count'] == 1
+    [profile] = profiler.profiles()
+    assert profile.label == '#1 /tmp/redis.sock'
+    assert profile.round_trips == 2
+
+
+def test_pool_profiler():
+    profiler = Profiler()
+    with ConnectionPool(REDIS_IP, max_size=2, profiler=profiler) as pool:
+        with pool.connection() as a, pool.connection() as b:
+            a.command_args('PING')
+            b.command_args('PING')
+            b.command_args('PING')
+    assert [p.round_trips for p in profiler.profiles()] == [1, 2]
+    assert profiler.total().round_trips == 3
+    assert profiler.report().split('\n\n')[-1].startswith('all connections: 3')
+
+
+def test_async_phases(loop):
+    async def test():
+        redis = AsyncConnection(REDIS_IP)
+        await redis.connect()
+        original = redis.replies
+        with profiling(redis) as profiler:
+            replies = await asyncio.gather(*(
+                redis.command_args('PING') for _ in range(50)
+            ))
+            assert replies == ['PONG'] * 50
+            with pytest.raises(ReplyError):
+                await redis.command_args('NOSUCHCOMMAND')
+            async with redis.pipeline() as pipe:
+                pipe.command_args('PING')
+                pipe.command_args('ECHO', 'a')
+            assert pipe.results == ['PONG', 'a']
+        assert redis.replies is original
+        # sequence numbers carry on after profiling
+        assert await redis.command('PING') == 'PONG'
+        await redis.disconnect()
+        return profiler
+    profiler = loop.run_until_complete(test())
+    [profile] = profiler.profiles()
+    assert (profile.round_trips, profile.commands) == (52, 53)
+    phases = profile.summary()['phases']
+    assert set(phases) == {'send', 'wait', 'read', 'dispatch'}
+    assert all(row['count'] == 52 for row in phases.values())
+
+
+def test_async_reconnect(loop):
+    async def test():
+        profiler = Profiler()
+        redis = AsyncConnection(path='/tmp/redis.sock', profiler=profiler)
+        # nothing to profile before connecting
+        await redis.connect()
+        await redis.command_args('PING')
+        await redis.connect()
+        await redis.command_args('PING')
+        await redis.disconnect()
+        return profiler
+    profiler = loop.run_until_complete(test())
+    assert [p.round_trips for p in profiler.profiles()] == [2]
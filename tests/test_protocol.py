@@ -0,0 +1,236 @@
+import asyncio
+
+import pytest
+
+from fastredis import AsyncConnection, CommandStats, SyncConnection
+from fastredis.connections import (
+    AsyncProtocolConnectionBytes,
+    AsyncProtocolConnectionStr
+)
+from fastredis.exceptions import (
+    ContextError,
+    EOFError,
+    FastredisError,
+    IOError,
+    ReplyError
+)
+from fastredis.profile import profiling
+from fastredis.wrappers_async import ReplyQueue
+from fastredis.wrappers_protocol import redis_set_reply_queue
+from resp_server import RespServer
+
+
+REDIS_IP = '127.0.0.1'
+REDIS_SOCKET = '/tmp/redis.sock'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_commands(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP, backend='protocol') as redis:
+            assert isinstance(redis, AsyncProtocolConnectionStr)
+            assert await redis.command('SET protocolkey abc') == 'OK'
+            assert await redis.command_args('GET', 'protocolkey') == 'abc'
+            with pytest.raises(ReplyError):
+                await redis.command_args('INCR', 'protocolkey')
+            with pytest.raises(TypeError):
+                await redis.command_args('GET', object())
+            replies = await asyncio.gather(*(
+                redis.command_args('ECHO', i) for i in range(1000)
+            ))
+            assert replies == [str(i) for i in range(1000)]
+            async with redis.pipeline(raise_on_error=False) as pipe:
+                pipe.command_args('GET', 'protocolkey')
+                pipe.command_args('LPUSH', 'protocolkey', 'x')
+                pipe.command_args('DEL', 'protocolkey')
+            assert pipe.results[0] == 'abc'
+            assert isinstance(pipe.results[1], ReplyError)
+            assert pipe.results[2] == 1
+            assert len(redis.replies) == 0
+        assert redis.context is None
+    loop.run_until_complete(test())
+
+
+def test_bytes_unix(loop):
+    async def test():
+        redis = AsyncConnection(
+            path=REDIS_SOCKET.encode(),
+            encoding=None,
+            backend='protocol'
+        )
+        assert isinstance(redis, AsyncProtocolConnectionBytes)
+        await redis.connect()
+        value = bytes(range(256)) * 1000
+        assert await redis.command_args(b'SET', b'protocolkey', value) == b'OK'
+        assert await redis.command_args(b'GET', b'protocolkey') == value
+        assert await redis.command_args(b'DEL', b'protocolkey') == 1
+        await redis.disconnect()
+    loop.run_until_complete(test())
+
+
+def test_backend_argument():
+    with pytest.raises(ValueError):
+        AsyncConnection(REDIS_IP, backend='nosuchbackend')
+
+
+def test_connect_errors(loop):
+    async def test():
+        with pytest.raises(IOError):
+            await AsyncConnection(REDIS_IP, port=1, backend='protocol').connect()
+        with pytest.raises(IOError):
+            await AsyncConnection(path='/nonexistent', backend='protocol').connect()
+    loop.run_until_complete(test())
+
+
+def test_fragmented_replies(loop):
+    async def test():
+        with RespServer(fragment_size=3) as server:
+            async with AsyncConnection(
+                    REDIS_IP,
+                    server.port,
+                    backend='protocol'
+                ) as redis:
+                await redis.command_args('SET', 'a', 'x' * 100)
+                replies = await asyncio.gather(
+                    redis.command_args('GET', 'a'),
+                    redis.command_args('MGET', 'a', 'b'),
+                    redis.command_args('PING')
+                )
+        assert replies == ['x' * 100, ('x' * 100, None), 'PONG']
+    loop.run_until_complete(test())
+
+
+def test_replies_resolved_per_read(loop):
+    batches = []
+
+    class RecordingQueue(ReplyQueue):
+        def resolve(self, replies):
+            batches.append(len(replies) // 2)
+            super().resolve(replies)
+
+    async def test():
+        async with AsyncConnection(REDIS_IP, backend='protocol') as redis:
+            protocol = redis.context
+            reads = []
+            data_received = protocol.data_received
+
+            def counted_data_received(data):
+                reads.append(len(data))
+                data_received(data)
+
+            protocol.data_received = counted_data_received
+            replies = RecordingQueue(loop)
+            replies.pending = protocol.replies.pending
+            redis_set_reply_queue(protocol, replies)
+            values = await asyncio.gather(*(
+                redis.command_args('ECHO', i) for i in range(1000)
+            ))
+        assert values == [str(i) for i in range(1000)]
+        assert sum(batches) == 1000
+        assert len(batches) == len(reads)
+    loop.run_until_complete(test())
+
+
+def test_unexpected_reply(loop):
+    async def test():
+        redis = AsyncConnection(REDIS_IP, backend='protocol')
+        await redis.connect()
+        protocol = redis.context
+        pending = asyncio.ensure_future(redis.command_args('PING'))
+        await asyncio.sleep(0)
+        # the reply to PING, then one nothing is waiting for
+        protocol.data_received(b'+PONG\r\n+OK\r\n')
+        assert await pending == 'PONG'
+        with pytest.raises(FastredisError, match='Unexpected reply'):
+            await asyncio.shield(protocol.disconnected)
+        with pytest.raises(ContextError):
+            await redis.command_args('PING')
+        await redis.disconnect(timeout=0)
+    loop.run_until_complete(test())
+
+
+def test_connection_lost(loop):
+    async def test():
+        redis = AsyncConnection(REDIS_IP, backend='protocol')
+        await redis.connect()
+        client_id = await redis.command_args('CLIENT', 'ID')
+        with SyncConnection(REDIS_IP) as killer:
+            killer.command_args('CLIENT', 'KILL', 'ID', client_id)
+        with pytest.raises(EOFError):
+            await redis.command_args('BLPOP', 'protocolempty', 1)
+        with pytest.raises(ContextError):
+            await redis.command_args('PING')
+        await redis.disconnect(timeout=0)
+        assert redis.context is None
+
+        # graceful and forced disconnects with replies pending
+        await redis.connect()
+        pending = asyncio.ensure_future(redis.command_args('PING'))
+        await asyncio.sleep(0)
+        await redis.disconnect()
+        assert await pending == 'PONG'
+        await redis.connect()
+        pending = asyncio.ensure_future(
+            redis.command_args('BLPOP', 'protocolempty', 1)
+        )
+        await asyncio.sleep(0)
+        await redis.disconnect(timeout=0)
+        with pytest.raises(ContextError):
+            await pending
+    loop.run_until_complete(test())
+
+
+def test_pubsub(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP, backend='protocol') as sub_conn, \
+                AsyncConnection(REDIS_IP) as redis:
+            sub = await sub_conn.subscribe('protocolchan', b'protocolchan2')
+            psub = await sub_conn.psubscribe('protocol*')
+            assert await redis.command_args('PUBLISH', 'protocolchan', 'a') == 2
+            assert await redis.command_args('PUBLISH', 'protocolchan2', 'b') == 2
+            messages = [await sub.__anext__(), await sub.__anext__()]
+            assert [(m.channel, m.data) for m in messages] == [
+                ('protocolchan', 'a'),
+                ('protocolchan2', 'b')
+            ]
+            message = await psub.__anext__()
+            assert (message.pattern, message.data) == ('protocol*', 'a')
+            await sub.unsubscribe()
+            await psub.unsubscribe()
+            with pytest.raises(StopAsyncIteration):
+                await sub.__anext__()
+            # a regular connection again
+            assert await sub_conn.command_args('PING') == 'PONG'
+            sub = await sub_conn.subscribe('protocolchan')
+        with pytest.raises(ContextError):
+            await sub.__anext__()
+    loop.run_until_complete(test())
+
+
+def test_observer_and_profiler(loop):
+    async def test():
+        stats = CommandStats()
+        redis = AsyncConnection(REDIS_IP, backend='protocol', observer=stats)
+        await redis.connect()
+        with profiling(redis) as profiler:
+            await asyncio.gather(*(redis.command_args('PING') for _ in range(10)))
+            async with redis.pipeline() as pipe:
+                pipe.command_args('PING')
+                pipe.command_args('PING')
+        assert redis.context.read_hook is None
+        await redis.disconnect()
+        return stats, profiler
+    stats, profiler = loop.run_until_complete(test())
+    assert stats.summary()['PING']['count'] == 12
+    [profile] = profiler.profiles()
+    assert (profile.round_trips, profile.commands) == (11, 12)
+    assert set(profile.summary()['phases']) == {'send', 'wait', 'read', 'dispatch'}
@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+
+from fastredis.connections import AsyncConnection
+from fastredis.exceptions import *
+from fastredis.pubsub import Message
+
+
+REDIS_IP = '127.0.0.1'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_subscribe(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as sub_conn, \
+                AsyncConnection(REDIS_IP) as pub:
+            sub = await sub_conn.subscribe('testchannel1', 'testchannel2')
+            assert sub.active == {'testchannel1', 'testchannel2'}
+            assert await pub.command_args('PUBLISH', 'testchannel1', 'a') == 1
+            assert await pub.command_args('PUBLISH', 'testchannel2', 'b') == 1
+            assert await sub.__anext__() == Message('testchannel1', 'a')
+            assert await sub.__anext__() == Message('testchannel2', 'b')
+            await sub.unsubscribe()
+            assert not sub.active
+            with pytest.raises(StopAsyncIteration):
+                await sub.__anext__()
+            assert await pub.command_args('PUBLISH', 'testchannel1', 'a') == 0
+    loop.run_until_complete(test())
+
+
+def test_psubscribe(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as sub_conn, \
+                AsyncConnection(REDIS_IP) as pub:
+            async with await sub_conn.psubscribe('testchannel*') as sub:
+                await pub.command_args('PUBLISH', 'testchannel9', 'x')
+                message = await sub.__anext__()
+                assert message == Message('testchannel9', 'x', 'testchannel*')
+            assert not sub.active
+    loop.run_until_complete(test())
+
+
+def test_bytes(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP.encode(), encoding=None) as sub_conn, \
+                AsyncConnection(REDIS_IP) as pub:
+            sub = await sub_conn.subscribe(b'testchannel')
+            await pub.command_args('PUBLISH', 'testchannel', b'\x00\xff')
+            assert await sub.__anext__() == Message(b'testchannel', b'\x00\xff')
+            await sub.unsubscribe()
+    loop.run_until_complete(test())
+
+
+def test_batches(loop):
+    N = 100
+    async def test():
+        async with AsyncConnection(REDIS_IP) as sub_conn, \
+                AsyncConnection(REDIS_IP) as pub:
+            sub = await sub_conn.subscribe('testchannel')
+            async with pub.pipeline() as pipe:
+                for i in range(N):
+                    pipe.command_args('PUBLISH', 'testchannel', i)
+            received = []
+            batches = 0
+            while len(received) < N:
+                batch = await sub.get_batch()
+                assert batch
+                received += batch
+                batches += 1
+            assert [m.data for m in received] == [str(i) for i in range(N)]
+            # the pipelined messages arrive in fewer reads than messages
+            assert batches < N
+            await sub.unsubscribe()
+    loop.run_until_complete(test())
+
+
+def test_iterate(loop):
+    N = 10
+    async def test():
+        async with AsyncConnection(REDIS_IP) as sub_conn, \
+                AsyncConnection(REDIS_IP) as pub:
+            sub = await sub_conn.subscribe('testchannel')
+
+            async def publish():
+                for i in range(N):
+                    await pub.command_args('PUBLISH', 'testchannel', i)
+                await sub.unsubscribe()
+
+            task = asyncio.ensure_future(publish())
+            received = [message.data async for message in sub]
+            await task
+            assert received == [str(i) for i in range(N)]
+    loop.run_until_complete(test())
+
+
+def test_overflow(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as sub_conn, \
+                AsyncConnection(REDIS_IP) as pub:
+            sub = await sub_conn.subscribe('testchannel', max_batches=1)
+            for i in range(3):
+                # one batch per message
+                await pub.command_args('PUBLISH', 'testchannel', i)
+                await asyncio.sleep(0.01)
+            assert await sub.__anext__() == Message('testchannel', '0')
+            with pytest.raises(FastredisError):
+                await sub.__anext__()
+            await pub.command_args('PUBLISH', 'testchannel', 3)
+            assert await sub.__anext__() == Message('testchannel', '3')
+            await sub.unsubscribe()
+    loop.run_until_complete(test())
+
+
+def test_connection_lost(loop):
+    async def test():
+        sub_conn = AsyncConnection(REDIS_IP)
+        await sub_conn.connect()
+        sub = await sub_conn.subscribe('testchannel')
+        await sub_conn.disconnect()
+        with pytest.raises(ContextError):
+            await sub.__anext__()
+        with pytest.raises(StopAsyncIteration):
+            await sub.__anext__()
+    loop.run_until_complete(test())
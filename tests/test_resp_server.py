@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+from fastredis import AsyncConnection, SyncConnection
+from fastredis.benchmarks import run, sweep
+from fastredis.exceptions import ContextError, IOError, ReplyError
+from resp_server import (
+    RespServer,
+    constant,
+    exponential,
+    parse_delay,
+    spikes
+)
+
+
+REDIS_IP = '127.0.0.1'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+def test_commands(tmp_path):
+    path = str(tmp_path / 'resp.sock')
+    with RespServer(path=path) as server:
+        with SyncConnection(REDIS_IP, server.port) as redis:
+            assert redis.command_args('PING') == 'PONG'
+            assert redis.command_args('SET', 'a', '1') == 'OK'
+            assert redis.command_args('SET', 'b', '2') == 'OK'
+            assert redis.command_args('GET', 'a') == '1'
+            assert redis.command_args('MGET', 'a', 'x', 'b') == ('1', None, '2')
+            with pytest.raises(ReplyError):
+                redis.command_args('INCR', 'a')
+        with SyncConnection(path=path.encode(), encoding=None) as redis:
+            assert redis.command_args(b'DEL', b'a', b'b', b'x') == 2
+            assert redis.command_args(b'GET', b'a') is None
+        stats = server.stats()
+        assert stats['counts']['GET'] == 2
+        assert stats['connections'] == 2
+        assert stats['keys'] == 0
+
+
+def test_delays():
+    delays = {'GET': constant(0.05), '*': constant(0.0)}
+    with RespServer(delays=delays) as server:
+        with SyncConnection(REDIS_IP, server.port) as redis:
+            start = time.perf_counter()
+            redis.command_args('SET', 'a', '1')
+            assert time.perf_counter() - start < 0.05
+            start = time.perf_counter()
+            with redis.pipeline() as pipe:
+                pipe.command_args('GET', 'a')
+                pipe.command_args('GET', 'a')
+            # commands on a connection are delayed one after the other
+            assert time.perf_counter() - start >= 0.1
+
+
+def _gets_before_timeout(seed):
+    with RespServer(delays={'GET': spikes(0.0, 0.5, 0.2)}, seed=seed) as server:
+        redis = SyncConnection(REDIS_IP, server.port, command_timeout=0.1)
+        redis.connect()
+        count = 0
+        with pytest.raises(IOError):
+            while True:
+                redis.command_args('GET', 'a')
+                count += 1
+        redis.disconnect()
+        return count
+
+
+def test_command_timeout():
+    # the same seed stalls the same command
+    assert _gets_before_timeout(3) == _gets_before_timeout(3)
+
+
+def test_distributions():
+    rng = random.Random(1)
+    assert parse_delay('const:0.5')(rng) == 0.5
+    assert 0.1 <= parse_delay('uniform:0.1,0.2')(rng) <= 0.2
+    assert parse_delay('exp:0')(rng) == 0.0
+    draws = [spikes(0.0, 1.0, 0.1)(rng) for _ in range(1000)]
+    assert 50 < sum(draws) < 150
+    mean = sum(exponential(0.01)(rng) for _ in range(1000)) / 1000
+    assert 0.008 < mean < 0.012
+    with pytest.raises(ValueError):
+        parse_delay('normal:1')
+
+
+def test_fragmented_replies():
+    with RespServer(fragment_size=1) as server:
+        with SyncConnection(REDIS_IP, server.port) as redis:
+            value = 'x' * 1000
+            redis.command_args('SET', 'a', value)
+            assert redis.command_args('GET', 'a') == value
+            assert redis.command_args('MGET', 'a', 'b') == (value, None)
+
+
+def test_drop_after():
+    with RespServer(drop_after=2) as server:
+        redis = SyncConnection(REDIS_IP, server.port)
+        redis.connect()
+        redis.command_args('PING')
+        redis.command_args('PING')
+        with pytest.raises(ContextError):
+            redis.command_args('PING')
+        redis.connect()
+        assert redis.command_args('PING') == 'PONG'
+        redis.disconnect()
+
+
+def test_async_drop_connections(loop):
+    async def test():
+        with RespServer() as server:
+            redis = AsyncConnection(REDIS_IP, server.port)
+            await redis.connect()
+            assert await redis.command_args('PING') == 'PONG'
+            server.drop_connections()
+            with pytest.raises(ContextError):
+                await redis.command_args('PING')
+            await redis.disconnect()
+    loop.run_until_complete(test())
+
+
+def test_async_delays_overlap(loop):
+    async def test():
+        with RespServer(delays={'GET': constant(0.1)}) as server:
+            conns = [AsyncConnection(REDIS_IP, server.port) for _ in range(5)]
+            for redis in conns:
+                await redis.connect()
+            start = time.perf_counter()
+            await asyncio.gather(*(
+                redis.command_args('GET', 'a') for redis in conns
+            ))
+            # each connection waits on its own delay
+            assert time.perf_counter() - start < 0.3
+            for redis in conns:
+                await redis.disconnect()
+    loop.run_until_complete(test())
+
+
+def test_async_write_stall(loop):
+    async def test():
+        with RespServer(fragment_size=1 << 20) as server:
+            async with AsyncConnection(REDIS_IP, server.port) as redis:
+                server.pause_reading()
+                await asyncio.sleep(0.05)
+                value = 'x' * (32 << 20)
+                # larger than the socket buffers, so hiredis cannot write it
+                # all at once and waits for the loop writer
+                pending = asyncio.ensure_future(
+                    redis.command_args('SET', 'a', value)
+                )
+                ticks = 0
+                for _ in range(10):
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+                assert not pending.done()
+                server.resume_reading()
+                assert await pending == 'OK'
+                assert ticks == 10
+                assert await redis.command_args('GET', 'a') == value
+    loop.run_until_complete(test())
+
+
+def test_subscribe(loop):
+    async def test():
+        with RespServer() as server:
+            async with AsyncConnection(REDIS_IP, server.port) as redis:
+                sub = await redis.subscribe('news', 'sport')
+                assert server.publish(b'news', b'hello') == 1
+                message = await sub.__anext__()
+                assert (message.channel, message.data) == ('news', 'hello')
+                with SyncConnection(REDIS_IP, server.port) as publisher:
+                    assert publisher.command_args('PUBLISH', 'sport', 'goal') == 1
+                message = await sub.__anext__()
+                assert (message.channel, message.data) == ('sport', 'goal')
+                await sub.unsubscribe()
+    loop.run_until_complete(test())
+
+
+def test_benchmark_target():
+    with RespServer(delays={'GET': constant(0.001)}) as server:
+        cases = list(sweep(transports=['tcp'], depths=[2], key_counts=[2]))
+        results = run(
+            cases,
+            port=server.port,
+            duration=0.01,
+            min_samples=3,
+            warmup=1
+        )
+        for result in results:
+            if result['case']['command'] == 'get':
+                assert result['stats']['p50_us'] >= 2000
+        assert server.stats()['keys'] == 0
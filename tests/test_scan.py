@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from fastredis import AsyncConnection, SyncConnection
+
+
+REDIS_IP = '127.0.0.1'
+N_KEYS = 500
+KEYS = [f'scantest:{i}' for i in range(N_KEYS)]
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='function', autouse=False)
+def keys():
+    with SyncConnection(REDIS_IP) as redis:
+        with redis.pipeline() as pipe:
+            for key in KEYS:
+                pipe.command_args('SET', key, key)
+            pipe.command_args('HSET', 'scantest:hash', 'a', '1', 'b', '2')
+            pipe.command_args('SADD', 'scantest:set', *range(100))
+            pipe.command_args('ZADD', 'scantest:zset', '1.5', 'a', 2, 'b')
+        yield
+        redis.command_args('DEL', *KEYS, 'scantest:hash', 'scantest:set', 'scantest:zset')
+
+
+def test_scan_iter(keys):
+    with SyncConnection(REDIS_IP) as redis:
+        found = set(redis.scan_iter(match='scantest:*', count=50))
+        assert found == {*KEYS, 'scantest:hash', 'scantest:set', 'scantest:zset'}
+        found = set(redis.scan_iter(match='scantest:*', count=50, type='hash'))
+        assert found == {'scantest:hash'}
+        assert redis.command_args('PING') == 'PONG'
+
+
+def test_scan_iter_bytes(keys):
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+        found = set(redis.scan_iter(match=b'scantest:*', type=b'string'))
+        assert found == {key.encode() for key in KEYS}
+
+
+def test_scan_iter_closed_early(keys):
+    with SyncConnection(REDIS_IP) as redis:
+        it = redis.scan_iter(match='scantest:*', count=10)
+        assert next(it).startswith('scantest:')
+        it.close()
+        # the prefetched page was read and discarded
+        assert redis.command_args('GET', KEYS[0]) == KEYS[0]
+        for key in redis.scan_iter(match='scantest:*', count=10):
+            break
+        assert redis.command_args('GET', KEYS[0]) == KEYS[0]
+
+
+def test_hscan_sscan_zscan_iter(keys):
+    with SyncConnection(REDIS_IP) as redis:
+        assert dict(redis.hscan_iter('scantest:hash')) == {'a': '1', 'b': '2'}
+        assert dict(redis.hscan_iter('scantest:hash', match='a')) == {'a': '1'}
+        members = set(redis.sscan_iter('scantest:set', count=10))
+        assert members == {str(i) for i in range(100)}
+        assert dict(redis.zscan_iter('scantest:zset')) == {'a': 1.5, 'b': 2.0}
+        assert list(redis.sscan_iter('scantest:missing')) == []
+
+
+def test_async_scan_iter(loop, keys):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as redis:
+            found = set()
+            async for key in redis.scan_iter(match='scantest:*', count=50):
+                found.add(key)
+                # other commands may be interleaved
+                if key == KEYS[0]:
+                    assert await redis.command_args('GET', key) == key
+            assert found >= set(KEYS)
+            pairs = [p async for p in redis.hscan_iter('scantest:hash')]
+            assert dict(pairs) == {'a': '1', 'b': '2'}
+            members = [m async for m in redis.sscan_iter('scantest:set')]
+            assert len(members) == 100
+            scores = [s async for s in redis.zscan_iter('scantest:zset')]
+            assert dict(scores) == {'a': 1.5, 'b': 2.0}
+    loop.run_until_complete(test())
+
+
+def test_async_scan_iter_closed_early(loop, keys):
+    async def test():
+        async with AsyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+            it = redis.scan_iter(match=b'scantest:*', count=10)
+            assert (await it.__anext__()).startswith(b'scantest:')
+            await it.aclose()
+            assert await redis.command_args(b'PING') == b'PONG'
+            assert len(redis.replies) == 0
+    loop.run_until_complete(test())
@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from fastredis import AsyncConnection, SyncConnection
+from fastredis.exceptions import ReplyError
+from fastredis.script import AsyncScript, Script, is_noscript
+
+
+REDIS_IP = '127.0.0.1'
+INCR_BY = "return redis.call('INCRBY', KEYS[1], ARGV[1])"
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='function', autouse=False)
+def redis():
+    with SyncConnection(REDIS_IP) as redis:
+        redis.command_args('SCRIPT', 'FLUSH')
+        yield redis
+        redis.command_args('DEL', 'testkey')
+
+
+def test_register_script(redis):
+    script = redis.register_script(INCR_BY)
+    assert isinstance(script, Script)
+    assert script.sha == hashlib.sha1(INCR_BY.encode()).hexdigest()
+    assert not script.loaded
+    assert script(keys=['testkey'], args=[5]) == 5
+    assert script.loaded
+    assert redis.command_args('SCRIPT', 'EXISTS', script.sha) == (1,)
+    assert script(['testkey'], [2]) == 7
+
+
+def test_noscript_recovery(redis):
+    script = redis.register_script(INCR_BY)
+    assert script(['testkey'], [1]) == 1
+    redis.command_args('SCRIPT', 'FLUSH')
+    assert script(['testkey'], [1]) == 2
+
+
+def test_script_errors(redis):
+    script = redis.register_script('return redis.call("NOSUCHCOMMAND")')
+    with pytest.raises(ReplyError) as e:
+        script()
+    assert not is_noscript(e.value)
+    bad = redis.register_script('this is not lua')
+    with pytest.raises(ReplyError):
+        bad()
+    assert redis.command_args('PING') == 'PONG'
+
+
+def test_bytes_connection():
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+        script = redis.register_script(b'return ARGV[1]')
+        assert script(args=[b'value']) == b'value'
+
+
+def test_pipeline(redis):
+    script = redis.register_script(INCR_BY)
+    with redis.pipeline() as pipe:
+        pipe.script(script, ['testkey'], [1])
+        pipe.command_args('GET', 'testkey')
+        pipe.script(script, ['testkey'], [2])
+        # the SCRIPT LOAD queued before the first call is not returned
+        assert pipe.execute() == [1, '1', 3]
+    assert script.loaded
+    with redis.pipeline() as pipe:
+        pipe.script(script, ['testkey'], [1])
+        assert len(pipe) == 1
+        assert pipe.execute() == [4]
+
+
+def test_pipeline_noscript_recovery(redis):
+    script = redis.register_script(INCR_BY)
+    script(['testkey'], [1])
+    redis.command_args('SCRIPT', 'FLUSH')
+    with redis.pipeline() as pipe:
+        pipe.script(script, ['testkey'], [1])
+        pipe.command_args('PING')
+        pipe.script(script, ['testkey'], [1])
+        assert pipe.execute() == [2, 'PONG', 3]
+    assert script.loaded
+
+
+def test_pipeline_errors(redis):
+    bad = redis.register_script('this is not lua')
+    pipe = redis.pipeline(raise_on_error=False)
+    pipe.script(bad)
+    pipe.command_args('PING')
+    results = pipe.execute()
+    assert isinstance(results[0], ReplyError)
+    assert not is_noscript(results[0])
+    assert results[1] == 'PONG'
+    pipe.script(bad)
+    with pytest.raises(ReplyError):
+        pipe.execute(raise_on_error=True)
+    assert redis.command_args('PING') == 'PONG'
+
+
+def test_async_script(loop):
+    async def test():
+        async with AsyncConnection(REDIS_IP) as redis:
+            await redis.command_args('SCRIPT', 'FLUSH')
+            script = redis.register_script(INCR_BY)
+            assert isinstance(script, AsyncScript)
+            assert await script(['testkey'], [3]) == 3
+            await redis.command_args('SCRIPT', 'FLUSH')
+            assert await script(['testkey'], [3]) == 6
+            async with redis.pipeline() as pipe:
+                pipe.script(script, ['testkey'], [1])
+                pipe.command_args('GET', 'testkey')
+            assert pipe.results == [7, '7']
+            await redis.command_args('SCRIPT', 'FLUSH')
+            async with redis.pipeline() as pipe:
+                pipe.script(script, ['testkey'], [1])
+            assert pipe.results == [8]
+            await redis.command_args('DEL', 'testkey')
+    loop.run_until_complete(test())
@@ -1,3 +1,9 @@
+import mmap
+import time
+
+import pytest
+
+from fastredis.exceptions import FastredisError, IOError, ReplyError
 from fastredis.connections import (
     SyncConnection,
     SyncConnectionBytes,
@@ -6,6 +12,7 @@ from fastredis.connections import (
 
 
 REDIS_IP = '127.0.0.1'
+REDIS_SOCKET = '/tmp/redis.sock'
 
 
 def test_connect():
@@ -42,3 +49,174 @@ def test_bytes():
         assert r.command(f'SET {KEY} {VALUE}'.encode('utf-8')) == b'OK'
         assert r.command(f'GET {KEY}'.encode('utf-8')) == VALUE.encode('utf-8')
         assert r.command(f'DEL {KEY}'.encode('utf-8')) == 1
+
+
+def test_command_args():
+    KEY = 'test key'
+    VALUE = 'test value'
+    with SyncConnection(REDIS_IP) as redis:
+        assert redis.command_args('SET', KEY, VALUE) == 'OK'
+        assert redis.command_args('GET', KEY) == VALUE
+        assert redis.command_args('DEL', KEY) == 1
+
+
+def test_write_read_args():
+    KEY = 'test key'
+    VALUE = 'test value'
+    with SyncConnection(REDIS_IP) as redis:
+        redis.write_args('SET', KEY, VALUE)
+        redis.write_args('GET', KEY)
+        redis.write_args('DEL', KEY)
+        assert redis.read() == 'OK'
+        assert redis.read() == VALUE
+        assert redis.read() == 1
+
+
+def test_bytes_command_args():
+    KEY = b'testkey'
+    VALUE = b'test value'
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as r:
+        assert r.command_args(b'SET', KEY, VALUE) == b'OK'
+        assert r.command_args(b'GET', KEY) == VALUE
+        assert r.command_args(b'DEL', KEY) == 1
+
+
+def test_unix():
+    with SyncConnection(path=REDIS_SOCKET) as redis:
+        assert isinstance(redis, SyncConnectionStr)
+        assert redis.command_args('PING') == 'PONG'
+    with SyncConnection(path=REDIS_SOCKET.encode(), encoding=None) as redis:
+        assert isinstance(redis, SyncConnectionBytes)
+        assert redis.command_args(b'PING') == b'PONG'
+
+
+def test_ip_or_path():
+    with pytest.raises(ValueError):
+        SyncConnection()
+    with pytest.raises(ValueError):
+        SyncConnection(REDIS_IP, path=REDIS_SOCKET)
+
+
+def test_command_timeout():
+    with SyncConnection(REDIS_IP, command_timeout=0.05) as redis:
+        assert redis.usable
+        with pytest.raises(IOError):
+            redis.command_args('BLPOP', 'testlist', 1)
+        assert not redis.usable
+        redis.connect()
+        assert redis.usable
+        assert redis.command_args('PING') == 'PONG'
+    assert not redis.usable
+
+
+def test_deadline():
+    with SyncConnection(REDIS_IP) as redis:
+        deadline = time.monotonic() + 1
+        assert redis.command('PING', deadline=deadline) == 'PONG'
+        # the per-call timeout does not outlive the call
+        assert redis.command_args('BLPOP', 'testlist', '0.1') is None
+        with pytest.raises(IOError):
+            redis.command_args(
+                'BLPOP', 'testlist', 1,
+                deadline=time.monotonic() + 0.05
+            )
+        assert not redis.usable
+
+
+def test_deadline_passed():
+    with SyncConnection(REDIS_IP) as redis:
+        with pytest.raises(IOError):
+            redis.command('PING', deadline=time.monotonic() - 1)
+        # nothing was sent, so the connection is still usable
+        assert redis.usable
+        redis.write_args('PING')
+        assert redis.read(deadline=time.monotonic() + 1) == 'PONG'
+
+
+def test_deadline_passed_out():
+    with SyncConnection(REDIS_IP) as redis:
+        redis.command_args('SET', 'testkey', 'v1')
+        out = bytearray(10)
+        with pytest.raises(IOError):
+            redis.command('GET testkey', deadline=time.monotonic() - 1, out=out)
+        # the command was not queued, so no stale reply is left behind
+        assert redis.command_args('ECHO', 'next') == 'next'
+        with pytest.raises(IOError):
+            redis.command_args(
+                'GET', 'testkey',
+                deadline=time.monotonic() - 1,
+                out=out
+            )
+        assert redis.command_args('ECHO', 'next') == 'next'
+        assert redis.command_args('DEL', 'testkey') == 1
+
+
+def test_get_into():
+    VALUE = bytes(range(256)) * 1000
+    with SyncConnection(REDIS_IP) as redis:
+        redis.command_args('SET', 'testkey', VALUE)
+        out = bytearray(len(VALUE) + 10)
+        assert redis.get_into('testkey', out) == len(VALUE)
+        assert out[:len(VALUE)] == VALUE
+        with mmap.mmap(-1, len(VALUE)) as m:
+            assert redis.command_args('GET', 'testkey', out=m) == len(VALUE)
+            assert m[:] == VALUE
+        assert redis.get_into('missingkey', out) is None
+        with pytest.raises(ValueError):
+            redis.get_into('testkey', bytearray(10))
+        # the reply was still read
+        assert redis.command('PING') == 'PONG'
+        with pytest.raises(BufferError):
+            redis.get_into('testkey', b'read only')
+        assert redis.command('PING') == 'PONG'
+        assert redis.command_args('DEL', 'testkey') == 1
+
+
+def test_get_into_deadline_passed():
+    with SyncConnection(REDIS_IP) as redis:
+        redis.command_args('SET', 'testkey', 'v1')
+        with pytest.raises(IOError):
+            redis.get_into('testkey', bytearray(10), deadline=time.monotonic() - 1)
+        assert redis.command_args('ECHO', 'next') == 'next'
+        with pytest.raises(IOError):
+            redis.get_view('testkey', deadline=time.monotonic() - 1)
+        assert redis.command_args('ECHO', 'next') == 'next'
+        assert redis.command_args('DEL', 'testkey') == 1
+
+
+def test_get_into_bytes():
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+        redis.command_args(b'SET', b'testkey', b'testvalue')
+        out = bytearray(9)
+        assert redis.command(b'GET testkey', out=out) == 9
+        assert out == b'testvalue'
+        assert redis.get_into(b'testkey', out, deadline=time.monotonic() + 1) == 9
+        assert redis.command_args(b'DEL', b'testkey') == 1
+
+
+def test_get_into_not_a_string():
+    with SyncConnection(REDIS_IP) as redis:
+        out = bytearray(10)
+        with pytest.raises(FastredisError):
+            redis.command_args('INCR', 'testkey', out=out)
+        redis.command_args('DEL', 'testkey')
+        redis.command_args('LPUSH', 'testkey', 'a')
+        with pytest.raises(ReplyError):
+            redis.get_into('testkey', out)
+        assert redis.command_args('DEL', 'testkey') == 1
+
+
+def test_get_view():
+    VALUE = b'x' * 100_000
+    with SyncConnection(REDIS_IP) as redis:
+        redis.command_args('SET', 'testkey', VALUE)
+        view = redis.get_view('testkey')
+        assert view.readonly
+        assert view.nbytes == len(VALUE)
+        assert view == VALUE
+        view.release()
+        redis.write_args('GET', 'testkey')
+        with redis.read_view(deadline=time.monotonic() + 1) as view:
+            assert bytes(view[:3]) == b'xxx'
+        assert redis.get_view('missingkey') is None
+        assert redis.command_args('DEL', 'testkey') == 1
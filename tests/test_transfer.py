@@ -0,0 +1,134 @@
+import io
+import os
+
+import pytest
+
+from fastredis import SyncConnection
+from fastredis.exceptions import FastredisError, ReplyError
+
+
+REDIS_IP = '127.0.0.1'
+DATA = os.urandom(100_000) + b'\0' * 1000
+
+
+@pytest.fixture(scope='function', autouse=False)
+def redis():
+    with SyncConnection(REDIS_IP.encode(), encoding=None) as redis:
+        yield redis
+        redis.command_args(b'DEL', b'testkey')
+
+
+def test_upload_download_path(redis, tmp_path):
+    source = tmp_path / 'source'
+    source.write_bytes(DATA)
+    assert redis.upload(b'testkey', source, chunk_size=4096, window=3) == len(DATA)
+    assert redis.command_args(b'GET', b'testkey') == DATA
+    target = tmp_path / 'target'
+    assert redis.download(b'testkey', target, chunk_size=4096, window=3) == len(DATA)
+    assert target.read_bytes() == DATA
+    # no temporary keys are left behind
+    assert redis.command_args(b'KEYS', b'testkey.upload.*') == ()
+
+
+def test_upload_download_fileobj(redis):
+    assert redis.upload(b'testkey', io.BytesIO(DATA), chunk_size=1000) == len(DATA)
+    out = io.BytesIO()
+    assert redis.download(b'testkey', out, chunk_size=999, window=2) == len(DATA)
+    assert out.getvalue() == DATA
+
+
+def test_str_connection(tmp_path):
+    source = tmp_path / 'source'
+    source.write_bytes(DATA)
+    with SyncConnection(REDIS_IP) as redis:
+        assert redis.upload('testkey', str(source)) == len(DATA)
+        target = tmp_path / 'target'
+        assert redis.download('testkey', str(target)) == len(DATA)
+        assert target.read_bytes() == DATA
+        redis.command_args('DEL', 'testkey')
+
+
+def test_empty(redis, tmp_path):
+    assert redis.upload(b'testkey', io.BytesIO()) == 0
+    assert redis.command_args(b'GET', b'testkey') == b''
+    target = tmp_path / 'target'
+    assert redis.download(b'testkey', target) == 0
+    assert target.read_bytes() == b''
+
+
+def test_download_missing(redis, tmp_path):
+    target = tmp_path / 'target'
+    assert redis.download(b'testkey', target) is None
+    assert not target.exists()
+
+
+def test_download_wrong_type(redis):
+    redis.command_args(b'LPUSH', b'testkey', b'a')
+    with pytest.raises(ReplyError):
+        redis.download(b'testkey', io.BytesIO(), chunk_size=1)
+    assert redis.command_args(b'PING') == b'PONG'
+
+
+def test_upload_replaces_value(redis):
+    redis.command_args(b'SET', b'testkey', b'old value')
+    redis.upload(b'testkey', io.BytesIO(b'new'))
+    assert redis.command_args(b'GET', b'testkey') == b'new'
+
+
+def test_invalid_arguments(redis):
+    with pytest.raises(ValueError):
+        redis.upload(b'testkey', io.BytesIO(DATA), chunk_size=0)
+    with pytest.raises(ValueError):
+        redis.download(b'testkey', io.BytesIO(), window=0)
+
+
+class FailingReader(io.BytesIO):
+    """Raises OSError on the read after `reads` reads."""
+
+    def __init__(self, data, reads):
+        super().__init__(data)
+        self.reads = reads
+
+    def readinto(self, buf):
+        if self.reads == 0:
+            raise OSError('disk error')
+        self.reads -= 1
+        return super().readinto(buf)
+
+
+def test_upload_source_error(redis):
+    # fails in the middle of the second window
+    with pytest.raises(OSError):
+        redis.upload(b'testkey', FailingReader(DATA, 5), chunk_size=1000, window=3)
+    # the replies to the chunks written were read before cleaning up
+    assert redis.command_args(b'ECHO', b'next') == b'next'
+    assert redis.command_args(b'KEYS', b'testkey*') == ()
+
+
+class FailingWriter(io.BytesIO):
+    def write(self, data):
+        if self.tell() > 0:
+            raise OSError('disk full')
+        return super().write(data)
+
+
+def test_download_sink_error(redis):
+    redis.command_args(b'SET', b'testkey', DATA)
+    with pytest.raises(OSError):
+        redis.download(b'testkey', FailingWriter(), chunk_size=1000, window=4)
+    assert redis.command_args(b'ECHO', b'next') == b'next'
+
+
+def test_download_value_grows(redis):
+    redis.command_args(b'SET', b'testkey', DATA)
+
+    class GrowingSink(io.BytesIO):
+        def write(self, data):
+            if self.tell() == 0:
+                with SyncConnection(REDIS_IP) as other:
+                    other.command_args('APPEND', 'testkey', 'more')
+            return super().write(data)
+
+    with pytest.raises(FastredisError):
+        redis.download(b'testkey', GrowingSink(), chunk_size=1000)
+    assert redis.command_args(b'ECHO', b'next') == b'next'
@@ -1,15 +1,31 @@
+import select
+
 import pytest
 
 from fastredis.exceptions import *
 from fastredis.wrappers import (
     redis_command,
+    redis_command_args,
     redis_connect,
+    redis_connect_unix,
+    redis_flush,
     redis_free,
+    redis_pipeline,
     redis_write,
-    redis_read
+    redis_write_args,
+    redis_read,
+    redis_read_available,
+    redis_read_into,
+    redis_read_view,
+    redis_read_many,
+    redis_set_timeout,
+    redis_write_many
 )
 
 
+REDIS_SOCKET = '/tmp/redis.sock'
+
+
 @pytest.fixture(scope='function', autouse=False)
 def context():
     c = redis_connect('127.0.0.1')
@@ -45,6 +61,23 @@ def test_redis_connect_with_timeout_failure():
         redis_connect('128.0.0.1', timeout=1)
 
 
+def test_redis_connect_unix():
+    context = redis_connect_unix(REDIS_SOCKET)
+    assert redis_command_args(context, ('PING',)) == 'PONG'
+    redis_free(context)
+
+
+def test_redis_connect_unix_with_timeout():
+    context = redis_connect_unix(REDIS_SOCKET, timeout=0.5)
+    assert redis_command_args(context, ('PING',)) == 'PONG'
+    redis_free(context)
+
+
+def test_redis_connect_unix_failure():
+    with pytest.raises(IOError):
+        redis_connect_unix('/tmp/fastredis-missing.sock')
+
+
 def test_redis_write_and_read(context):
     keys = [f'testkey{i}' for i in range(10)]
     for key in keys:
@@ -53,3 +86,122 @@ def test_redis_write_and_read(context):
     for key in keys:
         assert redis_read(context) == 'OK'
         assert redis_read(context) == key
+
+
+def test_redis_command_args(context):
+    key = 'test key'
+    value = 'test value'
+    assert redis_command_args(context, ('SET', key, value)) == 'OK'
+    assert redis_command_args(context, ('GET', key)) == value
+    assert redis_command_args(context, ('DEL', key)) == 1
+    assert redis_command_args(context, ['INCRBY', key, 5]) == 5
+    assert redis_command_args(context, ['DEL', key]) == 1
+    with pytest.raises(TypeError):
+        redis_command_args(context, ('SET', key, 1.5))
+    with pytest.raises(ValueError):
+        redis_command_args(context, ())
+
+
+def test_redis_write_args_and_read(context):
+    keys = [f'test key {i}' for i in range(10)]
+    for key in keys:
+        redis_write_args(context, ('SET', key, key))
+        redis_write_args(context, ('GET', key))
+        redis_write_args(context, ('DEL', key))
+    for key in keys:
+        assert redis_read(context) == 'OK'
+        assert redis_read(context) == key
+        assert redis_read(context) == 1
+
+
+def test_redis_pipeline(context):
+    keys = [f'testkey{i}' for i in range(10)]
+    commands = [('SET', key, key) for key in keys]
+    commands += [f'GET {key}' for key in keys]
+    commands.append(('HGET', keys[0], 'field'))
+    commands.append(('DEL', *keys))
+    results = redis_pipeline(context, commands, raise_on_error=False)
+    assert results[:10] == ['OK'] * 10
+    assert results[10:20] == keys
+    assert isinstance(results[20], ReplyError)
+    assert results[21] == len(keys)
+    with pytest.raises(ReplyError):
+        redis_pipeline(context, [('SET', 'k', 'v'), ('LLEN', 'k'), ('DEL', 'k')])
+    assert redis_command(context, 'EXISTS k') == 0
+
+
+def test_redis_pipeline_bad_argument(context):
+    """A bad argument sends nothing, so the replies stay in step."""
+
+    with pytest.raises(TypeError):
+        redis_pipeline(context, [('SET', 'k', 'v'), ('GET', 1.5)])
+    assert redis_command_args(context, ('PING',)) == 'PONG'
+    assert redis_command_args(context, ('EXISTS', 'k')) == 0
+
+
+def test_redis_write_flush_read_many(context):
+    commands = [('SET', 'k', 'v'), ('GET', 'k'), ('LLEN', 'k')]
+    assert redis_write_many(context, commands) == 3
+    redis_flush(context)
+    results = redis_read_many(context, 3, raise_on_error=False)
+    assert results[:2] == ['OK', 'v']
+    assert isinstance(results[2], ReplyError)
+    redis_write_many(context, [('DEL', 'k')])
+    assert redis_read_many(context, 1) == [1]
+
+
+def test_redis_read_available(context):
+    commands = [('SET', 'k', 'v'), ('GET', 'k'), ('LLEN', 'k')]
+    redis_write_many(context, commands)
+    redis_flush(context)
+    results = []
+    while len(results) < 3:
+        select.select([context.fd], [], [])
+        results += redis_read_available(context)
+    assert results[:2] == ['OK', 'v']
+    assert isinstance(results[2], ReplyError)
+    redis_write_many(context, [('DEL', 'k')])
+    assert redis_read_many(context, 1) == [1]
+
+
+def test_redis_read_into_view(context):
+    redis_command_args(context, ('SET', 'k', 'value'))
+    out = bytearray(8)
+    redis_write_args(context, ('GET', 'k'))
+    assert redis_read_into(context, out) == 5
+    assert out[:5] == b'value'
+    redis_write_args(context, ('GET', 'k'))
+    view = redis_read_view(context)
+    assert view == b'value'
+    view.release()
+    redis_write_args(context, ('DEL', 'k'))
+    redis_write_args(context, ('GET', 'k'))
+    redis_write_args(context, ('GET', 'k'))
+    assert redis_read(context) == 1
+    assert redis_read_into(context, out) is None
+    assert redis_read_view(context) is None
+
+
+def test_redis_command_args_buffers(context):
+    value = bytearray(b'buffer value')
+    with memoryview(value) as view:
+        args = ('SET', 'k', view[:6])
+        assert redis_command_args(context, args) == 'OK'
+    assert redis_command_args(context, ('APPEND', 'k', value[6:])) == 12
+    assert redis_command_args(context, ('GET', 'k')) == 'buffer value'
+    redis_command_args(context, ('DEL', 'k'))
+    with pytest.raises(TypeError):
+        redis_command_args(context, ('SET', 'k', 1.5))
+
+
+def test_redis_set_timeout(context):
+    redis_set_timeout(context, 0.05)
+    with pytest.raises(IOError):
+        redis_command_args(context, ('BLPOP', 'testlist', 1))
+    assert context.err != 0
+
+
+def test_redis_set_timeout_none(context):
+    redis_set_timeout(context, 0.05)
+    redis_set_timeout(context, None)
+    assert redis_command_args(context, ('BLPOP', 'testlist', '0.1')) is None
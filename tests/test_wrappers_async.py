@@ -4,15 +4,22 @@ import pytest
 from fastredis.exceptions import *
 import fastredis.hiredis as hiredis
 from fastredis.wrappers_async import (
+    ReplyQueue,
     redis_command,
+    redis_command_args,
     redis_connect,
+    redis_connect_unix,
     redis_set_connect_cb,
     redis_set_disconnect_cb,
     redis_disconnect,
-    redis_free
+    redis_free,
+    redis_pipeline,
+    redis_reply_queue,
+    redis_set_reply_queue
 )
 
 REDIS_IP = '127.0.0.1'
+REDIS_SOCKET = '/tmp/redis.sock'
 
 
 @pytest.fixture(scope='function', autouse=False)
@@ -135,6 +142,28 @@ def test_redis_connect_disconnect(loop):
     loop.run_until_complete(test())
 
 
+def test_redis_connect_unix(loop):
+    async def test():
+        context, not_garbage = redis_connect_unix(REDIS_SOCKET)
+        connected = loop.create_future()
+        disconnected = loop.create_future()
+
+        def connected_cb(_context, status):
+            connected.set_result(status)
+
+        def disconnected_cb(_context, status):
+            disconnected.set_result(status)
+
+        not_garbage += redis_set_connect_cb(context, connected_cb)
+        not_garbage += redis_set_disconnect_cb(context, disconnected_cb)
+        assert await connected == hiredis.REDIS_OK
+        assert await redis_command_args(context, ('PING',)) == 'PONG'
+        redis_disconnect(context)
+        assert await disconnected == hiredis.REDIS_OK
+
+    loop.run_until_complete(test())
+
+
 def test_redis_command(connected):
     loop, context = connected
     KEY = 'testkey'
@@ -151,3 +180,178 @@ def test_redis_command(connected):
     loop.run_until_complete(test())
 
 
+def test_redis_command_args(connected):
+    loop, context = connected
+    KEY = 'test key'
+    VALUE = 'test value'
+
+    async def test():
+        assert await redis_command_args(context, ('SET', KEY, VALUE)) == 'OK'
+        assert await redis_command_args(context, ('GET', KEY)) == VALUE
+        assert await redis_command_args(context, ('DEL', KEY)) == 1
+        assert await redis_command_args(context, ('INCRBY', KEY, 3)) == 3
+        assert await redis_command_args(context, ('DEL', KEY)) == 1
+
+    loop.run_until_complete(test())
+
+
+def test_redis_pipeline(connected):
+    loop, context = connected
+    keys = [f'testkey{i}' for i in range(100)]
+
+    async def test():
+        commands = [('SET', key, key) for key in keys]
+        commands += [f'GET {key}' for key in keys]
+        commands.append(('LPUSH', keys[0], 'value'))
+        commands.append(('DEL', *keys))
+        results = await redis_pipeline(context, commands, raise_on_error=False)
+        assert results[:100] == ['OK'] * 100
+        assert results[100:200] == keys
+        assert isinstance(results[200], ReplyError)
+        assert results[201] == len(keys)
+
+    loop.run_until_complete(test())
+
+
+def test_redis_command_cancelled(connected):
+    """A cancelled command leaves the connection usable."""
+
+    loop, context = connected
+    replies = redis_reply_queue(context)
+
+    async def test():
+        task = loop.create_task(redis_command(context, 'PING', replies))
+        await asyncio.sleep(0)
+        assert len(replies) == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert await redis_command(context, 'ECHO hello', replies) == 'hello'
+        assert len(replies) == 0
+
+    loop.run_until_complete(test())
+
+
+def test_redis_free_with_pending_commands(loop):
+    """Commands still waiting for replies fail when the context is freed."""
+
+    async def test():
+        context, not_garbage = redis_connect(REDIS_IP)
+        connected = loop.create_future()
+        not_garbage += redis_set_connect_cb(
+            context, lambda _context, status: connected.set_result(status)
+        )
+        await connected
+        task = loop.create_task(redis_command(context, 'PING'))
+        await asyncio.sleep(0)
+        redis_free(context)
+        with pytest.raises(ContextError):
+            await task
+
+    loop.run_until_complete(test())
+
+
+def test_replies_resolved_per_read(connected):
+    """All replies of one read reach the ReplyQueue in one resolve() call."""
+
+    loop, context = connected
+    batches = []
+
+    class RecordingQueue(ReplyQueue):
+        def resolve(self, replies):
+            batches.append(len(replies) // 2)
+            super().resolve(replies)
+
+    original = redis_reply_queue(context)
+    replies = RecordingQueue(loop)
+    replies.pending = original.pending
+    redis_set_reply_queue(context, replies)
+
+    async def test():
+        results = await redis_pipeline(
+            context,
+            [('ECHO', i) for i in range(1000)],
+            replies=replies
+        )
+        assert results == [str(i) for i in range(1000)]
+        assert sum(batches) == 1000
+        assert len(batches) < 1000
+
+        # a handler without resolve() is still called once per reply
+        received = []
+
+        def handler(seq, value):
+            received.append((seq, value))
+
+        # the context only borrows the handler
+        hiredis.redisAsyncSetReplyHandler(context, handler)
+        hiredis.redisAsyncCommandsOL(context, ['PING', 'PING'], 7)
+        while len(received) < 2:
+            await asyncio.sleep(0.01)
+        assert received == [(7, 'PONG'), (7, 'PONG')]
+        redis_set_reply_queue(context, original)
+
+    loop.run_until_complete(test())
+
+
+def test_resolve(loop):
+    """resolve() delivers every reply, past a failing subscription handler."""
+
+    replies = ReplyQueue(loop)
+    errors = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    def broken(value):
+        raise RuntimeError(value)
+
+    first, first_future = replies.push()
+    subscription = replies.subscribe(broken)
+    pipeline, pipeline_future = replies.push_pipeline(2)
+    last, last_future = replies.push()
+    replies.resolve([
+        first, 'a',
+        subscription, 'message',
+        pipeline, 'b',
+        pipeline, 'c',
+        last, ReplyError('d')
+    ])
+    assert first_future.result() == 'a'
+    assert pipeline_future.result() == ['b', 'c']
+    with pytest.raises(ReplyError):
+        last_future.result()
+    assert len(replies) == 0
+    assert [str(context['exception']) for context in errors] == ['message']
+
+
+def test_context_freed_during_read(loop):
+    """A read that frees the context still resolves its pending replies."""
+
+    async def test():
+        context, not_garbage = redis_connect(REDIS_IP)
+        connected = loop.create_future()
+        disconnected = loop.create_future()
+        not_garbage += redis_set_connect_cb(
+            context, lambda _context, status: connected.set_result(status)
+        )
+        not_garbage += redis_set_disconnect_cb(
+            context, lambda _context, status: disconnected.set_result(status)
+        )
+        await connected
+        fd = context.c.fd
+        client_id = await redis_command(context, 'CLIENT ID')
+        tasks = [
+            loop.create_task(redis_command(context, 'BLPOP wrappersempty 1'))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        killer, killer_garbage = redis_connect(REDIS_IP)
+        await redis_command(killer, f'CLIENT KILL ID {client_id}')
+        redis_free(killer)
+        assert await disconnected == hiredis.REDIS_ERR
+        for task in tasks:
+            with pytest.raises(HiredisError):
+                await task
+        # the cleanup hook ran, so the context is no longer read
+        assert fd not in loop._selector.get_map()
+
+    loop.run_until_complete(test())
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+
+from fastredis.exceptions import *
+import fastredis.hiredis as hiredis
+from fastredis.wrappers_asyncb import (
+    redis_command,
+    redis_command_args,
+    redis_connect,
+    redis_connect_unix,
+    redis_set_connect_cb,
+    redis_set_disconnect_cb,
+    redis_free
+)
+
+REDIS_IP = b'127.0.0.1'
+REDIS_SOCKET = b'/tmp/redis.sock'
+
+
+@pytest.fixture(scope='function', autouse=False)
+def loop():
+    loop = asyncio.get_event_loop()
+    if loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='function', autouse=False)
+def connected(loop):
+    """Fixture to connect to redis asynchronously."""
+
+    context, not_garbage = redis_connect(REDIS_IP)
+    connected = loop.create_future()
+    disconnected = loop.create_future()
+
+    def connected_cb(_context, status):
+        connected.set_result(status)
+
+    def disconnected_cb(_context, status):
+        disconnected.set_result(status)
+
+    not_garbage += redis_set_connect_cb(context, connected_cb)
+    not_garbage += redis_set_disconnect_cb(context, disconnected_cb)
+
+    assert loop.run_until_complete(connected) == hiredis.REDIS_OK
+
+    yield loop, context
+
+    redis_free(context)
+    loop.run_until_complete(disconnected)
+
+
+def test_redis_command_b(connected):
+    loop, context = connected
+    KEY = b'testkey'
+    VALUE = b'testvalue'
+
+    async def test():
+        assert await redis_command(context, b'SET %b %b' % (KEY, VALUE)) == b'OK'
+        assert await redis_command(context, b'GET %b' % KEY) == VALUE
+        with pytest.raises(ReplyError):
+            await redis_command(context, b'ZADD %b 0 %b' % (KEY, VALUE))
+        assert await redis_command(context, b'DEL %b' % KEY) == 1
+        assert await redis_command(context, b'GET %b' % KEY) == None
+
+    loop.run_until_complete(test())
+
+
+def test_redis_command_args_b(connected):
+    loop, context = connected
+    KEY = b'testkey'
+    VALUE = bytes(range(256))
+
+    async def test():
+        assert await redis_command_args(context, (b'SET', KEY, VALUE)) == b'OK'
+        assert await redis_command_args(context, (b'GET', KEY)) == VALUE
+        assert await redis_command_args(context, (b'RPUSH', KEY + b'2', VALUE)) == 1
+        assert await redis_command_args(context, (b'LRANGE', KEY + b'2', 0, -1)) == (VALUE,)
+        assert await redis_command_args(context, (b'DEL', KEY, KEY + b'2')) == 2
+
+    loop.run_until_complete(test())
+
+
+def test_redis_connect_unix_b(loop):
+    async def test():
+        context, not_garbage = redis_connect_unix(REDIS_SOCKET)
+        connected = loop.create_future()
+        disconnected = loop.create_future()
+
+        def connected_cb(_context, status):
+            connected.set_result(status)
+
+        def disconnected_cb(_context, status):
+            disconnected.set_result(status)
+
+        not_garbage += redis_set_connect_cb(context, connected_cb)
+        not_garbage += redis_set_disconnect_cb(context, disconnected_cb)
+        assert await connected == hiredis.REDIS_OK
+        assert await redis_command_args(context, (b'PING',)) == b'PONG'
+        redis_free(context)
+        assert await disconnected == hiredis.REDIS_OK
+
+    loop.run_until_complete(test())
@@ -1,15 +1,31 @@
+import select
+
 import pytest
 
 from fastredis.exceptions import *
 from fastredis.wrappersb import (
     redis_command,
+    redis_command_args,
     redis_connect,
+    redis_connect_unix,
+    redis_flush,
     redis_free,
+    redis_pipeline,
     redis_write,
+    redis_write_args,
     redis_read,
+    redis_read_available,
+    redis_read_into,
+    redis_read_view,
+    redis_read_many,
+    redis_set_timeout,
+    redis_write_many
 )
 
 
+REDIS_SOCKET = b'/tmp/redis.sock'
+
+
 @pytest.fixture(scope='function', autouse=False)
 def context():
     c = redis_connect('127.0.0.1'.encode())
@@ -45,6 +61,23 @@ def test_redis_connect_with_timeout_failure():
         redis_connect(b'128.0.0.1', timeout=1)
 
 
+def test_redis_connect_unix():
+    context = redis_connect_unix(REDIS_SOCKET)
+    assert redis_command_args(context, (b'PING',)) == b'PONG'
+    redis_free(context)
+
+
+def test_redis_connect_unix_with_timeout():
+    context = redis_connect_unix(REDIS_SOCKET, timeout=0.5)
+    assert redis_command_args(context, (b'PING',)) == b'PONG'
+    redis_free(context)
+
+
+def test_redis_connect_unix_failure():
+    with pytest.raises(IOError):
+        redis_connect_unix(b'/tmp/fastredis-missing.sock')
+
+
 def test_redis_write_and_read(context):
     keys = [f'testkey{i}' for i in range(10)]
     for key in keys:
@@ -53,3 +86,113 @@ def test_redis_write_and_read(context):
     for key in keys:
         assert redis_read(context) == b'OK'
         assert redis_read(context) == key.encode()
+
+
+def test_redis_command_args_b(context):
+    key = b'testkey'
+    value = bytes(range(256))
+    assert redis_command_args(context, (b'SET', key, value)) == b'OK'
+    assert redis_command_args(context, (b'GET', key)) == value
+    assert redis_command_args(context, (b'DEL', key)) == 1
+
+
+def test_redis_write_args_and_read(context):
+    keys = [f'testkey{i}'.encode() for i in range(10)]
+    for key in keys:
+        redis_write_args(context, (b'SET', key, b' ' + key))
+        redis_write_args(context, (b'GET', key))
+        redis_write_args(context, (b'DEL', key))
+    for key in keys:
+        assert redis_read(context) == b'OK'
+        assert redis_read(context) == b' ' + key
+        assert redis_read(context) == 1
+
+
+def test_redis_pipeline_b(context):
+    commands = [
+        (b'SET', b'testkey', b'\x00value'),
+        b'GET testkey',
+        (b'LLEN', b'testkey'),
+        (b'DEL', b'testkey'),
+    ]
+    results = redis_pipeline(context, commands, raise_on_error=False)
+    assert results[:2] == [b'OK', b'\x00value']
+    assert isinstance(results[2], ReplyError)
+    assert results[3] == 1
+
+
+def test_redis_pipeline_bad_argument(context):
+    """A bad argument sends nothing, so the replies stay in step."""
+
+    with pytest.raises(TypeError):
+        redis_pipeline(context, [(b'SET', b'k', b'v'), (b'GET', 1.5)])
+    assert redis_command_args(context, (b'PING',)) == b'PONG'
+    assert redis_command_args(context, (b'EXISTS', b'k')) == 0
+
+
+def test_redis_write_flush_read_many(context):
+    commands = [(b'SET', b'k', b'v'), (b'GET', b'k'), (b'LLEN', b'k')]
+    assert redis_write_many(context, commands) == 3
+    redis_flush(context)
+    results = redis_read_many(context, 3, raise_on_error=False)
+    assert results[:2] == [b'OK', b'v']
+    assert isinstance(results[2], ReplyError)
+    redis_write_many(context, [(b'DEL', b'k')])
+    assert redis_read_many(context, 1) == [1]
+
+
+def test_redis_read_available(context):
+    commands = [(b'SET', b'k', b'v'), (b'GET', b'k'), (b'LLEN', b'k')]
+    redis_write_many(context, commands)
+    redis_flush(context)
+    results = []
+    while len(results) < 3:
+        select.select([context.fd], [], [])
+        results += redis_read_available(context)
+    assert results[:2] == [b'OK', b'v']
+    assert isinstance(results[2], ReplyError)
+    redis_write_many(context, [(b'DEL', b'k')])
+    assert redis_read_many(context, 1) == [1]
+
+
+def test_redis_read_into_view(context):
+    redis_command_args(context, (b'SET', b'k', b'value'))
+    out = bytearray(8)
+    redis_write_args(context, (b'GET', b'k'))
+    assert redis_read_into(context, out) == 5
+    assert out[:5] == b'value'
+    redis_write_args(context, (b'GET', b'k'))
+    view = redis_read_view(context)
+    assert view == b'value'
+    view.release()
+    redis_write_args(context, (b'DEL', b'k'))
+    redis_write_args(context, (b'GET', b'k'))
+    redis_write_args(context, (b'GET', b'k'))
+    assert redis_read(context) == 1
+    assert redis_read_into(context, out) is None
+    assert redis_read_view(context) is None
+
+
+def test_redis_command_args_buffers(context):
+    value = bytearray(b'buffer value')
+    with memoryview(value) as view:
+        args = (b'SET', b'k', view[:6])
+        assert redis_command_args(context, args) == b'OK'
+    assert redis_command_args(context, (b'APPEND', b'k', value[6:])) == 12
+    assert redis_command_args(context, (b'GET', b'k')) == b'buffer value'
+    redis_command_args(context, (b'DEL', b'k'))
+    with pytest.raises(TypeError):
+        redis_command_args(context, (b'SET', b'k', 1.5))
+
+
+def test_redis_set_timeout(context):
+    redis_set_timeout(context, 0.05)
+    with pytest.raises(IOError):
+        redis_command_args(context, (b'BLPOP', b'testlist', 1))
+    assert context.err != 0
+
+
+def test_redis_set_timeout_none(context):
+    redis_set_timeout(context, 0.05)
+    redis_set_timeout(context, None)
+    assert redis_command_args(context, (b'BLPOP', b'testlist', b'0.1')) is None